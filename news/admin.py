@@ -1,14 +1,144 @@
+from django import forms
+from django.conf import settings
 from django.contrib import admin
+from django.contrib.admin.widgets import AutocompleteSelect
 from django.contrib.auth.admin import UserAdmin
+from django.core.paginator import Paginator
+from django.db import connections
+from django.utils.functional import cached_property
 from .models import CustomUser, Publisher, Article, Newsletter
 
 
+# -----------------------------------------------------------------------------
+# Large-table changelists
+# -----------------------------------------------------------------------------
+def estimated_count(model, using):
+    """
+    Return the database's own row estimate for ``model``'s table, or None
+    when the backend keeps none. Reading it costs the same at any size.
+    """
+    connection = connections[using]
+    table = model._meta.db_table
+    if connection.vendor == "mysql":
+        sql = ("SELECT table_rows FROM information_schema.tables "
+               "WHERE table_schema = DATABASE() AND table_name = %s")
+    elif connection.vendor == "postgresql":
+        sql = "SELECT reltuples FROM pg_class WHERE oid = to_regclass(%s)"
+    else:
+        return None
+    with connection.cursor() as cursor:
+        cursor.execute(sql, [table])
+        row = cursor.fetchone()
+    if row is None or row[0] is None or row[0] < 0:
+        return None
+    return int(row[0])
+
+
+class EstimatedCountPaginator(Paginator):
+    """
+    Paginator that never counts a whole table.
+
+    At most ``NEWS_ADMIN_COUNT_LIMIT`` matching rows are counted. An
+    unfiltered list reports the larger of that and the table estimate, so
+    small tables still show exact numbers.
+    """
+
+    @cached_property
+    def count(self):
+        queryset = self.object_list
+        limit = getattr(settings, "NEWS_ADMIN_COUNT_LIMIT", 1000)
+        count = queryset.order_by()[:limit].count()
+        if count >= limit and not queryset.query.where:
+            count = max(count, estimated_count(queryset.model, queryset.db)
+                        or 0)
+        return count
+
+
+class AutocompleteFilter(admin.FieldListFilter):
+    """
+    Foreign-key filter with an autocomplete box, instead of a sidebar that
+    lists every publisher or user.
+    """
+    template = "admin/news/autocomplete_filter.html"
+
+    def __init__(self, field, request, params, model, model_admin, field_path):
+        self.lookup_kwarg = f"{field_path}__{field.target_field.name}__exact"
+        # An empty box submits "", which means no filter.
+        if params.get(self.lookup_kwarg) in ([""], ""):
+            params.pop(self.lookup_kwarg)
+        self.lookup_val = params.get(self.lookup_kwarg)
+        super().__init__(field, request, params, model, model_admin, field_path)
+        self.admin_site = model_admin.admin_site
+
+    def expected_parameters(self):
+        return [self.lookup_kwarg]
+
+    def widget(self):
+        return AutocompleteSelect(self.field, self.admin_site)
+
+    def choices(self, changelist):
+        form_field = self.field.formfield(widget=self.widget(), required=False)
+        value = self.lookup_val[-1] if self.lookup_val else None
+        yield {
+            "selected": value is not None,
+            "widget": form_field.widget.render(self.lookup_kwarg, value),
+            "hidden": [
+                (name, item)
+                for name, items in changelist.params.items()
+                if name not in (self.lookup_kwarg, "p")
+                for item in (items if isinstance(items, list) else [items])
+            ],
+            "clear_query_string": changelist.get_query_string(
+                remove=[self.lookup_kwarg, "p"]),
+        }
+
+
+class LargeTableAdmin(admin.ModelAdmin):
+    """
+    Changelist settings whose cost does not grow with the table.
+
+    - bounded or estimated counts, and no second unfiltered count,
+    - autocomplete filters and widgets for publisher and author,
+    - one joined query for the author and publisher columns,
+    - case-insensitive title-prefix search (``LIKE 'x%'``), which can use
+      the title index, and sorting only on indexed columns.
+    """
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
+    list_display = ("title", "author", "publisher", "status", "created_at")
+    list_filter = (
+        "status",
+        ("publisher", AutocompleteFilter),
+        ("author", AutocompleteFilter),
+    )
+    list_select_related = ("author", "publisher")
+    autocomplete_fields = ("author", "publisher")
+    # body is stored compressed, so it cannot be matched with LIKE
+    search_fields = ("^title",)
+    sortable_by = ("title", "created_at")
+
+    def get_search_results(self, request, queryset, search_term):
+        # The whole box is one prefix. The default splits it into words and
+        # matches each one separately, which no index can serve.
+        search_term = search_term.strip()
+        if not search_term:
+            return queryset, False
+        return queryset.filter(title__istartswith=search_term), False
+
+    @property
+    def media(self):
+        field = self.model._meta.get_field("publisher")
+        return super().media + forms.Media(
+            AutocompleteSelect(field, self.admin_site).media)
+
+
 @admin.register(CustomUser)
 class CustomUserAdmin(UserAdmin):
     fieldsets = UserAdmin.fieldsets + (
         ('Additional Info', {
             'fields': (
                 'role',
+                'notification_frequency',
                 'subscriptions_publishers',
                 'subscriptions_journalists',
             )
@@ -21,20 +151,16 @@ class CustomUserAdmin(UserAdmin):
 class PublisherAdmin(admin.ModelAdmin):
     list_display = ['name', 'description']
     filter_horizontal = ['editors', 'journalists']
+    # Needed by the autocomplete widgets on the article/newsletter admins
+    search_fields = ['name']
+    ordering = ['name']
 
 
 @admin.register(Article)
-class ArticleAdmin(admin.ModelAdmin):
-    # Show status instead of the old approved boolean
-    list_display = ['title', 'author', 'publisher', 'status', 'created_at']
-    list_filter = ['status', 'publisher']
-    search_fields = ['title', 'body', 'author__username']
+class ArticleAdmin(LargeTableAdmin):
+    pass
 
 
 @admin.register(Newsletter)
-class NewsletterAdmin(admin.ModelAdmin):
-    list_display = ("title", "author", "publisher", "status", "created_at")
-    list_filter = ("status", "publisher", "author")
-    search_fields = ("title", "body")
-
-
+class NewsletterAdmin(LargeTableAdmin):
+    pass
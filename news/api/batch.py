@@ -0,0 +1,227 @@
+# news/api/batch.py
+
+"""
+Execution of ``POST /api/batch/`` (BatchView in news/api/views.py).
+
+A batch is a list of sub-requests against the API's own routes::
+
+    {"requests": [
+        {"id": "feed", "method": "GET", "path": "/api/articles/"},
+        {"id": "pubs", "method": "GET", "path": "/api/publishers/"},
+        {"id": "new", "method": "POST", "path": "/api/articles/",
+         "body": {"title": "...", "body": "...", "publisher": 3}}
+    ]}
+
+The caller is authenticated once, for the batch. Each sub-request is
+dispatched straight to its DRF view as that user, skipping the middleware
+stack and the per-request token lookup. Reads that follow each other run
+concurrently on a shared pool of ``NEWS_BATCH_WORKERS`` threads. A write
+waits for the reads before it, runs on its own, and the requests after it
+see its effects. The responses come back in request order, each with its
+own status code, so one failing sub-request does not fail the batch.
+
+A batch is rejected before anything runs when it has more than
+``NEWS_BATCH_MAX_REQUESTS`` entries or costs more than
+``NEWS_BATCH_MAX_COST``. A collection read costs COST_LIST, a write
+COST_WRITE and any other read COST_DETAIL. Streamed exports and
+audiences, token auth and nested batches cannot be batched; any other
+view that answers with a streaming response gets a 400 result instead.
+"""
+
+import io
+import json
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+from urllib.parse import urlsplit
+
+from django.conf import settings
+from django.db import connections
+from django.http import HttpRequest, QueryDict
+from django.urls import Resolver404, resolve
+
+logger = logging.getLogger(__name__)
+
+SAFE_METHODS = ("GET", "HEAD", "OPTIONS")
+METHODS = SAFE_METHODS + ("POST", "PUT", "PATCH", "DELETE")
+
+# Route names that cannot run inside a batch.
+EXCLUDED = {"audience", "batch", "export", "token-auth"}
+
+COST_DETAIL = 1
+COST_LIST = 4
+COST_WRITE = 2
+
+# Parent request headers that sub-requests inherit.
+INHERITED_META = ("REMOTE_ADDR", "SERVER_NAME", "SERVER_PORT", "HTTP_HOST",
+                  "HTTP_ACCEPT_LANGUAGE", "HTTP_USER_AGENT",
+                  "HTTP_X_FORWARDED_PROTO", "wsgi.url_scheme")
+
+
+class BatchError(ValueError):
+    """A batch that is malformed or over its limits."""
+
+
+def _setting(name, default):
+    return getattr(settings, name, default)
+
+
+# -----------------------------------------------------------------------------
+# Parsing
+# -----------------------------------------------------------------------------
+class SubRequest:
+    """One validated entry of a batch."""
+
+    def __init__(self, index, entry):
+        if not isinstance(entry, dict):
+            raise BatchError(f"requests[{index}]: expected an object.")
+        self.id = entry.get("id", index)
+        self.method = str(entry.get("method", "GET")).upper()
+        if self.method not in METHODS:
+            raise BatchError(
+                f"requests[{index}]: unsupported method {self.method!r}.")
+        path = entry.get("path")
+        if not isinstance(path, str) or not path.startswith("/"):
+            raise BatchError(f"requests[{index}]: expected an absolute path.")
+        url = urlsplit(path)
+        self.path, self.query = url.path, url.query
+        try:
+            self.match = resolve(self.path)
+        except Resolver404:
+            raise BatchError(f"requests[{index}]: no route for {self.path}.")
+        if self.match.namespace != "api" or self.match.url_name in EXCLUDED:
+            raise BatchError(
+                f"requests[{index}]: {self.path} cannot be batched.")
+        self.body = entry.get("body")
+
+    @property
+    def is_safe(self):
+        return self.method in SAFE_METHODS
+
+    @property
+    def cost(self):
+        if not self.is_safe:
+            return COST_WRITE
+        name = self.match.url_name or ""
+        if name.endswith("-list") or name == "months":
+            return COST_LIST
+        return COST_DETAIL
+
+
+def parse(data):
+    """
+    Turn a decoded request body into a list of SubRequests. Raises
+    BatchError when it is malformed or over the size and cost limits.
+    """
+    entries = data.get("requests") if isinstance(data, dict) else None
+    if not isinstance(entries, list) or not entries:
+        raise BatchError("Expected a non-empty 'requests' list.")
+    limit = _setting("NEWS_BATCH_MAX_REQUESTS", 20)
+    if len(entries) > limit:
+        raise BatchError(f"At most {limit} requests per batch.")
+    subrequests = [SubRequest(i, entry) for i, entry in enumerate(entries)]
+    ids = [sub.id for sub in subrequests]
+    if len(set(map(str, ids))) != len(ids):
+        raise BatchError("Request ids must be unique.")
+    cost = sum(sub.cost for sub in subrequests)
+    budget = _setting("NEWS_BATCH_MAX_COST", 40)
+    if cost > budget:
+        raise BatchError(f"Batch costs {cost}, the limit is {budget}.")
+    return subrequests
+
+
+# -----------------------------------------------------------------------------
+# Execution
+# -----------------------------------------------------------------------------
+def _build(parent, sub):
+    request = HttpRequest()
+    request.method = sub.method
+    request.path = request.path_info = sub.path
+    request.META = {name: parent.META[name] for name in INHERITED_META
+                    if name in parent.META}
+    request.META.update(REQUEST_METHOD=sub.method, PATH_INFO=sub.path,
+                        QUERY_STRING=sub.query)
+    request.GET = QueryDict(sub.query)
+    data = b"" if sub.body is None else json.dumps(sub.body).encode()
+    request.META.update(CONTENT_TYPE="application/json",
+                        CONTENT_LENGTH=str(len(data)))
+    request._stream = io.BytesIO(data)
+    request._read_started = False
+    # Picked up by rest_framework.request.Request: the batch's credentials
+    # stand in for the sub-request's own authentication.
+    request._force_auth_user = parent.user
+    request._force_auth_token = parent.auth
+    return request
+
+
+def _result(sub, response):
+    if response.streaming:
+        # Its body would have to be buffered whole to embed it in the batch.
+        response.close()
+        return {"id": sub.id, "status": 400, "headers": {},
+                "body": {"detail": f"{sub.path} streams its response and "
+                                   f"cannot be batched."}}
+    if hasattr(response, "render"):
+        response.render()
+    content_type = response.get("Content-Type", "")
+    if content_type.startswith("application/json"):
+        body = json.loads(response.content) if response.content else None
+    else:
+        body = response.content.decode(response.charset or "utf-8")
+    headers = {name: response[name] for name in ("Content-Type", "ETag",
+                                                 "Location")
+               if response.has_header(name)}
+    return {"id": sub.id, "status": response.status_code,
+            "headers": headers, "body": body}
+
+
+def run_one(parent, sub):
+    """Dispatch one sub-request and return its result entry."""
+    try:
+        response = sub.match.func(
+            _build(parent, sub), *sub.match.args, **sub.match.kwargs)
+        return _result(sub, response)
+    except Exception:
+        logger.exception("Batched %s %s failed", sub.method, sub.path)
+        return {"id": sub.id, "status": 500, "headers": {},
+                "body": {"detail": "Internal server error."}}
+
+
+def _run_in_thread(parent, sub):
+    try:
+        return run_one(parent, sub)
+    finally:
+        # Pool threads outlive the request; do not leave connections open.
+        connections.close_all()
+
+
+@lru_cache(maxsize=1)
+def _pool(workers):
+    return ThreadPoolExecutor(max_workers=workers,
+                              thread_name_prefix="api-batch")
+
+
+def waves(subrequests):
+    """Split ``subrequests`` into runs of consecutive reads and single
+    writes, in order."""
+    groups = []
+    for sub in subrequests:
+        if sub.is_safe and groups and groups[-1][0].is_safe:
+            groups[-1].append(sub)
+        else:
+            groups.append([sub])
+    return groups
+
+
+def execute(parent, subrequests):
+    """Run ``subrequests`` for the authenticated DRF ``parent`` request and
+    return their results in order."""
+    workers = _setting("NEWS_BATCH_WORKERS", 4)
+    results = []
+    for wave in waves(subrequests):
+        if workers > 1 and len(wave) > 1:
+            results += _pool(workers).map(
+                lambda sub: _run_in_thread(parent, sub), wave)
+        else:
+            results += [run_one(parent, sub) for sub in wave]
+    return results
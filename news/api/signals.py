@@ -1,25 +1,34 @@
 # news/api/signals.py
 
-import requests
 from django.db.models.signals import post_save
 from django.dispatch import receiver
-from news.models import Article
+from news import notifications
+from news.models import Article, CustomUser
 from django.core.mail import send_mail
 from django.conf import settings
 
 
 @receiver(post_save, sender=Article)
 def api_article_approved(sender, instance, created, **kwargs):
-    # when status flips to APPROVED, notify:
-    if instance.status == Article.STATUS_APPROVED:
-        # broadcast via email (your real code might loop subscribers)
+    # only when status flips to APPROVED (_was_approved is set in pre_save
+    # by news.signals), not on every later edit of an approved article
+    if instance.status != Article.STATUS_APPROVED or \
+            getattr(instance, "_was_approved", False):
+        return
+
+    # broadcast via email to whoever news.signals has not already emailed
+    recipients = notifications.claim_recipients(
+        instance, notifications.CHANNEL_EMAIL,
+        instance.publisher.subscribers.filter(
+            notification_frequency=CustomUser.FREQUENCY_IMMEDIATE),
+    )
+    if recipients:
         send_mail(
             subject=f"New Article: {instance.title}",
             message=instance.body,
             from_email=settings.DEFAULT_FROM_EMAIL,
-            recipient_list=[u.email for u in instance.publisher.subscribers.all()],
+            recipient_list=[u.email for u in recipients],
             fail_silently=True,
         )
-        # and post to X
-        requests.post("https://api.x.com/statuses/update", 
-                      data={"status": instance.title})
+    # and post to X, once per article
+    notifications.post_to_x(instance)
@@ -0,0 +1,77 @@
+
+from django.contrib.auth import get_user_model
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from news.models import Publisher, Article, Newsletter
+
+User = get_user_model()
+
+
+class LargeTableAdminTests(TestCase):
+    """Tests for the constant-cost article/newsletter changelists."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = User.objects.create_superuser("admin", "a@x.com", "pw")
+        cls.journalist = User.objects.create_user(
+            "journ", "j@x.com", "pw", role=User.ROLE_JOURNALIST
+        )
+        cls.publisher = Publisher.objects.create(name="Daily")
+        cls.other = Publisher.objects.create(name="Other")
+        for n in range(5):
+            Article.objects.create(
+                title=f"Story {n}", body="B", author=cls.journalist,
+                publisher=cls.publisher if n % 2 else cls.other,
+            )
+        Newsletter.objects.create(
+            title="Weekly", body="B", author=cls.journalist,
+            publisher=cls.publisher,
+        )
+
+    def setUp(self):
+        self.client.force_login(self.admin)
+        self.url = reverse("admin:news_article_changelist")
+
+    def test_changelist_counts_and_joins(self):
+        resp = self.client.get(self.url)
+        self.assertEqual(resp.status_code, 200)
+        self.assertEqual(resp.context["cl"].result_count, 5)
+        self.assertIsNone(resp.context["cl"].full_result_count)
+        # The sidebar is an autocomplete box, not a list of publishers.
+        self.assertContains(resp, 'data-model-name="article"')
+        self.assertContains(resp, "admin-autocomplete")
+        self.assertNotContains(resp, "?publisher__id__exact=")
+
+    @override_settings(NEWS_ADMIN_COUNT_LIMIT=3)
+    def test_count_is_bounded(self):
+        resp = self.client.get(self.url)
+        self.assertEqual(resp.context["cl"].result_count, 3)
+        self.assertEqual(len(resp.context["cl"].result_list), 5)
+
+    def test_autocomplete_filter(self):
+        resp = self.client.get(
+            self.url, {"publisher__id__exact": self.publisher.pk})
+        self.assertEqual(resp.context["cl"].result_count, 2)
+        self.assertContains(resp, "Daily")
+        resp = self.client.get(self.url, {"publisher__id__exact": ""})
+        self.assertEqual(resp.context["cl"].result_count, 5)
+
+    def test_title_prefix_search(self):
+        resp = self.client.get(self.url, {"q": "story 3"})
+        self.assertEqual(
+            [a.title for a in resp.context["cl"].result_list], ["Story 3"])
+        resp = self.client.get(self.url, {"q": "3"})
+        self.assertEqual(resp.context["cl"].result_count, 0)
+
+    def test_publisher_autocomplete_endpoint(self):
+        resp = self.client.get(reverse("admin:autocomplete"), {
+            "term": "da", "app_label": "news", "model_name": "article",
+            "field_name": "publisher",
+        })
+        self.assertEqual(
+            [r["text"] for r in resp.json()["results"]], ["Daily"])
+
+    def test_newsletter_changelist(self):
+        resp = self.client.get(reverse("admin:news_newsletter_changelist"))
+        self.assertContains(resp, "Weekly")
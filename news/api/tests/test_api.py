@@ -14,7 +14,7 @@ from rest_framework.test import APITestCase
 from rest_framework.authtoken.models import Token
 
 from news.models import Publisher, Article, CustomUser, Newsletter
-from news.forms import SubscriptionForm, CustomUserCreationForm, ArticleForm
+from news.forms import CustomUserCreationForm, ArticleForm
 
 User = get_user_model()
 
@@ -188,7 +188,7 @@ class NewsApiTests(APITestCase):
         )
         self.assertEqual(resp.status_code, status.HTTP_204_NO_CONTENT)
 
-    @patch('news.api.signals.requests.post')
+    @patch('news.notifications.requests.post')
     def test_editor_approves_article_sends_notifications(self, mock_x_post):
         self.reader.subscriptions_journalists.add(self.journalist)
         self.client.credentials(HTTP_AUTHORIZATION=self.editor_token_auth)
@@ -205,52 +205,6 @@ class NewsApiTests(APITestCase):
 
 # ─── FORM TESTS ────────────────────────────────────────────────────────────
 
-class SubscriptionFormTests(TestCase):
-    """Tests for SubscriptionForm validation & saving."""
-    def setUp(self):
-        self.user = CustomUser.objects.create_user(
-            "u1", "u1@x.com", "pass1234", role=CustomUser.ROLE_READER
-        )
-        self.j1 = CustomUser.objects.create_user(
-            "j1", "j1@x.com", "pass1234", role=CustomUser.ROLE_JOURNALIST
-        )
-        self.j2 = CustomUser.objects.create_user(
-            "j2", "j2@x.com", "pass1234", role=CustomUser.ROLE_JOURNALIST
-        )
-        self.pub1 = Publisher.objects.create(name='Pub One', description='D1')
-
-    def test_empty_submission_is_valid(self):
-        form = SubscriptionForm(data={}, instance=self.user)
-        self.assertTrue(form.is_valid())
-
-    def test_valid_selection_saves_correctly(self):
-        form = SubscriptionForm(
-            data={
-                'subscriptions_journalists': [self.j1.pk, self.j2.pk],
-                'subscriptions_publishers': [self.pub1.pk],
-            },
-            instance=self.user
-        )
-        self.assertTrue(form.is_valid())
-        u = form.save()
-        self.assertQuerySetEqual(
-            u.subscriptions_journalists.order_by('pk'),
-            [self.j1, self.j2], transform=lambda x: x
-        )
-        self.assertQuerySetEqual(
-            u.subscriptions_publishers.order_by('pk'),
-            [self.pub1], transform=lambda x: x
-        )
-
-    def test_invalid_journalist_pk_raises_error(self):
-        form = SubscriptionForm(
-            data={'subscriptions_journalists': [999]},
-            instance=self.user
-        )
-        self.assertFalse(form.is_valid())
-        self.assertIn('subscriptions_journalists', form.errors)
-
-
 class CustomUserCreationFormTests(TestCase):
     """Tests for CustomUserCreationForm validation."""
     def test_requires_fields(self):
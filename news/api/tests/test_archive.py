@@ -0,0 +1,131 @@
+
+from datetime import timedelta
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.test import TestCase
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APIClient
+
+from news import archive, related
+from news.models import (
+    Publisher,
+    Article,
+    ArchivedArticle,
+    ArchivedNewsletter,
+    ArticleVector,
+    Newsletter,
+)
+
+User = get_user_model()
+
+
+class ArchiveTests(TestCase):
+    """Tests for moving old articles and newsletters to the archive."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.journalist = User.objects.create_user(
+            "journ", "j@x.com", "pw", role=User.ROLE_JOURNALIST
+        )
+        cls.editor = User.objects.create_user(
+            "edit", "e@x.com", "pw", role=User.ROLE_EDITOR
+        )
+        cls.reader = User.objects.create_user(
+            "reader", "r@x.com", "pw", role=User.ROLE_READER
+        )
+        cls.publisher = Publisher.objects.create(name="Daily")
+        cls.reader.subscriptions_publishers.add(cls.publisher)
+
+    def _item(self, model, status, days_ago, title=None):
+        item = model.objects.create(
+            title=title or f"{status} {days_ago}", body="Archived body " * 200,
+            author=self.journalist, publisher=self.publisher, status=status,
+        )
+        model.objects.filter(pk=item.pk).update(
+            created_at=timezone.now() - timedelta(days=days_ago))
+        return item
+
+    def test_only_old_and_denied_rows_move(self):
+        old = self._item(Article, Article.STATUS_APPROVED, 400)
+        recent = self._item(Article, Article.STATUS_APPROVED, 10)
+        denied = self._item(Article, Article.STATUS_DENIED, 40)
+        pending = self._item(Article, Article.STATUS_PENDING, 400)
+
+        self.assertEqual(archive.archive(Article), 2)
+        self.assertEqual(
+            set(Article.objects.values_list("pk", flat=True)),
+            {recent.pk, pending.pk})
+        copy = ArchivedArticle.objects.get(pk=old.pk)
+        self.assertEqual(copy.body, "Archived body " * 200)
+        self.assertLess(copy.created_at,
+                        timezone.now() - timedelta(days=399))
+        self.assertEqual(copy.author, self.journalist)
+        self.assertTrue(ArchivedArticle.objects.filter(pk=denied.pk).exists())
+        self.assertEqual(archive.archive(Article), 0)
+
+    def test_batches_and_limit_resume(self):
+        items = [self._item(Article, Article.STATUS_APPROVED, 400)
+                 for _ in range(5)]
+        self.assertEqual(archive.archive(Article, batch_size=2, limit=3), 3)
+        self.assertEqual(Article.objects.count(), 2)
+        self.assertEqual(archive.archive(Article, batch_size=2), 2)
+        self.assertEqual(ArchivedArticle.objects.count(), len(items))
+
+    def test_derived_data_is_dropped(self):
+        old = self._item(Article, Article.STATUS_APPROVED, 400)
+        related.index_pending()
+        self.assertTrue(ArticleVector.objects.filter(pk=old.pk).exists())
+        archive.archive(Article)
+        self.assertFalse(ArticleVector.objects.filter(pk=old.pk).exists())
+
+    def test_detail_views_fall_back_to_the_archive(self):
+        old = self._item(Article, Article.STATUS_APPROVED, 400, "Old story")
+        denied = self._item(Article, Article.STATUS_DENIED, 40)
+        letter = self._item(Newsletter, Newsletter.STATUS_APPROVED, 400,
+                            "Old letter")
+        archive.archive(Article)
+        archive.archive(Newsletter)
+        self.assertTrue(ArchivedNewsletter.objects.filter(
+            pk=letter.pk).exists())
+
+        resp = self.client.get(old.get_absolute_url())
+        self.assertContains(resp, "Old story")
+        self.assertContains(resp, "Archived")
+        resp = self.client.get(
+            reverse('news:newsletter-detail', args=[letter.pk]))
+        self.assertContains(resp, "Old letter")
+
+        # Denied items stay hidden from everyone but editors.
+        url = reverse('news:article-detail', args=[denied.pk])
+        self.assertEqual(self.client.get(url).status_code, 404)
+        self.client.force_login(self.editor)
+        self.assertEqual(self.client.get(url).status_code, 200)
+
+    def test_api_retrieve_falls_back_to_the_archive(self):
+        old = self._item(Article, Article.STATUS_APPROVED, 400, "Old story")
+        archive.archive(Article)
+        client = APIClient()
+        token = Token.objects.create(user=self.reader)
+        client.credentials(HTTP_AUTHORIZATION=f"Token {token.key}")
+
+        resp = client.get(reverse('api:articles-detail', args=[old.pk]))
+        self.assertEqual(resp.status_code, 200)
+        self.assertEqual(resp.json()["title"], "Old story")
+        self.assertEqual(resp.json()["publisher"]["name"], "Daily")
+        list_ids = [a["id"] for a in
+                    client.get(reverse('api:articles-list')).json()]
+        self.assertNotIn(old.pk, list_ids)
+        self.assertEqual(client.get(
+            reverse('api:articles-detail', args=[999])).status_code, 404)
+
+    def test_command(self):
+        self._item(Article, Article.STATUS_APPROVED, 400)
+        self._item(Newsletter, Newsletter.STATUS_DENIED, 40)
+        out = StringIO()
+        call_command("archive_content", stdout=out)
+        self.assertIn("archived 1 articles", out.getvalue())
+        self.assertIn("archived 1 newsletters", out.getvalue())
@@ -0,0 +1,190 @@
+
+import csv
+import io
+import os
+import tempfile
+from io import StringIO
+from unittest.mock import patch
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APIClient
+
+from news import audiences
+from news.models import Publisher
+from news.querycache import get_generations
+
+User = get_user_model()
+
+
+class AudienceTests(TestCase):
+    """Tests for bulk follower import and export."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.publisher = Publisher.objects.create(name="Daily")
+        cls.journalist = User.objects.create_user(
+            "journ", "j@x.com", "pw", role=User.ROLE_JOURNALIST
+        )
+        cls.readers = [
+            User.objects.create_user(f"reader{i}", f"r{i}@x.com", "pw")
+            for i in range(6)
+        ]
+        # Two accounts share one address
+        User.objects.create_user("twin1", "twin@x.com", "pw")
+        User.objects.create_user("twin2", "twin@x.com", "pw")
+        cls.staff = User.objects.create_user(
+            "staff", "s@x.com", "pw", is_staff=True
+        )
+
+    def _followers(self, target):
+        return sorted(target.subscribers.values_list("username", flat=True))
+
+    def test_import_resolves_in_batches_and_is_idempotent(self):
+        self.readers[0].subscriptions_publishers.add(self.publisher)
+        lines = [
+            "username,email\n",
+            "reader0,\n",
+            "reader1,\n",
+            ",r2@x.com\n",
+            "reader3,ignored@x.com\n",
+            "nobody,\n",
+            ",twin@x.com\n",
+            "reader1,\n",
+        ]
+        generations = get_generations([User, Publisher])
+        batches = []
+        report = audiences.import_followers(
+            "publishers", self.publisher, lines, size=2,
+            progress=lambda r: batches.append(r.rows))
+        self.assertEqual(batches, [2, 4, 6, 7])
+        self.assertEqual(
+            (report.rows, report.subscribed, report.missing,
+             report.ambiguous), (7, 3, 1, 1))
+        self.assertEqual([line for line, _ in report.errors], [6, 7])
+        self.assertEqual(self._followers(self.publisher),
+                         ["reader0", "reader1", "reader2", "reader3"])
+        self.assertNotEqual(get_generations([User, Publisher]), generations)
+
+        again = audiences.import_followers(
+            "publishers", self.publisher, lines, size=3)
+        self.assertEqual(again.subscribed, 0)
+
+    def test_headerless_journalist_import(self):
+        lines = ["reader4\n", "r5@x.com\n", "journ\n"]
+        report = audiences.import_followers(
+            "journalists", self.journalist, lines)
+        self.assertEqual(report.subscribed, 2)
+        self.assertEqual(
+            sorted(self.journalist.subscriber_set.values_list(
+                "username", flat=True)), ["reader4", "reader5"])
+
+    def test_publisher_pk_equal_to_a_user_pk_is_not_dropped(self):
+        publisher = Publisher.objects.create(pk=self.readers[0].pk,
+                                             name="Collides")
+        lines = ["reader0\n", "reader1\n", "reader2\n"]
+        report = audiences.import_followers("publishers", publisher, lines)
+        self.assertEqual((report.subscribed, report.missing), (3, 0))
+        self.assertEqual(self._followers(publisher),
+                         ["reader0", "reader1", "reader2"])
+
+    def test_matching_ignores_case(self):
+        User.objects.create_user("casey", "Casey@X.io", "pw")
+        User.objects.create_user("other", "CASE@x.com", "pw")
+        User.objects.create_user("other2", "case@X.com", "pw")
+        lines = ["casey@x.io\n", "READER1\n", "case@x.com\n"]
+        report = audiences.import_followers(
+            "publishers", self.publisher, lines)
+        self.assertEqual(
+            (report.subscribed, report.missing, report.ambiguous), (2, 0, 1))
+        self.assertEqual(self._followers(self.publisher),
+                         ["casey", "reader1"])
+
+    def test_lookups_are_chunked_and_indexable(self):
+        values = {"reader0", "READER1", "reader2", "nobody"}
+        with patch.object(audiences, "LOOKUP_CHUNK", 3), \
+                CaptureQueriesContext(connection) as queries:
+            found, ambiguous = audiences.resolve("username", values)
+        self.assertEqual(len(queries), 2)
+        self.assertNotIn("LOWER(", " ".join(q["sql"] for q in queries))
+        self.assertEqual(found, {f"reader{i}": self.readers[i].pk
+                                 for i in range(3)})
+        self.assertEqual(ambiguous, set())
+
+    def test_concurrent_follows_are_not_counted(self):
+        through = User.subscriptions_publishers.through
+        bulk_create = through.objects.bulk_create
+
+        def racing_bulk_create(objs, **kwargs):
+            # Someone outside the import follows the publisher meanwhile
+            self.readers[5].subscriptions_publishers.add(self.publisher)
+            return bulk_create(objs, **kwargs)
+
+        with patch.object(through.objects, "bulk_create",
+                          side_effect=racing_bulk_create):
+            report = audiences.import_followers(
+                "publishers", self.publisher, ["reader0\n", "reader1\n"])
+        self.assertEqual(report.subscribed, 2)
+        self.assertEqual(len(self._followers(self.publisher)), 3)
+
+    def test_export_pages_through_followers(self):
+        for reader in self.readers[:5]:
+            reader.subscriptions_publishers.add(self.publisher)
+        data = b"".join(audiences.export_followers(
+            "publishers", self.publisher, chunk_size=2)).decode()
+        rows = list(csv.reader(io.StringIO(data)))
+        self.assertEqual(rows[0], ["username", "email"])
+        self.assertEqual(rows[1:], [[f"reader{i}", f"r{i}@x.com"]
+                                    for i in range(5)])
+
+    def test_commands_round_trip(self):
+        for reader in self.readers[:3]:
+            reader.subscriptions_publishers.add(self.publisher)
+        out = StringIO()
+        call_command("export_followers", "publishers",
+                     str(self.publisher.pk), stdout=out)
+
+        with tempfile.NamedTemporaryFile("w", suffix=".csv",
+                                         delete=False) as handle:
+            handle.write(out.getvalue())
+        self.addCleanup(os.unlink, handle.name)
+        out = StringIO()
+        call_command("import_followers", "journalists",
+                     str(self.journalist.pk), handle.name, stdout=out)
+        self.assertIn("3 new followers", out.getvalue())
+
+        with self.assertRaises(CommandError):
+            call_command("import_followers", "journalists",
+                         str(self.readers[0].pk), handle.name)
+
+    def test_staff_api(self):
+        url = reverse("api:audience", args=["publishers", self.publisher.pk])
+        client = APIClient()
+        token = Token.objects.create(user=self.readers[0])
+        client.credentials(HTTP_AUTHORIZATION=f"Token {token.key}")
+        self.assertEqual(client.get(url).status_code, 403)
+
+        token = Token.objects.create(user=self.staff)
+        client.credentials(HTTP_AUTHORIZATION=f"Token {token.key}")
+        response = client.post(
+            url, data="\ufeffemail\nr1@x.com\nr2@x.com\nnone@x.com\n",
+            content_type="text/csv")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data["subscribed"], 2)
+        self.assertEqual(response.data["errors"],
+                         [{"line": 4, "detail": "none@x.com: no such user"}])
+
+        response = client.get(url)
+        self.assertEqual(response["Content-Type"], "text/csv; charset=utf-8")
+        body = b"".join(response.streaming_content).decode()
+        self.assertEqual(body.splitlines()[1:],
+                         ["reader1,r1@x.com", "reader2,r2@x.com"])
+        self.assertEqual(client.get(reverse(
+            "api:audience", args=["journalists", self.staff.pk])).status_code,
+            404)
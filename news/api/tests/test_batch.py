@@ -0,0 +1,174 @@
+
+import threading
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.contrib.auth.models import Group
+from django.http import StreamingHttpResponse
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from rest_framework.authentication import TokenAuthentication
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APIClient
+
+from news.api import batch
+from news.models import Article, Publisher
+
+User = get_user_model()
+
+
+@override_settings(NEWS_BATCH_WORKERS=1)
+class BatchEndpointTests(TestCase):
+    """Tests for POST /api/batch/."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.journalist = User.objects.create_user(
+            "journ", "j@x.com", "pw", role=User.ROLE_JOURNALIST
+        )
+        cls.journalist.groups.add(
+            Group.objects.get_or_create(name="Journalist")[0])
+        cls.reader = User.objects.create_user(
+            "reader", "r@x.com", "pw", role=User.ROLE_READER
+        )
+        cls.publisher = Publisher.objects.create(name="Daily")
+        cls.article = Article.objects.create(
+            title="Visible", body="B", author=cls.journalist,
+            publisher=cls.publisher, status=Article.STATUS_APPROVED,
+        )
+        cls.reader.subscriptions_journalists.add(cls.journalist)
+
+    def _client(self, user):
+        client = APIClient()
+        token, _ = Token.objects.get_or_create(user=user)
+        client.credentials(HTTP_AUTHORIZATION=f"Token {token.key}")
+        return client
+
+    def _batch(self, user, requests):
+        return self._client(user).post(
+            reverse("api:batch"), {"requests": requests}, format="json")
+
+    def test_runs_sub_requests_and_keeps_their_statuses(self):
+        response = self._batch(self.reader, [
+            {"id": "feed", "path": "/api/articles/"},
+            {"id": "pubs", "path": "/api/publishers/"},
+            {"id": "one", "path": f"/api/articles/{self.article.pk}/"},
+            {"id": "gone", "path": "/api/articles/999999/"},
+            {"id": "denied", "method": "POST", "path": "/api/articles/",
+             "body": {"title": "T", "body": "B",
+                      "publisher": self.publisher.pk}},
+        ])
+        self.assertEqual(response.status_code, 200)
+        results = {r["id"]: r for r in response.data["responses"]}
+        self.assertEqual(list(results),
+                         ["feed", "pubs", "one", "gone", "denied"])
+        self.assertEqual([a["id"] for a in results["feed"]["body"]],
+                         [self.article.pk])
+        self.assertEqual(results["pubs"]["body"][0]["name"], "Daily")
+        self.assertEqual(results["one"]["body"]["title"], "Visible")
+        self.assertEqual(results["gone"]["status"], 404)
+        self.assertEqual(results["denied"]["status"], 403)
+
+    def test_writes_are_seen_by_later_requests(self):
+        response = self._batch(self.journalist, [
+            {"id": "new", "method": "POST", "path": "/api/articles/",
+             "body": {"title": "Fresh", "body": "B",
+                      "publisher": self.publisher.pk}},
+            {"id": "months", "path": "/api/months/articles/?publisher=x"},
+        ])
+        new, months = response.data["responses"]
+        self.assertEqual(new["status"], 201)
+        self.assertTrue(Article.objects.filter(
+            pk=new["body"]["id"], author=self.journalist).exists())
+        self.assertEqual(months["status"], 400)
+
+    def test_authenticates_once(self):
+        client = self._client(self.reader)
+        requests = [{"path": "/api/publishers/"}] * 3
+        with mock.patch.object(
+                TokenAuthentication, "authenticate_credentials",
+                autospec=True,
+                side_effect=TokenAuthentication.authenticate_credentials,
+        ) as check:
+            response = client.post(reverse("api:batch"),
+                                   {"requests": requests}, format="json")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(check.call_count, 1)
+
+    def test_rejects_malformed_and_oversized_batches(self):
+        bad = [
+            {},
+            {"requests": []},
+            {"requests": [{"path": "articles"}]},
+            {"requests": [{"path": "/api/nowhere/"}]},
+            {"requests": [{"path": "/api/batch/", "method": "POST"}]},
+            {"requests": [{"path": "/api/export/articles.csv"}]},
+            {"requests": [{"path": "/api/audiences/publishers/1/"}]},
+            {"requests": [{"path": "/articles/"}]},
+            {"requests": [{"path": "/api/articles/", "method": "TRACE"}]},
+            {"requests": [{"id": 1, "path": "/api/publishers/"},
+                          {"id": 1, "path": "/api/publishers/"}]},
+        ]
+        client = self._client(self.reader)
+        for body in bad:
+            response = client.post(reverse("api:batch"), body, format="json")
+            self.assertEqual(response.status_code, 400, body)
+
+        with override_settings(NEWS_BATCH_MAX_REQUESTS=2):
+            response = self._batch(self.reader, [{"path": "/api/"}] * 3)
+        self.assertIn("At most 2", response.data["detail"])
+        with override_settings(NEWS_BATCH_MAX_COST=5):
+            response = self._batch(self.reader, [
+                {"path": "/api/articles/"},
+                {"path": f"/api/articles/{self.article.pk}/"},
+                {"path": f"/api/articles/{self.article.pk}/related/"},
+            ])
+            self.assertEqual(response.status_code, 400)
+            self.assertIn("costs 6", response.data["detail"])
+
+    def test_streaming_responses_are_not_batchable(self):
+        sub = batch.SubRequest(0, {"path": "/api/publishers/"})
+        sub.match.func = lambda request: StreamingHttpResponse(iter([b"x"]))
+        parent = mock.Mock(META={}, user=self.reader, auth=None)
+        result = batch.run_one(parent, sub)
+        self.assertEqual(result["status"], 400)
+        self.assertIn("cannot be batched", result["body"]["detail"])
+
+    def test_requires_authentication(self):
+        response = APIClient().post(
+            reverse("api:batch"),
+            {"requests": [{"path": "/api/publishers/"}]}, format="json")
+        self.assertEqual(response.status_code, 401)
+
+
+class BatchSchedulingTests(TestCase):
+    """Reads run concurrently between writes, results stay in order."""
+
+    def _subs(self, methods):
+        return [batch.SubRequest(i, {"method": method,
+                                     "path": "/api/publishers/"})
+                for i, method in enumerate(methods)]
+
+    def test_waves_split_at_writes(self):
+        subs = self._subs(["GET", "GET", "POST", "GET", "DELETE", "DELETE"])
+        self.assertEqual([[s.id for s in wave] for wave in batch.waves(subs)],
+                         [[0, 1], [2], [3], [4], [5]])
+
+    @override_settings(NEWS_BATCH_WORKERS=3)
+    def test_reads_share_the_pool(self):
+        barrier = threading.Barrier(3, timeout=5)
+
+        def fake_run(parent, sub):
+            if sub.is_safe:
+                # Only passes when all three reads run at the same time.
+                barrier.wait()
+            return {"id": sub.id, "thread": threading.current_thread().name}
+
+        subs = self._subs(["GET", "GET", "GET", "POST"])
+        with mock.patch.object(batch, "run_one", fake_run):
+            results = batch.execute(None, subs)
+        self.assertEqual([r["id"] for r in results], [0, 1, 2, 3])
+        self.assertTrue(all(r["thread"].startswith("api-batch")
+                            for r in results[:3]))
+        self.assertEqual(results[3]["thread"],
+                         threading.current_thread().name)
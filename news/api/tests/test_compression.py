@@ -0,0 +1,125 @@
+
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.db import connection
+from django.test import TestCase, override_settings
+
+from news.fields import (
+    CompressedPayload, compress_text, decompress_text, is_compressed
+)
+from news.models import Publisher, Article, Newsletter
+
+User = get_user_model()
+
+LONG_BODY = "The council approved the new budget on Tuesday. " * 100
+
+
+@override_settings(NEWS_COMPRESSION_THRESHOLD=256)
+class CompressedTextFieldTests(TestCase):
+    """Tests for CompressedTextField and the compress_bodies command."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.journalist = User.objects.create_user(
+            "journ", "j@x.com", "pw", role=User.ROLE_JOURNALIST
+        )
+        cls.publisher = Publisher.objects.create(name="Daily")
+
+    def _article(self, body):
+        return Article.objects.create(
+            title="T", body=body, author=self.journalist,
+            publisher=self.publisher,
+        )
+
+    def _stored(self, pk):
+        with connection.cursor() as cursor:
+            cursor.execute(
+                "SELECT body FROM news_article WHERE id = %s", [pk])
+            return cursor.fetchone()[0]
+
+    def test_codec_round_trip(self):
+        for text in ["", "short", LONG_BODY, "\x1fstarts with tag", "ünï"]:
+            self.assertEqual(decompress_text(compress_text(text, 0)), text)
+        self.assertTrue(is_compressed(compress_text(LONG_BODY, 0)))
+        self.assertFalse(is_compressed(compress_text("tiny", 1000)))
+
+    def test_large_body_is_stored_compressed(self):
+        art = self._article(LONG_BODY)
+        stored = self._stored(art.pk)
+        self.assertTrue(is_compressed(stored))
+        self.assertLess(len(stored), len(LONG_BODY) // 5)
+        self.assertEqual(Article.objects.get(pk=art.pk).body, LONG_BODY)
+
+    def test_small_body_is_stored_plain(self):
+        art = self._article("Short body")
+        self.assertEqual(bytes(self._stored(art.pk)), b"Short body")
+
+    def test_decompression_is_lazy(self):
+        art = self._article(LONG_BODY)
+        loaded = Article.objects.get(pk=art.pk)
+        self.assertIsInstance(loaded.__dict__["body"], CompressedPayload)
+        self.assertEqual(loaded.body[:9], "The counc")
+        self.assertIsInstance(loaded.__dict__["body"], str)
+
+    def test_untouched_body_is_not_recompressed_on_save(self):
+        art = self._article(LONG_BODY)
+        before = bytes(self._stored(art.pk))
+        loaded = Article.objects.get(pk=art.pk)
+        loaded.title = "Edited"
+        loaded.save()
+        self.assertIsInstance(loaded.__dict__["body"], CompressedPayload)
+        self.assertEqual(bytes(self._stored(art.pk)), before)
+
+    def test_deferred_body_loads_on_access(self):
+        art = self._article(LONG_BODY)
+        loaded = Article.objects.defer("body").get(pk=art.pk)
+        self.assertEqual(loaded.body, LONG_BODY)
+
+    def test_compress_bodies_command_is_resumable(self):
+        legacy = [self._article("x") for _ in range(3)]
+        with connection.cursor() as cursor:
+            cursor.execute(
+                "UPDATE news_article SET body = %s",
+                [LONG_BODY.encode("utf-8")],
+            )
+        self.assertFalse(is_compressed(self._stored(legacy[0].pk)))
+
+        newsletter = Newsletter.objects.create(
+            title="NL", body="x", author=self.journalist)
+        with connection.cursor() as cursor:
+            cursor.execute(
+                "UPDATE news_newsletter SET body = %s",
+                [LONG_BODY.encode("utf-8")],
+            )
+
+        # The checkpoint only applies to the article table of its shard.
+        out = StringIO()
+        call_command("compress_bodies", "--batch-size", "2",
+                     "--resume", f"article:default:{legacy[0].pk}",
+                     stdout=out)
+        self.assertIn("article:default: compressed 2 rows", out.getvalue())
+        self.assertIn("newsletter:default: compressed 1 rows",
+                      out.getvalue())
+        self.assertIn(f"checkpoint article:default:{legacy[2].pk}",
+                      out.getvalue())
+        self.assertFalse(is_compressed(self._stored(legacy[0].pk)))
+        self.assertTrue(is_compressed(self._stored(legacy[2].pk)))
+        self.assertEqual(Newsletter.objects.get(pk=newsletter.pk).body,
+                         LONG_BODY)
+
+        out = StringIO()
+        call_command("compress_bodies", "--model", "article", stdout=out)
+        self.assertIn("compressed 1 rows", out.getvalue())
+        self.assertEqual(Article.objects.get(pk=legacy[0].pk).body, LONG_BODY)
+
+        with self.assertRaises(CommandError):
+            call_command("compress_bodies", "--resume", "article:nowhere:1")
+
+    def test_benchmark_command_reports_each_codec(self):
+        out = StringIO()
+        call_command("benchmark_compression", "--sizes", "1024",
+                     "--repeat", "1", stdout=out)
+        self.assertIn("zlib:6", out.getvalue())
@@ -0,0 +1,155 @@
+
+from datetime import timedelta
+from io import StringIO
+from unittest.mock import patch
+
+from django.contrib.auth import get_user_model
+from django.core import mail
+from django.core.management import call_command
+from django.test import TestCase
+from django.urls import reverse
+from django.utils import timezone
+
+from news import moderation, notifications
+from news.digests import send_digests
+from news.models import Publisher, Article, Newsletter
+
+User = get_user_model()
+
+
+class DigestTests(TestCase):
+    """Tests for delivery preferences and the batched digest sender."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.journalist = User.objects.create_user(
+            "journ", "j@x.com", "pw", role=User.ROLE_JOURNALIST
+        )
+        cls.publisher = Publisher.objects.create(name="Daily")
+        cls.other_publisher = Publisher.objects.create(name="Other")
+        cls.immediate = User.objects.create_user(
+            "now", "now@x.com", "pw", role=User.ROLE_READER)
+        cls.hourly = User.objects.create_user(
+            "hourly", "hourly@x.com", "pw", role=User.ROLE_READER,
+            notification_frequency=User.FREQUENCY_HOURLY,
+        )
+        cls.daily = User.objects.create_user(
+            "daily", "daily@x.com", "pw", role=User.ROLE_READER,
+            notification_frequency=User.FREQUENCY_DAILY,
+        )
+        for reader in (cls.immediate, cls.hourly, cls.daily):
+            reader.subscriptions_publishers.add(cls.publisher)
+        cls.daily.subscriptions_journalists.add(cls.journalist)
+
+    def setUp(self):
+        mail.outbox = []
+
+    def _approve_article(self, title, publisher=None):
+        art = Article.objects.create(
+            title=title, body="B", author=self.journalist,
+            publisher=publisher or self.publisher,
+        )
+        return moderation.approve(Article, art.pk)
+
+    def test_digest_readers_get_no_immediate_email(self):
+        self._approve_article("Breaking")
+        self.assertEqual([m.to for m in mail.outbox], [["now@x.com"]])
+
+    def test_hourly_digest_groups_items(self):
+        self._approve_article("First")
+        self._approve_article("Second")
+        nl = Newsletter.objects.create(
+            title="Weekly", body="B", author=self.journalist,
+            publisher=self.publisher,
+        )
+        moderation.approve(Newsletter, nl.pk)
+        mail.outbox = []
+
+        self.assertEqual(send_digests(User.FREQUENCY_HOURLY), (1, 1))
+        message = mail.outbox[0]
+        self.assertEqual(message.to, ["hourly@x.com"])
+        self.assertEqual(message.subject, "Hourly digest: 3 new items")
+        self.assertLess(message.body.index("First"),
+                        message.body.index("Second"))
+        self.assertIn(reverse('news:newsletter-detail', args=[nl.pk]),
+                      message.body)
+
+    def test_watermark_prevents_resending(self):
+        self._approve_article("First")
+        now = timezone.now()
+        send_digests(User.FREQUENCY_HOURLY, now=now)
+        mail.outbox = []
+        # Not due again until an hour has passed.
+        self.assertEqual(send_digests(User.FREQUENCY_HOURLY), (0, 0))
+
+        later = now + timedelta(hours=1)
+        art = self._approve_article("Second")
+        Article.objects.filter(pk=art.pk).update(
+            approved_at=now + timedelta(minutes=30))
+        mail.outbox = []
+        self.assertEqual(send_digests(User.FREQUENCY_HOURLY, now=later),
+                         (1, 1))
+        self.assertNotIn("First", mail.outbox[0].body)
+        self.assertIn("Second", mail.outbox[0].body)
+
+    def test_failed_send_keeps_the_readers_watermark(self):
+        self._approve_article("First")
+        self.daily.subscriptions_publishers.remove(self.publisher)
+        self.daily.subscriptions_journalists.remove(self.journalist)
+        User.objects.filter(pk=self.daily.pk).update(
+            notification_frequency=User.FREQUENCY_HOURLY)
+        mail.outbox = []
+        with patch("django.core.mail.backends.locmem.EmailBackend"
+                   ".send_messages", return_value=0):
+            self.assertEqual(send_digests(User.FREQUENCY_HOURLY), (2, 0))
+        self.hourly.refresh_from_db()
+        self.assertIsNone(self.hourly.digest_sent_at)
+        # Nothing was owed to the other reader, so theirs moves on.
+        self.daily.refresh_from_db()
+        self.assertIsNotNone(self.daily.digest_sent_at)
+
+        self.assertEqual(send_digests(User.FREQUENCY_HOURLY), (1, 1))
+        self.assertIn("First", mail.outbox[0].body)
+
+    def test_items_already_emailed_are_left_out(self):
+        art = self._approve_article("Seen")
+        self._approve_article("Unseen")
+        # Emailed immediately before the reader switched to a digest
+        notifications.claim_recipient_ids(
+            art, notifications.CHANNEL_EMAIL, [self.hourly.pk])
+        mail.outbox = []
+        self.assertEqual(send_digests(User.FREQUENCY_HOURLY), (1, 1))
+        self.assertEqual(mail.outbox[0].subject, "Hourly digest: 1 new item")
+        self.assertNotIn("Seen", mail.outbox[0].body)
+
+    def test_daily_digest_follows_journalists_too(self):
+        self._approve_article("Elsewhere", publisher=self.other_publisher)
+        call_command("send_digests", "--frequency", "daily", stdout=StringIO())
+        self.assertEqual(len(mail.outbox), 1)
+        self.assertIn("Elsewhere", mail.outbox[0].body)
+
+    def test_queries_per_batch_do_not_grow_with_readers(self):
+        for i in range(40):
+            reader = User.objects.create_user(
+                f"bulk{i}", f"b{i}@x.com", "pw", role=User.ROLE_READER,
+                notification_frequency=User.FREQUENCY_HOURLY,
+            )
+            reader.subscriptions_publishers.add(self.publisher)
+            reader.subscriptions_journalists.add(self.journalist)
+        self._approve_article("Shared")
+        mail.outbox = []
+        # readers, two follow tables, articles, newsletters, the ledger of
+        # the articles, watermark and the empty follow-up batch lookup.
+        with self.assertNumQueries(8):
+            self.assertEqual(
+                send_digests(User.FREQUENCY_HOURLY, batch_size=100), (41, 41))
+
+    def test_reader_can_choose_delivery(self):
+        self.client.login(username="now", password="pw")
+        resp = self.client.get(reverse('news:subscriptions'))
+        self.assertContains(resp, "Daily digest")
+        self.client.post(reverse('news:subscription-delivery'),
+                         {'notification_frequency': User.FREQUENCY_DAILY})
+        self.immediate.refresh_from_db()
+        self.assertEqual(self.immediate.notification_frequency,
+                         User.FREQUENCY_DAILY)
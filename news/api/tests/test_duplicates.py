@@ -0,0 +1,149 @@
+
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.contrib.auth.models import Group
+from django.contrib.messages import get_messages
+from django.core.management import call_command
+from django.test import TestCase
+from django.urls import reverse
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APIClient
+
+from news import duplicates, review_queue
+from news.ingest import Ingester
+from news.models import Article, ArticleBand, ArticleFingerprint, Publisher
+
+User = get_user_model()
+
+WIRE = (
+    "Officials confirmed on Tuesday that the river burst its banks after "
+    "three days of heavy rain, flooding more than two hundred homes in the "
+    "low lying districts of the town. Emergency crews worked through the "
+    "night to move residents to temporary shelters while the regional "
+    "council opened its crisis centre and asked drivers to avoid the main "
+    "bridge until engineers have inspected it"
+)
+REWRITE = WIRE.replace("Tuesday", "Wednesday")
+OTHER = (
+    "The national orchestra announced its autumn programme with a series "
+    "of concerts devoted to young composers, including four premieres and "
+    "a free open air performance in the park at the end of September"
+)
+
+
+class DuplicateDetectionTests(TestCase):
+    """Tests for the MinHash/LSH near-duplicate index."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.journalist = User.objects.create_user(
+            "journ", "j@x.com", "pw", role=User.ROLE_JOURNALIST
+        )
+        cls.other_journalist = User.objects.create_user(
+            "journ2", "j2@x.com", "pw", role=User.ROLE_JOURNALIST
+        )
+        cls.editor = User.objects.create_user(
+            "ed", "e@x.com", "pw", role=User.ROLE_EDITOR
+        )
+        cls.publisher = Publisher.objects.create(name="Daily")
+        cls.publisher.editors.add(cls.editor)
+        cls.journalist.groups.add(
+            Group.objects.get_or_create(name="Journalist")[0])
+
+    def _article(self, body, title="River floods town", author=None):
+        return Article.objects.create(
+            title=title, body=body, author=author or self.journalist,
+            publisher=self.publisher,
+        )
+
+    def _cluster(self, article):
+        return ArticleFingerprint.objects.get(pk=article.pk).cluster_id
+
+    def test_signature_estimates_similarity(self):
+        sig = duplicates.signature("River floods town", WIRE)
+        self.assertEqual(sig.dtype.str, "<u4")
+        self.assertEqual(len(sig), 16 * 8)
+        self.assertEqual(len(duplicates.band_keys(sig)), 16)
+        others = [duplicates.signature("River floods town", text)
+                  for text in (WIRE, REWRITE, OTHER)]
+        scores = duplicates.similarity(sig, others).tolist()
+        self.assertEqual(scores[0], 1.0)
+        self.assertGreater(scores[1], 0.8)
+        self.assertLess(scores[2], 0.2)
+
+    def test_new_articles_are_grouped_on_save(self):
+        first = self._article(WIRE)
+        unrelated = self._article(OTHER, title="Orchestra season")
+        copy = self._article(REWRITE, author=self.other_journalist)
+        self.assertEqual(self._cluster(first), first.pk)
+        self.assertEqual(self._cluster(copy), first.pk)
+        self.assertEqual(self._cluster(unrelated), unrelated.pk)
+        self.assertEqual(duplicates.groups([copy.pk, unrelated.pk]),
+                         {copy.pk: [first.pk]})
+        self.assertEqual(duplicates.duplicates_of(first.pk), [copy])
+
+        copy.title, copy.body = "Orchestra season", OTHER + " again"
+        copy.save()
+        self.assertEqual(self._cluster(copy), unrelated.pk)
+        self.assertEqual(duplicates.duplicates_of(first.pk), [])
+
+        copy.delete()
+        self.assertFalse(ArticleBand.objects.filter(
+            article_id=copy.pk).exists())
+        self.assertEqual(duplicates.groups([unrelated.pk]), {})
+
+    def test_rebuild_matches_incremental_groups(self):
+        articles = [self._article(WIRE), self._article(OTHER),
+                    self._article(REWRITE), self._article(WIRE + " again")]
+        incremental = {a.pk: self._cluster(a) for a in articles}
+        out = StringIO()
+        call_command("rebuild_duplicates", "--chunk-size", "2", stdout=out)
+        self.assertIn("indexed 4 articles", out.getvalue())
+        self.assertEqual({a.pk: self._cluster(a) for a in articles},
+                         incremental)
+
+    def test_ingest_groups_within_a_batch(self):
+        lines = [
+            '{"title": "River floods town", "body": "%s", "publisher": %d, '
+            '"author": %d, "status": "PENDING"}'
+            % (body, self.publisher.pk, self.journalist.pk)
+            for body in (WIRE, REWRITE)
+        ]
+        Ingester(index_related=False).run(lines)
+        first, copy = Article.objects.order_by("pk")
+        self.assertEqual(self._cluster(copy), first.pk)
+
+    def test_create_view_warns_and_api_reports(self):
+        original = self._article(WIRE)
+        self.client.force_login(self.other_journalist)
+        response = self.client.post(reverse("news:article-create"), {
+            "title": "River floods town", "body": REWRITE,
+            "publisher": self.publisher.pk,
+        })
+        self.assertEqual(response.status_code, 302)
+        self.assertIn("near-duplicate",
+                      str(list(get_messages(response.wsgi_request))[0]))
+
+        api = APIClient()
+        token = Token.objects.create(user=self.journalist)
+        api.credentials(HTTP_AUTHORIZATION=f"Token {token.key}")
+        response = api.post(reverse("api:articles-list"), {
+            "title": "River floods town", "body": WIRE + " Updated.",
+            "publisher": self.publisher.pk,
+        }, format="json")
+        self.assertEqual(response.status_code, 201)
+        self.assertIn(original.pk, response.data["suspected_duplicates"])
+
+    def test_review_queue_shows_groups_together(self):
+        first = self._article(WIRE)
+        self._article(OTHER, title="Orchestra season")
+        copy = self._article(REWRITE, author=self.other_journalist)
+        review_queue.claim(Article, self.editor, limit=10)
+        self.client.force_login(self.editor)
+        response = self.client.get(reverse("news:pending_articles"))
+        rows = response.context["pending_articles"]
+        self.assertEqual([a.pk for a in rows][:2], [first.pk, copy.pk])
+        self.assertEqual(rows[1].suspected_duplicates, [first])
+        self.assertEqual(rows[2].suspected_duplicates, [])
+        self.assertContains(response, "Possible duplicate")
@@ -0,0 +1,96 @@
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import TestCase
+from django.urls import reverse
+
+from news import moderation
+from news.models import Publisher, Article
+
+User = get_user_model()
+
+
+class FeedTests(TestCase):
+    """Tests for the cached, conditional RSS/Atom feeds."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.journalist = User.objects.create_user(
+            "journ", "j@x.com", "pw", role=User.ROLE_JOURNALIST
+        )
+        cls.reader = User.objects.create_user(
+            "reader", "r@x.com", "pw", role=User.ROLE_READER
+        )
+        cls.publisher = Publisher.objects.create(name="Daily")
+        cls.other = Publisher.objects.create(name="Other")
+
+    def setUp(self):
+        cache.clear()
+        self.article = Article.objects.create(
+            title="Approved story", body="Full text", author=self.journalist,
+            publisher=self.publisher, status=Article.STATUS_APPROVED,
+        )
+        Article.objects.create(
+            title="Pending story", body="B", author=self.journalist,
+            publisher=self.publisher,
+        )
+        self.url = reverse('news:publisher-feed',
+                           args=[self.publisher.pk, 'rss'])
+
+    def test_publisher_rss_lists_approved_articles(self):
+        resp = self.client.get(self.url)
+        self.assertEqual(resp.status_code, 200)
+        self.assertTrue(resp["Content-Type"].startswith(
+            "application/rss+xml"))
+        self.assertContains(resp, "Approved story")
+        self.assertContains(resp, "Full text")
+        self.assertNotContains(resp, "Pending story")
+        self.assertIn("ETag", resp)
+        self.assertIn("Last-Modified", resp)
+
+    def test_journalist_atom_feed(self):
+        url = reverse('news:journalist-feed',
+                      args=[self.journalist.pk, 'atom'])
+        resp = self.client.get(url)
+        self.assertTrue(resp["Content-Type"].startswith(
+            "application/atom+xml"))
+        self.assertContains(resp, "Approved story")
+
+    def test_cached_feed_answers_conditional_requests_without_queries(self):
+        first = self.client.get(self.url)
+        with self.assertNumQueries(0):
+            resp = self.client.get(self.url,
+                                   HTTP_IF_NONE_MATCH=first["ETag"])
+        self.assertEqual(resp.status_code, 304)
+        resp = self.client.get(
+            self.url, HTTP_IF_MODIFIED_SINCE=first["Last-Modified"])
+        self.assertEqual(resp.status_code, 304)
+
+    def test_approval_invalidates_feeds(self):
+        first = self.client.get(self.url)
+        pending = Article.objects.get(title="Pending story")
+        # Feeds move to a new version only once the approval commits.
+        with self.captureOnCommitCallbacks(execute=True):
+            moderation.approve(Article, pending.pk)
+        resp = self.client.get(self.url, HTTP_IF_NONE_MATCH=first["ETag"])
+        self.assertEqual(resp.status_code, 200)
+        self.assertContains(resp, "Pending story")
+
+    def test_moving_an_article_updates_both_publisher_feeds(self):
+        self.client.get(self.url)
+        self.article.publisher = self.other
+        with self.captureOnCommitCallbacks(execute=True):
+            self.article.save()
+        self.assertNotContains(self.client.get(self.url), "Approved story")
+        other_url = reverse('news:publisher-feed', args=[self.other.pk, 'rss'])
+        self.assertContains(self.client.get(other_url), "Approved story")
+
+    def test_unknown_sources_and_formats_are_404(self):
+        self.assertEqual(self.client.get(reverse(
+            'news:publisher-feed', args=[999, 'rss'])).status_code, 404)
+        self.assertEqual(self.client.get(reverse(
+            'news:journalist-feed', args=[self.reader.pk, 'rss'])
+        ).status_code, 404)
+        self.assertEqual(self.client.get(reverse(
+            'news:publisher-feed', args=[self.publisher.pk, 'json'])
+        ).status_code, 404)
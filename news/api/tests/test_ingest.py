@@ -0,0 +1,150 @@
+
+import json
+import os
+import tempfile
+from io import StringIO
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core import mail
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import TestCase
+
+from news import feeds
+from news.ingest import Ingester
+from news.models import (
+    Publisher,
+    Article,
+    ArticleChange,
+    ArticleVector,
+    IngestCheckpoint,
+    RelatedIndexQueue,
+)
+
+User = get_user_model()
+
+
+class IngestTests(TestCase):
+    """Tests for the batched, resumable NDJSON ingest."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.journalist = User.objects.create_user(
+            "journ", "j@x.com", "pw", role=User.ROLE_JOURNALIST
+        )
+        cls.reader = User.objects.create_user(
+            "reader", "r@x.com", "pw", role=User.ROLE_READER
+        )
+        cls.publisher = Publisher.objects.create(name="Daily")
+        cls.reader.subscriptions_publishers.add(cls.publisher)
+
+    def setUp(self):
+        cache.clear()
+
+    def _line(self, n, **extra):
+        data = {"title": f"Wire {n}", "body": f"Wire body {n}",
+                "publisher": "daily", "author": self.journalist.username}
+        data.update(extra)
+        return json.dumps(data) + "\n"
+
+    def _file(self, lines):
+        handle, path = tempfile.mkstemp(suffix=".ndjson")
+        with os.fdopen(handle, "w") as out:
+            out.writelines(lines)
+        self.addCleanup(os.remove, path)
+        return path
+
+    def test_rows_are_stored_in_batches_with_change_log(self):
+        lines = [self._line(n) for n in range(5)]
+        lines.append(self._line(5, status=Article.STATUS_PENDING,
+                                publisher=self.publisher.pk,
+                                author=self.journalist.pk,
+                                created_at="2020-01-02T03:04:05Z"))
+        batches = []
+        ingester = Ingester(batch_size=2, index_related=False,
+                            progress=lambda i: batches.append(i.created))
+        ingester.run(lines)
+
+        self.assertEqual(batches, [2, 4, 6])
+        self.assertEqual(Article.objects.count(), 6)
+        pending = Article.objects.get(title="Wire 5")
+        self.assertEqual(pending.status, Article.STATUS_PENDING)
+        self.assertEqual(pending.created_at.year, 2020)
+        self.assertIsNone(pending.approved_at)
+        self.assertIsNotNone(Article.objects.get(title="Wire 0").approved_at)
+        self.assertEqual(
+            ArticleChange.objects.filter(
+                kind=ArticleChange.KIND_APPROVED).count(), 5)
+        self.assertEqual(
+            ArticleChange.objects.filter(
+                kind=ArticleChange.KIND_CREATED).count(), 1)
+
+    def test_bad_lines_are_skipped_and_reported(self):
+        lines = [
+            self._line(0),
+            "{not json\n",
+            "\n",
+            self._line(1, publisher="Nowhere"),
+            self._line(2, author=self.reader.username),
+            self._line(3, status="BOGUS"),
+            self._line(4, title=""),
+            self._line(5),
+        ]
+        ingester = Ingester(index_related=False).run(lines)
+        self.assertEqual(ingester.created, 2)
+        self.assertEqual(ingester.skipped, 5)
+        self.assertEqual([line for line, _ in ingester.errors],
+                         [2, 4, 5, 6, 7])
+        self.assertIn("unknown publisher", ingester.errors[1][1])
+
+    def test_per_row_signals_are_bypassed(self):
+        with mock.patch("news.signals.queue_related") as index:
+            Ingester(index_related=False).run([self._line(0)])
+        index.assert_not_called()
+        self.assertEqual(len(mail.outbox), 0)
+
+    def test_deferred_pass_updates_feeds_and_related_index(self):
+        version = feeds.feed_version(feeds.SOURCE_PUBLISHER, self.publisher.pk)
+        with self.captureOnCommitCallbacks(execute=True):
+            Ingester().run([self._line(0), self._line(1)])
+        self.assertNotEqual(
+            feeds.feed_version(feeds.SOURCE_PUBLISHER, self.publisher.pk),
+            version)
+        self.assertEqual(ArticleVector.objects.count(), 2)
+
+    def test_related_index_covers_only_the_ingested_rows(self):
+        with mock.patch("news.related.rebuild_index") as rebuild, \
+                mock.patch("news.related.index_pending") as index:
+            Ingester().run([self._line(0)])
+        rebuild.assert_not_called()
+        index.assert_called_once_with()
+        self.assertTrue(RelatedIndexQueue.objects.exists())
+
+        with mock.patch("news.related.rebuild_index") as rebuild, \
+                mock.patch("news.related.index_pending") as index:
+            Ingester(rebuild_related=True).run([self._line(1)])
+        rebuild.assert_called_once_with()
+        index.assert_not_called()
+
+    def test_command_resumes_from_checkpoint(self):
+        path = self._file([self._line(n) for n in range(3)])
+        out = StringIO()
+        call_command("ingest_articles", path, "--batch-size", "2",
+                     "--no-index", stdout=out)
+        self.assertIn("ingested 3 rows", out.getvalue())
+        checkpoint = IngestCheckpoint.objects.get(name=os.path.abspath(path))
+        self.assertEqual((checkpoint.line, checkpoint.rows), (3, 3))
+
+        # Appended lines are picked up; stored ones are not repeated.
+        with open(path, "a") as more:
+            more.write(self._line(3))
+        out = StringIO()
+        call_command("ingest_articles", path, "--no-index", stdout=out)
+        self.assertIn("resuming after line 3", out.getvalue())
+        self.assertIn("ingested 1 rows", out.getvalue())
+        self.assertEqual(Article.objects.count(), 4)
+
+        call_command("ingest_articles", path, "--restart", "--no-index",
+                     stdout=StringIO())
+        self.assertEqual(Article.objects.count(), 8)
@@ -0,0 +1,217 @@
+
+import threading
+from collections import Counter
+from unittest.mock import patch
+
+from django.contrib.auth import get_user_model
+from django.core import mail
+from django.db import OperationalError, connection
+from django.db.backends.signals import connection_created
+from django.test import TestCase, TransactionTestCase
+from django.urls import reverse
+
+from news import moderation
+from news.models import Publisher, Article, ArticleChange, Newsletter
+
+User = get_user_model()
+
+EDITORS = 8
+ITEMS = 5
+
+
+class ModerationTransitionTests(TestCase):
+    """Tests for the conditional-UPDATE moderation service and views."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.journalist = User.objects.create_user(
+            "journ", "j@x.com", "pass", role=User.ROLE_JOURNALIST
+        )
+        cls.editor = User.objects.create_user(
+            "edit", "e@x.com", "pass", role=User.ROLE_EDITOR
+        )
+        cls.reader = User.objects.create_user(
+            "read", "r@x.com", "pass", role=User.ROLE_READER
+        )
+        cls.publisher = Publisher.objects.create(name="Daily")
+        cls.publisher.editors.add(cls.editor)
+        cls.reader.subscriptions_publishers.add(cls.publisher)
+
+    def setUp(self):
+        self.article = Article.objects.create(
+            title="T", body="B", author=self.journalist,
+            publisher=self.publisher,
+        )
+        mail.outbox = []
+
+    def test_only_the_first_transition_wins(self):
+        approved = moderation.approve(Article, self.article.pk)
+        self.assertEqual(approved.status, Article.STATUS_APPROVED)
+        self.assertIsNone(moderation.approve(Article, self.article.pk))
+        self.assertIsNone(moderation.deny(Article, self.article.pk))
+        self.assertIsNone(moderation.approve(Article, 999999))
+        self.assertEqual(len(mail.outbox), 1)
+        self.assertEqual(
+            list(ArticleChange.objects.filter(article_id=self.article.pk)
+                 .values_list("kind", flat=True)),
+            [ArticleChange.KIND_CREATED, ArticleChange.KIND_APPROVED],
+        )
+
+    def test_deny_does_not_notify(self):
+        self.assertIsNotNone(moderation.deny(Article, self.article.pk))
+        self.assertEqual(mail.outbox, [])
+        self.article.refresh_from_db()
+        self.assertEqual(self.article.status, Article.STATUS_DENIED)
+
+    def test_newsletter_transition_stamps_updated_at(self):
+        nl = Newsletter.objects.create(
+            title="NL", body="B", author=self.journalist,
+            publisher=self.publisher,
+        )
+        approved = moderation.approve(Newsletter, nl.pk)
+        self.assertGreater(approved.updated_at, nl.updated_at)
+        self.assertEqual(len(mail.outbox), 1)
+
+    def test_views_return_404_once_moderated(self):
+        self.client.login(username="edit", password="pass")
+        url = reverse('news:article-approve', args=[self.article.pk])
+        self.assertEqual(self.client.post(url).status_code, 302)
+        self.assertEqual(self.client.post(url).status_code, 404)
+        deny = reverse('news:article-deny', args=[self.article.pk])
+        self.assertEqual(self.client.post(deny).status_code, 404)
+        self.assertEqual(len(mail.outbox), 1)
+
+
+class ConcurrentModerationTests(TransactionTestCase):
+    """
+    Many editors race to approve or deny the same pending items from
+    separate threads (and so separate database connections). Each item must
+    change state once and notify its subscribers once.
+    """
+
+    def setUp(self):
+        journalist = User.objects.create_user(
+            "journ", "j@x.com", "pass", role=User.ROLE_JOURNALIST
+        )
+        publisher = Publisher.objects.create(name="Daily")
+        reader = User.objects.create_user(
+            "read", "r@x.com", "pass", role=User.ROLE_READER
+        )
+        reader.subscriptions_publishers.add(publisher)
+        self.articles = [
+            Article.objects.create(
+                title=f"A{i}", body="B", author=journalist,
+                publisher=publisher,
+            )
+            for i in range(ITEMS)
+        ]
+        self.newsletters = [
+            Newsletter.objects.create(
+                title=f"N{i}", body="B", author=journalist,
+                publisher=publisher,
+            )
+            for i in range(ITEMS)
+        ]
+        mail.outbox = []
+
+        self.events = Counter()
+        self.events_lock = threading.Lock()
+
+        # The receivers write the notification ledger after the transition
+        # has committed; retry those writes too, as a server would queue them.
+        send = moderation.status_changed.send
+        dispatch_lock = threading.Lock()
+
+        def send_when_unlocked(*args, **kwargs):
+            with dispatch_lock:
+                return self._attempt(send, *args, **kwargs)
+
+        patcher = patch.object(
+            moderation.status_changed, "send", send_when_unlocked)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        moderation.status_changed.connect(self._record_event)
+        self.addCleanup(
+            moderation.status_changed.disconnect, self._record_event)
+
+    def _record_event(self, sender, instance, new_status, **kwargs):
+        with self.events_lock:
+            self.events[(sender, instance.pk)] += 1
+
+    @staticmethod
+    def _attempt(func, *args, **kwargs):
+        # SQLite test databases refuse concurrent writers with "table is
+        # locked" instead of queueing them; the refused transaction changed
+        # nothing, so the editor simply clicks again.
+        while True:
+            try:
+                return func(*args, **kwargs)
+            except OperationalError as exc:
+                if "locked" not in str(exc):
+                    raise
+
+    @staticmethod
+    def _allow_dirty_reads(sender, connection, **kwargs):
+        # Stop shared-cache readers taking table locks, so only writers
+        # contend; see _attempt().
+        if connection.vendor == "sqlite":
+            connection.cursor().execute("PRAGMA read_uncommitted = 1")
+
+    def _race(self, model, items):
+        connection_created.connect(self._allow_dirty_reads)
+        self.addCleanup(
+            connection_created.disconnect, self._allow_dirty_reads)
+        barrier = threading.Barrier(EDITORS)
+        wins = Counter()
+        errors = []
+
+        def editor(n):
+            try:
+                barrier.wait()
+                verb = moderation.approve if n % 2 else moderation.deny
+                for item in items:
+                    if self._attempt(verb, model, item.pk) is not None:
+                        with self.events_lock:
+                            wins[item.pk] += 1
+            except Exception as exc:  # surfaced by the assertion below
+                errors.append(exc)
+            finally:
+                connection.close()
+
+        threads = [
+            threading.Thread(target=editor, args=(n,)) for n in range(EDITORS)
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(errors, [])
+        return wins
+
+    def test_articles_transition_exactly_once(self):
+        wins = self._race(Article, self.articles)
+        self.assertEqual(wins, Counter({a.pk: 1 for a in self.articles}))
+        self.assertEqual(
+            self.events, Counter({(Article, a.pk): 1 for a in self.articles}))
+
+        approved = Article.objects.filter(
+            status=Article.STATUS_APPROVED).count()
+        self.assertEqual(
+            Article.objects.filter(status=Article.STATUS_PENDING).count(), 0)
+        self.assertEqual(len(mail.outbox), approved)
+        self.assertEqual(
+            ArticleChange.objects.exclude(
+                kind=ArticleChange.KIND_CREATED).count(),
+            ITEMS,
+        )
+
+    def test_newsletters_transition_exactly_once(self):
+        wins = self._race(Newsletter, self.newsletters)
+        self.assertEqual(wins, Counter({n.pk: 1 for n in self.newsletters}))
+        self.assertEqual(
+            self.events,
+            Counter({(Newsletter, n.pk): 1 for n in self.newsletters}),
+        )
+        approved = Newsletter.objects.filter(
+            status=Newsletter.STATUS_APPROVED).count()
+        self.assertEqual(len(mail.outbox), approved)
@@ -0,0 +1,143 @@
+
+from datetime import timedelta
+from io import StringIO
+from unittest.mock import patch
+
+from django.contrib.auth import get_user_model
+from django.core import mail
+from django.core.management import call_command
+from django.test import TestCase
+from django.utils import timezone
+
+import news.api.signals  # noqa: F401  (connects the second approval path)
+from news import moderation, notifications
+from news.models import Publisher, Article, Newsletter, SentNotification
+
+User = get_user_model()
+
+
+@patch('news.notifications.requests.post')
+class NotificationLedgerTests(TestCase):
+    """Tests for the SentNotification de-duplication ledger."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.journalist = User.objects.create_user(
+            "journ", "j@x.com", "pw", role=User.ROLE_JOURNALIST
+        )
+        cls.publisher = Publisher.objects.create(name="Daily")
+        cls.readers = [
+            User.objects.create_user(
+                f"reader{i}", f"r{i}@x.com", "pw", role=User.ROLE_READER)
+            for i in range(3)
+        ]
+        for reader in cls.readers:
+            reader.subscriptions_publishers.add(cls.publisher)
+        # Follows both the publisher and the journalist.
+        cls.readers[0].subscriptions_journalists.add(cls.journalist)
+
+    def setUp(self):
+        self.article = Article.objects.create(
+            title="T", body="B", author=self.journalist,
+            publisher=self.publisher,
+        )
+        mail.outbox = []
+
+    def _recipients(self):
+        return sorted(addr for msg in mail.outbox for addr in msg.to)
+
+    def test_both_signal_paths_email_each_subscriber_once(self, x_post):
+        self.article.status = Article.STATUS_APPROVED
+        self.article.save()
+        self.assertEqual(self._recipients(),
+                         ["r0@x.com", "r1@x.com", "r2@x.com"])
+        x_post.assert_called_once()
+
+    def test_later_edits_do_not_resend(self, x_post):
+        self.article.status = Article.STATUS_APPROVED
+        self.article.save()
+        mail.outbox = []
+        self.article.title = "Edited"
+        self.article.save()
+        self.assertEqual(mail.outbox, [])
+        x_post.assert_called_once()
+
+    def test_moderation_path_shares_the_ledger(self, x_post):
+        moderation.approve(Article, self.article.pk)
+        self.assertEqual(len(mail.outbox), 3)
+        self.article.refresh_from_db()
+        self.article.status = Article.STATUS_APPROVED
+        self.article.save()
+        self.assertEqual(len(mail.outbox), 3)
+
+    def test_moderation_path_posts_to_x_once(self, x_post):
+        moderation.transition(
+            Article, self.article.pk, Article.STATUS_APPROVED)
+        x_post.assert_called_once_with(
+            "https://api.x.com/statuses/update", data={"status": "T"})
+        # A later save through the post_save path does not post again.
+        self.article.refresh_from_db()
+        self.article.title = "Edited"
+        self.article.save()
+        x_post.assert_called_once()
+
+    def test_newsletters_are_deduplicated(self, x_post):
+        nl = Newsletter.objects.create(
+            title="NL", body="B", author=self.journalist,
+            publisher=self.publisher,
+        )
+        notifications.claim_recipients(
+            nl, notifications.CHANNEL_EMAIL, self.readers[:1])
+        moderation.approve(Newsletter, nl.pk)
+        self.assertEqual(self._recipients(), ["r1@x.com", "r2@x.com"])
+
+    def test_claim_costs_a_fixed_number_of_queries(self, x_post):
+        ids = list(range(1, 101))
+        with self.assertNumQueries(3):
+            fresh = notifications.claim_recipient_ids(
+                self.article, notifications.CHANNEL_EMAIL, ids)
+        self.assertEqual(fresh, set(ids))
+        self.assertEqual(notifications.claim_recipient_ids(
+            self.article, notifications.CHANNEL_EMAIL, ids[:10] + [900]),
+            {900})
+        self.assertTrue(notifications.claim_broadcast(
+            self.article, notifications.CHANNEL_X))
+        self.assertFalse(notifications.claim_broadcast(
+            self.article, notifications.CHANNEL_X))
+
+    def test_concurrent_claim_only_returns_rows_it_inserted(self, x_post):
+        # Another sender claims recipients 1 and 2 after our SELECT but
+        # before our INSERT.
+        bulk_create = SentNotification.objects.bulk_create
+
+        def racing_bulk_create(objs, **kwargs):
+            bulk_create([
+                SentNotification(
+                    item_type=SentNotification.ITEM_ARTICLE,
+                    item_id=self.article.pk, transition="approved",
+                    channel=notifications.CHANNEL_EMAIL, recipient_id=pk,
+                    claim="other",
+                )
+                for pk in (1, 2)
+            ])
+            return bulk_create(objs, **kwargs)
+
+        with patch.object(SentNotification.objects, "bulk_create",
+                          side_effect=racing_bulk_create):
+            fresh = notifications.claim_recipient_ids(
+                self.article, notifications.CHANNEL_EMAIL, [1, 2, 3])
+        self.assertEqual(fresh, {3})
+
+    def test_prune_removes_old_rows(self, x_post):
+        notifications.claim_recipient_ids(
+            self.article, notifications.CHANNEL_EMAIL, [1, 2])
+        SentNotification.objects.filter(recipient_id=1).update(
+            sent_at=timezone.now() - timedelta(days=60))
+        self.assertEqual(notifications.prune(), 1)
+
+        SentNotification.objects.update(
+            sent_at=timezone.now() - timedelta(days=2))
+        out = StringIO()
+        call_command("prune_notifications", "--days", "1", stdout=out)
+        self.assertIn("pruned 1 ledger rows", out.getvalue())
+        self.assertFalse(SentNotification.objects.exists())
@@ -0,0 +1,164 @@
+
+from datetime import timedelta
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.management import call_command
+from django.core.signals import request_finished
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.db import connection
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APIClient
+
+from news import popularity
+from news.models import Publisher, Article, Newsletter, ViewCount
+
+User = get_user_model()
+
+
+class PopularityTests(TestCase):
+    """Tests for buffered read counts and the "most read" rankings."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.journalist = User.objects.create_user(
+            "journ", "j@x.com", "pw", role=User.ROLE_JOURNALIST
+        )
+        cls.reader = User.objects.create_user(
+            "reader", "r@x.com", "pw", role=User.ROLE_READER
+        )
+        cls.publisher = Publisher.objects.create(name="Daily")
+        cls.other_publisher = Publisher.objects.create(name="Other")
+        cls.articles = [
+            Article.objects.create(
+                title=f"Story {i}", body="B", author=cls.journalist,
+                publisher=cls.publisher if i < 2 else cls.other_publisher,
+                status=Article.STATUS_APPROVED,
+            )
+            for i in range(3)
+        ]
+        cls.pending = Article.objects.create(
+            title="Draft", body="B", author=cls.journalist,
+            publisher=cls.publisher,
+        )
+
+    def setUp(self):
+        cache.clear()
+        self.counter = popularity.view_counter
+        with self.counter._lock:
+            self.counter._pending.clear()
+
+    def _read(self, item, times):
+        for _ in range(times):
+            self.counter.hit(item)
+
+    def test_flushes_add_to_stored_hits(self):
+        self._read(self.articles[0], 3)
+        self.assertEqual(self.counter.flush(), 3)
+        self._read(self.articles[0], 2)
+        self.counter.flush()
+        row = ViewCount.objects.get(item_id=self.articles[0].pk)
+        self.assertEqual(row.hits, 5)
+        self.assertEqual(row.publisher_id, self.publisher.pk)
+        self.assertEqual(self.counter.pending(), 0)
+
+    def test_detail_view_does_not_write(self):
+        url = reverse('news:article-detail', args=[self.articles[0].pk])
+        with self.settings(NEWS_VIEWCOUNT_FLUSH_SECONDS=3600), \
+                CaptureQueriesContext(connection) as queries:
+            self.client.get(url)
+        self.assertFalse(any("news_viewcount" in q["sql"]
+                             for q in queries.captured_queries))
+        self.assertEqual(self.counter.pending(), 1)
+
+    @override_settings(NEWS_VIEWCOUNT_FLUSH_SECONDS=0)
+    def test_request_finished_flushes_when_due(self):
+        self._read(self.articles[1], 4)
+        request_finished.send(sender=self.__class__)
+        self.assertEqual(self.counter.pending(), 0)
+        self.assertEqual(ViewCount.objects.get().hits, 4)
+        # Rankings were stale, so the flush rebuilt them.
+        self.assertEqual(popularity.top("article")[0]["hits"], 4)
+
+    def test_rankings_are_ordered_per_publisher_and_approved_only(self):
+        self._read(self.articles[0], 1)
+        self._read(self.articles[1], 5)
+        self._read(self.articles[2], 3)
+        self._read(self.pending, 10)
+        self.counter.flush()
+        popularity.rebuild_rankings()
+
+        with self.assertNumQueries(0):
+            overall = popularity.top("article", "today")
+            daily = popularity.top("article", "week", self.publisher.pk)
+        self.assertEqual([e["id"] for e in overall],
+                         [self.articles[1].pk, self.articles[2].pk,
+                          self.articles[0].pk])
+        self.assertEqual(overall[0]["title"], "Story 1")
+        self.assertEqual([e["id"] for e in daily],
+                         [self.articles[1].pk, self.articles[0].pk])
+        self.assertEqual(popularity.top("newsletter"), [])
+
+    def test_old_buckets_leave_the_window_and_are_pruned(self):
+        now = timezone.now()
+        popularity.upsert_counts({
+            (ViewCount.ITEM_ARTICLE, self.articles[0].pk, self.publisher.pk,
+             popularity.bucket_for(now - timedelta(days=3))): 7,
+            (ViewCount.ITEM_ARTICLE, self.articles[1].pk, self.publisher.pk,
+             popularity.bucket_for(now - timedelta(days=9))): 9,
+        })
+        popularity.rebuild_rankings(now=now)
+        self.assertEqual(popularity.top("article", "today"), [])
+        self.assertEqual([e["id"] for e in popularity.top("article", "week")],
+                         [self.articles[0].pk])
+        self.assertEqual(ViewCount.objects.count(), 1)
+
+    def test_api_popular_ordering(self):
+        self.reader.subscriptions_publishers.add(
+            self.publisher, self.other_publisher)
+        self._read(self.articles[2], 2)
+        self._read(self.articles[0], 6)
+        self.counter.flush()
+        popularity.rebuild_rankings()
+
+        client = APIClient()
+        token = Token.objects.create(user=self.reader)
+        client.credentials(HTTP_AUTHORIZATION=f"Token {token.key}")
+        resp = client.get(reverse('api:articles-list'),
+                          {"ordering": "popular", "window": "week"})
+        self.assertEqual(resp.status_code, 200)
+        self.assertEqual([a["id"] for a in resp.json()],
+                         [self.articles[0].pk, self.articles[2].pk])
+
+        resp = client.get(reverse('api:articles-list'),
+                          {"ordering": "popular", "window": "year"})
+        self.assertEqual(resp.status_code, 400)
+
+    def test_list_pages_show_most_read(self):
+        nl = Newsletter.objects.create(
+            title="Popular letter", body="B", author=self.journalist,
+            publisher=self.publisher, status=Newsletter.STATUS_APPROVED,
+        )
+        self._read(nl, 2)
+        self._read(self.articles[1], 1)
+        self.counter.flush()
+        popularity.rebuild_rankings()
+
+        resp = self.client.get(reverse('news:article-list'))
+        self.assertEqual(resp.context["most_read_today"][0]["id"],
+                         self.articles[1].pk)
+        self.assertContains(resp, "Most read today")
+        resp = self.client.get(reverse('news:newsletter-list'))
+        self.assertContains(
+            resp, reverse('news:newsletter-detail', args=[nl.pk]))
+
+    def test_flush_command(self):
+        self._read(self.articles[0], 2)
+        out = StringIO()
+        call_command("flush_view_counts", stdout=out)
+        self.assertIn("flushed 2 reads; rankings rebuilt", out.getvalue())
+        self.assertEqual(len(popularity.top("article")), 1)
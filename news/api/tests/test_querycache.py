@@ -0,0 +1,119 @@
+
+from django.contrib.auth import get_user_model
+from django.contrib.auth.models import Group
+from django.core.cache import cache
+from django.db import transaction
+from django.test import TransactionTestCase
+from django.urls import reverse
+
+from rest_framework import status
+from rest_framework.test import APIClient
+from rest_framework.authtoken.models import Token
+
+from news.models import Publisher
+from news.querycache import QueryCache, query_cache
+
+User = get_user_model()
+
+
+class QueryCacheTests(TransactionTestCase):
+    """
+    Tests for the generation-keyed query cache. TransactionTestCase is used
+    because results read inside a transaction with pending writes are never
+    cached.
+    """
+
+    def setUp(self):
+        cache.clear()
+        query_cache.clear()
+        self.publisher = Publisher.objects.create(name="Daily News")
+        self.qc = QueryCache(max_entries=2)
+
+    def _publishers(self, qc=None):
+        return (qc or self.qc).get(
+            "publishers", Publisher.objects.all, depends_on=[Publisher]
+        )
+
+    def test_second_read_hits_l1(self):
+        self._publishers()
+        with self.assertNumQueries(0):
+            self.assertEqual(self._publishers(), [self.publisher])
+
+    def test_other_process_reads_from_l2(self):
+        self._publishers()
+        with self.assertNumQueries(0):
+            self.assertEqual(
+                self._publishers(QueryCache()), [self.publisher]
+            )
+
+    def test_save_and_delete_invalidate(self):
+        self._publishers()
+        other = Publisher.objects.create(name="Weekly")
+        self.assertEqual(len(self._publishers()), 2)
+        other.delete()
+        self.assertEqual(self._publishers(), [self.publisher])
+
+    def test_m2m_change_invalidates_both_sides(self):
+        journalists = Group.objects.create(name="Journalist")
+        user = User.objects.create_user("j1", "j1@x.com", "pw")
+        factory = User.objects.filter(groups__name="Journalist").all
+        self.assertEqual(
+            self.qc.get("journalists", factory, depends_on=[User, Group]), []
+        )
+        user.groups.add(journalists)
+        self.assertEqual(
+            self.qc.get("journalists", factory, depends_on=[User, Group]),
+            [user],
+        )
+
+    def test_last_login_stamp_does_not_invalidate(self):
+        User.objects.create_user("j1", "j1@x.com", "pw")
+        users = self.qc.get("users", User.objects.all, depends_on=[User])
+        users[0].save(update_fields=["last_login"])
+        with self.assertNumQueries(0):
+            self.qc.get("users", User.objects.all, depends_on=[User])
+
+    def test_l1_is_bounded_lru(self):
+        for name in ["a", "b", "a", "c"]:
+            self.qc.get(name, Publisher.objects.all, depends_on=[Publisher])
+        self.assertEqual(len(self.qc), 2)
+        self.assertEqual(list(self.qc._l1), ["a", "c"])
+
+    def test_uncommitted_writes_bypass_cache(self):
+        self._publishers()
+        with transaction.atomic():
+            Publisher.objects.create(name="Draft")
+            self.assertEqual(len(self._publishers()), 2)
+            with self.assertNumQueries(1):
+                self._publishers()
+        self.assertEqual(len(self._publishers()), 2)
+
+    def test_journalists_api_list_is_cached(self):
+        journalist = User.objects.create_user("journ", "j@x.com", "pw")
+        journalist.groups.add(
+            Group.objects.get_or_create(name="Journalist")[0])
+        user = User.objects.create_user("reader", "r@x.com", "pw")
+        client = APIClient()
+        client.credentials(
+            HTTP_AUTHORIZATION=f"Token {Token.objects.create(user=user).key}"
+        )
+        url = reverse('api:journalists-list')
+        client.get(url)
+        # only the token lookup remains
+        with self.assertNumQueries(1):
+            resp = client.get(url)
+        self.assertEqual([j['username'] for j in resp.data], ["journ"])
+
+    def test_publishers_api_list_is_cached(self):
+        user = User.objects.create_user("reader", "r@x.com", "pw")
+        client = APIClient()
+        client.credentials(
+            HTTP_AUTHORIZATION=f"Token {Token.objects.create(user=user).key}"
+        )
+        url = reverse('api:publishers-list')
+        client.get(url)
+        # only the token lookup remains
+        with self.assertNumQueries(1):
+            resp = client.get(url)
+        self.assertEqual(resp.status_code, status.HTTP_200_OK)
+        self.assertEqual(resp.data[0]['name'], "Daily News")
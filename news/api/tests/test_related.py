@@ -0,0 +1,169 @@
+
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APIClient
+
+from news import moderation, related
+from news.models import Publisher, Article, ArticleVector, RelatedIndexQueue
+
+User = get_user_model()
+
+TEXTS = {
+    "rates": ("Central bank raises interest rates",
+              "The central bank raised interest rates again to fight "
+              "inflation, and markets expect further rate rises."),
+    "inflation": ("Inflation pushes bank toward higher rates",
+                  "Rising inflation leaves the central bank little choice "
+                  "but to keep interest rates high."),
+    "football": ("Local football club wins cup final",
+                 "The football club celebrated a dramatic cup final win "
+                 "with fans in the city centre."),
+    "league": ("Football league announces new season fixtures",
+               "Fans of every club can now plan for the football season "
+               "after the league published its fixtures."),
+}
+
+
+@override_settings(NEWS_RELATED_SIZE=2, NEWS_RELATED_CHUNK_SIZE=2)
+class RelatedArticleTests(TestCase):
+    """Tests for the related-articles vector index."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.journalist = User.objects.create_user(
+            "journ", "j@x.com", "pw", role=User.ROLE_JOURNALIST
+        )
+        cls.publisher = Publisher.objects.create(name="Daily")
+
+    def _article(self, key, approved=True, index=True):
+        title, body = TEXTS[key]
+        article = Article.objects.create(
+            title=title, body=body, author=self.journalist,
+            publisher=self.publisher,
+            status=Article.STATUS_APPROVED if approved
+            else Article.STATUS_PENDING,
+        )
+        if index:
+            related.index_pending()
+        return article
+
+    def _ids(self, article):
+        return related.related_ids(article.pk)
+
+    def test_encode_is_normalised_and_packs_round_trip(self):
+        indices, values = related.encode(*TEXTS["rates"])
+        self.assertAlmostEqual(float((values ** 2).sum()), 1.0, places=5)
+        back = related.unpack(related.pack(indices, values))
+        self.assertEqual(back[0].tolist(), indices.tolist())
+        self.assertEqual(back[1].tolist(), values.tolist())
+
+    def test_approval_indexes_incrementally(self):
+        rates = self._article("rates")
+        football = self._article("football")
+        league = self._article("league")
+        self.assertEqual(self._ids(football), [league.pk])
+
+        pending = self._article("inflation", approved=False)
+        self.assertFalse(ArticleVector.objects.filter(
+            article_id=pending.pk).exists())
+        # Approving only queues the article.
+        with self.assertNumQueries(1):
+            related.queue_articles([pending.pk])
+        moderation.approve(Article, pending.pk)
+        self.assertFalse(ArticleVector.objects.filter(
+            article_id=pending.pk).exists())
+        self.assertEqual(related.index_pending(), 1)
+        self.assertFalse(RelatedIndexQueue.objects.exists())
+        # The new article was spliced into its neighbour's list.
+        self.assertEqual(self._ids(pending)[0], rates.pk)
+        self.assertEqual(self._ids(rates)[0], pending.pk)
+
+    def test_incremental_matches_rebuild(self):
+        articles = [self._article(key) for key in TEXTS]
+        incremental = {a.pk: ArticleVector.objects.get(pk=a.pk).related
+                       for a in articles}
+        self.assertEqual(related.rebuild_index(chunk_size=3), 4)
+        rebuilt = {a.pk: ArticleVector.objects.get(pk=a.pk).related
+                   for a in articles}
+        self.assertEqual(incremental, rebuilt)
+
+    def test_batched_indexing_matches_rebuild(self):
+        articles = [self._article(key, index=False) for key in TEXTS]
+        self.assertEqual(related.index_pending(batch_size=3), 4)
+        batched = {a.pk: ArticleVector.objects.get(pk=a.pk).related
+                   for a in articles}
+        related.rebuild_index(chunk_size=3)
+        rebuilt = {a.pk: ArticleVector.objects.get(pk=a.pk).related
+                   for a in articles}
+        self.assertEqual(batched, rebuilt)
+
+    def test_queued_articles_that_lost_approval_are_skipped(self):
+        article = self._article("rates", index=False)
+        Article.objects.filter(pk=article.pk).update(
+            status=Article.STATUS_PENDING)
+        self.assertEqual(related.index_pending(), 0)
+        self.assertFalse(ArticleVector.objects.exists())
+        self.assertFalse(RelatedIndexQueue.objects.exists())
+
+    def test_unapproved_and_deleted_articles_drop_out(self):
+        rates = self._article("rates")
+        inflation = self._article("inflation")
+        self.assertEqual([a.pk for a in related.related_articles(rates.pk)],
+                         [inflation.pk])
+        inflation.status = Article.STATUS_PENDING
+        inflation.save()
+        self.assertEqual(related.related_articles(rates.pk), [])
+        rates.delete()
+        self.assertFalse(ArticleVector.objects.exists())
+
+    def test_detail_page_reads_stored_list(self):
+        rates = self._article("rates")
+        inflation = self._article("inflation")
+        resp = self.client.get(reverse('news:article-detail', args=[rates.pk]))
+        self.assertEqual(resp.context["related_articles"], [inflation])
+        self.assertContains(resp, "Related articles")
+
+    def test_api_related_respects_visibility(self):
+        rates = self._article("rates")
+        inflation = self._article("inflation")
+        other = Publisher.objects.create(name="Other")
+        Article.objects.filter(pk=inflation.pk).update(publisher=other)
+
+        reader = User.objects.create_user(
+            "reader", "r@x.com", "pw", role=User.ROLE_READER)
+        reader.subscriptions_publishers.add(self.publisher)
+        client = APIClient()
+        token = Token.objects.create(user=reader)
+        client.credentials(HTTP_AUTHORIZATION=f"Token {token.key}")
+        url = reverse('api:articles-related', args=[rates.pk])
+        self.assertEqual(client.get(url).json(), [])
+
+        reader.subscriptions_publishers.add(other)
+        self.assertEqual([a["id"] for a in client.get(url).json()],
+                         [inflation.pk])
+
+    def test_rebuild_drops_stale_rows(self):
+        rates = self._article("rates")
+        inflation = self._article("inflation")
+        Article.objects.filter(pk=inflation.pk).update(
+            status=Article.STATUS_PENDING)
+        self.assertEqual(related.rebuild_index(chunk_size=1), 1)
+        self.assertEqual(list(ArticleVector.objects.values_list(
+            "article_id", flat=True)), [rates.pk])
+        self.assertEqual(self._ids(rates), [])
+
+    def test_commands(self):
+        self._article("football", index=False)
+        out = StringIO()
+        call_command("index_related", "--batch-size", "1", stdout=out)
+        self.assertIn("indexed 1 articles", out.getvalue())
+        ArticleVector.objects.all().delete()
+        out = StringIO()
+        call_command("rebuild_related", "--chunk-size", "1", stdout=out)
+        self.assertIn("indexed 1 articles", out.getvalue())
+        self.assertEqual(ArticleVector.objects.count(), 1)
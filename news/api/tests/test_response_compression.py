@@ -0,0 +1,115 @@
+
+import gzip
+import unittest
+import zlib
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.management import call_command
+from django.http import HttpResponse, StreamingHttpResponse
+from django.test import RequestFactory, TestCase, override_settings
+from django.urls import reverse
+
+from news.middleware import (
+    BrotliEncoder,
+    CompressionMiddleware,
+    GzipEncoder,
+    brotli,
+    negotiate,
+)
+from news.models import Publisher, Article
+
+User = get_user_model()
+
+
+class ResponseCompressionTests(TestCase):
+    """Tests for the gzip/brotli response compression middleware."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.journalist = User.objects.create_user(
+            "journ", "j@x.com", "pw", role=User.ROLE_JOURNALIST
+        )
+        cls.publisher = Publisher.objects.create(name="Daily")
+        cls.article = Article.objects.create(
+            title="Long story", body="Paragraph of text. " * 300,
+            author=cls.journalist, publisher=cls.publisher,
+            status=Article.STATUS_APPROVED,
+        )
+
+    def setUp(self):
+        cache.clear()
+
+    def _process(self, response, accept="gzip"):
+        request = RequestFactory().get("/", HTTP_ACCEPT_ENCODING=accept)
+        return CompressionMiddleware(lambda r: response)(request)
+
+    def test_negotiation(self):
+        both = [BrotliEncoder, GzipEncoder]
+        self.assertIs(negotiate("gzip, deflate, br", both), BrotliEncoder)
+        self.assertIs(negotiate("br;q=0.5, gzip", both), GzipEncoder)
+        self.assertIs(negotiate("br;q=0, *", both), GzipEncoder)
+        self.assertIsNone(negotiate("identity", both))
+        self.assertIsNone(negotiate("gzip;q=0", [GzipEncoder]))
+        self.assertIsNone(negotiate("", both))
+
+    def test_article_page_is_gzipped(self):
+        resp = self.client.get(self.article.get_absolute_url(),
+                               HTTP_ACCEPT_ENCODING="gzip")
+        self.assertEqual(resp["Content-Encoding"], "gzip")
+        self.assertIn("Accept-Encoding", resp["Vary"])
+        self.assertEqual(int(resp["Content-Length"]), len(resp.content))
+        self.assertIn(b"Long story", gzip.decompress(resp.content))
+
+        plain = self.client.get(self.article.get_absolute_url())
+        self.assertFalse(plain.has_header("Content-Encoding"))
+
+    def test_small_and_unlisted_responses_are_left_alone(self):
+        small = self._process(HttpResponse("tiny"))
+        self.assertFalse(small.has_header("Content-Encoding"))
+        self.assertIn("Accept-Encoding", small["Vary"])
+
+        image = self._process(
+            HttpResponse(b"x" * 4096, content_type="image/png"))
+        self.assertFalse(image.has_header("Content-Encoding"))
+        self.assertFalse(image.has_header("Vary"))
+
+        with override_settings(NEWS_COMPRESS_MIN_BYTES=2):
+            self.assertEqual(self._process(
+                HttpResponse("tiny " * 10))["Content-Encoding"], "gzip")
+
+    def test_streamed_responses_are_compressed_chunk_wise(self):
+        chunks = [f"line {n}\n".encode() * 50 for n in range(5)]
+        resp = self._process(StreamingHttpResponse(
+            iter(chunks), content_type="application/x-ndjson"))
+        self.assertEqual(resp["Content-Encoding"], "gzip")
+        self.assertFalse(resp.has_header("Content-Length"))
+
+        decoder = zlib.decompressobj(31)
+        pieces = list(resp.streaming_content)
+        # Every chunk is decodable as soon as it arrives.
+        for chunk, piece in zip(chunks, pieces):
+            self.assertEqual(decoder.decompress(piece), chunk)
+        self.assertEqual(gzip.decompress(b"".join(pieces)), b"".join(chunks))
+
+    def test_etags_become_weak_and_still_match(self):
+        url = reverse('news:publisher-feed', args=[self.publisher.pk, 'rss'])
+        first = self.client.get(url, HTTP_ACCEPT_ENCODING="gzip")
+        self.assertEqual(first["Content-Encoding"], "gzip")
+        self.assertTrue(first["ETag"].startswith('W/"'))
+        resp = self.client.get(url, HTTP_ACCEPT_ENCODING="gzip",
+                               HTTP_IF_NONE_MATCH=first["ETag"])
+        self.assertEqual(resp.status_code, 304)
+
+    @unittest.skipIf(brotli is None, "brotli is not installed")
+    def test_brotli_is_preferred_when_installed(self):
+        resp = self._process(HttpResponse("text " * 500), "gzip, br")
+        self.assertEqual(resp["Content-Encoding"], "br")
+        self.assertEqual(brotli.decompress(resp.content), b"text " * 500)
+
+    def test_benchmark_command(self):
+        out = StringIO()
+        call_command("benchmark_response_compression", "--repeat", "1",
+                     stdout=out)
+        self.assertIn("gzip:6", out.getvalue())
@@ -0,0 +1,239 @@
+
+import threading
+from datetime import timedelta
+
+from django.contrib.auth import get_user_model
+from django.db import OperationalError, connection
+from django.test import TestCase, TransactionTestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from news import moderation, review_queue
+from news.models import Publisher, Article, Newsletter
+
+User = get_user_model()
+
+
+def make_article(journalist, publisher, minutes_ago):
+    art = Article.objects.create(
+        title=f"{publisher.name} {minutes_ago}", body="B",
+        author=journalist, publisher=publisher,
+    )
+    Article.objects.filter(pk=art.pk).update(
+        created_at=timezone.now() - timedelta(minutes=minutes_ago))
+    return art
+
+
+@override_settings(NEWS_REVIEW_BATCH_SIZE=3)
+class ReviewQueueTests(TestCase):
+    """Tests for leased claiming, expiry and keyset paging of reviews."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.journalist = User.objects.create_user(
+            "journ", "j@x.com", "pass", role=User.ROLE_JOURNALIST
+        )
+        cls.alice = User.objects.create_user(
+            "alice", "a@x.com", "pass", role=User.ROLE_EDITOR
+        )
+        cls.bob = User.objects.create_user(
+            "bob", "b@x.com", "pass", role=User.ROLE_EDITOR
+        )
+        cls.mine = Publisher.objects.create(name="Mine")
+        cls.other = Publisher.objects.create(name="Other")
+        cls.mine.editors.add(cls.alice, cls.bob)
+        cls.other.editors.add(cls.bob)
+
+    def setUp(self):
+        self.articles = [
+            make_article(self.journalist, self.mine, minutes_ago=10 - i)
+            for i in range(5)
+        ]
+        self.foreign = make_article(self.journalist, self.other, 60)
+
+    def _claimed(self, editor):
+        items, _ = review_queue.claimed_page(Article, editor, page_size=50)
+        return [a.pk for a in items]
+
+    def test_claim_is_scoped_batched_and_oldest_first(self):
+        self.assertEqual(review_queue.claim(Article, self.alice), 3)
+        self.assertEqual(self._claimed(self.alice),
+                         [a.pk for a in self.articles[:3]])
+        self.assertEqual(review_queue.waiting_count(Article, self.alice), 2)
+        self.assertNotIn(self.foreign.pk, self._claimed(self.alice))
+
+    def test_editors_never_share_items(self):
+        review_queue.claim(Article, self.alice)
+        review_queue.claim(Article, self.bob)
+        self.assertEqual(self._claimed(self.bob),
+                         [self.foreign.pk] + [a.pk for a in self.articles[3:]])
+        self.assertEqual(review_queue.claim(Article, self.alice), 0)
+
+    def test_expired_leases_return_to_the_queue(self):
+        review_queue.claim(Article, self.alice)
+        Article.objects.filter(claimed_by=self.alice).update(
+            claimed_until=timezone.now() - timedelta(seconds=1))
+        self.assertEqual(self._claimed(self.alice), [])
+        review_queue.claim(Article, self.bob, limit=10)
+        self.assertEqual(len(self._claimed(self.bob)), 6)
+
+    def test_claim_extends_held_leases(self):
+        review_queue.claim(Article, self.alice)
+        Article.objects.filter(claimed_by=self.alice).update(
+            claimed_until=timezone.now() + timedelta(seconds=5))
+        review_queue.claim(Article, self.alice)
+        soonest = Article.objects.filter(claimed_by=self.alice) \
+            .order_by("claimed_until").first().claimed_until
+        self.assertGreater(soonest, timezone.now() + timedelta(minutes=5))
+
+    def test_release_and_moderation_clear_the_lease(self):
+        review_queue.claim(Article, self.alice)
+        first, second = self.articles[:2]
+        self.assertFalse(review_queue.release(Article, self.bob, first.pk))
+        self.assertTrue(review_queue.release(Article, self.alice, first.pk))
+        moderation.approve(Article, second.pk)
+        second.refresh_from_db()
+        self.assertIsNone(second.claimed_by)
+        self.assertIsNone(second.claimed_until)
+        self.assertEqual(self._claimed(self.alice), [self.articles[2].pk])
+
+    def test_keyset_pages(self):
+        review_queue.claim(Article, self.alice, limit=5)
+        page, cursor = review_queue.claimed_page(
+            Article, self.alice, page_size=2)
+        seen = [a.pk for a in page]
+        while cursor:
+            page, cursor = review_queue.claimed_page(
+                Article, self.alice, review_queue.decode_cursor(cursor), 2)
+            seen += [a.pk for a in page]
+        self.assertEqual(seen, [a.pk for a in self.articles])
+        with self.assertRaises(ValueError):
+            review_queue.decode_cursor("bogus")
+
+    def test_dashboard_claim_and_release(self):
+        url = reverse('news:pending_articles')
+        self.client.login(username="alice", password="pass")
+        self.assertEqual(
+            self.client.post(url, {'action': 'claim'}).status_code, 302)
+        resp = self.client.get(url)
+        self.assertEqual(
+            [a.pk for a in resp.context['pending_articles']],
+            [a.pk for a in self.articles[:3]],
+        )
+        self.assertEqual(resp.context['waiting'], 2)
+        self.client.post(
+            url, {'action': 'release', 'pk': self.articles[0].pk})
+        resp = self.client.get(url)
+        self.assertEqual(len(resp.context['pending_articles']), 2)
+        self.assertEqual(
+            self.client.get(url, {'after': '!!'}).status_code, 404)
+
+    def test_newsletter_queue_includes_publisherless_items(self):
+        nl = Newsletter.objects.create(
+            title="NL", body="B", author=self.journalist)
+        self.client.login(username="alice", password="pass")
+        url = reverse('news:pending_newsletters')
+        self.client.post(url, {'action': 'claim'})
+        resp = self.client.get(url)
+        self.assertEqual(
+            [n.pk for n in resp.context['pending_newsletters']], [nl.pk])
+
+    def test_moderation_respects_foreign_leases(self):
+        review_queue.claim(Article, self.bob)
+        held = self.articles[0]
+        self.assertRaises(moderation.LeaseHeld, moderation.approve,
+                          Article, held.pk, editor=self.alice)
+
+        self.client.login(username="alice", password="pass")
+        url = reverse('news:article-approve', args=[held.pk])
+        self.assertEqual(self.client.post(url).status_code, 409)
+        deny = reverse('news:article-deny', args=[held.pk])
+        self.assertEqual(self.client.post(deny).status_code, 409)
+        held.refresh_from_db()
+        self.assertEqual(held.status, Article.STATUS_PENDING)
+
+        # Unleased items are fair game, and expired leases no longer count.
+        free = self.articles[4]
+        self.assertEqual(self.client.post(reverse(
+            'news:article-approve', args=[free.pk])).status_code, 302)
+        Article.objects.filter(pk=held.pk).update(
+            claimed_until=timezone.now() - timedelta(seconds=1))
+        self.assertEqual(self.client.post(url).status_code, 302)
+
+    def test_lease_holder_can_moderate(self):
+        review_queue.claim(Article, self.bob)
+        held = self.articles[0]
+        self.assertIsNotNone(
+            moderation.deny(Article, held.pk, editor=self.bob))
+
+    def test_moderation_is_limited_to_the_editors_scope(self):
+        self.client.login(username="alice", password="pass")
+        url = reverse('news:article-approve', args=[self.foreign.pk])
+        self.assertEqual(self.client.post(url).status_code, 403)
+        self.foreign.refresh_from_db()
+        self.assertEqual(self.foreign.status, Article.STATUS_PENDING)
+        self.assertIsNotNone(
+            moderation.approve(Article, self.foreign.pk, editor=self.bob))
+
+    def test_dashboard_is_for_editors_only(self):
+        self.client.login(username="journ", password="pass")
+        resp = self.client.get(reverse('news:pending_articles'))
+        self.assertEqual(resp.status_code, 403)
+
+
+class ConcurrentClaimTests(TransactionTestCase):
+    """Editors claiming at the same time receive disjoint batches."""
+
+    EDITORS = 6
+
+    def setUp(self):
+        journalist = User.objects.create_user(
+            "journ", "j@x.com", "pass", role=User.ROLE_JOURNALIST
+        )
+        publisher = Publisher.objects.create(name="Daily")
+        self.editors = [
+            User.objects.create_user(
+                f"edit{i}", f"e{i}@x.com", "pass", role=User.ROLE_EDITOR)
+            for i in range(self.EDITORS)
+        ]
+        publisher.editors.add(*self.editors)
+        for i in range(20):
+            make_article(journalist, publisher, minutes_ago=i)
+
+    def test_concurrent_claims_are_disjoint(self):
+        barrier = threading.Barrier(self.EDITORS)
+        errors = []
+
+        def editor(user):
+            try:
+                barrier.wait()
+                while True:
+                    # SQLite refuses concurrent writers instead of queueing
+                    # them; the refused transaction was rolled back.
+                    try:
+                        review_queue.claim(Article, user, limit=5)
+                        return
+                    except OperationalError as exc:
+                        if "locked" not in str(exc):
+                            raise
+            except Exception as exc:  # surfaced by the assertion below
+                errors.append(exc)
+            finally:
+                connection.close()
+
+        threads = [threading.Thread(target=editor, args=(user,))
+                   for user in self.editors]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(errors, [])
+
+        held = [
+            {a.pk for a in review_queue.claimed_page(
+                Article, user, page_size=50)[0]}
+            for user in self.editors
+        ]
+        self.assertEqual(sum(len(h) for h in held), 20)
+        self.assertEqual(len(set().union(*held)), 20)
+        self.assertTrue(all(len(h) <= 5 for h in held))
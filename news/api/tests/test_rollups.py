@@ -0,0 +1,188 @@
+
+from datetime import datetime
+
+from django.contrib.auth import get_user_model
+from django.test import TestCase
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APIClient
+
+from news import archive, moderation, rollups
+from news.ingest import Ingester
+from news.models import (
+    Publisher,
+    Article,
+    ArchivedArticle,
+    MonthRollup,
+    Newsletter,
+)
+
+User = get_user_model()
+
+
+def moment(year, month, day=15):
+    return timezone.make_aware(datetime(year, month, day, 12))
+
+
+class MonthRollupTests(TestCase):
+    """Tests for month rollups and the date archive pages."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.journalist = User.objects.create_user(
+            "journ", "j@x.com", "pw", role=User.ROLE_JOURNALIST
+        )
+        cls.reader = User.objects.create_user(
+            "reader", "r@x.com", "pw", role=User.ROLE_READER
+        )
+        cls.publisher = Publisher.objects.create(name="Daily")
+        cls.other = Publisher.objects.create(name="Other")
+        cls.reader.subscriptions_publishers.add(cls.publisher)
+
+    def _article(self, when, status=Article.STATUS_APPROVED, publisher=None,
+                 title="Story"):
+        article = Article.objects.create(
+            title=title, body="B", author=self.journalist,
+            publisher=publisher or self.publisher, status=status,
+        )
+        # Only the created_at column moves; the rollup follows via rebuild
+        # in tests that need it.
+        Article.objects.filter(pk=article.pk).update(created_at=when)
+        article.refresh_from_db()
+        return article
+
+    def _counts(self, kind=MonthRollup.KIND_ARTICLE):
+        return {
+            (r.publisher_id, r.month.strftime("%Y-%m")): r.count
+            for r in MonthRollup.objects.filter(kind=kind) if r.count
+        }
+
+    def test_signals_keep_counts_current(self):
+        now = timezone.localdate().strftime("%Y-%m")
+        article = Article.objects.create(
+            title="A", body="B", author=self.journalist,
+            publisher=self.publisher, status=Article.STATUS_APPROVED,
+        )
+        pending = Article.objects.create(
+            title="P", body="B", author=self.journalist,
+            publisher=self.publisher,
+        )
+        self.assertEqual(self._counts(), {(self.publisher.pk, now): 1})
+
+        moderation.approve(Article, pending.pk)
+        self.assertEqual(self._counts(), {(self.publisher.pk, now): 2})
+
+        article.publisher = self.other
+        article.save()
+        self.assertEqual(self._counts(), {(self.publisher.pk, now): 1,
+                                          (self.other.pk, now): 1})
+
+        article.status = Article.STATUS_DENIED
+        article.save()
+        Article.objects.get(pk=pending.pk).delete()
+        self.assertEqual(self._counts(), {})
+
+    def test_newsletter_counts(self):
+        letter = Newsletter.objects.create(
+            title="N", body="B", author=self.journalist)
+        moderation.approve(Newsletter, letter.pk)
+        now = timezone.localdate().strftime("%Y-%m")
+        self.assertEqual(self._counts(MonthRollup.KIND_NEWSLETTER),
+                         {(None, now): 1})
+
+    def test_rebuild_matches_and_counts_archived_items(self):
+        self._article(moment(2020, 1))
+        self._article(moment(2020, 1), publisher=self.other)
+        self._article(moment(2020, 3))
+        self._article(moment(2020, 3), status=Article.STATUS_PENDING)
+        archive.archive(Article)
+        self.assertEqual(ArchivedArticle.objects.count(), 3)
+        self.assertEqual(rollups.rebuild(), 3)
+        self.assertEqual(self._counts(), {
+            (self.publisher.pk, "2020-01"): 1,
+            (self.other.pk, "2020-01"): 1,
+            (self.publisher.pk, "2020-03"): 1,
+        })
+        self.assertEqual(
+            [(m.month, n) for m, n in rollups.months(Article)],
+            [(3, 1), (1, 2)])
+
+    def test_month_page(self):
+        for n in range(12):
+            self._article(moment(2021, 5, 1 + n), title=f"May {n}")
+        self._article(moment(2021, 4), title="April story")
+        self._article(moment(2021, 6), status=Article.STATUS_PENDING,
+                      title="Pending story")
+        archive.archive(Article, limit=3)
+        rollups.rebuild()
+
+        url = reverse('news:article-month', args=[2021, 5])
+        resp = self.client.get(url)
+        self.assertEqual(resp.status_code, 200)
+        page = resp.context["page_obj"]
+        self.assertEqual(page.paginator.count, 12)
+        self.assertEqual([a.title for a in page.object_list],
+                         [f"May {n}" for n in range(11, 1, -1)])
+        self.assertEqual(resp.context["older_month"].month, 4)
+        self.assertIsNone(resp.context["newer_month"])
+        self.assertNotContains(resp, "Pending story")
+
+        resp = self.client.get(url, {"page": 2})
+        # The oldest ones were archived and still show up.
+        self.assertEqual([a.title for a in resp.context["page_obj"]],
+                         ["May 1", "May 0"])
+        self.assertIsInstance(
+            resp.context["page_obj"].object_list[-1], ArchivedArticle)
+
+        resp = self.client.get(url, {"publisher": self.other.pk})
+        self.assertEqual(resp.context["page_obj"].paginator.count, 0)
+        self.assertEqual(self.client.get(reverse(
+            'news:article-month', args=[2021, 13])).status_code, 404)
+
+    def test_index_redirects_to_newest_month(self):
+        self._article(moment(2019, 8))
+        rollups.rebuild()
+        resp = self.client.get(reverse('news:article-archive'))
+        self.assertRedirects(
+            resp, reverse('news:article-month', args=[2019, 8]))
+        resp = self.client.get(reverse('news:newsletter-archive'))
+        today = timezone.localdate()
+        self.assertRedirects(resp, reverse(
+            'news:newsletter-month', args=[today.year, today.month]))
+
+    def test_ingest_updates_rollups(self):
+        Ingester(index_related=False).run([
+            '{"title": "Wire", "body": "B", "publisher": "Daily", '
+            '"author": "journ", "created_at": "2018-02-03T04:05:06Z"}\n'
+        ])
+        self.assertEqual(self._counts(),
+                         {(self.publisher.pk, "2018-02"): 1})
+
+    def test_api_month_filter_and_months(self):
+        self._article(moment(2022, 7), title="July")
+        self._article(moment(2022, 8), title="August")
+        self._article(moment(2022, 7), publisher=self.other, title="Hidden")
+        archive.archive(Article, limit=1)
+        rollups.rebuild()
+        client = APIClient()
+        token = Token.objects.create(user=self.reader)
+        client.credentials(HTTP_AUTHORIZATION=f"Token {token.key}")
+
+        resp = client.get(reverse('api:articles-list'),
+                          {"year": 2022, "month": 7})
+        self.assertEqual([a["title"] for a in resp.json()], ["July"])
+        resp = client.get(reverse('api:articles-list'),
+                          {"year": 2022, "month": 13})
+        self.assertEqual(resp.status_code, 400)
+
+        resp = client.get(reverse('api:months', args=["articles"]))
+        self.assertEqual(resp.json(), [
+            {"year": 2022, "month": 8, "count": 1},
+            {"year": 2022, "month": 7, "count": 2},
+        ])
+        resp = client.get(reverse('api:months', args=["articles"]),
+                          {"publisher": self.other.pk})
+        self.assertEqual(resp.json(), [{"year": 2022, "month": 7, "count": 1}])
+        self.assertEqual(client.get(reverse(
+            'api:months', args=["nope"])).status_code, 404)
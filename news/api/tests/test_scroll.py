@@ -0,0 +1,103 @@
+
+from datetime import timedelta
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import TestCase
+from django.urls import reverse
+from django.utils import timezone
+
+from news.models import Publisher, Article, Newsletter
+
+User = get_user_model()
+
+
+class InfiniteScrollTests(TestCase):
+    """Tests for the card fragments behind infinite scroll."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.journalist = User.objects.create_user(
+            "journ", "j@x.com", "pw", role=User.ROLE_JOURNALIST
+        )
+        cls.editor = User.objects.create_user(
+            "edit", "e@x.com", "pw", role=User.ROLE_EDITOR
+        )
+        cls.publisher = Publisher.objects.create(name="Daily")
+        now = timezone.now()
+        cls.articles = []
+        for n in range(25):
+            article = Article.objects.create(
+                title=f"Story {n:02d}", body="B", author=cls.journalist,
+                publisher=cls.publisher, status=Article.STATUS_APPROVED,
+            )
+            # Two articles share every timestamp, so pk breaks the ties.
+            Article.objects.filter(pk=article.pk).update(
+                created_at=now - timedelta(minutes=n // 2))
+            cls.articles.append(article)
+        Article.objects.create(
+            title="Pending", body="B", author=cls.journalist,
+            publisher=cls.publisher,
+        )
+
+    def setUp(self):
+        cache.clear()
+
+    def _titles(self, resp):
+        return [line.strip() for line in resp.content.decode().splitlines()
+                if "card-title" in line]
+
+    def test_fragments_continue_the_list_page(self):
+        page = self.client.get(reverse('news:article-list'))
+        cursor = page.context["next_cursor"]
+        self.assertContains(page, "data-scroll-next")
+        self.assertContains(page, "js/infinite_scroll.js")
+
+        seen = [a.title for a in page.context["articles"]]
+        url = f"{reverse('news:article-more')}?after={cursor}"
+        while url:
+            resp = self.client.get(url)
+            self.assertEqual(resp.status_code, 200)
+            self.assertNotContains(resp, "<html")
+            seen += [t.split(">")[1].split("<")[0]
+                     for t in self._titles(resp)]
+            url = resp.get("X-Next-Url")
+
+        expected = [a.title for a in sorted(
+            Article.objects.filter(status=Article.STATUS_APPROVED),
+            key=lambda a: (a.created_at, a.pk), reverse=True)]
+        self.assertEqual(seen, expected)
+
+    def test_public_fragments_are_cached(self):
+        cursor = self.client.get(
+            reverse('news:article-list')).context["next_cursor"]
+        url = f"{reverse('news:article-more')}?after={cursor}"
+        first = self.client.get(url)
+        self.assertIn("public", first["Cache-Control"])
+        self.assertIn("max-age=60", first["Cache-Control"])
+        with self.assertNumQueries(0):
+            second = self.client.get(url)
+        self.assertEqual(second.content, first.content)
+        self.assertEqual(second["X-Next-Url"], first["X-Next-Url"])
+
+    def test_editor_newsletter_fragments_are_private(self):
+        for n in range(12):
+            Newsletter.objects.create(
+                title=f"Letter {n}", body="B", author=self.journalist,
+                publisher=self.publisher,
+            )
+        self.client.force_login(self.editor)
+        page = self.client.get(reverse('news:newsletter-list'))
+        cursor = page.context["next_cursor"]
+        resp = self.client.get(
+            reverse('news:newsletter-more'), {"after": cursor})
+        self.assertIn("private", resp["Cache-Control"])
+        # Editors also see pending newsletters.
+        self.assertContains(resp, "Letter 1")
+        self.assertNotIn("X-Next-Url", resp)
+
+    def test_bad_cursor_is_404(self):
+        resp = self.client.get(reverse('news:article-more'), {"after": "nope"})
+        self.assertEqual(resp.status_code, 404)
+        resp = self.client.get(reverse('news:article-more'))
+        self.assertEqual(resp.status_code, 404)
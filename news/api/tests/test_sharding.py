@@ -0,0 +1,221 @@
+
+from datetime import timedelta
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.db import connections
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from rest_framework.authtoken.models import Token
+
+from news import archive, review_queue
+from news.models import (
+    ArchivedArticle, Publisher, Article, ArticleChange, Newsletter
+)
+from news.sharding import merge_shards, shard_aliases, shard_for_publisher
+
+User = get_user_model()
+
+SHARDS = ["shard_1", "shard_2", "shard_3"]
+
+
+def register_sqlite_shards():
+    """Add in-memory SQLite databases for SHARDS and migrate them."""
+    for alias in SHARDS:
+        if alias in connections.settings:
+            continue
+        connections.settings[alias] = connections.configure_settings({
+            "default": connections.settings["default"],
+            alias: {"ENGINE": "django.db.backends.sqlite3", "NAME": ":memory:"},
+        })[alias]
+        call_command("migrate", database=alias, verbosity=0)
+
+
+@override_settings(NEWS_SHARDS=SHARDS)
+class ShardingTests(TestCase):
+    """Articles and newsletters spread over three local SQLite shards."""
+
+    databases = {"default", *SHARDS}
+
+    @classmethod
+    def setUpClass(cls):
+        register_sqlite_shards()
+        super().setUpClass()
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.journalist = User.objects.create_user(
+            "journ", "j@x.com", "pass", role=User.ROLE_JOURNALIST
+        )
+        cls.editor = User.objects.create_user(
+            "edit", "e@x.com", "pass", role=User.ROLE_EDITOR
+        )
+        cls.reader = User.objects.create_user(
+            "read", "r@x.com", "pass", role=User.ROLE_READER
+        )
+        cls.publishers = [
+            Publisher.objects.create(name=f"Pub {i}") for i in range(3)
+        ]
+        for publisher in cls.publishers:
+            publisher.editors.add(cls.editor)
+
+    def _article(self, publisher, minutes_ago=0, **kwargs):
+        kwargs.setdefault("status", Article.STATUS_APPROVED)
+        art = Article.objects.create(
+            title=f"{publisher.name} {minutes_ago}", body="Body",
+            author=self.journalist, publisher=publisher, **kwargs
+        )
+        stamp = timezone.now() - timedelta(minutes=minutes_ago)
+        Article.objects.using(art._state.db).filter(pk=art.pk).update(
+            created_at=stamp)
+        art.created_at = stamp
+        return art
+
+    def test_rows_are_placed_by_publisher(self):
+        for pub in self.publishers:
+            art = self._article(pub)
+            alias = shard_for_publisher(pub.pk)
+            self.assertEqual(art._state.db, alias)
+            self.assertEqual(art.pk % len(SHARDS), shard_aliases().index(alias))
+            self.assertTrue(
+                Article.objects.using(alias).filter(pk=art.pk).exists())
+            self.assertFalse(Article.objects.filter(pk=art.pk).exists())
+
+        nl = Newsletter.objects.create(
+            title="NL", body="B", author=self.journalist)
+        self.assertEqual(nl._state.db, SHARDS[0])
+
+    def test_related_lookups_leave_the_shard(self):
+        art = self._article(self.publishers[1])
+        fresh = Article.objects.using(art._state.db).get(pk=art.pk)
+        self.assertEqual(fresh.author, self.journalist)
+        self.assertEqual(fresh.publisher, self.publishers[1])
+
+    def test_detail_and_moderation_route_by_pk(self):
+        art = self._article(self.publishers[2], status=Article.STATUS_PENDING)
+        self.client.login(username="edit", password="pass")
+        resp = self.client.post(reverse('news:article-approve', args=[art.pk]))
+        self.assertEqual(resp.status_code, 302)
+        art.refresh_from_db()
+        self.assertEqual(art.status, Article.STATUS_APPROVED)
+        # The change log stays on default
+        self.assertTrue(ArticleChange.objects.filter(
+            article_id=art.pk, kind=ArticleChange.KIND_APPROVED).exists())
+
+        self.client.logout()
+        resp = self.client.get(reverse('news:article-detail', args=[art.pk]))
+        self.assertEqual(resp.status_code, 200)
+        self.assertEqual(resp.context['article'], art)
+
+    def test_update_and_delete_route_by_pk(self):
+        art = self._article(self.publishers[1])
+        self.client.login(username="journ", password="pass")
+        self.client.post(
+            reverse('news:article-update', args=[art.pk]),
+            {'title': 'Edited', 'body': 'B', 'publisher': self.publishers[1].pk},
+        )
+        art.refresh_from_db()
+        self.assertEqual(art.title, 'Edited')
+        self.client.post(reverse('news:article-delete', args=[art.pk]))
+        self.assertFalse(
+            Article.objects.using(art._state.db).filter(pk=art.pk).exists())
+
+    def test_latest_feed_is_a_merge_of_shards(self):
+        arts = [
+            self._article(self.publishers[i % 3], minutes_ago=i)
+            for i in range(12)
+        ]
+        resp = self.client.get(reverse('news:article-list'))
+        self.assertEqual(
+            [a.pk for a in resp.context['articles']],
+            [a.pk for a in arts[:10]],
+        )
+        self.assertEqual(resp.context['paginator'].count, 12)
+        page2 = self.client.get(reverse('news:article-list'), {'page': 2})
+        self.assertEqual(
+            [a.pk for a in page2.context['articles']],
+            [a.pk for a in arts[10:]],
+        )
+
+    def test_subscribed_feed_spans_shards(self):
+        other = User.objects.create_user(
+            "other", "o@x.com", "pass", role=User.ROLE_JOURNALIST)
+        by_pub = self._article(self.publishers[0], minutes_ago=2)
+        by_author = Article.objects.create(
+            title="By other", body="B", author=other,
+            publisher=self.publishers[1], status=Article.STATUS_APPROVED,
+        )
+        self._article(self.publishers[2], minutes_ago=1)
+        self.reader.subscriptions_publishers.add(self.publishers[0])
+        self.reader.subscriptions_journalists.add(other)
+
+        self.client.login(username="read", password="pass")
+        resp = self.client.get(
+            reverse('news:article-list'), {'view': 'subscribed'})
+        self.assertEqual(
+            [a.pk for a in resp.context['articles']],
+            [by_author.pk, by_pub.pk],
+        )
+
+    def test_api_list_and_retrieve(self):
+        self.reader.subscriptions_journalists.add(self.journalist)
+        arts = [self._article(p, minutes_ago=i)
+                for i, p in enumerate(self.publishers)]
+        token = Token.objects.create(user=self.reader).key
+        auth = {'HTTP_AUTHORIZATION': f"Token {token}"}
+
+        resp = self.client.get(reverse('api:articles-list'), **auth)
+        self.assertEqual([a['id'] for a in resp.json()],
+                         [a.pk for a in arts])
+        resp = self.client.get(
+            reverse('api:articles-detail', args=[arts[2].pk]), **auth)
+        self.assertEqual(resp.status_code, 200)
+        self.assertEqual(resp.json()['publisher']['id'], self.publishers[2].pk)
+
+    def test_merged_queryset_slices_like_a_list(self):
+        arts = [self._article(self.publishers[i % 3], minutes_ago=i)
+                for i in range(7)]
+        merged = merge_shards(Article.objects.all())
+        self.assertEqual(merged.count(), 7)
+        self.assertEqual([a.pk for a in merged[2:5]],
+                         [a.pk for a in arts[2:5]])
+        self.assertEqual(merged[6].pk, arts[6].pk)
+        self.assertEqual([a.pk for a in merged], [a.pk for a in arts])
+
+    def test_deleting_publisher_cleans_its_shard(self):
+        pub = self.publishers[1]
+        art = self._article(pub)
+        pub.delete()
+        self.assertFalse(
+            Article.objects.using(art._state.db).filter(pk=art.pk).exists())
+
+    def test_review_queue_spans_shards(self):
+        for pub in self.publishers:
+            pub.editors.add(self.editor)
+        arts = [
+            self._article(self.publishers[i % 3], minutes_ago=10 - i,
+                          status=Article.STATUS_PENDING)
+            for i in range(6)
+        ]
+        self.assertEqual(review_queue.claim(Article, self.editor, 6), 6)
+        page, cursor = review_queue.claimed_page(
+            Article, self.editor, page_size=4)
+        rest, _ = review_queue.claimed_page(
+            Article, self.editor, review_queue.decode_cursor(cursor), 4)
+        self.assertEqual([a.pk for a in page + rest], [a.pk for a in arts])
+
+    def test_archive_keeps_rows_on_their_shard(self):
+        arts = [self._article(pub, minutes_ago=60 * 24 * 400)
+                for pub in self.publishers]
+        self.assertEqual(archive.archive(Article, batch_size=1), 3)
+        for art in arts:
+            self.assertTrue(ArchivedArticle.objects.using(art._state.db)
+                            .filter(pk=art.pk).exists())
+            self.assertEqual(
+                archive.get_archived(Article, art.pk).title, art.title)
+        self.client.force_login(self.reader)
+        resp = self.client.get(reverse('news:article-detail',
+                                       args=[arts[1].pk]))
+        self.assertContains(resp, arts[1].title)
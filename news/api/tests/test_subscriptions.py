@@ -0,0 +1,121 @@
+
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from news.models import Publisher, Article
+
+User = get_user_model()
+
+
+class SubscriptionManagerTests(TestCase):
+    """Tests for the paginated subscription page, search and toggle API."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.reader = User.objects.create_user(
+            "reader", "r@x.com", "pass", role=User.ROLE_READER
+        )
+        cls.journalists = [
+            User.objects.create_user(
+                f"jour{i:02d}", f"j{i}@x.com", "pass",
+                role=User.ROLE_JOURNALIST,
+            )
+            for i in range(25)
+        ]
+        cls.publisher = Publisher.objects.create(name="Daily News")
+        cls.reader.subscriptions_journalists.add(*cls.journalists)
+        Article.objects.create(
+            title="Followed", body="B", author=cls.journalists[0],
+            publisher=cls.publisher, status=Article.STATUS_APPROVED,
+        )
+
+    def setUp(self):
+        self.client.login(username="reader", password="pass")
+        self.url = reverse('news:subscriptions')
+
+    def test_requires_login(self):
+        self.client.logout()
+        resp = self.client.get(self.url)
+        self.assertEqual(resp.status_code, 302)
+
+    def test_subscriptions_are_paginated(self):
+        resp = self.client.get(self.url)
+        self.assertEqual(resp.status_code, 200)
+        self.assertEqual(len(resp.context['journalists_page']), 20)
+        self.assertEqual(len(resp.context['articles']), 1)
+
+        resp = self.client.get(self.url, {'jpage': 2})
+        self.assertEqual(
+            [j.username for j in resp.context['journalists_page']],
+            [f"jour{i}" for i in range(20, 25)],
+        )
+
+    # Reads buffered by earlier tests must not be flushed mid-measurement
+    @override_settings(NEWS_VIEWCOUNT_FLUSH_SECONDS=3600)
+    def test_page_cost_does_not_grow_with_catalogue(self):
+        self.client.get(self.url)
+        with CaptureQueriesContext(connection) as before:
+            self.client.get(self.url)
+        for i in range(30):
+            User.objects.create_user(
+                f"extra{i}", f"x{i}@x.com", "pw", role=User.ROLE_JOURNALIST)
+            Publisher.objects.create(name=f"Extra {i}")
+        with CaptureQueriesContext(connection) as after:
+            resp = self.client.get(self.url)
+        self.assertEqual(len(before), len(after))
+        self.assertNotContains(resp, "extra1")
+
+    def test_prefix_search(self):
+        User.objects.create_user(
+            "other", "o@x.com", "pw", role=User.ROLE_JOURNALIST)
+        url = reverse('news:subscription-search', args=['journalist'])
+        results = self.client.get(url, {'q': 'jour0'}).json()['results']
+        self.assertEqual(len(results), 10)
+        self.assertTrue(all(r['subscribed'] for r in results))
+
+        results = self.client.get(url, {'q': 'OTH'}).json()['results']
+        self.assertEqual(results, [
+            {'id': results[0]['id'], 'name': 'other', 'subscribed': False}
+        ])
+        self.assertEqual(
+            self.client.get(url, {'q': ''}).json()['results'], [])
+
+    def test_search_unknown_kind_is_404(self):
+        url = reverse('news:subscription-search', args=['editor'])
+        self.assertEqual(self.client.get(url, {'q': 'a'}).status_code, 404)
+
+    def test_incremental_add_and_remove(self):
+        url = reverse('news:subscription-toggle',
+                      args=['publisher', self.publisher.pk])
+        resp = self.client.post(url)
+        self.assertEqual(resp.json()['subscribed'], True)
+        self.assertTrue(
+            self.reader.subscriptions_publishers.filter(
+                pk=self.publisher.pk).exists())
+
+        resp = self.client.delete(url)
+        self.assertEqual(resp.json()['subscribed'], False)
+        self.assertFalse(self.reader.subscriptions_publishers.exists())
+
+        self.assertEqual(self.client.get(url).status_code, 405)
+
+    def test_toggle_rejects_non_journalist(self):
+        url = reverse('news:subscription-toggle',
+                      args=['journalist', self.reader.pk])
+        self.assertEqual(self.client.post(url).status_code, 404)
+
+    def test_toggle_journalist_and_unknown_target(self):
+        reader = User.objects.create_user("fresh", "f@x.com", "pass")
+        self.client.force_login(reader)
+        url = reverse('news:subscription-toggle',
+                      args=['journalist', self.journalists[1].pk])
+        self.assertEqual(self.client.post(url).json()['subscribed'], True)
+        self.assertEqual(list(reader.subscriptions_journalists.all()),
+                         [self.journalists[1]])
+
+        url = reverse('news:subscription-toggle', args=['journalist', 999999])
+        self.assertEqual(self.client.post(url).status_code, 404)
+        self.assertEqual(reader.subscriptions_journalists.count(), 1)
@@ -0,0 +1,188 @@
+
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from django.contrib.auth import get_user_model
+from django.contrib.auth.models import Group
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APIClient
+
+from news import moderation, surrogate
+from news.models import Article, Newsletter, Publisher
+
+User = get_user_model()
+
+
+class StubProxy(BaseHTTPRequestHandler):
+    """Records purge requests like a caching proxy would receive them."""
+
+    received = []
+    status = 200
+
+    def do_PURGE(self):
+        self.received.append(
+            (self.command, self.headers.get("Surrogate-Key")))
+        self.send_response(self.status)
+        self.send_header("Content-Length", "0")
+        self.end_headers()
+
+    def log_message(self, *args):
+        pass
+
+
+class SurrogateTestCase(TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.server = ThreadingHTTPServer(("127.0.0.1", 0), StubProxy)
+        threading.Thread(target=cls.server.serve_forever, daemon=True).start()
+        cls.proxy_url = f"http://127.0.0.1:{cls.server.server_port}/"
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.server.shutdown()
+        cls.server.server_close()
+        super().tearDownClass()
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.journalist = User.objects.create_user(
+            "journ", "j@x.com", "pw", role=User.ROLE_JOURNALIST
+        )
+        cls.journalist.groups.add(
+            Group.objects.get_or_create(name="Journalist")[0])
+        cls.reader = User.objects.create_user(
+            "reader", "r@x.com", "pw", role=User.ROLE_READER
+        )
+        cls.publisher = Publisher.objects.create(name="Daily")
+        cls.article = Article.objects.create(
+            title="Visible", body="B", author=cls.journalist,
+            publisher=cls.publisher, status=Article.STATUS_APPROVED,
+        )
+
+    def setUp(self):
+        cache.clear()
+        StubProxy.received = []
+        StubProxy.status = 200
+        surrogate.purge_queue.flush()
+
+    def purged(self):
+        """The keys the stub proxy was asked to purge, one set per call."""
+        return [set(keys.split()) for _, keys in StubProxy.received]
+
+
+class SurrogateHeaderTests(SurrogateTestCase):
+    """Tests for the surrogate keys and cache headers of responses."""
+
+    def test_anonymous_pages_are_shared_and_tagged(self):
+        item_keys = {f"article-{self.article.pk}",
+                     f"author-{self.journalist.pk}",
+                     f"publisher-{self.publisher.pk}"}
+        resp = self.client.get(reverse("news:article-list"))
+        self.assertEqual(set(resp["Surrogate-Key"].split()),
+                         item_keys | {"list-latest"})
+        self.assertEqual(
+            sorted(resp["Cache-Control"].split(", ")),
+            ["max-age=0", "public", "s-maxage=300"])
+        self.assertIn("Cookie", resp["Vary"])
+        self.assertIn("Authorization", resp["Vary"])
+
+        resp = self.client.get(
+            reverse("news:article-detail", args=[self.article.pk]))
+        self.assertEqual(set(resp["Surrogate-Key"].split()), item_keys)
+
+        resp = self.client.get(
+            reverse("news:publisher-feed", args=[self.publisher.pk, "rss"]))
+        self.assertEqual(resp["Surrogate-Key"],
+                         f"publisher-{self.publisher.pk}")
+
+    def test_logged_in_and_personal_pages_stay_private(self):
+        self.client.force_login(self.reader)
+        resp = self.client.get(reverse("news:article-list"))
+        self.assertIn("private", resp["Cache-Control"])
+        self.assertNotIn("s-maxage", resp["Cache-Control"])
+
+        resp = self.client.get(reverse("news:article-list") +
+                               "?view=subscribed")
+        self.assertFalse(resp.has_header("Surrogate-Key"))
+
+    def test_api_reads(self):
+        client = APIClient()
+        token = Token.objects.create(user=self.reader)
+        client.credentials(HTTP_AUTHORIZATION=f"Token {token.key}")
+        resp = client.get(reverse("api:publishers-list"))
+        self.assertEqual(resp["Surrogate-Key"], "list-publishers")
+        self.assertIn("public", resp["Cache-Control"])
+        self.assertIn("Authorization", resp["Vary"])
+
+        resp = client.get(reverse("api:journalists-list"))
+        self.assertEqual(set(resp["Surrogate-Key"].split()),
+                         {"list-journalists", f"author-{self.journalist.pk}"})
+        # Article reads depend on the caller's subscriptions
+        resp = client.get(reverse("api:articles-list"))
+        self.assertFalse(resp.has_header("Surrogate-Key"))
+
+
+class PurgeTests(SurrogateTestCase):
+    """Tests for purging changed content through the stub proxy."""
+
+    def test_disabled_without_url(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            self.article.save()
+        self.assertEqual(surrogate.purge_queue.pending(), set())
+
+    def test_edits_and_transitions_purge_their_keys(self):
+        with override_settings(NEWS_PURGE_URL=self.proxy_url):
+            pending = Newsletter.objects.create(
+                title="Draft", body="B", author=self.journalist,
+                publisher=self.publisher,
+            )
+            self.assertEqual(surrogate.purge_queue.pending(), set())
+
+            with self.captureOnCommitCallbacks(execute=True):
+                other = Publisher.objects.create(name="Other")
+                moderation.approve(Newsletter, pending.pk)
+                self.article.publisher = other
+                self.article.save()
+            surrogate.purge_queue.flush()
+
+        self.assertEqual(StubProxy.received[0][0], "PURGE")
+        self.assertEqual(self.purged(), [{
+            "list-latest", "list-publishers",
+            f"newsletter-{pending.pk}", f"article-{self.article.pk}",
+            f"author-{self.journalist.pk}",
+            f"publisher-{self.publisher.pk}", f"publisher-{other.pk}",
+        }])
+
+    def test_flushes_in_batches_after_requests(self):
+        with override_settings(NEWS_PURGE_URL=self.proxy_url,
+                               NEWS_PURGE_BATCH_SIZE=2):
+            surrogate.purge_queue.add(["a-1"])
+            self.assertEqual(StubProxy.received, [])
+            self.client.get(reverse("news:article-list"))
+            self.assertEqual(self.purged(), [{"a-1"}])
+
+            surrogate.purge_queue.add(["a-2", "a-3", "a-4"])
+            self.assertEqual(self.purged()[1:], [{"a-2", "a-3"}, {"a-4"}])
+
+    def test_last_login_does_not_purge(self):
+        with override_settings(NEWS_PURGE_URL=self.proxy_url):
+            with self.captureOnCommitCallbacks(execute=True):
+                self.client.force_login(self.reader)
+            self.assertEqual(surrogate.purge_queue.pending(), set())
+            with self.captureOnCommitCallbacks(execute=True):
+                self.reader.save()
+            self.assertEqual(surrogate.purge_queue.pending(),
+                             {f"author-{self.reader.pk}"})
+
+    def test_failed_purge_is_logged_and_dropped(self):
+        StubProxy.status = 500
+        with override_settings(NEWS_PURGE_URL=self.proxy_url), \
+                self.assertLogs("news.surrogate", "ERROR"):
+            surrogate.purge_queue.add(["a-1"])
+            self.assertEqual(surrogate.purge_queue.flush(), 1)
+        self.assertEqual(surrogate.purge_queue.pending(), set())
@@ -0,0 +1,164 @@
+
+from datetime import timedelta
+
+from django.contrib.auth import get_user_model
+from django.test import override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from rest_framework import status
+from rest_framework.test import APITestCase
+from rest_framework.authtoken.models import Token
+
+from news.changelog import decode_cursor, encode_cursor
+from news.models import Publisher, Article, ArticleChange
+
+User = get_user_model()
+
+
+@override_settings(NEWS_SYNC_SETTLE_SECONDS=0)
+class ArticleSyncTests(APITestCase):
+    """Tests for the change log and /api/articles/sync/."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.reader = User.objects.create_user("reader1", "r1@x.com", "pass1234")
+        cls.journalist = User.objects.create_user(
+            "journalist1", "j1@x.com", "pass1234", role=User.ROLE_JOURNALIST
+        )
+        cls.publisher = Publisher.objects.create(name="Daily News")
+        cls.reader.subscriptions_publishers.add(cls.publisher)
+        cls.token = Token.objects.create(user=cls.reader).key
+
+    def setUp(self):
+        self.client.credentials(HTTP_AUTHORIZATION=f"Token {self.token}")
+        self.url = reverse('api:articles-sync')
+
+    def _article(self, **kwargs):
+        kwargs.setdefault("status", Article.STATUS_PENDING)
+        return Article.objects.create(
+            title="Story", body="Body", author=self.journalist,
+            publisher=self.publisher, **kwargs
+        )
+
+    def _head(self):
+        return self.client.get(self.url).data['cursor']
+
+    def test_cursor_round_trip(self):
+        self.assertEqual(decode_cursor(encode_cursor(42)), 42)
+        for bad in ["", "!!!", encode_cursor(1)[:-2] + "zz"]:
+            with self.assertRaises(ValueError):
+                decode_cursor(bad)
+
+    def test_signals_classify_changes(self):
+        art = self._article()
+        art.status = Article.STATUS_APPROVED
+        art.save()
+        art.title = "Edited"
+        art.save()
+        art.status = Article.STATUS_DENIED
+        art.save()
+        pk = art.pk
+        art.delete()
+        kinds = list(
+            ArticleChange.objects.filter(article_id=pk)
+            .values_list("kind", flat=True)
+        )
+        self.assertEqual(kinds, [
+            ArticleChange.KIND_CREATED,
+            ArticleChange.KIND_APPROVED,
+            ArticleChange.KIND_UPDATED,
+            ArticleChange.KIND_UNAPPROVED,
+            ArticleChange.KIND_DELETED,
+        ])
+
+    def test_bootstrap_returns_head_cursor_only(self):
+        self._article(status=Article.STATUS_APPROVED)
+        resp = self.client.get(self.url)
+        self.assertEqual(resp.status_code, status.HTTP_200_OK)
+        self.assertEqual(resp.data['changes'], [])
+        self.assertEqual(
+            decode_cursor(resp.data['cursor']),
+            ArticleChange.objects.latest("pk").pk,
+        )
+
+    def test_up_to_date_client_costs_one_query(self):
+        cursor = self._head()
+        # one query for the token, one for the change log
+        with self.assertNumQueries(2):
+            resp = self.client.get(self.url, {'cursor': cursor})
+        self.assertEqual(resp.data['changes'], [])
+        self.assertEqual(resp.data['cursor'], cursor)
+
+    def test_upserts_and_tombstones(self):
+        cursor = self._head()
+        kept = self._article(status=Article.STATUS_APPROVED)
+        pending = self._article()
+        regressed = self._article(status=Article.STATUS_APPROVED)
+        deleted = self._article(status=Article.STATUS_APPROVED)
+        regressed.status = Article.STATUS_DENIED
+        regressed.save()
+        deleted_pk = deleted.pk
+        deleted.delete()
+
+        resp = self.client.get(self.url, {'cursor': cursor})
+        self.assertEqual(resp.status_code, status.HTTP_200_OK)
+        ops = {c['id']: c['op'] for c in resp.data['changes']}
+        self.assertEqual(ops, {
+            kept.pk: 'upsert',
+            regressed.pk: 'delete',
+            deleted_pk: 'delete',
+        })
+        self.assertNotIn(pending.pk, ops)
+        upsert = resp.data['changes'][0]
+        self.assertEqual(upsert['article']['title'], "Story")
+
+        again = self.client.get(self.url, {'cursor': resp.data['cursor']})
+        self.assertEqual(again.data['changes'], [])
+
+    def test_limit_pages_through_log(self):
+        cursor = self._head()
+        for _ in range(3):
+            self._article(status=Article.STATUS_APPROVED)
+        seen = []
+        has_more = True
+        while has_more:
+            resp = self.client.get(self.url, {'cursor': cursor, 'limit': 2})
+            seen += [c['id'] for c in resp.data['changes']]
+            cursor, has_more = resp.data['cursor'], resp.data['has_more']
+        self.assertEqual(len(seen), 3)
+
+    def test_invalid_cursor_is_rejected(self):
+        resp = self.client.get(self.url, {'cursor': 'garbage'})
+        self.assertEqual(resp.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_unsettled_rows_hold_the_cursor_back(self):
+        cursor = self._head()
+        first = self._article(status=Article.STATUS_APPROVED)
+        second = self._article(status=Article.STATUS_APPROVED)
+        ArticleChange.objects.filter(article_id=first.pk).update(
+            changed_at=timezone.now() - timedelta(minutes=1))
+        with self.settings(NEWS_SYNC_SETTLE_SECONDS=30):
+            resp = self.client.get(self.url, {'cursor': cursor})
+            self.assertEqual([c['id'] for c in resp.data['changes']],
+                             [first.pk])
+            self.assertTrue(resp.data['has_more'])
+            # The head cursor stops at the settled row too.
+            self.assertEqual(self._head(), resp.data['cursor'])
+
+        resp = self.client.get(self.url, {'cursor': resp.data['cursor']})
+        self.assertEqual([c['id'] for c in resp.data['changes']],
+                         [second.pk])
+
+    def test_unsettled_first_row_still_reports_more(self):
+        cursor = self._head()
+        art = self._article(status=Article.STATUS_APPROVED)
+        with self.settings(NEWS_SYNC_SETTLE_SECONDS=30):
+            resp = self.client.get(self.url, {'cursor': cursor})
+            self.assertEqual(resp.data['changes'], [])
+            self.assertEqual(resp.data['cursor'], cursor)
+            # The client must keep polling for the row that is settling.
+            self.assertTrue(resp.data['has_more'])
+
+        resp = self.client.get(self.url, {'cursor': cursor})
+        self.assertEqual([c['id'] for c in resp.data['changes']], [art.pk])
@@ -0,0 +1,114 @@
+
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+
+from news.models import Publisher, Article, Newsletter
+from news.tracking import UNKNOWN
+
+User = get_user_model()
+
+
+class TrackedFieldsTests(TestCase):
+    """Tests for TrackedFieldsMixin and the approval pre_save receivers."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.journalist = User.objects.create_user(
+            "journ", "j@x.com", "pw", role=User.ROLE_JOURNALIST
+        )
+        cls.publisher = Publisher.objects.create(name="Daily")
+        cls.article = Article.objects.create(
+            title="T", body="B", author=cls.journalist,
+            publisher=cls.publisher,
+        )
+
+    def _article_selects(self, queries):
+        return [
+            q["sql"] for q in queries
+            if q["sql"].startswith("SELECT") and '"news_article"' in q["sql"]
+        ]
+
+    def test_save_of_loaded_instance_does_not_reselect(self):
+        art = Article.objects.get(pk=self.article.pk)
+        art.status = Article.STATUS_APPROVED
+        with CaptureQueriesContext(connection) as ctx:
+            art.save()
+        self.assertEqual(self._article_selects(ctx.captured_queries), [])
+        self.assertFalse(art._was_approved)
+
+        art.title = "Edited"
+        with CaptureQueriesContext(connection) as ctx:
+            art.save()
+        self.assertEqual(self._article_selects(ctx.captured_queries), [])
+        self.assertTrue(art._was_approved)
+
+    def test_new_instance_has_no_previous_value(self):
+        art = Article(title="N", body="B", author=self.journalist,
+                      publisher=self.publisher)
+        self.assertIs(art.get_loaded_value("status"), UNKNOWN)
+        with self.assertNumQueries(0):
+            self.assertIsNone(art.get_previous_value("status"))
+        art.save()
+        self.assertEqual(art.get_loaded_value("status"),
+                         Article.STATUS_PENDING)
+
+    def test_deferred_status_falls_back_to_a_query(self):
+        Article.objects.filter(pk=self.article.pk).update(
+            status=Article.STATUS_APPROVED)
+        art = Article.objects.only("title").get(pk=self.article.pk)
+        with self.assertNumQueries(1):
+            self.assertEqual(art.get_previous_value("status"),
+                             Article.STATUS_APPROVED)
+
+    def test_refresh_from_db_updates_snapshot(self):
+        art = Article.objects.get(pk=self.article.pk)
+        Article.objects.filter(pk=art.pk).update(
+            status=Article.STATUS_APPROVED)
+        self.assertEqual(art.get_loaded_value("status"),
+                         Article.STATUS_PENDING)
+        art.refresh_from_db(fields=["status"])
+        self.assertEqual(art.get_loaded_value("status"),
+                         Article.STATUS_APPROVED)
+
+    def test_update_fields_only_snapshot_written_fields(self):
+        art = Article.objects.get(pk=self.article.pk)
+        art.status = Article.STATUS_APPROVED
+        art.title = "Edited"
+        art.save(update_fields=["title"])
+        self.assertEqual(art.get_loaded_value("status"),
+                         Article.STATUS_PENDING)
+        self.assertEqual(art.changed_fields(), {
+            "status": (Article.STATUS_PENDING, Article.STATUS_APPROVED),
+        })
+        art.save()
+        self.assertEqual(art.changed_fields(), {})
+
+    def test_update_fields_accept_field_names(self):
+        other = Publisher.objects.create(name="Other")
+        art = Article.objects.get(pk=self.article.pk)
+        art.publisher = other
+        art.save(update_fields=["publisher"])
+        self.assertEqual(art.get_loaded_value("publisher_id"), other.pk)
+        self.assertFalse(art.has_changed("publisher_id"))
+
+        art.status = Article.STATUS_APPROVED
+        art.save(update_fields=[])
+        self.assertEqual(art.get_loaded_value("status"),
+                         Article.STATUS_PENDING)
+
+    def test_newsletter_is_tracked(self):
+        nl = Newsletter.objects.create(
+            title="NL", body="B", author=self.journalist,
+            status=Newsletter.STATUS_APPROVED,
+        )
+        nl = Newsletter.objects.get(pk=nl.pk)
+        nl.title = "Edited"
+        with CaptureQueriesContext(connection) as ctx:
+            nl.save()
+        self.assertFalse(any(
+            q["sql"].startswith("SELECT") and '"news_newsletter"' in q["sql"]
+            for q in ctx.captured_queries
+        ))
+        self.assertTrue(nl._was_approved)
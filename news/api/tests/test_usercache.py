@@ -0,0 +1,80 @@
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from news import usercache
+
+User = get_user_model()
+
+
+class CachedUserTests(TestCase):
+    """Tests for cached sessions and logged-in user snapshots."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.reader = User.objects.create_user(
+            "reader", "r@x.com", "pw", role=User.ROLE_READER
+        )
+
+    def setUp(self):
+        cache.clear()
+        self.client.login(username="reader", password="pw")
+        self.url = reverse('news:article-list')
+
+    def _tables(self):
+        with CaptureQueriesContext(connection) as queries:
+            resp = self.client.get(self.url)
+        self.assertEqual(resp.wsgi_request.user.username, "reader")
+        return " ".join(q["sql"] for q in queries)
+
+    def test_logged_in_page_skips_session_and_user_queries(self):
+        self.assertIn("news_customuser", self._tables())
+        sql = self._tables()
+        self.assertNotIn("news_customuser", sql)
+        self.assertNotIn("django_session", sql)
+
+    def test_snapshot_user_is_deferred_and_saves_loaded_fields_only(self):
+        self.client.get(self.url)
+        user, _ = usercache.recall(self.reader.pk)
+        self.assertEqual(user.role, User.ROLE_READER)
+        self.assertIn("email", user.get_deferred_fields())
+        user.is_staff = True
+        user.save()
+        fresh = User.objects.get(pk=self.reader.pk)
+        self.assertTrue(fresh.is_staff)
+        self.assertEqual(fresh.email, "r@x.com")
+
+    def test_user_save_invalidates_snapshot(self):
+        self.client.get(self.url)
+        self.reader.role = User.ROLE_EDITOR
+        with self.captureOnCommitCallbacks(execute=True):
+            self.reader.save()
+        resp = self.client.get(self.url)
+        self.assertEqual(resp.wsgi_request.user.role, User.ROLE_EDITOR)
+
+    def test_password_change_ends_other_sessions(self):
+        self.client.get(self.url)
+        self.reader.set_password("new")
+        with self.captureOnCommitCallbacks(execute=True):
+            self.reader.save()
+        resp = self.client.get(self.url)
+        self.assertFalse(resp.wsgi_request.user.is_authenticated)
+
+    def test_stale_snapshot_hash_falls_back_to_database(self):
+        self.client.get(self.url)
+        key = usercache.SNAPSHOT_KEY.format(self.reader.pk)
+        snapshot = cache.get(key)
+        cache.set(key, dict(snapshot, session_hash="stale"))
+        resp = self.client.get(self.url)
+        self.assertTrue(resp.wsgi_request.user.is_authenticated)
+        self.assertEqual(cache.get(key), snapshot)
+
+    def test_logout_drops_snapshot(self):
+        self.client.get(self.url)
+        self.assertIsNotNone(usercache.recall(self.reader.pk))
+        self.client.post(reverse('logout'))
+        self.assertIsNone(usercache.recall(self.reader.pk))
@@ -4,7 +4,15 @@ from django.urls import include, path
 from rest_framework.routers import DefaultRouter
 from rest_framework.authtoken.views import obtain_auth_token
 
-from .views import ArticleViewSet, PublisherViewSet, JournalistViewSet
+from .views import (
+    ArticleViewSet,
+    AudienceView,
+    BatchView,
+    ExportView,
+    MonthRollupView,
+    JournalistViewSet,
+    PublisherViewSet,
+)
 
 router = DefaultRouter()
 router.register(r'articles',    ArticleViewSet,    basename='articles')
@@ -40,6 +48,30 @@ urlpatterns = [
         name='article-delete'
     ),
 
+    # → /api/export/articles.csv  name='export'  (also .ndjson, newsletters)
+    path(
+        'export/<str:kind>.<str:fmt>',
+        ExportView.as_view(),
+        name='export'
+    ),
+
+    # → /api/months/articles/  name='months'  (also newsletters)
+    path(
+        'months/<str:kind>/',
+        MonthRollupView.as_view(),
+        name='months'
+    ),
+
+    # → /api/audiences/publishers/<pk>/  name='audience'  (also journalists)
+    path(
+        'audiences/<str:kind>/<int:pk>/',
+        AudienceView.as_view(),
+        name='audience'
+    ),
+
+    # → /api/batch/  name='batch'  (many API calls in one round trip)
+    path('batch/', BatchView.as_view(), name='batch'),
+
     # token‐auth remains
     path('auth/token/', obtain_auth_token, name='token-auth'),
 ]
@@ -1,13 +1,46 @@
 # news/api/views.py
 
+import codecs
+
 from django.db.models import Q
+from django.http import Http404, StreamingHttpResponse
 from django.contrib.auth import get_user_model
+from django.contrib.auth.models import Group
 
 from rest_framework import viewsets
 from rest_framework.authentication import TokenAuthentication
-from rest_framework.permissions import IsAuthenticated, SAFE_METHODS
+from rest_framework.decorators import action
+from rest_framework.exceptions import PermissionDenied, ValidationError
+from rest_framework.permissions import (
+    IsAdminUser,
+    IsAuthenticated,
+    SAFE_METHODS,
+)
+from rest_framework.response import Response
+from rest_framework.views import APIView
 
-from news.models import Article, Publisher
+from news.changelog import (
+    changes_since,
+    decode_cursor,
+    encode_cursor,
+    head_change_id,
+)
+from news import (
+    archive, audiences, duplicates, exports, popularity, related, rollups,
+    surrogate,
+)
+from news.models import ArchivedArticle, Article, ArticleChange, Publisher
+from news.querycache import cached_queryset
+from news.sharding import (
+    MergedQuerySet,
+    evaluate_for_shards,
+    fetch_by_pks,
+    merge_shards,
+    queryset_for_pk,
+    select_related_across,
+    shard_querysets,
+)
+from . import batch
 from .serializers import (
     ArticleSerializer,
     PublisherSerializer,
@@ -28,17 +61,185 @@ class ArticleViewSet(viewsets.ModelViewSet):
 
     def get_queryset(self):
         qs = Article.objects.all()
+        if self.lookup_field in self.kwargs:
+            qs = queryset_for_pk(qs, self.kwargs[self.lookup_field])
         if self.request.method in SAFE_METHODS:
-            user = self.request.user
-            qs = qs.filter(status=Article.STATUS_APPROVED).filter(
-                Q(author__in=user.subscriptions_journalists.all()) |
-                Q(publisher__in=user.subscriptions_publishers.all())
-            )
+            qs = self._readable(qs)
         return qs.distinct()
 
+    def _readable(self, qs):
+        """Limit ``qs`` to approved articles the caller subscribes to."""
+        user = self.request.user
+        return qs.filter(status=Article.STATUS_APPROVED).filter(
+            Q(author__in=evaluate_for_shards(
+                user.subscriptions_journalists.all())) |
+            Q(publisher__in=evaluate_for_shards(
+                user.subscriptions_publishers.all()))
+        )
+
+    def list(self, request, *args, **kwargs):
+        if request.query_params.get("ordering") == "popular":
+            return self._list_popular(request)
+        if "year" in request.query_params or "month" in request.query_params:
+            return self._list_month(request)
+        articles = merge_shards(self.filter_queryset(self.get_queryset()))
+        return Response(self.get_serializer(articles, many=True).data)
+
+    def _list_popular(self, request):
+        """
+        ``?ordering=popular[&window=today|week][&publisher=<id>]``: the
+        caller's visible articles from the precomputed "most read" ranking,
+        busiest first.
+        """
+        window = request.query_params.get("window", "today")
+        if window not in popularity.WINDOWS:
+            raise ValidationError({"window": "Expected 'today' or 'week'."})
+        publisher = request.query_params.get("publisher")
+        try:
+            publisher = int(publisher) if publisher else None
+        except ValueError:
+            raise ValidationError({"publisher": "Expected a publisher id."})
+        ids = [e["id"] for e in popularity.top("article", window, publisher)]
+        visible = fetch_by_pks(
+            select_related_across(self.get_queryset(), "author", "publisher"),
+            ids,
+        )
+        articles = [visible[pk] for pk in ids if pk in visible]
+        return Response(self.get_serializer(articles, many=True).data)
+
+    def _list_month(self, request):
+        """
+        ``?year=<yyyy>&month=<m>``: the caller's visible articles created
+        that month, archived ones included, newest first. One
+        ``created_at`` range scan per table and shard.
+        """
+        try:
+            year = int(request.query_params.get("year", ""))
+            month = int(request.query_params.get("month", ""))
+            month_filter = rollups.month_filter(year, month)
+        except ValueError:
+            raise ValidationError(
+                {"month": "Expected a year and a month (1-12)."})
+        querysets = []
+        for qs in (Article.objects.all(), ArchivedArticle.objects.all()):
+            qs = self._readable(qs).filter(month_filter).distinct()
+            querysets += shard_querysets(
+                select_related_across(qs, "author", "publisher")
+                .order_by("-created_at", "-pk"))
+        articles = MergedQuerySet(
+            querysets, key=lambda obj: (obj.created_at, obj.pk))
+        return Response(self.get_serializer(list(articles), many=True).data)
+
+    def retrieve(self, request, *args, **kwargs):
+        try:
+            return super().retrieve(request, *args, **kwargs)
+        except Http404:
+            # Old articles live in the archive (news/archive.py)
+            article = archive.get_archived(
+                Article, kwargs[self.lookup_field],
+                self._readable(ArchivedArticle.objects.all()).distinct(),
+            )
+            if article is None:
+                raise
+            return Response(self.get_serializer(article).data)
+
+    def create(self, request, *args, **kwargs):
+        """
+        Create an article. The response also lists the ids of existing
+        articles it looks like a near-duplicate of (news/duplicates.py) as
+        ``suspected_duplicates``.
+        """
+        response = super().create(request, *args, **kwargs)
+        response.data["suspected_duplicates"] = [
+            article.pk
+            for article in duplicates.duplicates_of(response.data["id"])
+        ]
+        return response
+
     def perform_create(self, serializer):
         serializer.save(author=self.request.user)
 
+    @action(detail=True, methods=["get"], url_path="related",
+            url_name="related")
+    def related_articles(self, request, pk=None):
+        """
+        ``GET /api/articles/{pk}/related/``: the article's precomputed
+        neighbours that the caller can read, most similar first.
+        """
+        article = self.get_object()
+        readable = select_related_across(
+            self._readable(Article.objects.all()).distinct(),
+            "author", "publisher",
+        )
+        articles = related.related_articles(article.pk, readable)
+        return Response(self.get_serializer(articles, many=True).data)
+
+    SYNC_DEFAULT_LIMIT = 100
+    SYNC_MAX_LIMIT = 500
+
+    @action(detail=False, methods=["get"], url_path="sync")
+    def sync(self, request):
+        """
+        Incremental sync: ``GET /api/articles/sync/?cursor=<token>``.
+
+        Without a cursor only the current head cursor is returned; clients
+        fetch it first, load ``/api/articles/`` and then poll with it.
+        Each change is collapsed to the article's latest state: an
+        ``upsert`` carrying the serialized article when it is visible to
+        the caller, or a ``delete`` tombstone when it was deleted or lost
+        its approval. Changes are served once they are
+        ``NEWS_SYNC_SETTLE_SECONDS`` old, so a slow writer's change is not
+        skipped (see news/changelog.py).
+        """
+        token = request.query_params.get("cursor")
+        if not token:
+            return Response({
+                "changes": [],
+                "cursor": encode_cursor(head_change_id()),
+                "has_more": False,
+            })
+
+        try:
+            after = decode_cursor(token)
+            limit = int(request.query_params.get("limit",
+                                                 self.SYNC_DEFAULT_LIMIT))
+        except ValueError as exc:
+            raise ValidationError({"cursor": str(exc)})
+        limit = max(1, min(limit, self.SYNC_MAX_LIMIT))
+
+        rows, has_more = changes_since(after, limit)
+        if not rows:
+            return Response({"changes": [], "cursor": token,
+                             "has_more": has_more})
+
+        # Keep only the last change per article, in log order.
+        latest = {}
+        for change_id, article_id, kind in rows:
+            latest.pop(article_id, None)
+            latest[article_id] = kind
+
+        visible = fetch_by_pks(
+            select_related_across(self.get_queryset(), "author", "publisher"),
+            latest.keys(),
+        )
+        changes = []
+        for article_id, kind in latest.items():
+            if article_id in visible:
+                changes.append({
+                    "id": article_id,
+                    "op": "upsert",
+                    "article": self.get_serializer(visible[article_id]).data,
+                })
+            elif kind in (ArticleChange.KIND_DELETED,
+                          ArticleChange.KIND_UNAPPROVED):
+                changes.append({"id": article_id, "op": "delete"})
+
+        return Response({
+            "changes": changes,
+            "cursor": encode_cursor(rows[-1][0]),
+            "has_more": has_more,
+        })
+
 
 class PublisherViewSet(viewsets.ModelViewSet):
     authentication_classes = [TokenAuthentication]
@@ -46,9 +247,178 @@ class PublisherViewSet(viewsets.ModelViewSet):
     queryset = Publisher.objects.all()
     serializer_class = PublisherSerializer
 
+    def list(self, request, *args, **kwargs):
+        publishers = cached_queryset(
+            "api:publishers", self.get_queryset, depends_on=[Publisher]
+        )
+        return surrogate.tag(
+            Response(self.get_serializer(publishers, many=True).data),
+            surrogate.LIST_PUBLISHERS)
+
+    def retrieve(self, request, *args, **kwargs):
+        response = super().retrieve(request, *args, **kwargs)
+        return surrogate.tag(response,
+                             surrogate.publisher_key(response.data["id"]))
+
 
 class JournalistViewSet(viewsets.ModelViewSet):
     authentication_classes = [TokenAuthentication]
     permission_classes = [IsAuthenticated]
     queryset = User.objects.filter(groups__name='Journalist')
     serializer_class = JournalistSerializer
+
+    def list(self, request, *args, **kwargs):
+        journalists = cached_queryset(
+            "api:journalists", self.get_queryset, depends_on=[User, Group]
+        )
+        return surrogate.tag(
+            Response(self.get_serializer(journalists, many=True).data),
+            surrogate.LIST_JOURNALISTS,
+            *(surrogate.author_key(user.pk) for user in journalists))
+
+    def retrieve(self, request, *args, **kwargs):
+        response = super().retrieve(request, *args, **kwargs)
+        return surrogate.tag(response,
+                             surrogate.author_key(response.data["id"]))
+
+
+class ExportView(APIView):
+    """
+    ``GET /api/export/<articles|newsletters>.<csv|ndjson>``: stream every
+    matching row (see news/exports.py).
+
+    Filters: ``publisher``, ``author``, ``status``, ``since``, ``until``
+    (ISO dates on ``created_at``) and ``archived=1`` to include the archive.
+    Editors and staff may export anything; journalists only their own
+    work.
+    """
+
+    authentication_classes = [TokenAuthentication]
+    permission_classes = [IsAuthenticated]
+
+    def perform_content_negotiation(self, request, force=False):
+        # The body is CSV or NDJSON whatever the Accept header asks for;
+        # negotiation only picks a renderer for error responses.
+        return super().perform_content_negotiation(request, force=True)
+
+    def get(self, request, kind, fmt):
+        if kind not in exports.KINDS or fmt not in exports.FORMATS:
+            raise Http404("Unknown export.")
+        user = request.user
+        model = exports.KINDS[kind]
+        try:
+            filters = exports.parse_filters(model, request.query_params)
+        except ValueError as exc:
+            raise ValidationError({"detail": str(exc)})
+        if not (user.is_staff or user.role == User.ROLE_EDITOR):
+            if user.role != User.ROLE_JOURNALIST:
+                raise PermissionDenied("Only editors and journalists can "
+                                       "export content.")
+            filters["author"] = user.pk
+
+        response = StreamingHttpResponse(
+            exports.export(
+                kind, fmt,
+                include_archived=request.query_params.get("archived") == "1",
+                **filters,
+            ),
+            content_type=exports.FORMATS[fmt],
+        )
+        response["Content-Disposition"] = \
+            f'attachment; filename="{kind}.{fmt}"'
+        return response
+
+
+class MonthRollupView(APIView):
+    """
+    ``GET /api/months/<articles|newsletters>/[?publisher=<id>]``: months
+    that have approved items, newest first, with their counts. Read from
+    the month rollups (news/rollups.py), never from the content tables.
+    """
+
+    authentication_classes = [TokenAuthentication]
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request, kind):
+        if kind not in exports.KINDS:
+            raise Http404("Unknown kind.")
+        publisher = request.query_params.get("publisher")
+        try:
+            publisher = int(publisher) if publisher else None
+        except ValueError:
+            raise ValidationError({"publisher": "Expected a publisher id."})
+        return surrogate.tag(Response([
+            {"year": month.year, "month": month.month, "count": count}
+            for month, count in rollups.months(exports.KINDS[kind], publisher)
+        ]), surrogate.LIST_LATEST)
+
+
+class AudienceView(APIView):
+    """
+    Staff only: the followers of a publisher or journalist as CSV (see
+    news/audiences.py).
+
+    ``GET /api/audiences/<publishers|journalists>/<pk>/`` streams them as
+    ``username,email`` rows. ``POST`` with a ``text/csv`` body of usernames
+    and/or emails subscribes everyone in it. The body is read as a stream
+    and resolved in batches, and the response reports the counts.
+    """
+
+    authentication_classes = [TokenAuthentication]
+    permission_classes = [IsAdminUser]
+
+    def perform_content_negotiation(self, request, force=False):
+        return super().perform_content_negotiation(request, force=True)
+
+    def _target(self, kind, pk):
+        target = audiences.get_target(kind, pk)
+        if target is None:
+            raise Http404("Unknown publisher or journalist.")
+        return target
+
+    def get(self, request, kind, pk):
+        target = self._target(kind, pk)
+        response = StreamingHttpResponse(
+            audiences.export_followers(kind, target),
+            content_type="text/csv; charset=utf-8",
+        )
+        response["Content-Disposition"] = \
+            f'attachment; filename="{kind}-{pk}-followers.csv"'
+        return response
+
+    def post(self, request, kind, pk):
+        target = self._target(kind, pk)
+        if request.stream is None:
+            raise ValidationError({"detail": "Expected a CSV body."})
+        try:
+            report = audiences.import_followers(
+                kind, target, codecs.iterdecode(request.stream, "utf-8-sig"))
+        except UnicodeDecodeError:
+            raise ValidationError({"detail": "The CSV must be UTF-8."})
+        return Response({
+            "rows": report.rows,
+            "subscribed": report.subscribed,
+            "missing": report.missing,
+            "ambiguous": report.ambiguous,
+            "errors": [{"line": line, "detail": detail}
+                       for line, detail in report.errors],
+        })
+
+
+class BatchView(APIView):
+    """
+    ``POST /api/batch/``: run up to ``NEWS_BATCH_MAX_REQUESTS`` API calls in
+    one round trip (see news/api/batch.py). Responds with
+    ``{"responses": [{"id", "status", "headers", "body"}, ...]}`` in request
+    order, or 400 when the batch itself is malformed or over its limits.
+    """
+
+    authentication_classes = [TokenAuthentication]
+    permission_classes = [IsAuthenticated]
+
+    def post(self, request):
+        try:
+            subrequests = batch.parse(request.data)
+        except batch.BatchError as exc:
+            raise ValidationError({"detail": str(exc)})
+        return Response({"responses": batch.execute(request, subrequests)})
@@ -0,0 +1,152 @@
+# news/archive.py
+
+"""
+Hot/cold split of articles and newsletters.
+
+Nearly all reads are for recent items, so old ones move out of the hot
+tables into ArchivedArticle / ArchivedNewsletter:
+
+- approved items created more than ``NEWS_ARCHIVE_AFTER_DAYS`` ago, and
+- denied items created more than ``NEWS_ARCHIVE_DENIED_AFTER_DAYS`` ago.
+
+Pending items are never archived.
+
+archive() works one shard at a time, ``NEWS_ARCHIVE_BATCH_SIZE`` rows per
+transaction. Each batch locks the rows it picks. One ``INSERT ... SELECT``
+copies them within the shard's database, bodies still compressed. Then the
+hot rows are deleted. A batch either moves completely or not at all, and
+the next run picks up whatever is still eligible, so an interrupted run
+can simply be restarted.
+
+Archived rows keep their primary key and therefore their shard.
+get_archived() finds them by the same id, which is how the detail views
+and the API fall back transparently.
+"""
+
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import connections, transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from . import feeds
+from .models import (
+    Article,
+    ArchivedArticle,
+    ArchivedNewsletter,
+    ArticleVector,
+    Newsletter,
+)
+from .sharding import queryset_for_pk, shard_querysets
+
+ARCHIVES = {
+    Article: ArchivedArticle,
+    Newsletter: ArchivedNewsletter,
+}
+
+
+def _setting(name, default):
+    return getattr(settings, name, default)
+
+
+def archivable(model, now=None):
+    """Return the hot ``model`` rows that are due for the archive."""
+    now = now or timezone.now()
+    approved_before = now - timedelta(
+        days=_setting("NEWS_ARCHIVE_AFTER_DAYS", 365))
+    denied_before = now - timedelta(
+        days=_setting("NEWS_ARCHIVE_DENIED_AFTER_DAYS", 30))
+    return model._base_manager.filter(
+        Q(status=model.STATUS_APPROVED, created_at__lt=approved_before)
+        | Q(status=model.STATUS_DENIED, created_at__lt=denied_before)
+    )
+
+
+def _copy_sql(model, connection, count):
+    archive = ARCHIVES[model]
+    qn = connection.ops.quote_name
+    columns = [
+        qn(field.column) for field in archive._meta.concrete_fields
+        if field.name != "archived_at"
+    ]
+    placeholders = ", ".join(["%s"] * count)
+    return (
+        f"INSERT INTO {qn(archive._meta.db_table)} "
+        f"({', '.join(columns)}, {qn('archived_at')}) "
+        f"SELECT {', '.join(columns)}, %s "
+        f"FROM {qn(model._meta.db_table)} "
+        f"WHERE {qn(model._meta.pk.column)} IN ({placeholders})"
+    )
+
+
+def archive_batch(queryset, batch_size, now=None):
+    """
+    Move up to ``batch_size`` rows of ``queryset`` (one shard's archivable
+    rows) into the archive. Returns the moved ``(pk, status, publisher_id,
+    author_id)`` tuples.
+    """
+    model = queryset.model
+    alias = queryset.db
+    connection = connections[alias]
+    now = now or timezone.now()
+    with transaction.atomic(using=alias):
+        rows = list(
+            queryset.select_for_update(skip_locked=True)
+            .order_by("pk")
+            .values_list("pk", "status", "publisher_id", "author_id")
+            [:batch_size]
+        )
+        if not rows:
+            return []
+        pks = [row[0] for row in rows]
+        with connection.cursor() as cursor:
+            cursor.execute(
+                _copy_sql(model, connection, len(pks)),
+                [connection.ops.adapt_datetimefield_value(now), *pks],
+            )
+        # No cascades or per-row signals: nothing points at these rows, and
+        # an archived item has not been deleted as far as readers can tell.
+        model._base_manager.using(alias).filter(pk__in=pks)._raw_delete(alias)
+    return rows
+
+
+def _forget(model, rows):
+    """Drop derived data that only covers hot items."""
+    approved = [row for row in rows if row[1] == model.STATUS_APPROVED]
+    if model is Article:
+        ArticleVector.objects.filter(
+            article_id__in=[row[0] for row in approved]).delete()
+        for publisher_id, author_id in {row[2:] for row in approved}:
+            feeds.invalidate(feeds.SOURCE_PUBLISHER, publisher_id)
+            feeds.invalidate(feeds.SOURCE_JOURNALIST, author_id)
+
+
+def archive(model, batch_size=None, limit=None, now=None):
+    """
+    Move every archivable ``model`` row (or at most ``limit``) into the
+    archive, batch by batch. Returns the number of rows moved.
+    """
+    batch_size = batch_size or _setting("NEWS_ARCHIVE_BATCH_SIZE", 500)
+    now = now or timezone.now()
+    moved = 0
+    for queryset in shard_querysets(archivable(model, now)):
+        while limit is None or moved < limit:
+            size = batch_size if limit is None \
+                else min(batch_size, limit - moved)
+            rows = archive_batch(queryset, size, now)
+            if not rows:
+                break
+            _forget(model, rows)
+            moved += len(rows)
+    return moved
+
+
+def get_archived(model, pk, queryset=None):
+    """
+    Return archived ``model`` item ``pk`` or None. ``queryset`` (over the
+    archive model) can narrow what the caller is allowed to see.
+    """
+    if queryset is None:
+        queryset = ARCHIVES[model]._default_manager.all()
+    return queryset_for_pk(queryset, pk).filter(pk=pk).first()
@@ -0,0 +1,239 @@
+# news/audiences.py
+
+"""
+Bulk import and export of follower lists.
+
+A publisher that joins brings its audience along as a CSV file. Adding
+each reader through the subscription views would cost one m2m ``add()``
+per reader. import_followers() instead streams the file and works
+``NEWS_FOLLOWER_BATCH_SIZE`` rows at a time. Each batch resolves its
+usernames and emails with one query per LOOKUP_CHUNK values, looks up
+which of those users already follow the target, and writes only the new
+pairs straight into the m2m through table with
+``bulk_create(ignore_conflicts=True)``. Memory use does not grow with the
+file, and existing subscriptions are left as they are, so re-running an
+interrupted import is safe.
+
+The CSV either has a header row with ``username`` and/or ``email``
+columns, or it has no header and holds one username or email per row.
+Usernames and emails are matched case-insensitively with OR'd ``iexact``
+lookups rather than ``LOWER(column) IN (...)``, which could not use the
+column indexes (MariaDB has no functional indexes). Under the usual
+case-insensitive MySQL collations, ``iexact`` is a plain indexed
+comparison. A value that matches several accounts (a shared email,
+or usernames that differ only in case) is reported as ambiguous and
+skipped.
+
+export_followers() walks the through table in follower-id order, one
+keyset-paginated join per chunk, and yields CSV chunks like
+news/exports.py does.
+
+Bulk writes bypass ``m2m_changed``, so import_followers() bumps the query
+cache generations (news/querycache.py) once at the end instead.
+"""
+
+import csv
+from collections import defaultdict
+
+from django.conf import settings
+from django.db.models import Q
+
+from .exports import _buffered, _csv_lines
+from .models import CustomUser, Publisher
+from .querycache import bump_generation
+
+KINDS = {
+    "publishers": ("subscriptions_publishers", Publisher),
+    "journalists": ("subscriptions_journalists", CustomUser),
+}
+
+COLUMNS = ("username", "email")
+MAX_REPORTED = 20
+
+# Values matched per query; SQLite rejects much deeper OR expressions.
+LOOKUP_CHUNK = 500
+
+
+def batch_size():
+    return getattr(settings, "NEWS_FOLLOWER_BATCH_SIZE", 5000)
+
+
+def _through(kind):
+    """Return ``(through model, follower column, target column)``."""
+    relation, target_model = KINDS[kind]
+    field = CustomUser._meta.get_field(relation)
+    through = field.remote_field.through
+    return (through, field.m2m_column_name(),
+            field.m2m_reverse_name())
+
+
+def get_target(kind, pk):
+    """Return the publisher or journalist ``pk``, or None."""
+    if kind not in KINDS:
+        return None
+    target_model = KINDS[kind][1]
+    queryset = target_model.objects.all()
+    if kind == "journalists":
+        queryset = queryset.filter(role=CustomUser.ROLE_JOURNALIST)
+    return queryset.filter(pk=pk).first()
+
+
+# -----------------------------------------------------------------------------
+# Import
+# -----------------------------------------------------------------------------
+def identifiers(lines):
+    """Yield ``(line_number, column, value)`` from CSV ``lines``;
+    ``column`` is ``"username"`` or ``"email"``."""
+    reader = csv.reader(lines)
+    columns = None
+    for line_no, row in enumerate(reader, 1):
+        cells = [cell.strip() for cell in row]
+        if line_no == 1:
+            names = [cell.lower() for cell in cells]
+            if set(names) & set(COLUMNS):
+                columns = [(name, names.index(name)) for name in COLUMNS
+                           if name in names]
+                continue
+        if columns is None:
+            if cells and cells[0]:
+                # No header: guess from the value itself
+                yield (line_no, "email" if "@" in cells[0] else "username",
+                       cells[0])
+            continue
+        for name, index in columns:
+            if index < len(cells) and cells[index]:
+                yield line_no, name, cells[index]
+                break
+
+
+def resolve(column, values):
+    """
+    Map usernames or emails to user ids, one query per LOOKUP_CHUNK values.
+    Returns ``(found, ambiguous)``: ``{value.lower(): user_id}`` and the set
+    of lowercased values that belong to more than one account.
+    """
+    keys = sorted({value.lower() for value in values})
+    accounts = defaultdict(set)
+    for start in range(0, len(keys), LOOKUP_CHUNK):
+        condition = Q(*[Q(**{f"{column}__iexact": key})
+                        for key in keys[start:start + LOOKUP_CHUNK]],
+                      _connector=Q.OR)
+        for pk, matched in CustomUser.objects.filter(condition) \
+                .values_list("pk", column):
+            accounts[matched.lower()].add(pk)
+    found, ambiguous = {}, set()
+    for key, pks in accounts.items():
+        if len(pks) > 1:
+            ambiguous.add(key)
+        else:
+            found[key] = pks.pop()
+    return found, ambiguous
+
+
+class ImportReport:
+    """Counts of one import_followers() run."""
+
+    def __init__(self):
+        self.rows = 0
+        self.subscribed = 0
+        self.missing = 0
+        self.ambiguous = 0
+        self.errors = []
+
+    def _note(self, line_no, message):
+        if len(self.errors) < MAX_REPORTED:
+            self.errors.append((line_no, message))
+
+
+def import_followers(kind, target, lines, size=None, progress=None):
+    """
+    Subscribe every user named in CSV ``lines`` to ``target`` (a Publisher
+    for ``"publishers"``, a journalist for ``"journalists"``).
+
+    ``progress`` is called with the ImportReport after every batch.
+    """
+    through, follower_column, target_column = _through(kind)
+    size = size or batch_size()
+    report = ImportReport()
+    followers = through.objects.filter(**{target_column: target.pk})
+
+    def flush(batch):
+        resolved = {
+            column: resolve(column, {value for _, name, value in batch
+                                     if name == column})
+            for column in COLUMNS
+        }
+        follower_ids = set()
+        for line_no, column, value in batch:
+            found, ambiguous = resolved[column]
+            key = value.lower()
+            if key in found:
+                follower_ids.add(found[key])
+            elif key in ambiguous:
+                report.ambiguous += 1
+                report._note(line_no, f"{value}: several accounts")
+            else:
+                report.missing += 1
+                report._note(line_no, f"{value}: no such user")
+        if kind == "journalists":
+            # A journalist cannot follow themselves
+            follower_ids.discard(target.pk)
+        follower_ids -= set(followers.filter(
+            **{f"{follower_column}__in": follower_ids})
+            .values_list(follower_column, flat=True))
+        # Should another writer add one of these follows in between,
+        # ignore_conflicts skips it, though it is still counted here.
+        through.objects.bulk_create([
+            through(**{follower_column: follower_id,
+                       target_column: target.pk})
+            for follower_id in follower_ids
+        ], ignore_conflicts=True)
+        report.subscribed += len(follower_ids)
+        if progress:
+            progress(report)
+
+    batch = []
+    for entry in identifiers(lines):
+        batch.append(entry)
+        report.rows += 1
+        if len(batch) >= size:
+            flush(batch)
+            batch = []
+    if batch:
+        flush(batch)
+
+    if report.subscribed:
+        bump_generation(CustomUser)
+        bump_generation(KINDS[kind][1])
+    return report
+
+
+# -----------------------------------------------------------------------------
+# Export
+# -----------------------------------------------------------------------------
+def followers(kind, target, chunk_size=None):
+    """Yield ``(username, email)`` of every follower of ``target``, in
+    follower-id order, ``chunk_size`` rows per query."""
+    through, follower_column, target_column = _through(kind)
+    chunk_size = chunk_size or batch_size()
+    follower = follower_column[:-len("_id")]
+    base = through.objects.filter(**{target_column: target.pk}) \
+        .order_by(follower_column) \
+        .values_list(follower_column, f"{follower}__username",
+                     f"{follower}__email")
+    last = None
+    while True:
+        page = base if last is None \
+            else base.filter(**{f"{follower_column}__gt": last})
+        chunk = list(page[:chunk_size])
+        for _, username, email in chunk:
+            yield username, email
+        if len(chunk) < chunk_size:
+            return
+        last = chunk[-1][0]
+
+
+def export_followers(kind, target, chunk_size=None):
+    """Return an iterator of encoded CSV chunks, header first."""
+    return _buffered(_csv_lines(COLUMNS, followers(kind, target,
+                                                   chunk_size)))
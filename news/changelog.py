@@ -0,0 +1,119 @@
+# news/changelog.py
+
+"""
+Helpers around the append-only ArticleChange log:
+
+- record_article_change(): classify a save/delete and append a log row.
+- encode_cursor() / decode_cursor(): opaque sync cursors handed to clients.
+- changes_since(): the one indexed lookup behind the sync endpoint.
+
+Cursors follow the auto-increment primary key, but ids are handed out when
+a row is inserted, not when its transaction commits. A row can therefore
+become visible after a row with a higher id has already been read, and a
+cursor that had moved past it would skip it for good. To prevent that,
+sync only hands out rows older than ``NEWS_SYNC_SETTLE_SECONDS`` (the
+"settled horizon"). It stops at the first younger row, and the next poll
+picks up from there. A row is only missed if its transaction takes longer
+than the window to commit (or the app servers' clocks disagree by more),
+so keep the window above the longest write transaction. Clients see
+changes that much later.
+"""
+
+import base64
+import binascii
+from datetime import timedelta
+
+from django.conf import settings
+from django.utils import timezone
+
+from .models import Article, ArticleChange
+
+CURSOR_PREFIX = "c1:"
+
+
+def classify_article_change(instance, created, was_approved):
+    """
+    Return the ArticleChange kind for a saved article.
+
+    A status moving away from APPROVED is reported as "unapproved" so clients
+    can drop the article, just as they would for a delete.
+    """
+    is_approved = instance.status == Article.STATUS_APPROVED
+    if created:
+        return ArticleChange.KIND_APPROVED if is_approved \
+            else ArticleChange.KIND_CREATED
+    if is_approved and not was_approved:
+        return ArticleChange.KIND_APPROVED
+    if was_approved and not is_approved:
+        return ArticleChange.KIND_UNAPPROVED
+    return ArticleChange.KIND_UPDATED
+
+
+def record_article_change(article_id, kind):
+    """Append one row to the change log and return it."""
+    return ArticleChange.objects.create(article_id=article_id, kind=kind)
+
+
+def encode_cursor(change_id):
+    """Wrap a change-log id in an opaque, URL-safe token."""
+    raw = f"{CURSOR_PREFIX}{int(change_id)}".encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(token):
+    """
+    Turn a token from encode_cursor() back into a change-log id.
+
+    Raises ValueError for anything that was not produced by encode_cursor().
+    """
+    padded = token + "=" * (-len(token) % 4)
+    try:
+        raw = base64.urlsafe_b64decode(padded.encode()).decode()
+    except (binascii.Error, UnicodeDecodeError) as exc:
+        raise ValueError("Malformed sync cursor.") from exc
+    if not raw.startswith(CURSOR_PREFIX):
+        raise ValueError("Malformed sync cursor.")
+    change_id = int(raw[len(CURSOR_PREFIX):])
+    if change_id < 0:
+        raise ValueError("Malformed sync cursor.")
+    return change_id
+
+
+def settled_horizon():
+    """Return the time before which change-log rows are safe to hand out."""
+    return timezone.now() - timedelta(
+        seconds=getattr(settings, "NEWS_SYNC_SETTLE_SECONDS", 5))
+
+
+def head_change_id():
+    """Return the id of the newest settled change-log row, or 0 if there is
+    none."""
+    return (
+        ArticleChange.objects
+        .filter(changed_at__lte=settled_horizon())
+        .order_by("-pk")
+        .values_list("pk", flat=True)
+        .first()
+    ) or 0
+
+
+def changes_since(change_id, limit):
+    """
+    Return up to ``limit`` settled (id, article_id, kind) tuples newer than
+    ``change_id``, oldest first, plus a flag telling whether more remain.
+
+    This is a primary-key range scan, so an up-to-date client costs exactly
+    one indexed lookup that returns nothing. The result ends before the
+    first row that is not settled yet (see the module docstring).
+    """
+    horizon = settled_horizon()
+    rows = list(
+        ArticleChange.objects
+        .filter(pk__gt=change_id)
+        .order_by("pk")
+        .values_list("pk", "article_id", "kind", "changed_at")[:limit + 1]
+    )
+    for index, row in enumerate(rows):
+        if row[3] > horizon:
+            return [row[:3] for row in rows[:index]], True
+    return [row[:3] for row in rows[:limit]], len(rows) > limit
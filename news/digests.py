@@ -0,0 +1,234 @@
+# news/digests.py
+
+"""
+Hourly and daily notification digests.
+
+Readers whose ``notification_frequency`` is a digest get no per-approval
+email (news/signals.py skips them); send_digests() collects everything
+approved since their last digest into one message instead.
+
+Work is done a batch of readers at a time, with a fixed number of queries
+per batch no matter how many readers it holds:
+
+1. the batch of due readers (keyset on pk),
+2. their followed publishers and 3. followed journalists, straight from the
+   subscription tables,
+4. approved articles and 5. newsletters from any of those, over the widest
+   window in the batch (one query per shard),
+6. the SentNotification ledger rows (news/notifications.py) of those items
+   for the batch's readers, one query per item type,
+7. one UPDATE moving the ``digest_sent_at`` watermark forward.
+
+Items are then matched to readers in memory, minus any the reader was
+already emailed about (for example before switching to a digest), rendered
+from ``news/email/digest.txt`` and sent one message at a time over a single
+mail connection. The watermark only moves for readers whose digest was
+sent or who had nothing new, so a failed send is retried next run.
+"""
+
+from collections import defaultdict
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.mail import EmailMessage, get_connection
+from django.db.models import Q
+from django.template.loader import get_template
+from django.urls import reverse
+from django.utils import timezone
+
+from . import notifications
+from .models import Article, CustomUser, Newsletter, SentNotification
+from .sharding import shard_querysets
+
+PERIODS = {
+    CustomUser.FREQUENCY_HOURLY: timedelta(hours=1),
+    CustomUser.FREQUENCY_DAILY: timedelta(days=1),
+}
+
+# A reader is due a little early, so a cron job that drifts by a few minutes
+# does not push a digest back by a whole period.
+DUE_SLACK = timedelta(minutes=5)
+
+
+def _due_readers(frequency, now, after_pk, batch_size):
+    cutoff = now - PERIODS[frequency] + DUE_SLACK
+    return list(
+        CustomUser.objects
+        .filter(notification_frequency=frequency, pk__gt=after_pk)
+        .exclude(email="")
+        .filter(Q(digest_sent_at__isnull=True) | Q(digest_sent_at__lte=cutoff))
+        .order_by("pk")
+        .values("pk", "username", "email", "digest_sent_at")[:batch_size]
+    )
+
+
+def _follows(reader_ids):
+    """Return ``({reader: {publisher}}, {reader: {journalist}})``."""
+    publishers = defaultdict(set)
+    journalists = defaultdict(set)
+    pub_through = CustomUser.subscriptions_publishers.through
+    for reader_id, publisher_id in pub_through.objects.filter(
+            customuser_id__in=reader_ids).values_list(
+            "customuser_id", "publisher_id"):
+        publishers[reader_id].add(publisher_id)
+    journ_through = CustomUser.subscriptions_journalists.through
+    for reader_id, journalist_id in journ_through.objects.filter(
+            from_customuser_id__in=reader_ids).values_list(
+            "from_customuser_id", "to_customuser_id"):
+        journalists[reader_id].add(journalist_id)
+    return publishers, journalists
+
+
+def _approved(model, since, until, publisher_ids, author_ids):
+    """Return approved ``model`` rows from any of the given sources."""
+    if not publisher_ids and not author_ids:
+        return []
+    qs = (
+        model._default_manager
+        .filter(status=model.STATUS_APPROVED,
+                approved_at__gt=since, approved_at__lte=until)
+        .filter(Q(publisher_id__in=list(publisher_ids))
+                | Q(author_id__in=list(author_ids)))
+        .order_by("approved_at")
+        .values("pk", "title", "publisher_id", "author_id", "approved_at")
+    )
+    rows = [row for shard in shard_querysets(qs) for row in shard]
+    rows.sort(key=lambda row: row["approved_at"])
+    return rows
+
+
+def _already_emailed(item_type, rows, reader_ids):
+    """Return ``{(item_id, reader_id)}`` for ``rows`` already emailed to
+    the readers according to the notification ledger."""
+    if not rows:
+        return set()
+    return set(
+        SentNotification.objects.filter(
+            item_type=item_type, item_id__in=[row["pk"] for row in rows],
+            transition=notifications.TRANSITION_APPROVED,
+            channel=notifications.CHANNEL_EMAIL,
+            recipient_id__in=reader_ids,
+        ).values_list("item_id", "recipient_id")
+    )
+
+
+def _index(rows):
+    by_publisher = defaultdict(list)
+    by_author = defaultdict(list)
+    for row in rows:
+        by_publisher[row["publisher_id"]].append(row)
+        by_author[row["author_id"]].append(row)
+    return by_publisher, by_author
+
+
+def _items_for(index, publishers, journalists, since):
+    by_publisher, by_author = index
+    found = {}
+    for publisher_id in publishers:
+        for row in by_publisher.get(publisher_id, ()):
+            found[row["pk"]] = row
+    for journalist_id in journalists:
+        for row in by_author.get(journalist_id, ()):
+            found[row["pk"]] = row
+    return sorted(
+        (row for row in found.values() if row["approved_at"] > since),
+        key=lambda row: row["approved_at"],
+    )
+
+
+def _link(name, pk):
+    base = getattr(settings, "NEWS_SITE_URL", "").rstrip("/")
+    return base + reverse(name, args=[pk])
+
+
+def send_digests(frequency, batch_size=500, now=None):
+    """
+    Send the ``frequency`` digest to every reader who is due one.
+
+    Returns ``(readers, emails)``: how many readers were processed and how
+    many digests were sent (readers with nothing new get no email).
+    """
+    now = now or timezone.now()
+    period = PERIODS[frequency]
+    template = get_template("news/email/digest.txt")
+    label = dict(CustomUser.FREQUENCY_CHOICES)[frequency]
+    readers_done = emails_sent = 0
+    after_pk = 0
+
+    while True:
+        readers = _due_readers(frequency, now, after_pk, batch_size)
+        if not readers:
+            break
+        after_pk = readers[-1]["pk"]
+        reader_ids = [reader["pk"] for reader in readers]
+        publishers, journalists = _follows(reader_ids)
+
+        since = {
+            reader["pk"]: reader["digest_sent_at"] or now - period
+            for reader in readers
+        }
+        oldest = min(since.values())
+        all_publishers = set().union(*publishers.values())
+        all_journalists = set().union(*journalists.values())
+        article_rows = _approved(
+            Article, oldest, now, all_publishers, all_journalists)
+        newsletter_rows = _approved(
+            Newsletter, oldest, now, all_publishers, all_journalists)
+        emailed_articles = _already_emailed(
+            SentNotification.ITEM_ARTICLE, article_rows, reader_ids)
+        emailed_newsletters = _already_emailed(
+            SentNotification.ITEM_NEWSLETTER, newsletter_rows, reader_ids)
+        articles = _index(article_rows)
+        newsletters = _index(newsletter_rows)
+
+        messages = []
+        done_ids = []
+        for reader in readers:
+            pk = reader["pk"]
+            reader_articles = [
+                row for row in _items_for(
+                    articles, publishers[pk], journalists[pk], since[pk])
+                if (row["pk"], pk) not in emailed_articles
+            ]
+            reader_newsletters = [
+                row for row in _items_for(
+                    newsletters, publishers[pk], journalists[pk], since[pk])
+                if (row["pk"], pk) not in emailed_newsletters
+            ]
+            if not reader_articles and not reader_newsletters:
+                done_ids.append(pk)
+                continue
+            body = template.render({
+                "reader": reader,
+                "label": label,
+                "articles": [
+                    dict(row, url=_link("news:article-detail", row["pk"]))
+                    for row in reader_articles
+                ],
+                "newsletters": [
+                    dict(row, url=_link("news:newsletter-detail", row["pk"]))
+                    for row in reader_newsletters
+                ],
+            })
+            count = len(reader_articles) + len(reader_newsletters)
+            messages.append((pk, EmailMessage(
+                subject=f"{label}: {count} new item{'s' if count != 1 else ''}",
+                body=body,
+                from_email=settings.DEFAULT_FROM_EMAIL,
+                to=[reader["email"]],
+            )))
+
+        if messages:
+            with get_connection(fail_silently=True) as connection:
+                for pk, message in messages:
+                    # One message per call, so a failure only holds back
+                    # that reader's watermark.
+                    if connection.send_messages([message]):
+                        done_ids.append(pk)
+                        emails_sent += 1
+        if done_ids:
+            CustomUser.objects.filter(pk__in=done_ids) \
+                .update(digest_sent_at=now)
+        readers_done += len(readers)
+
+    return readers_done, emails_sent
@@ -0,0 +1,279 @@
+# news/duplicates.py
+
+"""
+Near-duplicate detection for submitted articles with MinHash and LSH.
+
+An article's title and body are lower-cased, split into words and cut into
+overlapping word ``NEWS_DUPLICATE_SHINGLE``-grams. Each shingle is hashed
+to 32 bits and run through ``bands x rows`` fixed random permutations
+``(a * x + b) mod p`` at once, as one NumPy matrix. The column minima are
+the MinHash signature. Two signatures agree in a position with probability
+equal to the Jaccard similarity of the shingle sets, so the fraction of
+equal positions estimates it.
+
+For lookup, the signature is cut into ``NEWS_DUPLICATE_BANDS`` bands of
+``NEWS_DUPLICATE_ROWS`` values, and each band is hashed into a 64-bit
+ArticleBand key. Articles that share any key are candidates. The defaults
+(16 x 8) make articles at 0.8 similarity candidates 95% of the time and
+ones at 0.4 about 1%. Finding an article's duplicates is therefore one
+indexed ``key IN (...)`` probe with 16 keys plus a primary-key fetch of the
+candidates' signatures, whatever the number of articles.
+Candidates at ``NEWS_DUPLICATE_THRESHOLD`` or above are duplicates.
+
+Matching articles share a ``cluster_id`` (ArticleFingerprint): the lowest
+article id of the group, merging groups that a new article bridges. The
+review queue shows these groups together. index_articles() runs from the
+save signal when an article is created or its text changes, and for each
+bulk-ingest batch. rebuild() re-indexes every article through the same
+code; the groups do not depend on the order articles arrive in.
+Archiving removes articles with a raw delete and leaves their fingerprints
+behind; readers skip articles that no longer exist.
+"""
+
+import hashlib
+import zlib
+
+import numpy as np
+from django.conf import settings
+from django.db import router, transaction
+
+from .models import Article, ArticleBand, ArticleFingerprint
+from .related import TOKEN_RE
+from .sharding import fetch_by_pks, shard_querysets
+
+# A prime just above 2**32; a * x + b stays below 2**64 for 32-bit x.
+PRIME = (1 << 32) + 15
+SEED = 20240501
+SHINGLE_CHUNK = 2048
+
+
+def _setting(name, default):
+    return getattr(settings, name, default)
+
+
+def shape():
+    """Return ``(bands, rows)`` of the LSH index."""
+    return (_setting("NEWS_DUPLICATE_BANDS", 16),
+            _setting("NEWS_DUPLICATE_ROWS", 8))
+
+
+def threshold():
+    return _setting("NEWS_DUPLICATE_THRESHOLD", 0.8)
+
+
+def _permutations(count):
+    # Fixed seed: stored signatures must stay comparable across processes.
+    rng = np.random.default_rng(SEED)
+    a = rng.integers(1, (1 << 32) - 1, size=count, dtype=np.uint64)
+    b = rng.integers(0, PRIME, size=count, dtype=np.uint64)
+    return a, b
+
+
+# -----------------------------------------------------------------------------
+# Signatures
+# -----------------------------------------------------------------------------
+def shingles(title, body, size=None):
+    """Return the distinct 32-bit shingle hashes of an article."""
+    size = size or _setting("NEWS_DUPLICATE_SHINGLE", 3)
+    words = TOKEN_RE.findall(f"{title} {body}".lower())
+    if len(words) < size:
+        grams = [" ".join(words)] if words else []
+    else:
+        grams = (" ".join(words[i:i + size])
+                 for i in range(len(words) - size + 1))
+    hashes = np.fromiter((zlib.crc32(gram.encode()) for gram in grams),
+                         dtype=np.uint64)
+    return np.unique(hashes)
+
+
+def signature(title, body):
+    """Return the MinHash signature of an article as a uint32 array."""
+    bands, rows = shape()
+    a, b = _permutations(bands * rows)
+    hashes = shingles(title, body)
+    result = np.full(bands * rows, (1 << 32) - 1, dtype=np.uint64)
+    for start in range(0, len(hashes), SHINGLE_CHUNK):
+        chunk = hashes[start:start + SHINGLE_CHUNK, None]
+        permuted = (chunk * a + b) % PRIME & np.uint64((1 << 32) - 1)
+        np.minimum(result, permuted.min(axis=0), out=result)
+    return result.astype("<u4")
+
+
+def band_keys(sig):
+    """Return one signed 64-bit bucket key per band of ``sig``."""
+    bands, rows = shape()
+    return [
+        int.from_bytes(hashlib.blake2b(
+            bytes([band]) + values.tobytes(), digest_size=8).digest(),
+            "little", signed=True)
+        for band, values in enumerate(sig.reshape(bands, rows))
+    ]
+
+
+def similarity(sig, others):
+    """Return the estimated Jaccard similarity of ``sig`` to each row of
+    the 2-D array ``others``."""
+    return (others == sig).mean(axis=1)
+
+
+def _unpack(blob):
+    return np.frombuffer(bytes(blob), dtype="<u4")
+
+
+# -----------------------------------------------------------------------------
+# Incremental updates
+# -----------------------------------------------------------------------------
+def _body(article):
+    # Read the raw slot: a still-compressed body (news/fields.py) is decoded
+    # here without replacing the payload the next save() writes back.
+    body = article.__dict__.get("body")
+    return str(body if body is not None else article.body or "")
+
+
+def _root(merged, cluster):
+    while cluster in merged:
+        cluster = merged[cluster]
+    return cluster
+
+
+def _buckets(keys, exclude):
+    """Return ``{key: [article_id, ...]}`` for stored entries of ``keys``."""
+    buckets = {}
+    keys = list(keys)
+    for start in range(0, len(keys), 500):
+        entries = ArticleBand.objects.filter(
+            key__in=keys[start:start + 500]).exclude(
+            article_id__in=exclude).values_list("key", "article_id")
+        for key, article_id in entries:
+            buckets.setdefault(key, []).append(article_id)
+    return buckets
+
+
+def index_articles(articles):
+    """
+    Fingerprint saved ``articles`` (re-indexing ones seen before) and group
+    each with its near-duplicates, including earlier ones in the same list.
+
+    Returns ``{article_id: [(duplicate_id, score), ...]}``, most similar
+    first.
+    """
+    limit = threshold()
+    sigs = {article.pk: signature(article.title, _body(article))
+            for article in articles}
+    keys = {pk: band_keys(sig) for pk, sig in sigs.items()}
+    buckets = _buckets({key for ks in keys.values() for key in ks}, sigs)
+    known = {
+        article_id: (_unpack(blob), cluster_id)
+        for article_id, blob, cluster_id in ArticleFingerprint.objects
+        .filter(article_id__in={pk for ids in buckets.values()
+                                for pk in ids})
+        .values_list("article_id", "signature", "cluster_id")
+    }
+
+    found = {}
+    merged = {}
+    for pk, sig in sigs.items():
+        candidates = sorted({other for key in keys[pk]
+                             for other in buckets.get(key, ())
+                             if other in known and other != pk})
+        scores = similarity(sig, np.array([known[other][0]
+                                           for other in candidates])) \
+            if candidates else []
+        matches = sorted(
+            ((other, round(float(score), 4))
+             for other, score in zip(candidates, scores) if score >= limit),
+            key=lambda match: -match[1])
+        clusters = {_root(merged, known[other][1]) for other, _ in matches}
+        cluster = min(clusters | {pk})
+        for old in clusters - {cluster}:
+            merged[old] = cluster
+        found[pk] = matches
+        known[pk] = (sig, cluster)
+        for key in keys[pk]:
+            buckets.setdefault(key, []).append(pk)
+
+    with transaction.atomic(using=router.db_for_write(ArticleFingerprint)):
+        ArticleBand.objects.filter(article_id__in=list(sigs)).delete()
+        ArticleFingerprint.objects.filter(article_id__in=list(sigs)).delete()
+        ArticleFingerprint.objects.bulk_create([
+            ArticleFingerprint(
+                article_id=pk, signature=sig.tobytes(),
+                cluster_id=_root(merged, known[pk][1]))
+            for pk, sig in sigs.items()
+        ], batch_size=500)
+        ArticleBand.objects.bulk_create([
+            ArticleBand(key=key, article_id=pk)
+            for pk, ks in keys.items() for key in ks
+        ], batch_size=1000)
+        for old in merged:
+            ArticleFingerprint.objects.filter(cluster_id=old) \
+                .update(cluster_id=_root(merged, old))
+    return found
+
+
+def index_article(article):
+    """Index one article; returns its ``[(duplicate_id, score), ...]``."""
+    return index_articles([article])[article.pk]
+
+
+def remove_article(article_id):
+    """Drop a deleted article; the rest of its group stays together."""
+    ArticleBand.objects.filter(article_id=article_id).delete()
+    ArticleFingerprint.objects.filter(article_id=article_id).delete()
+
+
+def rebuild(chunk_size=1000):
+    """
+    Re-index every article, shard by shard, ``chunk_size`` at a time.
+    Returns the number of articles indexed.
+    """
+    ArticleBand.objects.all().delete()
+    ArticleFingerprint.objects.all().delete()
+    indexed = 0
+    batch = []
+    for qs in shard_querysets(Article.objects.order_by("pk")
+                              .only("pk", "title", "body")):
+        for article in qs.iterator(chunk_size=2000):
+            batch.append(article)
+            if len(batch) >= chunk_size:
+                index_articles(batch)
+                indexed += len(batch)
+                batch = []
+    if batch:
+        index_articles(batch)
+        indexed += len(batch)
+    return indexed
+
+
+# -----------------------------------------------------------------------------
+# Reading
+# -----------------------------------------------------------------------------
+def groups(article_ids):
+    """
+    Return ``{article_id: [other_id, ...]}`` for those of ``article_ids``
+    that have suspected duplicates, members oldest id first.
+    """
+    clusters = dict(
+        ArticleFingerprint.objects.filter(article_id__in=list(article_ids))
+        .values_list("article_id", "cluster_id"))
+    members = {}
+    for article_id, cluster_id in ArticleFingerprint.objects.filter(
+            cluster_id__in=set(clusters.values())) \
+            .order_by("article_id").values_list("article_id", "cluster_id"):
+        members.setdefault(cluster_id, []).append(article_id)
+    return {
+        article_id: [pk for pk in members[cluster_id] if pk != article_id]
+        for article_id, cluster_id in clusters.items()
+        if len(members[cluster_id]) > 1
+    }
+
+
+def duplicates_of(article_id, queryset=None):
+    """Return the existing articles grouped with ``article_id`` that are in
+    ``queryset`` (all articles by default), oldest first."""
+    ids = groups([article_id]).get(article_id, [])
+    if not ids:
+        return []
+    found = fetch_by_pks(queryset if queryset is not None
+                         else Article.objects.all(), ids)
+    return [found[pk] for pk in ids if pk in found]
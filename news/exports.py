@@ -0,0 +1,203 @@
+# news/exports.py
+
+"""
+Streaming CSV / NDJSON exports of articles and newsletters.
+
+rows() walks each shard in primary-key order, ``NEWS_EXPORT_CHUNK_SIZE``
+rows per query, with keyset pagination (``pk > last``). Memory use stays
+constant and the first rows are available after one query. Keyset chunks
+are used rather than ``QuerySet.iterator()``, because the MySQL/MariaDB
+drivers buffer an iterator's whole result set on the client. A chunk only
+loads the exported columns, and bodies are decompressed one row at a time.
+
+csv_chunks() and ndjson_chunks() turn rows into byte strings of roughly
+``NEWS_EXPORT_BUFFER_BYTES``, ready for a StreamingHttpResponse or a file.
+Rows come out shard by shard, ordered by id within each shard.
+"""
+
+import csv
+import io
+from datetime import datetime, time
+
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.utils import timezone
+from django.utils.dateparse import parse_date, parse_datetime
+
+from .archive import ARCHIVES
+from .models import Article, Newsletter
+from .sharding import shard_querysets
+
+KINDS = {
+    "articles": Article,
+    "newsletters": Newsletter,
+}
+
+FORMATS = {
+    "csv": "text/csv; charset=utf-8",
+    "ndjson": "application/x-ndjson",
+}
+
+COLUMNS = {
+    Article: ("id", "title", "body", "status", "created_at", "approved_at",
+              "publisher_id", "author_id"),
+    Newsletter: ("id", "title", "body", "status", "created_at", "updated_at",
+                 "approved_at", "publisher_id", "author_id"),
+}
+
+
+def _setting(name, default):
+    return getattr(settings, name, default)
+
+
+def columns(model):
+    """Return the exported column names, in order."""
+    return COLUMNS[model] + ("archived",)
+
+
+def _filtered(queryset, publisher=None, author=None, status=None,
+              since=None, until=None):
+    if publisher is not None:
+        queryset = queryset.filter(publisher_id=publisher)
+    if author is not None:
+        queryset = queryset.filter(author_id=author)
+    if status is not None:
+        queryset = queryset.filter(status=status)
+    if since is not None:
+        queryset = queryset.filter(created_at__gte=since)
+    if until is not None:
+        queryset = queryset.filter(created_at__lt=until)
+    return queryset
+
+
+def _parse_moment(value):
+    moment = parse_datetime(value)
+    if moment is None:
+        day = parse_date(value)
+        if day is None:
+            raise ValueError(f"Invalid date: {value!r}.")
+        moment = datetime.combine(day, time.min)
+    if timezone.is_naive(moment):
+        moment = timezone.make_aware(moment)
+    return moment
+
+
+def parse_filters(model, params):
+    """
+    Turn string ``params`` (a QueryDict or dict of options) into keyword
+    arguments for rows(). Raises ValueError naming the bad parameter.
+    """
+    filters = {}
+    for name in ("publisher", "author"):
+        value = params.get(name)
+        if value not in (None, ""):
+            try:
+                filters[name] = int(value)
+            except (TypeError, ValueError):
+                raise ValueError(f"{name}: expected an id.")
+    status = params.get("status")
+    if status not in (None, ""):
+        if status not in dict(model.STATUS_CHOICES):
+            raise ValueError(
+                f"status: expected one of "
+                f"{', '.join(dict(model.STATUS_CHOICES))}.")
+        filters["status"] = status
+    for name in ("since", "until"):
+        value = params.get(name)
+        if value not in (None, ""):
+            try:
+                filters[name] = _parse_moment(value)
+            except ValueError as exc:
+                raise ValueError(f"{name}: {exc}")
+    return filters
+
+
+def rows(model, include_archived=False, chunk_size=None, **filters):
+    """
+    Yield one tuple per exported ``model`` row (see columns()).
+
+    ``filters`` are ``publisher``, ``author`` (ids), ``status`` and a
+    ``since``/``until`` range on ``created_at``. With ``include_archived``
+    the archive tables (news/archive.py) follow the hot ones.
+    """
+    chunk_size = chunk_size or _setting("NEWS_EXPORT_CHUNK_SIZE", 2000)
+    names = COLUMNS[model]
+    body = names.index("body")
+    sources = [(model, False)]
+    if include_archived:
+        sources.append((ARCHIVES[model], True))
+    for source, archived in sources:
+        base = _filtered(source._base_manager.all(), **filters)
+        for queryset in shard_querysets(base.order_by("pk")
+                                        .values_list(*names)):
+            last = None
+            while True:
+                page = queryset if last is None \
+                    else queryset.filter(pk__gt=last)
+                chunk = list(page[:chunk_size])
+                for row in chunk:
+                    row = list(row)
+                    row[body] = str(row[body])
+                    yield (*row, archived)
+                if len(chunk) < chunk_size:
+                    break
+                last = chunk[-1][0]
+
+
+def _buffered(pieces):
+    """
+    Join small strings into encoded chunks of about the buffer size. The
+    first piece goes out on its own so clients see bytes straight away.
+    """
+    limit = _setting("NEWS_EXPORT_BUFFER_BYTES", 64 * 1024)
+    buffer, size = [], 0
+    first = True
+    for piece in pieces:
+        buffer.append(piece)
+        size += len(piece)
+        if size >= limit or first:
+            first = False
+            yield "".join(buffer).encode("utf-8")
+            buffer, size = [], 0
+    if buffer:
+        yield "".join(buffer).encode("utf-8")
+
+
+def _csv_lines(header, records):
+    out = io.StringIO()
+    writer = csv.writer(out)
+
+    def line(values):
+        writer.writerow(values)
+        text = out.getvalue()
+        out.seek(0)
+        out.truncate()
+        return text
+
+    yield line(header)
+    for record in records:
+        yield line(record)
+
+
+def csv_chunks(model, records):
+    """Encode ``records`` from rows() as CSV, header first."""
+    return _buffered(_csv_lines(columns(model), records))
+
+
+def ndjson_chunks(model, records):
+    """Encode ``records`` from rows() as one JSON object per line."""
+    names = columns(model)
+    encoder = DjangoJSONEncoder(ensure_ascii=False)
+    return _buffered(
+        encoder.encode(dict(zip(names, record))) + "\n"
+        for record in records
+    )
+
+
+def export(kind, fmt, include_archived=False, **filters):
+    """Return an iterator of encoded chunks for ``kind`` in ``fmt``."""
+    model = KINDS[kind]
+    records = rows(model, include_archived=include_archived, **filters)
+    if fmt == "csv":
+        return csv_chunks(model, records)
+    return ndjson_chunks(model, records)
@@ -0,0 +1,158 @@
+# news/feeds.py
+
+"""
+RSS and Atom feeds of approved articles per publisher and per journalist.
+
+Aggregators poll feeds far more often than feeds change, so a rendered
+feed is kept in the shared cache. Its key includes the source's *feed
+version*, a timestamp that is replaced after commit whenever an approved
+article of that publisher or journalist is added, edited, withdrawn or
+deleted. Nothing has to find and delete stale entries. The version also
+serves as Last-Modified, so it only moves forward even when an article
+drops out. The ETag is a hash of the rendered bytes.
+
+On a cache hit a request costs two cache reads and no query. A client
+that sends its ETag or date back gets a 304 without a body. A miss reads
+the newest ``NEWS_FEED_SIZE`` items through the ``(status, publisher,
+created_at)`` or ``(status, author, created_at)`` index, loading only
+the columns a feed shows.
+"""
+
+import hashlib
+import io
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.utils.feedgenerator import Atom1Feed, Rss201rev2Feed
+from django.urls import reverse
+
+from .models import Article, CustomUser, Publisher
+from .sharding import merge_shards
+
+VERSION_KEY = "feed:ver:{}:{}"
+ENTRY_KEY = "feed:{}:{}:{}:{}:{}"
+
+FORMATS = {
+    "rss": Rss201rev2Feed,
+    "atom": Atom1Feed,
+}
+
+SOURCE_PUBLISHER = "publisher"
+SOURCE_JOURNALIST = "journalist"
+
+
+def _setting(name, default):
+    return getattr(settings, name, default)
+
+
+# -----------------------------------------------------------------------------
+# Versions
+# -----------------------------------------------------------------------------
+def feed_version(source, pk):
+    """Return the current version (a ``time.time_ns()`` stamp) of a feed."""
+    key = VERSION_KEY.format(source, pk)
+    version = cache.get(key)
+    if version is None:
+        cache.add(key, time.time_ns(), timeout=None)
+        version = cache.get(key)
+    return version
+
+
+def invalidate(source, pk, using="default"):
+    """Move a feed to a new version once the current transaction commits."""
+    key = VERSION_KEY.format(source, pk)
+    transaction.on_commit(
+        lambda: cache.set(key, time.time_ns(), timeout=None), using=using)
+
+
+def invalidate_article(article, using="default"):
+    """Invalidate the publisher and journalist feeds ``article`` is in."""
+    invalidate(SOURCE_PUBLISHER, article.publisher_id, using)
+    invalidate(SOURCE_JOURNALIST, article.author_id, using)
+
+
+# -----------------------------------------------------------------------------
+# Rendering
+# -----------------------------------------------------------------------------
+def _source(source, pk):
+    """Return ``(title, description, filter)`` or None if there is none."""
+    if source == SOURCE_PUBLISHER:
+        publisher = Publisher.objects.filter(pk=pk).only("name").first()
+        if publisher is None:
+            return None
+        return (publisher.name, f"Latest articles from {publisher.name}",
+                {"publisher_id": pk})
+    journalist = (
+        CustomUser.objects.filter(pk=pk, role=CustomUser.ROLE_JOURNALIST)
+        .only("username").first()
+    )
+    if journalist is None:
+        return None
+    return (journalist.username,
+            f"Latest articles by {journalist.username}",
+            {"author_id": pk})
+
+
+def render_feed(request, source, pk, fmt, version):
+    """
+    Render a feed and return ``{"body", "content_type", "etag",
+    "last_modified"}``, or None when the publisher or journalist does not
+    exist. ``version`` becomes the Last-Modified time.
+    """
+    found = _source(source, pk)
+    if found is None:
+        return None
+    title, description, filters = found
+
+    articles = merge_shards(
+        Article.objects.filter(status=Article.STATUS_APPROVED, **filters)
+        .only("pk", "title", "body", "created_at", "approved_at",
+              "author_id")
+        .order_by("-created_at")
+    )[:_setting("NEWS_FEED_SIZE", 20)]
+    authors = dict(
+        CustomUser.objects.filter(pk__in={a.author_id for a in articles})
+        .values_list("pk", "username")
+    )
+
+    feed = FORMATS[fmt](
+        title=title,
+        link=request.build_absolute_uri(reverse("news:article-list")),
+        description=description,
+        feed_url=request.build_absolute_uri(),
+        language=settings.LANGUAGE_CODE,
+    )
+    for article in articles:
+        feed.add_item(
+            title=article.title,
+            link=request.build_absolute_uri(article.get_absolute_url()),
+            description=article.body,
+            author_name=authors.get(article.author_id, ""),
+            pubdate=article.created_at,
+            updateddate=article.approved_at or article.created_at,
+            unique_id=f"article-{article.pk}",
+        )
+    out = io.BytesIO()
+    feed.write(out, "utf-8")
+    body = out.getvalue()
+    return {
+        "body": body,
+        "content_type": feed.content_type,
+        "etag": hashlib.md5(body).hexdigest(),
+        "last_modified": version / 1e9,
+    }
+
+
+def get_feed(request, source, pk, fmt):
+    """Return the cached feed entry, rendering it on a miss."""
+    version = feed_version(source, pk)
+    key = ENTRY_KEY.format(source, pk, fmt, request.get_host(), version)
+    entry = cache.get(key)
+    if entry is None:
+        entry = render_feed(request, source, pk, fmt, version)
+        if entry is None:
+            return None
+        cache.set(key, entry, _setting("NEWS_FEED_CACHE_SECONDS", 3600))
+    return entry
@@ -0,0 +1,176 @@
+# news/fields.py
+
+"""
+Custom model fields.
+
+CompressedTextField stores large text compressed in a binary column and
+only decompresses it when the attribute is first read.
+
+Stored format (the first bytes of the column):
+
+- ``\\x1fZ`` + zlib stream
+- ``\\x1fS`` + zstd frame (only written when ``zstandard`` is installed)
+- ``\\x1fR`` + UTF-8 text that itself starts with ``\\x1f``
+- anything else: plain UTF-8 text, which is also how rows written before
+  the column was converted read back.
+"""
+
+import zlib
+
+from django.conf import settings
+from django.db import models
+from django.db.models.query_utils import DeferredAttribute
+
+try:
+    import zstandard
+except ImportError:  # optional dependency
+    zstandard = None
+
+TAG = b"\x1f"
+ZLIB = TAG + b"Z"
+ZSTD = TAG + b"S"
+RAW = TAG + b"R"
+
+
+def compress_text(text, threshold=None, codec=None, level=None):
+    """
+    Encode ``text`` for storage, compressing it when it is at least
+    ``threshold`` bytes long and compression actually saves space.
+    """
+    if threshold is None:
+        threshold = getattr(settings, "NEWS_COMPRESSION_THRESHOLD", 1024)
+    codec = codec or getattr(settings, "NEWS_COMPRESSION_CODEC", "zlib")
+    raw = text.encode("utf-8")
+    if len(raw) >= threshold:
+        if codec == "zstd" and zstandard is not None:
+            packed = ZSTD + zstandard.ZstdCompressor(
+                level=level or 3).compress(raw)
+        else:
+            packed = ZLIB + zlib.compress(raw, level or 6)
+        if len(packed) < len(raw):
+            return packed
+    return RAW + raw if raw.startswith(TAG) else raw
+
+
+def decompress_text(data):
+    """Decode a value produced by compress_text()."""
+    if isinstance(data, str):
+        return data
+    data = bytes(data)
+    header = data[:2]
+    if header == ZLIB:
+        data = zlib.decompress(data[2:])
+    elif header == ZSTD:
+        if zstandard is None:
+            raise RuntimeError(
+                "zstandard is required to read zstd-compressed text.")
+        data = zstandard.ZstdDecompressor().decompress(data[2:])
+    elif header == RAW:
+        data = data[2:]
+    return data.decode("utf-8")
+
+
+def is_compressed(data):
+    """Return True if ``data`` is a stored compressed (zlib/zstd) value."""
+    return isinstance(data, (bytes, memoryview)) and \
+        bytes(data[:2]) in (ZLIB, ZSTD)
+
+
+class CompressedPayload:
+    """
+    Still-compressed column value, as loaded from the database.
+
+    Model attributes hide this by decoding on first access; ``values()``
+    and ``values_list()`` return it as-is, so call ``str()`` on it there.
+    """
+
+    __slots__ = ("data",)
+
+    def __init__(self, data):
+        self.data = bytes(data)
+
+    def __str__(self):
+        return decompress_text(self.data)
+
+    def __len__(self):
+        return len(self.data)
+
+    def __eq__(self, other):
+        return isinstance(other, CompressedPayload) and other.data == self.data
+
+    def __hash__(self):
+        return hash(self.data)
+
+    def __repr__(self):
+        return f"<CompressedPayload {len(self.data)} bytes>"
+
+
+class CompressedTextDescriptor(DeferredAttribute):
+    """Decode a CompressedPayload the first time the attribute is read."""
+
+    def __get__(self, instance, cls=None):
+        if instance is None:
+            return self
+        value = super().__get__(instance, cls)
+        if isinstance(value, CompressedPayload):
+            value = str(value)
+            instance.__dict__[self.field.attname] = value
+        return value
+
+    def __set__(self, instance, value):
+        instance.__dict__[self.field.attname] = value
+
+
+class CompressedTextField(models.TextField):
+    """
+    A TextField stored compressed in a binary column.
+
+    Values of at least ``threshold`` bytes (default
+    ``settings.NEWS_COMPRESSION_THRESHOLD``) are compressed with
+    ``settings.NEWS_COMPRESSION_CODEC``; shorter values are stored as plain
+    UTF-8. Saving an instance whose value was never read writes the stored
+    bytes back without recompressing them.
+
+    The column cannot be searched with ``LIKE``/``icontains``.
+    """
+
+    descriptor_class = CompressedTextDescriptor
+
+    def __init__(self, *args, threshold=None, **kwargs):
+        self.threshold = threshold
+        super().__init__(*args, **kwargs)
+
+    def deconstruct(self):
+        name, path, args, kwargs = super().deconstruct()
+        if self.threshold is not None:
+            kwargs["threshold"] = self.threshold
+        return name, path, args, kwargs
+
+    def get_internal_type(self):
+        return "BinaryField"
+
+    def from_db_value(self, value, expression, connection):
+        if value is None or isinstance(value, str):
+            return value
+        if is_compressed(value):
+            return CompressedPayload(value)
+        return decompress_text(value)
+
+    def to_python(self, value):
+        if isinstance(value, CompressedPayload):
+            return str(value)
+        return super().to_python(value)
+
+    def pre_save(self, model_instance, add):
+        # Read the raw slot so an untouched payload is not decoded.
+        return model_instance.__dict__.get(self.attname)
+
+    def get_prep_value(self, value):
+        if value is None:
+            return None
+        if isinstance(value, CompressedPayload):
+            return value.data
+        return compress_text(str(value), self.threshold)
+
+    def value_to_string(self, obj):
+        return getattr(obj, self.attname)
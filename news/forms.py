@@ -4,26 +4,11 @@ from .models import CustomUser, Article, Publisher
 from django.contrib.auth.forms import UserCreationForm
 
 
-class SubscriptionForm(forms.ModelForm):
-    subscriptions_journalists = forms.ModelMultipleChoiceField(
-        queryset=CustomUser.objects.filter(role=CustomUser.ROLE_JOURNALIST),
-        widget=forms.CheckboxSelectMultiple,
-        required=False,
-        label="Follow Journalists"
-    )
-    subscriptions_publishers = forms.ModelMultipleChoiceField(
-        queryset=Publisher.objects.all(),
-        widget=forms.CheckboxSelectMultiple,
-        required=False,
-        label="Follow Publishers"
-    )
-
+class DeliveryPreferenceForm(forms.ModelForm):
     class Meta:
         model = CustomUser
-        fields = [
-            "subscriptions_journalists",
-            "subscriptions_publishers",
-        ]
+        fields = ["notification_frequency"]
+        labels = {"notification_frequency": "Email me"}
 
 
 class CustomUserCreationForm(UserCreationForm):
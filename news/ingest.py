@@ -0,0 +1,282 @@
+# news/ingest.py
+
+"""
+Bulk ingest of wire-service articles from NDJSON.
+
+Each input line is one JSON object::
+
+    {"title": "...", "body": "...", "publisher": 3 | "Daily",
+     "author": 7 | "jsmith", "status": "APPROVED",
+     "created_at": "2024-05-01T09:30:00Z"}
+
+``status`` and ``created_at`` are optional. Publishers and journalists are
+resolved by id or by name (case-insensitive) from lookup tables loaded once
+at start, so parsing a line never queries. Bad lines are counted and
+skipped, never fatal.
+
+Rows are stored ``NEWS_INGEST_BATCH_SIZE`` at a time with bulk_create,
+split per shard, with pre-allocated shard pks. A batch commits together
+with its ArticleChange rows (so sync clients see the articles), its month
+rollup counts, its duplicate fingerprints and the IngestCheckpoint line
+number. An interrupted run therefore resumes right after the last stored
+batch; without sharding, no row is written twice. On a sharded setup the
+shard inserts commit just before the checkpoint, so a crash in that gap can
+repeat one batch.
+
+Per-row signals are bypassed on purpose: no notification emails and no
+per-article feed work. Each batch queues its approved articles for the
+related-articles index (news/related.py) in the same transaction. finish()
+then does the rest once for the whole run. It invalidates the feeds of
+every touched publisher and journalist, purges their pages from the
+caching proxy (news/surrogate.py) and indexes the queued articles in
+batches. A full rebuild of the index is opt-in (``rebuild_related``); it
+only pays off when the ingest is large compared with the corpus.
+"""
+
+import json
+import time
+from collections import defaultdict
+from contextlib import contextmanager
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, transaction
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from . import duplicates, feeds, related, rollups, surrogate
+from .changelog import classify_article_change
+from .models import (
+    Article,
+    ArticleChange,
+    CustomUser,
+    IngestCheckpoint,
+    Publisher,
+)
+from .sharding import allocate_pk, is_sharded, shard_for_publisher
+
+MAX_REPORTED_ERRORS = 20
+
+
+class IngestError(ValueError):
+    """An input line that cannot be turned into an article."""
+
+
+@contextmanager
+def keep_created_at():
+    """
+    Let bulk_create store the input's ``created_at`` instead of now().
+
+    This flips ``auto_now_add`` on the model field, which is process-wide,
+    so it is only meant for the ingest command's own process.
+    """
+    field = Article._meta.get_field("created_at")
+    field.auto_now_add = False
+    try:
+        yield
+    finally:
+        field.auto_now_add = True
+
+
+class Ingester:
+    """
+    Streams NDJSON lines into Article rows; see the module docstring.
+
+    ``progress`` is called with the Ingester after every stored batch.
+    """
+
+    def __init__(self, batch_size=None, default_status=None,
+                 checkpoint=None, progress=None, index_related=True,
+                 rebuild_related=False):
+        self.batch_size = batch_size or getattr(
+            settings, "NEWS_INGEST_BATCH_SIZE", 1000)
+        self.default_status = default_status or Article.STATUS_APPROVED
+        self.checkpoint = checkpoint
+        self.progress = progress
+        self.index_related = index_related
+        self.rebuild_related = rebuild_related
+
+        self.publisher_ids, self.publisher_names = self._lookup(
+            Publisher.objects.values_list("pk", "name"))
+        self.author_ids, self.author_names = self._lookup(
+            CustomUser.objects.filter(role=CustomUser.ROLE_JOURNALIST)
+            .values_list("pk", "username"))
+
+        self.start_line = 0
+        self.total_rows = 0
+        if checkpoint:
+            saved = IngestCheckpoint.objects.filter(name=checkpoint).first()
+            if saved is not None:
+                self.start_line, self.total_rows = saved.line, saved.rows
+        self.line = self.start_line
+        self.created = 0
+        self.skipped = 0
+        self.errors = []
+        self.sources = set()
+        self.approved = 0
+        self.started = time.monotonic()
+
+    @staticmethod
+    def _lookup(pairs):
+        ids, names = set(), {}
+        for pk, name in pairs:
+            ids.add(pk)
+            names[name.casefold()] = pk
+        return ids, names
+
+    @staticmethod
+    def _resolve(value, ids, names, label):
+        if isinstance(value, int) and not isinstance(value, bool):
+            if value in ids:
+                return value
+        elif isinstance(value, str):
+            if value.casefold() in names:
+                return names[value.casefold()]
+            if value.isdigit() and int(value) in ids:
+                return int(value)
+        raise IngestError(f"unknown {label} {value!r}")
+
+    # -------------------------------------------------------------------------
+    # Parsing
+    # -------------------------------------------------------------------------
+    def parse(self, line):
+        """Turn one NDJSON line into an unsaved Article."""
+        try:
+            data = json.loads(line)
+        except ValueError as exc:
+            raise IngestError(f"invalid JSON ({exc})")
+        if not isinstance(data, dict):
+            raise IngestError("expected a JSON object")
+
+        title, body = data.get("title"), data.get("body")
+        if not isinstance(title, str) or not title.strip():
+            raise IngestError("missing title")
+        if len(title) > Article._meta.get_field("title").max_length:
+            raise IngestError("title too long")
+        if not isinstance(body, str):
+            raise IngestError("missing body")
+
+        status = data.get("status", self.default_status)
+        if status not in dict(Article.STATUS_CHOICES):
+            raise IngestError(f"unknown status {status!r}")
+
+        created_at = timezone.now()
+        if data.get("created_at") is not None:
+            created_at = parse_datetime(str(data["created_at"]))
+            if created_at is None:
+                raise IngestError(
+                    f"invalid created_at {data['created_at']!r}")
+            if timezone.is_naive(created_at):
+                created_at = timezone.make_aware(created_at)
+
+        return Article(
+            title=title,
+            body=body,
+            publisher_id=self._resolve(
+                data.get("publisher"), self.publisher_ids,
+                self.publisher_names, "publisher"),
+            author_id=self._resolve(
+                data.get("author"), self.author_ids, self.author_names,
+                "author"),
+            status=status,
+            created_at=created_at,
+            approved_at=created_at
+            if status == Article.STATUS_APPROVED else None,
+        )
+
+    # -------------------------------------------------------------------------
+    # Storing
+    # -------------------------------------------------------------------------
+    def store(self, batch, line):
+        """Write ``batch`` and move the checkpoint to ``line`` atomically."""
+        by_alias = defaultdict(list)
+        for article in batch:
+            alias = shard_for_publisher(article.publisher_id) \
+                if is_sharded() else DEFAULT_DB_ALIAS
+            by_alias[alias].append(article)
+
+        with transaction.atomic(using=DEFAULT_DB_ALIAS), keep_created_at():
+            for alias, articles in by_alias.items():
+                with transaction.atomic(using=alias):
+                    if is_sharded():
+                        for article in articles:
+                            article.pk = allocate_pk(Article, alias)
+                    Article.objects.using(alias).bulk_create(articles)
+            rollups.bump_many(Article, batch)
+            duplicates.index_articles(batch)
+            related.queue_articles([
+                article.pk for article in batch
+                if article.status == Article.STATUS_APPROVED
+            ])
+            ArticleChange.objects.bulk_create([
+                ArticleChange(
+                    article_id=article.pk,
+                    kind=classify_article_change(article, True, False),
+                )
+                for article in batch
+            ])
+            if self.checkpoint:
+                IngestCheckpoint.objects.update_or_create(
+                    name=self.checkpoint,
+                    defaults={"line": line,
+                              "rows": self.total_rows + len(batch)},
+                )
+
+        self.line = line
+        self.created += len(batch)
+        self.total_rows += len(batch)
+        for article in batch:
+            if article.status == Article.STATUS_APPROVED:
+                self.approved += 1
+                self.sources.add((article.publisher_id, article.author_id))
+        if self.progress:
+            self.progress(self)
+
+    def run(self, lines):
+        """Ingest ``lines`` (any iterable of str), skipping checkpointed
+        ones, then finish()."""
+        batch = []
+        line_no = 0
+        for line_no, line in enumerate(lines, 1):
+            if line_no <= self.start_line or not line.strip():
+                continue
+            try:
+                batch.append(self.parse(line))
+            except IngestError as exc:
+                self.skipped += 1
+                if len(self.errors) < MAX_REPORTED_ERRORS:
+                    self.errors.append((line_no, str(exc)))
+            if len(batch) >= self.batch_size:
+                self.store(batch, line_no)
+                batch = []
+        if line_no > self.line:
+            # Also records trailing lines that were all skipped.
+            self.store(batch, line_no)
+        self.finish()
+        return self
+
+    def finish(self):
+        """The deferred pass: feeds, proxy purges and the related-articles
+        index."""
+        for publisher_id, author_id in self.sources:
+            feeds.invalidate(feeds.SOURCE_PUBLISHER, publisher_id)
+            feeds.invalidate(feeds.SOURCE_JOURNALIST, author_id)
+        if self.approved:
+            # bulk_create sends no post_save for news/signals.py to purge on
+            surrogate.purge(surrogate.LIST_LATEST, *(
+                key for publisher_id, author_id in self.sources
+                for key in (surrogate.publisher_key(publisher_id),
+                            surrogate.author_key(author_id))))
+            surrogate.purge_queue.flush()
+        if self.approved and self.rebuild_related:
+            related.rebuild_index()
+        elif self.approved and self.index_related:
+            related.index_pending()
+
+    @property
+    def elapsed(self):
+        return time.monotonic() - self.started
+
+    @property
+    def rate(self):
+        """Articles created per second so far."""
+        return self.created / self.elapsed if self.elapsed else 0.0
@@ -0,0 +1,31 @@
+# news/management/commands/archive_content.py
+
+from django.core.management.base import BaseCommand
+
+from news.archive import archive
+from news.models import Article, Newsletter
+
+
+class Command(BaseCommand):
+    help = (
+        "Move old approved and denied articles and newsletters into the "
+        "archive tables, one batch per transaction. Safe to interrupt and "
+        "re-run; schedule it nightly to keep the hot tables small."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--only", choices=["articles", "newsletters"], default=None)
+        parser.add_argument("--batch-size", type=int, default=None)
+        parser.add_argument(
+            "--limit", type=int, default=None,
+            help="Stop after this many rows per model.")
+
+    def handle(self, *args, **options):
+        models = {"articles": Article, "newsletters": Newsletter}
+        for name, model in models.items():
+            if options["only"] not in (None, name):
+                continue
+            moved = archive(model, batch_size=options["batch_size"],
+                            limit=options["limit"])
+            self.stdout.write(f"archived {moved} {name}")
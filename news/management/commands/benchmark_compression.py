@@ -0,0 +1,90 @@
+# news/management/commands/benchmark_compression.py
+
+import random
+import time
+
+from django.core.management.base import BaseCommand
+
+from news.fields import compress_text, decompress_text, zstandard
+from news.models import Article
+
+WORDS = (
+    "the government said on tuesday that council budget report minister "
+    "election market shares rose percent city police officials announced "
+    "new policy health school students weather storm season league match "
+    "coach players fans record quarter growth inflation rates bank energy "
+    "prices climate summit agreement talks leaders community residents"
+).split()
+
+
+def synthetic_body(size, rng):
+    """Return roughly ``size`` bytes of newsroom-like prose."""
+    words = []
+    length = 0
+    while length < size:
+        sentence = " ".join(rng.choice(WORDS) for _ in range(rng.randint(8, 20)))
+        words.append(sentence.capitalize() + ".")
+        length += len(sentence) + 2
+    return " ".join(words)[:size]
+
+
+class Command(BaseCommand):
+    help = (
+        "Measure storage savings and encode/decode cost of body compression "
+        "for each codec and level, on synthetic text or sampled articles."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--sizes", default="512,2048,8192,32768",
+            help="Comma-separated body sizes in bytes (synthetic mode).")
+        parser.add_argument(
+            "--sample", type=int, default=0,
+            help="Benchmark the N largest existing articles instead.")
+        parser.add_argument("--repeat", type=int, default=50)
+
+    def handle(self, *args, **options):
+        if options["sample"]:
+            bodies = [
+                str(b) for b in Article.objects
+                .order_by("-pk")
+                .values_list("body", flat=True)[:options["sample"]]
+            ]
+            corpora = [("sampled", bodies)]
+        else:
+            rng = random.Random(0)
+            corpora = [
+                (f"{size}B", [synthetic_body(int(size), rng)])
+                for size in options["sizes"].split(",")
+            ]
+
+        codecs = [("zlib", 1), ("zlib", 6), ("zlib", 9)]
+        if zstandard is not None:
+            codecs += [("zstd", 1), ("zstd", 3), ("zstd", 9)]
+
+        self.stdout.write(
+            f"{'corpus':>9} {'codec':>7} {'raw B':>9} {'stored B':>9} "
+            f"{'ratio':>6} {'enc us':>8} {'dec us':>8}")
+        for label, bodies in corpora:
+            raw = sum(len(b.encode("utf-8")) for b in bodies)
+            for codec, level in codecs:
+                stored, enc, dec = self._measure(
+                    bodies, codec, level, options["repeat"])
+                self.stdout.write(
+                    f"{label:>9} {codec + ':' + str(level):>7} {raw:>9} "
+                    f"{stored:>9} {raw / max(stored, 1):>6.2f} "
+                    f"{enc:>8.1f} {dec:>8.1f}")
+
+    def _measure(self, bodies, codec, level, repeat):
+        packed = [compress_text(b, 0, codec, level) for b in bodies]
+        start = time.perf_counter()
+        for _ in range(repeat):
+            for body in bodies:
+                compress_text(body, 0, codec, level)
+        enc = (time.perf_counter() - start) / repeat * 1e6
+        start = time.perf_counter()
+        for _ in range(repeat):
+            for data in packed:
+                decompress_text(data)
+        dec = (time.perf_counter() - start) / repeat * 1e6
+        return sum(len(p) for p in packed), enc, dec
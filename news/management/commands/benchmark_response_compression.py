@@ -0,0 +1,78 @@
+# news/management/commands/benchmark_response_compression.py
+
+import json
+import random
+import time
+
+from django.core.management.base import BaseCommand
+
+from news.management.commands.benchmark_compression import synthetic_body
+from news.middleware import BrotliEncoder, GzipEncoder, brotli, compress
+
+
+def synthetic_payloads(rng):
+    """Return ``(label, chunks)`` pairs shaped like the site's responses."""
+    articles = [
+        {"id": n, "title": synthetic_body(60, rng),
+         "body": synthetic_body(rng.randint(800, 4000), rng),
+         "status": "APPROVED", "publisher": {"id": 1, "name": "Daily"},
+         "created_at": "2024-05-01T09:30:00Z"}
+        for n in range(40)
+    ]
+    page = "".join(
+        f'<article class="card"><h2><a href="/article/{a["id"]}/">'
+        f'{a["title"]}</a></h2><p>{a["body"][:300]}</p></article>\n'
+        for a in articles
+    )
+    ndjson = [json.dumps(a).encode() + b"\n" for a in articles]
+    return [
+        ("html", [f"<html><body>{page}</body></html>".encode()]),
+        ("json", [json.dumps(articles).encode()]),
+        # Exports arrive in chunks, each flushed on its own.
+        ("ndjson", [b"".join(ndjson[i:i + 8])
+                    for i in range(0, len(ndjson), 8)]),
+    ]
+
+
+class Command(BaseCommand):
+    help = (
+        "Measure bytes on the wire and CPU time of response compression "
+        "for each codec and level, on synthetic HTML, JSON and a chunked "
+        "NDJSON export."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--repeat", type=int, default=20)
+
+    def handle(self, *args, **options):
+        codecs = [(GzipEncoder, level) for level in (1, 4, 6, 9)]
+        if brotli is not None:
+            codecs += [(BrotliEncoder, level) for level in (1, 4, 6, 11)]
+        else:
+            self.stdout.write("brotli is not installed; gzip only")
+
+        self.stdout.write(
+            f"{'payload':>8} {'codec':>7} {'raw B':>9} {'sent B':>9} "
+            f"{'ratio':>6} {'enc us':>9} {'MB/s':>7}")
+        for label, chunks in synthetic_payloads(random.Random(0)):
+            raw = sum(len(c) for c in chunks)
+            for encoder_class, level in codecs:
+                sent, enc = self._measure(
+                    chunks, encoder_class, level, options["repeat"])
+                self.stdout.write(
+                    f"{label:>8} {encoder_class.name + ':' + str(level):>7} "
+                    f"{raw:>9} {sent:>9} {raw / max(sent, 1):>6.2f} "
+                    f"{enc:>9.1f} {raw / max(enc, 1e-9):>7.1f}")
+
+    def _measure(self, chunks, encoder_class, level, repeat):
+        sent = 0
+        start = time.perf_counter()
+        for _ in range(repeat):
+            if len(chunks) == 1:
+                sent = len(compress(chunks[0], encoder_class(level)))
+                continue
+            encoder = encoder_class(level)
+            sent = sum(len(encoder.feed(c)) for c in chunks) \
+                + len(encoder.finish())
+        enc = (time.perf_counter() - start) / repeat * 1e6
+        return sent, enc
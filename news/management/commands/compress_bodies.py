@@ -0,0 +1,88 @@
+# news/management/commands/compress_bodies.py
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from news.fields import CompressedPayload
+from news.models import Article, Newsletter
+from news.sharding import shard_querysets
+
+
+class Command(BaseCommand):
+    help = (
+        "Compress existing Article/Newsletter bodies in primary-key batches, "
+        "one model and shard at a time. Already compressed rows are skipped, "
+        "so the command can be stopped and re-run at any time; pass the last "
+        "printed checkpoint of each model and shard to --resume to skip "
+        "what was already scanned."
+    )
+
+    MODELS = {"article": Article, "newsletter": Newsletter}
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--model", choices=["all", *self.MODELS], default="all")
+        parser.add_argument("--batch-size", type=int, default=500)
+        parser.add_argument(
+            "--resume", action="append", default=[], metavar="MODEL:ALIAS:PK",
+            help="Skip rows of MODEL on database ALIAS up to and including "
+                 "PK, as printed in a checkpoint line. May be repeated; "
+                 "other models and shards start from the beginning.")
+
+    def handle(self, *args, **options):
+        names = list(self.MODELS) if options["model"] == "all" \
+            else [options["model"]]
+        threshold = getattr(settings, "NEWS_COMPRESSION_THRESHOLD", 1024)
+        resume = self._parse_resume(options["resume"])
+        for name in names:
+            model = self.MODELS[name]
+            for qs in shard_querysets(model._base_manager.all()):
+                self._compress(name, model, qs, threshold,
+                               resume.get((name, qs.db), 0), options)
+
+    def _parse_resume(self, tokens):
+        resume = {}
+        for token in tokens:
+            name, alias, pk = (token.split(":") + ["", ""])[:3]
+            if name not in self.MODELS or alias not in settings.DATABASES \
+                    or not pk.isdigit():
+                raise CommandError(
+                    f"Invalid --resume {token!r}; expected MODEL:ALIAS:PK, "
+                    f"e.g. article:default:1234.")
+            resume[(name, alias)] = int(pk)
+        return resume
+
+    def _compress(self, name, model, qs, threshold, last_pk, options):
+        field = model._meta.get_field("body")
+        total = before = after = 0
+        while True:
+            rows = list(
+                qs.filter(pk__gt=last_pk)
+                .order_by("pk")
+                .values_list("pk", "body")[:options["batch_size"]]
+            )
+            if not rows:
+                break
+            last_pk = rows[-1][0]
+            batch = []
+            for pk, body in rows:
+                if body is None or isinstance(body, CompressedPayload):
+                    continue
+                size = len(body.encode("utf-8"))
+                if size < threshold:
+                    continue
+                before += size
+                after += len(field.get_prep_value(body))
+                batch.append(model(pk=pk, body=body))
+            if batch:
+                # bulk_update skips signals: no notifications or change log
+                qs.bulk_update(batch, ["body"])
+                total += len(batch)
+            self.stdout.write(
+                f"checkpoint {name}:{qs.db}:{last_pk}, "
+                f"compressed {total} so far")
+
+        saved = before - after
+        self.stdout.write(self.style.SUCCESS(
+            f"{name}:{qs.db}: compressed {total} rows, "
+            f"{before} -> {after} bytes ({saved} saved)"))
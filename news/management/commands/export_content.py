@@ -0,0 +1,50 @@
+# news/management/commands/export_content.py
+
+from django.core.management.base import BaseCommand, CommandError
+
+from news import exports
+
+
+class Command(BaseCommand):
+    help = (
+        "Stream articles or newsletters as CSV or NDJSON to a file or stdout. "
+        "Rows are read in keyset-paginated chunks, so memory use stays flat "
+        "however large the export."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("kind", choices=sorted(exports.KINDS))
+        parser.add_argument(
+            "--format", dest="fmt", choices=sorted(exports.FORMATS),
+            default="csv")
+        parser.add_argument("--output", default="-",
+                            help="File to write, or - for stdout.")
+        parser.add_argument("--publisher")
+        parser.add_argument("--author")
+        parser.add_argument("--status")
+        parser.add_argument("--since", help="ISO date or datetime.")
+        parser.add_argument("--until", help="ISO date or datetime.")
+        parser.add_argument("--include-archived", action="store_true")
+
+    def handle(self, *args, **options):
+        model = exports.KINDS[options["kind"]]
+        try:
+            filters = exports.parse_filters(model, options)
+        except ValueError as exc:
+            raise CommandError(str(exc))
+        chunks = exports.export(
+            options["kind"], options["fmt"],
+            include_archived=options["include_archived"], **filters,
+        )
+        if options["output"] != "-":
+            with open(options["output"], "wb") as out:
+                for chunk in chunks:
+                    out.write(chunk)
+            return
+        out = getattr(self.stdout, "buffer", None)
+        for chunk in chunks:
+            if out is not None:
+                out.write(chunk)
+            else:
+                # stdout was replaced by a text stream, e.g. in tests
+                self.stdout.write(chunk.decode("utf-8"), ending="")
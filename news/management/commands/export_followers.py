@@ -0,0 +1,40 @@
+# news/management/commands/export_followers.py
+
+from django.core.management.base import BaseCommand, CommandError
+
+from news import audiences
+
+
+class Command(BaseCommand):
+    help = (
+        "Write the followers of a publisher or journalist as username,email "
+        "CSV to a file or stdout, reading them in keyset-paginated chunks."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("kind", choices=sorted(audiences.KINDS))
+        parser.add_argument("pk", type=int,
+                            help="Publisher or journalist id.")
+        parser.add_argument("--output", default="-",
+                            help="File to write, or - for stdout.")
+        parser.add_argument("--chunk-size", type=int, default=None)
+
+    def handle(self, *args, **options):
+        kind = options["kind"]
+        target = audiences.get_target(kind, options["pk"])
+        if target is None:
+            raise CommandError(f"No such {kind[:-1]}: {options['pk']}.")
+        chunks = audiences.export_followers(
+            kind, target, chunk_size=options["chunk_size"])
+        if options["output"] != "-":
+            with open(options["output"], "wb") as out:
+                for chunk in chunks:
+                    out.write(chunk)
+            return
+        out = getattr(self.stdout, "buffer", None)
+        for chunk in chunks:
+            if out is not None:
+                out.write(chunk)
+            else:
+                # stdout was replaced by a text stream, e.g. in tests
+                self.stdout.write(chunk.decode("utf-8"), ending="")
@@ -0,0 +1,51 @@
+# news/management/commands/import_followers.py
+
+import sys
+
+from django.core.management.base import BaseCommand, CommandError
+
+from news import audiences
+
+
+class Command(BaseCommand):
+    help = (
+        "Subscribe the users listed in a CSV file (usernames and/or emails, "
+        "or - for stdin) to a publisher or journalist. Rows are resolved and "
+        "inserted in batches; users who already follow are left alone, so "
+        "the import can simply be run again after an interruption."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("kind", choices=sorted(audiences.KINDS))
+        parser.add_argument("pk", type=int,
+                            help="Publisher or journalist id.")
+        parser.add_argument("path", help="CSV file, or - for stdin.")
+        parser.add_argument("--batch-size", type=int, default=None)
+
+    def handle(self, *args, **options):
+        kind = options["kind"]
+        target = audiences.get_target(kind, options["pk"])
+        if target is None:
+            raise CommandError(f"No such {kind[:-1]}: {options['pk']}.")
+        try:
+            if options["path"] == "-":
+                report = self._import(kind, target, sys.stdin, options)
+            else:
+                with open(options["path"], encoding="utf-8-sig",
+                          newline="") as lines:
+                    report = self._import(kind, target, lines, options)
+        except OSError as exc:
+            raise CommandError(str(exc))
+
+        for line, message in report.errors:
+            self.stderr.write(f"line {line}: {message}")
+        self.stdout.write(
+            f"{report.rows} rows: {report.subscribed} new followers, "
+            f"{report.missing} unknown, {report.ambiguous} ambiguous")
+
+    def _import(self, kind, target, lines, options):
+        return audiences.import_followers(
+            kind, target, lines, size=options["batch_size"],
+            progress=lambda report: self.stdout.write(
+                f"{report.rows} rows read"),
+        )
@@ -0,0 +1,20 @@
+# news/management/commands/index_related.py
+
+from django.core.management.base import BaseCommand
+
+from news.related import index_pending
+
+
+class Command(BaseCommand):
+    help = (
+        "Index the articles queued by approvals and edits into the "
+        "related-articles index. Run it from cron every minute or so; "
+        "articles show no related list until it has run."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=None)
+
+    def handle(self, *args, **options):
+        indexed = index_pending(batch_size=options["batch_size"])
+        self.stdout.write(f"indexed {indexed} articles")
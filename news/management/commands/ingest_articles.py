@@ -0,0 +1,80 @@
+# news/management/commands/ingest_articles.py
+
+import os
+import sys
+
+from django.core.management.base import BaseCommand, CommandError
+
+from news.ingest import Ingester
+from news.models import Article, IngestCheckpoint
+
+
+class Command(BaseCommand):
+    help = (
+        "Bulk-load articles from an NDJSON file (or - for stdin), one JSON "
+        "object per line. Batches are committed with a checkpoint, so an "
+        "interrupted run picks up where it stopped when started again."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("path", help="NDJSON file, or - for stdin.")
+        parser.add_argument("--batch-size", type=int, default=None)
+        parser.add_argument(
+            "--status", choices=[s for s, _ in Article.STATUS_CHOICES],
+            default=None,
+            help="Status for lines without one (default: approved).")
+        parser.add_argument(
+            "--checkpoint",
+            help="Checkpoint name (default: the file's absolute path; "
+                 "stdin is only checkpointed when this is given).")
+        parser.add_argument(
+            "--restart", action="store_true",
+            help="Forget the checkpoint and start from the first line.")
+        parser.add_argument(
+            "--no-index", action="store_true",
+            help="Leave the new articles queued for `index_related` instead "
+                 "of indexing them at the end.")
+        parser.add_argument(
+            "--rebuild-related", action="store_true",
+            help="Rebuild the whole related-articles index at the end; "
+                 "cheaper than indexing the queue when the ingest is large "
+                 "compared with the corpus.")
+
+    def handle(self, *args, **options):
+        path = options["path"]
+        checkpoint = options["checkpoint"]
+        if checkpoint is None and path != "-":
+            checkpoint = os.path.abspath(path)
+        if checkpoint and options["restart"]:
+            IngestCheckpoint.objects.filter(name=checkpoint).delete()
+
+        ingester = Ingester(
+            batch_size=options["batch_size"],
+            default_status=options["status"],
+            checkpoint=checkpoint,
+            progress=self._progress,
+            index_related=not options["no_index"],
+            rebuild_related=options["rebuild_related"],
+        )
+        if ingester.start_line:
+            self.stdout.write(f"resuming after line {ingester.start_line}")
+
+        try:
+            if path == "-":
+                ingester.run(sys.stdin)
+            else:
+                with open(path, encoding="utf-8") as lines:
+                    ingester.run(lines)
+        except OSError as exc:
+            raise CommandError(str(exc))
+
+        for line, message in ingester.errors:
+            self.stderr.write(f"line {line}: {message}")
+        self.stdout.write(
+            f"ingested {ingester.created} rows, skipped {ingester.skipped} "
+            f"in {ingester.elapsed:.1f}s ({ingester.rate:.0f} rows/s)")
+
+    def _progress(self, ingester):
+        self.stdout.write(
+            f"line {ingester.line}: {ingester.created} rows "
+            f"({ingester.rate:.0f} rows/s)")
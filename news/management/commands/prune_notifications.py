@@ -0,0 +1,22 @@
+# news/management/commands/prune_notifications.py
+
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+
+from news.notifications import prune
+
+
+class Command(BaseCommand):
+    help = (
+        "Delete notification ledger rows older than --days (default "
+        "NEWS_NOTIFICATION_LEDGER_DAYS). Run it daily to keep the ledger small."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--days", type=int, default=None)
+
+    def handle(self, *args, **options):
+        days = options["days"]
+        deleted = prune(timedelta(days=days) if days is not None else None)
+        self.stdout.write(f"pruned {deleted} ledger rows")
@@ -0,0 +1,20 @@
+# news/management/commands/rebuild_duplicates.py
+
+from django.core.management.base import BaseCommand
+
+from news.duplicates import rebuild
+
+
+class Command(BaseCommand):
+    help = (
+        "Fingerprint every article and regroup suspected near-duplicates. "
+        "New and edited articles are indexed on save; run this once for "
+        "existing data and after changing any NEWS_DUPLICATE_* setting."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--chunk-size", type=int, default=1000)
+
+    def handle(self, *args, **options):
+        indexed = rebuild(chunk_size=options["chunk_size"])
+        self.stdout.write(f"indexed {indexed} articles")
@@ -0,0 +1,20 @@
+# news/management/commands/rebuild_related.py
+
+from django.core.management.base import BaseCommand
+
+from news.related import rebuild_index
+
+
+class Command(BaseCommand):
+    help = (
+        "Re-encode every approved article and recompute all related-article "
+        "lists. `index_related` keeps the index current between runs; run this "
+        "after changing NEWS_RELATED_DIMENSIONS or to sweep out stale entries."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--chunk-size", type=int, default=None)
+
+    def handle(self, *args, **options):
+        indexed = rebuild_index(chunk_size=options["chunk_size"])
+        self.stdout.write(f"indexed {indexed} articles")
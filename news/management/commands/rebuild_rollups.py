@@ -0,0 +1,17 @@
+# news/management/commands/rebuild_rollups.py
+
+from django.core.management.base import BaseCommand
+
+from news import rollups
+
+
+class Command(BaseCommand):
+    help = (
+        "Recompute the per-publisher month counts behind the date archive "
+        "from the article and newsletter tables (hot and archived). Run "
+        "once after migrating, and after bulk changes that bypass signals."
+    )
+
+    def handle(self, *args, **options):
+        written = rollups.rebuild()
+        self.stdout.write(f"wrote {written} month rollups")
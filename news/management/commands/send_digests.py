@@ -0,0 +1,27 @@
+# news/management/commands/send_digests.py
+
+from django.core.management.base import BaseCommand
+
+from news.digests import PERIODS, send_digests
+
+
+class Command(BaseCommand):
+    help = (
+        "Send hourly and/or daily notification digests to the readers who "
+        "are due one. Schedule it hourly (e.g. from cron); daily readers are "
+        "only picked up once their last digest is a day old."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--frequency", choices=["all", *PERIODS], default="all")
+        parser.add_argument("--batch-size", type=int, default=500)
+
+    def handle(self, *args, **options):
+        frequencies = list(PERIODS) if options["frequency"] == "all" \
+            else [options["frequency"]]
+        for frequency in frequencies:
+            readers, emails = send_digests(
+                frequency, batch_size=options["batch_size"])
+            self.stdout.write(
+                f"{frequency}: {readers} readers, {emails} digests sent")
@@ -0,0 +1,195 @@
+# news/middleware.py
+
+"""
+Response compression negotiated from ``Accept-Encoding``.
+
+CompressionMiddleware sends brotli when the client accepts it and the
+optional ``brotli`` package is installed, and gzip otherwise. It only
+compresses:
+
+- content types listed in ``NEWS_COMPRESS_TYPES`` (HTML, JSON, feeds,
+  exports, ...). Images and files are already compressed, and WhiteNoise
+  serves static files pre-compressed,
+- buffered responses of at least ``NEWS_COMPRESS_MIN_BYTES``. Below that,
+  the headers cost more than compression saves,
+- streamed responses of any size. These are compressed one chunk at a time
+  and flushed after each chunk. Exports therefore still reach the client
+  while they are produced, and memory use stays flat.
+
+Strong ETags become weak ones (``W/"..."``), because the compressed bytes
+differ from the ones the tag was computed for. Django's conditional
+responses compare weakly for ``If-None-Match``, so 304s keep working.
+``Vary: Accept-Encoding`` is added to every response that could have been
+compressed, so shared caches keep the variants apart.
+
+``manage.py benchmark_response_compression`` prints the bytes saved and CPU
+cost per codec and level, to help choose the levels in settings.
+"""
+
+import zlib
+
+from django.conf import settings
+from django.http import FileResponse
+from django.utils.cache import patch_vary_headers
+
+try:
+    import brotli
+except ImportError:  # optional dependency
+    brotli = None
+
+DEFAULT_TYPES = (
+    "text/html", "text/plain", "text/csv", "application/json",
+    "application/x-ndjson", "application/rss+xml", "application/atom+xml",
+)
+
+
+def _setting(name, default):
+    return getattr(settings, name, default)
+
+
+class GzipEncoder:
+    """Incremental gzip stream; ``feed`` output is flushed to a byte
+    boundary so every chunk can be decoded as soon as it arrives."""
+    name = "gzip"
+
+    def __init__(self, level=None):
+        self.level = level or _setting("NEWS_COMPRESS_GZIP_LEVEL", 6)
+        # wbits=31 writes a gzip header and trailer around the deflate data.
+        self._stream = zlib.compressobj(self.level, zlib.DEFLATED, 31)
+
+    def feed(self, data):
+        return self._stream.compress(data) + self._stream.flush(
+            zlib.Z_SYNC_FLUSH)
+
+    def finish(self):
+        return self._stream.flush()
+
+
+class BrotliEncoder:
+    """Incremental brotli stream, flushed after every ``feed``."""
+    name = "br"
+
+    def __init__(self, level=None):
+        self.level = level or _setting("NEWS_COMPRESS_BROTLI_LEVEL", 4)
+        self._stream = brotli.Compressor(quality=self.level)
+
+    def feed(self, data):
+        return self._stream.process(data) + self._stream.flush()
+
+    def finish(self):
+        return self._stream.finish()
+
+
+def encoders():
+    """Return the available encoder classes, most preferred first."""
+    if brotli is not None:
+        return [BrotliEncoder, GzipEncoder]
+    return [GzipEncoder]
+
+
+def compress(data, encoder):
+    """Compress ``data`` in one go with an encoder instance."""
+    return encoder.feed(data) + encoder.finish() if data \
+        else encoder.finish()
+
+
+def negotiate(accept_encoding, available=None):
+    """
+    Return the encoder class the ``Accept-Encoding`` header asks for, or
+    None. Higher q-values win; ties go to the earlier entry in
+    ``available``. ``q=0`` refuses a coding, and ``*`` covers the ones that
+    are not named.
+    """
+    weights = {}
+    for part in (accept_encoding or "").split(","):
+        name, _, params = part.partition(";")
+        name = name.strip().lower()
+        if not name:
+            continue
+        quality = 1.0
+        for param in params.split(";"):
+            key, _, value = param.partition("=")
+            if key.strip().lower() == "q":
+                try:
+                    quality = float(value)
+                except ValueError:
+                    quality = 0.0
+        weights[name] = quality
+    best, best_quality = None, 0.0
+    for encoder in available or encoders():
+        quality = weights.get(encoder.name, weights.get("*", 0.0))
+        if quality > best_quality:
+            best, best_quality = encoder, quality
+    return best
+
+
+def _compressible(response):
+    if response.has_header("Content-Encoding") \
+            or isinstance(response, FileResponse) \
+            or response.status_code in (204, 206, 304):
+        return False
+    if "no-transform" in response.get("Cache-Control", ""):
+        return False
+    content_type = response.get("Content-Type", "").split(";")[0].strip()
+    return content_type.lower() in _setting("NEWS_COMPRESS_TYPES",
+                                            DEFAULT_TYPES)
+
+
+class CompressionMiddleware:
+    """See the module docstring. Goes near the top of ``MIDDLEWARE``, above
+    anything that reads or rewrites response bodies."""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        return self.process_response(request, self.get_response(request))
+
+    def process_response(self, request, response):
+        if not _compressible(response):
+            return response
+        patch_vary_headers(response, ("Accept-Encoding",))
+        if not response.streaming and len(response.content) < _setting(
+                "NEWS_COMPRESS_MIN_BYTES", 512):
+            return response
+        encoder_class = negotiate(request.META.get("HTTP_ACCEPT_ENCODING"))
+        if encoder_class is None:
+            return response
+
+        encoder = encoder_class()
+        if response.streaming:
+            if response.is_async:
+                response.streaming_content = self._astream(
+                    response.streaming_content, encoder)
+            else:
+                response.streaming_content = self._stream(
+                    response.streaming_content, encoder)
+            del response.headers["Content-Length"]
+        else:
+            compressed = compress(response.content, encoder)
+            if len(compressed) >= len(response.content):
+                return response
+            response.content = compressed
+            response.headers["Content-Length"] = str(len(compressed))
+
+        etag = response.get("ETag")
+        if etag and etag.startswith('"'):
+            response.headers["ETag"] = "W/" + etag
+        response.headers["Content-Encoding"] = encoder.name
+        return response
+
+    @staticmethod
+    def _stream(chunks, encoder):
+        for chunk in chunks:
+            data = encoder.feed(chunk)
+            if data:
+                yield data
+        yield encoder.finish()
+
+    @staticmethod
+    async def _astream(chunks, encoder):
+        async for chunk in chunks:
+            data = encoder.feed(chunk)
+            if data:
+                yield data
+        yield encoder.finish()
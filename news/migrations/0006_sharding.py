@@ -0,0 +1,66 @@
+# Generated by Django 5.2.4 on 2026-10-19 03:43
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("news", "0005_articlechange"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="ShardSequence",
+            fields=[
+                (
+                    "name",
+                    models.CharField(max_length=100, primary_key=True, serialize=False),
+                ),
+                ("next_local", models.BigIntegerField(default=1)),
+            ],
+        ),
+        migrations.AlterField(
+            model_name="article",
+            name="author",
+            field=models.ForeignKey(
+                db_constraint=False,
+                on_delete=django.db.models.deletion.CASCADE,
+                related_name="articles",
+                to=settings.AUTH_USER_MODEL,
+            ),
+        ),
+        migrations.AlterField(
+            model_name="article",
+            name="publisher",
+            field=models.ForeignKey(
+                db_constraint=False,
+                on_delete=django.db.models.deletion.CASCADE,
+                related_name="articles",
+                to="news.publisher",
+            ),
+        ),
+        migrations.AlterField(
+            model_name="newsletter",
+            name="author",
+            field=models.ForeignKey(
+                db_constraint=False,
+                limit_choices_to={"role": "journalist"},
+                on_delete=django.db.models.deletion.CASCADE,
+                to=settings.AUTH_USER_MODEL,
+            ),
+        ),
+        migrations.AlterField(
+            model_name="newsletter",
+            name="publisher",
+            field=models.ForeignKey(
+                blank=True,
+                db_constraint=False,
+                null=True,
+                on_delete=django.db.models.deletion.CASCADE,
+                to="news.publisher",
+            ),
+        ),
+    ]
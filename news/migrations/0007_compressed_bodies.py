@@ -0,0 +1,24 @@
+# Generated by Django 5.2.4 on 2026-10-19 03:47
+
+import news.fields
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("news", "0006_sharding"),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name="article",
+            name="body",
+            field=news.fields.CompressedTextField(),
+        ),
+        migrations.AlterField(
+            model_name="newsletter",
+            name="body",
+            field=news.fields.CompressedTextField(),
+        ),
+    ]
@@ -0,0 +1,58 @@
+# Generated by Django 5.2.4 on 2026-10-19 03:59
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("news", "0008_review_queue"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="SentNotification",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                (
+                    "item_type",
+                    models.CharField(
+                        choices=[("a", "Article"), ("n", "Newsletter")], max_length=1
+                    ),
+                ),
+                ("item_id", models.BigIntegerField()),
+                ("transition", models.CharField(max_length=10)),
+                ("channel", models.CharField(max_length=10)),
+                ("recipient_id", models.BigIntegerField()),
+                (
+                    "sent_at",
+                    models.DateTimeField(
+                        db_index=True, default=django.utils.timezone.now
+                    ),
+                ),
+            ],
+            options={
+                "constraints": [
+                    models.UniqueConstraint(
+                        fields=(
+                            "item_type",
+                            "item_id",
+                            "transition",
+                            "channel",
+                            "recipient_id",
+                        ),
+                        name="news_sentnotification_unique",
+                    )
+                ],
+            },
+        ),
+    ]
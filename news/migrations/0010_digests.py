@@ -0,0 +1,43 @@
+# Generated by Django 5.2.4 on 2026-10-19 04:03
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("news", "0009_sentnotification"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="article",
+            name="approved_at",
+            field=models.DateTimeField(blank=True, db_index=True, null=True),
+        ),
+        migrations.AddField(
+            model_name="customuser",
+            name="digest_sent_at",
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name="customuser",
+            name="notification_frequency",
+            field=models.CharField(
+                choices=[
+                    ("immediate", "Immediately"),
+                    ("hourly", "Hourly digest"),
+                    ("daily", "Daily digest"),
+                ],
+                db_index=True,
+                default="immediate",
+                help_text="How to be told about new articles and newsletters",
+                max_length=10,
+            ),
+        ),
+        migrations.AddField(
+            model_name="newsletter",
+            name="approved_at",
+            field=models.DateTimeField(blank=True, db_index=True, null=True),
+        ),
+    ]
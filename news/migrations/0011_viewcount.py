@@ -0,0 +1,45 @@
+# Generated by Django 5.2.4 on 2026-10-19 04:06
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("news", "0010_digests"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="ViewCount",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                (
+                    "item_type",
+                    models.CharField(
+                        choices=[("a", "Article"), ("n", "Newsletter")], max_length=1
+                    ),
+                ),
+                ("item_id", models.BigIntegerField()),
+                ("publisher_id", models.BigIntegerField(blank=True, null=True)),
+                ("bucket", models.DateTimeField(db_index=True)),
+                ("hits", models.PositiveIntegerField(default=0)),
+            ],
+            options={
+                "constraints": [
+                    models.UniqueConstraint(
+                        fields=("item_type", "item_id", "bucket"),
+                        name="news_viewcount_unique",
+                    )
+                ],
+            },
+        ),
+    ]
@@ -0,0 +1,25 @@
+# Generated by Django 5.2.4 on 2026-10-19 04:11
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("news", "0011_viewcount"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="ArticleVector",
+            fields=[
+                (
+                    "article_id",
+                    models.BigIntegerField(primary_key=True, serialize=False),
+                ),
+                ("vector", models.BinaryField()),
+                ("related", models.JSONField(blank=True, default=list)),
+                ("indexed_at", models.DateTimeField(auto_now=True)),
+            ],
+        ),
+    ]
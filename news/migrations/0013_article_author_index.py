@@ -0,0 +1,20 @@
+# Generated by Django 5.2.4 on 2026-10-19 04:14
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("news", "0012_article_vectors"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="article",
+            index=models.Index(
+                fields=["status", "author", "created_at"],
+                name="news_article_author_idx",
+            ),
+        ),
+    ]
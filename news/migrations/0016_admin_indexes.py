@@ -0,0 +1,31 @@
+# Generated by Django 5.2.4 on 2026-10-19 04:23
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("news", "0015_ingest_checkpoint"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="article",
+            index=models.Index(fields=["created_at"], name="news_article_created_idx"),
+        ),
+        migrations.AddIndex(
+            model_name="article",
+            index=models.Index(fields=["title"], name="news_article_title_idx"),
+        ),
+        migrations.AddIndex(
+            model_name="newsletter",
+            index=models.Index(
+                fields=["created_at"], name="news_newsletter_created_idx"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="newsletter",
+            index=models.Index(fields=["title"], name="news_newsletter_title_idx"),
+        ),
+    ]
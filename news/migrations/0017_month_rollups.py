@@ -0,0 +1,68 @@
+# Generated by Django 5.2.4 on 2026-10-19 04:30
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("news", "0016_admin_indexes"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="MonthRollup",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                (
+                    "kind",
+                    models.CharField(
+                        choices=[("article", "Article"), ("newsletter", "Newsletter")],
+                        max_length=10,
+                    ),
+                ),
+                ("month", models.DateField()),
+                ("count", models.IntegerField(default=0)),
+            ],
+        ),
+        migrations.AddIndex(
+            model_name="archivedarticle",
+            index=models.Index(fields=["created_at"], name="news_archart_created_idx"),
+        ),
+        migrations.AddIndex(
+            model_name="archivednewsletter",
+            index=models.Index(fields=["created_at"], name="news_archnl_created_idx"),
+        ),
+        migrations.AddField(
+            model_name="monthrollup",
+            name="publisher",
+            field=models.ForeignKey(
+                blank=True,
+                null=True,
+                on_delete=django.db.models.deletion.CASCADE,
+                related_name="+",
+                to="news.publisher",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="monthrollup",
+            index=models.Index(
+                fields=["kind", "month"], name="news_monthrollup_month_idx"
+            ),
+        ),
+        migrations.AddConstraint(
+            model_name="monthrollup",
+            constraint=models.UniqueConstraint(
+                fields=("kind", "publisher", "month"), name="news_monthrollup_unique"
+            ),
+        ),
+    ]
@@ -0,0 +1,48 @@
+# Generated by Django 5.2.4 on 2026-10-19 04:36
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("news", "0017_month_rollups"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="ArticleFingerprint",
+            fields=[
+                (
+                    "article_id",
+                    models.BigIntegerField(primary_key=True, serialize=False),
+                ),
+                ("signature", models.BinaryField()),
+                ("cluster_id", models.BigIntegerField(db_index=True)),
+                ("indexed_at", models.DateTimeField(auto_now=True)),
+            ],
+        ),
+        migrations.CreateModel(
+            name="ArticleBand",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("key", models.BigIntegerField()),
+                ("article_id", models.BigIntegerField(db_index=True)),
+            ],
+            options={
+                "indexes": [
+                    models.Index(
+                        fields=["key", "article_id"], name="news_articleband_key_idx"
+                    )
+                ],
+            },
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.4 on 2026-10-19 09:12
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("news", "0018_duplicate_index"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="sentnotification",
+            name="claim",
+            field=models.CharField(blank=True, max_length=32),
+        ),
+    ]
@@ -0,0 +1,29 @@
+# Generated by Django 5.2.4 on 2026-10-19 09:40
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("news", "0019_sentnotification_claim"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="RelatedIndexQueue",
+            fields=[
+                (
+                    "article_id",
+                    models.BigIntegerField(primary_key=True, serialize=False),
+                ),
+                (
+                    "queued_at",
+                    models.DateTimeField(
+                        db_index=True, default=django.utils.timezone.now
+                    ),
+                ),
+            ],
+        ),
+    ]
@@ -11,8 +11,13 @@ Defines the core data models for the News Portal application, including:
 from django.contrib.auth.models import AbstractUser
 from django.db import models
 from django.urls import reverse
+from django.utils import timezone
 from django.conf import settings
 
+from .fields import CompressedTextField
+from .sharding import ShardedQuerySet
+from .tracking import TrackedFieldsMixin
+
 
 class CustomUser(AbstractUser):
     """
@@ -27,6 +32,10 @@ class CustomUser(AbstractUser):
         role (str): The user’s role, chosen from ROLE_CHOICES.
         subscriptions_publishers (ManyToMany): Publishers this user follows.
         subscriptions_journalists (ManyToMany): Journalists this user follows.
+        notification_frequency (str): How approvals are delivered, one of
+            FREQUENCY_CHOICES.
+        digest_sent_at (datetime): End of the window covered by the last
+            digest sent to this user.
     """
 
     ROLE_READER = 'reader'
@@ -39,12 +48,31 @@ class CustomUser(AbstractUser):
         (ROLE_EDITOR, 'Editor'),
     ]
 
+    FREQUENCY_IMMEDIATE = 'immediate'
+    FREQUENCY_HOURLY = 'hourly'
+    FREQUENCY_DAILY = 'daily'
+
+    FREQUENCY_CHOICES = [
+        (FREQUENCY_IMMEDIATE, 'Immediately'),
+        (FREQUENCY_HOURLY, 'Hourly digest'),
+        (FREQUENCY_DAILY, 'Daily digest'),
+    ]
+
     role = models.CharField(
         max_length=12,
         choices=ROLE_CHOICES,
         default=ROLE_READER,
     )
 
+    notification_frequency = models.CharField(
+        max_length=10,
+        choices=FREQUENCY_CHOICES,
+        default=FREQUENCY_IMMEDIATE,
+        db_index=True,
+        help_text='How to be told about new articles and newsletters'
+    )
+    digest_sent_at = models.DateTimeField(null=True, blank=True)
+
     subscriptions_publishers = models.ManyToManyField(
         'Publisher',
         blank=True,
@@ -112,17 +140,20 @@ class Publisher(models.Model):
         return self.name
 
 
-class Article(models.Model):
+class Article(TrackedFieldsMixin, models.Model):
     """
     A news article submitted by a journalist and optionally reviewed by an editor.
 
     Attributes:
         title (str): Headline of the article.
-        body (TextField): Main content.
+        body (CompressedTextField): Main content, compressed when large.
         created_at (datetime): Timestamp when created.
         status (str): Review status, one of STATUS_CHOICES.
+        approved_at (datetime): When the article was last approved.
         publisher (ForeignKey): Publisher under which the article appears.
         author (ForeignKey): Journalist who wrote the article.
+        claimed_by (ForeignKey): Editor currently holding the review lease.
+        claimed_until (datetime): When that lease lapses.
     """
 
     STATUS_PENDING = 'PENDING'
@@ -135,28 +166,65 @@ class Article(models.Model):
         (STATUS_DENIED,   'Denied'),
     ]
 
+    # Loaded values are remembered so signals can see status and publisher
+    # changes without re-reading the row (news/tracking.py).
+    tracked_fields = ('status', 'publisher_id')
+
     title = models.CharField(max_length=200)
-    body = models.TextField()
+    body = CompressedTextField()
     created_at = models.DateTimeField(auto_now_add=True)
     status = models.CharField(
         max_length=10,
         choices=STATUS_CHOICES,
         default=STATUS_PENDING,
     )
+    approved_at = models.DateTimeField(null=True, blank=True, db_index=True)
 
+    # No database-level constraints: articles may live on a shard while
+    # publishers and users stay on 'default' (see news/sharding.py).
     publisher = models.ForeignKey(
         Publisher,
         on_delete=models.CASCADE,
-        related_name='articles'
+        related_name='articles',
+        db_constraint=False,
     )
     author = models.ForeignKey(
         CustomUser,
         on_delete=models.CASCADE,
-        related_name='articles'
+        related_name='articles',
+        db_constraint=False,
     )
 
+    # Review-queue lease (news/review_queue.py).
+    claimed_by = models.ForeignKey(
+        CustomUser,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name='+',
+        db_constraint=False,
+    )
+    claimed_until = models.DateTimeField(null=True, blank=True)
+
+    objects = ShardedQuerySet.as_manager()
+
     class Meta:
         ordering = ['-created_at']
+        indexes = [
+            models.Index(
+                fields=['status', 'publisher', 'created_at'],
+                name='news_article_review_idx',
+            ),
+            # Journalist feeds (news/feeds.py)
+            models.Index(
+                fields=['status', 'author', 'created_at'],
+                name='news_article_author_idx',
+            ),
+            # Admin changelist (news/admin.py): newest-first pages and
+            # title-prefix search.
+            models.Index(fields=['created_at'], name='news_article_created_idx'),
+            models.Index(fields=['title'], name='news_article_title_idx'),
+        ]
 
     def __str__(self):
         """Return the article’s title for display purposes."""
@@ -173,18 +241,21 @@ class Article(models.Model):
         return reverse('news:article-detail', args=[self.pk])
 
 
-class Newsletter(models.Model):
+class Newsletter(TrackedFieldsMixin, models.Model):
     """
     A periodic newsletter authored by a journalist, optionally linked to a publisher.
 
     Attributes:
         title (str): Newsletter title.
-        body (TextField): Newsletter content.
+        body (CompressedTextField): Newsletter content, compressed when large.
         author (ForeignKey): Journalist authoring the newsletter.
         publisher (ForeignKey, optional): Associated publisher.
         status (str): Review status, one of STATUS_CHOICES.
+        approved_at (datetime): When the newsletter was last approved.
         created_at (datetime): Creation timestamp.
         updated_at (datetime): Last update timestamp.
+        claimed_by (ForeignKey): Editor currently holding the review lease.
+        claimed_until (datetime): When that lease lapses.
     """
 
     STATUS_PENDING = "P"
@@ -196,30 +267,530 @@ class Newsletter(models.Model):
         (STATUS_DENIED, "Denied"),
     ]
 
+    tracked_fields = ("status", "publisher_id")
+
     title = models.CharField(max_length=255)
-    body = models.TextField()
+    body = CompressedTextField()
     author = models.ForeignKey(
         settings.AUTH_USER_MODEL,
         on_delete=models.CASCADE,
-        limit_choices_to={"role": CustomUser.ROLE_JOURNALIST}
+        limit_choices_to={"role": CustomUser.ROLE_JOURNALIST},
+        db_constraint=False,
     )
     publisher = models.ForeignKey(
         Publisher,
         on_delete=models.CASCADE,
         null=True,
-        blank=True
+        blank=True,
+        db_constraint=False,
     )
     status = models.CharField(
         max_length=1,
         choices=STATUS_CHOICES,
         default=STATUS_PENDING
     )
+    approved_at = models.DateTimeField(null=True, blank=True, db_index=True)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    # Review-queue lease (news/review_queue.py).
+    claimed_by = models.ForeignKey(
+        CustomUser,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name="+",
+        db_constraint=False,
+    )
+    claimed_until = models.DateTimeField(null=True, blank=True)
+
+    objects = ShardedQuerySet.as_manager()
+
+    class Meta:
+        ordering = ["-created_at"]
+        indexes = [
+            models.Index(
+                fields=["status", "publisher", "created_at"],
+                name="news_newsletter_review_idx",
+            ),
+            # Admin changelist (news/admin.py)
+            models.Index(fields=["created_at"],
+                         name="news_newsletter_created_idx"),
+            models.Index(fields=["title"], name="news_newsletter_title_idx"),
+        ]
+
+    def __str__(self):
+        """Return the newsletter’s title."""
+        return self.title
+
+
+class ArticleChange(models.Model):
+    """
+    Append-only log of article changes, written by the model signals and read
+    by the incremental sync API.
+
+    Rows are never updated; the auto-incrementing primary key doubles as the
+    sync cursor, so "anything newer than cursor N?" is a single primary-key
+    range lookup.
+
+    Attributes:
+        article_id (int): Primary key of the changed article. Not a foreign
+            key, so tombstones outlive the article they describe.
+        kind (str): What happened, one of KIND_CHOICES.
+        changed_at (datetime): When the change was recorded.
+    """
+
+    KIND_CREATED = 'created'
+    KIND_UPDATED = 'updated'
+    KIND_APPROVED = 'approved'
+    KIND_UNAPPROVED = 'unapproved'
+    KIND_DELETED = 'deleted'
+
+    KIND_CHOICES = [
+        (KIND_CREATED, 'Created'),
+        (KIND_UPDATED, 'Updated'),
+        (KIND_APPROVED, 'Approved'),
+        (KIND_UNAPPROVED, 'Un-approved'),
+        (KIND_DELETED, 'Deleted'),
+    ]
+
+    article_id = models.BigIntegerField(db_index=True)
+    kind = models.CharField(max_length=10, choices=KIND_CHOICES)
+    changed_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        ordering = ['id']
+
+    def __str__(self):
+        """Return a short description of the change."""
+        return f"#{self.pk} article {self.article_id} {self.kind}"
+
+
+class ShardSequence(models.Model):
+    """
+    Per-shard primary-key reservation counter for sharded models.
+
+    Each shard database keeps one row per model; allocate_pk() in
+    news/sharding.py reserves blocks of local ids from it.
+
+    Attributes:
+        name (str): Model label, e.g. ``news.article``.
+        next_local (int): First local id not yet reserved.
+    """
+
+    name = models.CharField(max_length=100, primary_key=True)
+    next_local = models.BigIntegerField(default=1)
+
+    def __str__(self):
+        """Return the model label and next free local id."""
+        return f"{self.name} @ {self.next_local}"
+
+
+class SentNotification(models.Model):
+    """
+    Idempotency ledger for subscriber notifications.
+
+    One row per (item, transition, channel, recipient) that has been sent.
+    Every notification path asks news/notifications.py which recipients are
+    still owed a message before sending, so a transition handled by more than
+    one signal receiver reaches each subscriber once. Rows only need to
+    outlive the window in which a duplicate could be attempted, so old ones
+    are pruned (``manage.py prune_notifications``).
+
+    Attributes:
+        item_type (str): ITEM_ARTICLE or ITEM_NEWSLETTER.
+        item_id (int): Primary key of the article or newsletter.
+        transition (str): The status change notified about, e.g. "approved".
+        channel (str): Delivery channel, e.g. "email" or "x".
+        recipient_id (int): User primary key; 0 for broadcast channels.
+        claim (str): Token of the claim_recipient_ids() call that inserted
+            the row, so the caller can tell which rows it won.
+        sent_at (datetime): When the notification was recorded.
+    """
+
+    ITEM_ARTICLE = 'a'
+    ITEM_NEWSLETTER = 'n'
+
+    ITEM_CHOICES = [
+        (ITEM_ARTICLE, 'Article'),
+        (ITEM_NEWSLETTER, 'Newsletter'),
+    ]
+
+    item_type = models.CharField(max_length=1, choices=ITEM_CHOICES)
+    item_id = models.BigIntegerField()
+    transition = models.CharField(max_length=10)
+    channel = models.CharField(max_length=10)
+    recipient_id = models.BigIntegerField()
+    claim = models.CharField(max_length=32, blank=True)
+    sent_at = models.DateTimeField(default=timezone.now, db_index=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=['item_type', 'item_id', 'transition', 'channel',
+                        'recipient_id'],
+                name='news_sentnotification_unique',
+            ),
+        ]
+
+    def __str__(self):
+        """Return a short description of the ledger entry."""
+        return (f"{self.get_item_type_display()} {self.item_id} "
+                f"{self.transition} via {self.channel} to {self.recipient_id}")
+
+
+class ViewCount(models.Model):
+    """
+    Hourly read counts for articles and newsletters.
+
+    Rows are written in batches by the buffered counter in
+    news/popularity.py (one upsert per flush, never one write per page
+    view) and summed over a window to build the "most read" rankings.
+
+    Attributes:
+        item_type (str): ITEM_ARTICLE or ITEM_NEWSLETTER.
+        item_id (int): Primary key of the article or newsletter.
+        publisher_id (int): The item's publisher, copied so per-publisher
+            rankings need no join; None for newsletters without one.
+        bucket (datetime): Start of the hour the reads fall in.
+        hits (int): Reads counted in that hour.
+    """
+
+    ITEM_ARTICLE = 'a'
+    ITEM_NEWSLETTER = 'n'
+
+    ITEM_CHOICES = [
+        (ITEM_ARTICLE, 'Article'),
+        (ITEM_NEWSLETTER, 'Newsletter'),
+    ]
+
+    item_type = models.CharField(max_length=1, choices=ITEM_CHOICES)
+    item_id = models.BigIntegerField()
+    publisher_id = models.BigIntegerField(null=True, blank=True)
+    bucket = models.DateTimeField(db_index=True)
+    hits = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=['item_type', 'item_id', 'bucket'],
+                name='news_viewcount_unique',
+            ),
+        ]
+
+    def __str__(self):
+        """Return a short description of the bucket."""
+        return (f"{self.get_item_type_display()} {self.item_id} "
+                f"@ {self.bucket:%Y-%m-%d %H:00}: {self.hits}")
+
+
+class ArticleVector(models.Model):
+    """
+    Feature vector and precomputed nearest neighbours of an approved article.
+
+    Maintained by news/related.py: a row is written when an approved
+    article is indexed and its neighbours' lists are patched in the same
+    pass, so the detail page reads its "related articles" with one primary-key
+    lookup instead of computing similarities per request.
+
+    Attributes:
+        article_id (int): Primary key of the article. Not a foreign key,
+            since articles may live on another shard.
+        vector (bytes): L2-normalised hashed term weights, stored sparse as
+            little-endian uint32 indices followed by float32 values.
+        related (list): ``[[article_id, score], ...]``, most similar first.
+        indexed_at (datetime): When the row was last written.
+    """
+
+    article_id = models.BigIntegerField(primary_key=True)
+    vector = models.BinaryField()
+    related = models.JSONField(default=list, blank=True)
+    indexed_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        """Return a short description of the row."""
+        return f"article {self.article_id}: {len(self.related)} related"
+
+
+class RelatedIndexQueue(models.Model):
+    """
+    Articles waiting for news/related.py to (re)index them.
+
+    Approving or editing an article only adds its id here, so the editor's
+    request never pays for scoring it against the whole corpus;
+    ``manage.py index_related`` drains the queue in batches.
+
+    Attributes:
+        article_id (int): Primary key of the article.
+        queued_at (datetime): When the article was first queued.
+    """
+
+    article_id = models.BigIntegerField(primary_key=True)
+    queued_at = models.DateTimeField(default=timezone.now, db_index=True)
+
+    def __str__(self):
+        """Return a short description of the row."""
+        return f"article {self.article_id} queued at {self.queued_at}"
+
+
+class ArticleFingerprint(models.Model):
+    """
+    MinHash signature and duplicate group of an article.
+
+    Maintained by news/duplicates.py whenever an article is created or its
+    text changes. Articles whose signatures agree closely enough share a
+    ``cluster_id``, which is how the review queue groups suspected
+    duplicates.
+
+    Attributes:
+        article_id (int): Primary key of the article. Not a foreign key,
+            since articles may live on another shard.
+        signature (bytes): The MinHash values as little-endian uint32.
+        cluster_id (int): Id of the oldest article of the duplicate group;
+            the article's own id when it has no duplicates.
+        indexed_at (datetime): When the row was last written.
+    """
+
+    article_id = models.BigIntegerField(primary_key=True)
+    signature = models.BinaryField()
+    cluster_id = models.BigIntegerField(db_index=True)
+    indexed_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        """Return a short description of the row."""
+        return f"article {self.article_id} in group {self.cluster_id}"
+
+
+class ArticleBand(models.Model):
+    """
+    One LSH bucket entry: an article whose signature hashes to ``key`` in
+    one band.
+
+    Looking up an article's candidates is an indexed ``key IN (...)``
+    probe with one key per band (news/duplicates.py).
+
+    Attributes:
+        key (int): 64-bit hash of the band number and its MinHash values.
+        article_id (int): The article in the bucket.
+    """
+
+    key = models.BigIntegerField()
+    article_id = models.BigIntegerField(db_index=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["key", "article_id"],
+                         name="news_articleband_key_idx"),
+        ]
+
+    def __str__(self):
+        """Return a short description of the row."""
+        return f"article {self.article_id} in bucket {self.key}"
+
+
+class ArchivedArticle(models.Model):
+    """
+    An old or denied article moved out of the hot ``news_article`` table.
+
+    news/archive.py moves rows here in batches, keeping the primary key (and
+    with it the shard), so ``/article/<pk>/`` and the API keep resolving by
+    falling back to this table when the hot lookup misses.
+
+    Attributes:
+        title (str): Headline of the article.
+        body (CompressedTextField): Main content, copied still compressed.
+        created_at (datetime): When the article was created.
+        status (str): Review status when archived (approved or denied).
+        approved_at (datetime): When the article was last approved.
+        publisher (ForeignKey): Publisher under which the article appeared.
+        author (ForeignKey): Journalist who wrote the article.
+        archived_at (datetime): When the row was moved here.
+    """
+
+    STATUS_PENDING = Article.STATUS_PENDING
+    STATUS_APPROVED = Article.STATUS_APPROVED
+    STATUS_DENIED = Article.STATUS_DENIED
+    STATUS_CHOICES = Article.STATUS_CHOICES
+
+    id = models.BigIntegerField(primary_key=True)
+    title = models.CharField(max_length=200)
+    body = CompressedTextField()
+    created_at = models.DateTimeField()
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES)
+    approved_at = models.DateTimeField(null=True, blank=True)
+    publisher = models.ForeignKey(
+        Publisher,
+        on_delete=models.CASCADE,
+        related_name='+',
+        db_constraint=False,
+    )
+    author = models.ForeignKey(
+        CustomUser,
+        on_delete=models.CASCADE,
+        related_name='+',
+        db_constraint=False,
+    )
+    archived_at = models.DateTimeField()
+
+    objects = ShardedQuerySet.as_manager()
+
+    class Meta:
+        ordering = ['-created_at']
+        indexes = [
+            # Month archive pages (news/rollups.py)
+            models.Index(fields=['created_at'],
+                         name='news_archart_created_idx'),
+        ]
+
+    def __str__(self):
+        """Return the article’s title for display purposes."""
+        return self.title
+
+    def is_approved(self):
+        """Return True if the article was approved when archived."""
+        return self.status == self.STATUS_APPROVED
+
+    def get_absolute_url(self):
+        """Return the article's usual detail URL, which falls back here."""
+        return reverse('news:article-detail', args=[self.pk])
+
+
+class ArchivedNewsletter(models.Model):
+    """
+    An old or denied newsletter moved out of the hot ``news_newsletter``
+    table; see ArchivedArticle.
+
+    Attributes:
+        title (str): Newsletter title.
+        body (CompressedTextField): Newsletter content, copied still
+            compressed.
+        author (ForeignKey): Journalist who wrote the newsletter.
+        publisher (ForeignKey, optional): Associated publisher.
+        status (str): Review status when archived (approved or denied).
+        approved_at (datetime): When the newsletter was last approved.
+        created_at (datetime): Creation timestamp.
+        updated_at (datetime): Last update before archiving.
+        archived_at (datetime): When the row was moved here.
+    """
+
+    STATUS_PENDING = Newsletter.STATUS_PENDING
+    STATUS_APPROVED = Newsletter.STATUS_APPROVED
+    STATUS_DENIED = Newsletter.STATUS_DENIED
+    STATUS_CHOICES = Newsletter.STATUS_CHOICES
+
+    id = models.BigIntegerField(primary_key=True)
+    title = models.CharField(max_length=255)
+    body = CompressedTextField()
+    author = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name="+",
+        db_constraint=False,
+    )
+    publisher = models.ForeignKey(
+        Publisher,
+        on_delete=models.CASCADE,
+        null=True,
+        blank=True,
+        related_name="+",
+        db_constraint=False,
+    )
+    status = models.CharField(max_length=1, choices=STATUS_CHOICES)
+    approved_at = models.DateTimeField(null=True, blank=True)
+    created_at = models.DateTimeField()
+    updated_at = models.DateTimeField()
+    archived_at = models.DateTimeField()
+
+    objects = ShardedQuerySet.as_manager()
+
     class Meta:
         ordering = ["-created_at"]
+        indexes = [
+            # Month archive pages (news/rollups.py)
+            models.Index(fields=["created_at"],
+                         name="news_archnl_created_idx"),
+        ]
 
     def __str__(self):
         """Return the newsletter’s title."""
         return self.title
+
+    def get_absolute_url(self):
+        """Return the newsletter's usual detail URL, which falls back here."""
+        return reverse("news:newsletter-detail", args=[self.pk])
+
+
+class IngestCheckpoint(models.Model):
+    """
+    How far a bulk ingest (news/ingest.py) has got through its input.
+
+    The row is updated in the same transaction as the batch it describes,
+    so an interrupted ingest resumes exactly after the last stored batch.
+
+    Attributes:
+        name (str): Identifies the input, by default its absolute path.
+        line (int): Number of input lines fully processed.
+        rows (int): Articles created so far.
+        updated_at (datetime): When the last batch was stored.
+    """
+
+    name = models.CharField(max_length=255, primary_key=True)
+    line = models.BigIntegerField(default=0)
+    rows = models.BigIntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        """Return the input name and progress."""
+        return f"{self.name} @ line {self.line} ({self.rows} rows)"
+
+
+class MonthRollup(models.Model):
+    """
+    Approved articles or newsletters per publisher and calendar month.
+
+    Kept up to date by the signals in news/signals.py and by bulk ingest,
+    so month navigation and counts never scan the content tables
+    (news/rollups.py). Archived items still count: they stay browsable.
+
+    Attributes:
+        kind (str): KIND_ARTICLE or KIND_NEWSLETTER.
+        publisher (Publisher): The publisher, or None for newsletters
+            without one.
+        month (date): First day of the month, in the site time zone.
+        count (int): Approved items created in that month.
+    """
+
+    KIND_ARTICLE = 'article'
+    KIND_NEWSLETTER = 'newsletter'
+
+    KIND_CHOICES = [
+        (KIND_ARTICLE, 'Article'),
+        (KIND_NEWSLETTER, 'Newsletter'),
+    ]
+
+    kind = models.CharField(max_length=10, choices=KIND_CHOICES)
+    publisher = models.ForeignKey(
+        Publisher,
+        on_delete=models.CASCADE,
+        null=True,
+        blank=True,
+        related_name='+',
+    )
+    month = models.DateField()
+    count = models.IntegerField(default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=['kind', 'publisher', 'month'],
+                name='news_monthrollup_unique',
+            ),
+        ]
+        indexes = [
+            models.Index(fields=['kind', 'month'],
+                         name='news_monthrollup_month_idx'),
+        ]
+
+    def __str__(self):
+        """Return the kind, publisher, month and count."""
+        return f"{self.kind} {self.publisher_id} {self.month:%Y-%m}: {self.count}"
@@ -0,0 +1,118 @@
+# news/moderation.py
+
+"""
+Moderation state transitions for articles and newsletters.
+
+A transition is one conditional statement,
+``UPDATE ... SET status = <to> WHERE id = <pk> AND status = <from>``, so when
+several editors act on the same item at once the database lets exactly one
+of them through. Only that caller gets an instance back. Once the
+transition has committed, ``status_changed`` is sent, from which the
+receivers in news/signals.py notify subscribers.
+
+For articles, the transition also appends a sync change-log row
+(news/changelog.py). When the article lives on the same database as the
+log, both writes share one transaction. With sharding (news/sharding.py)
+they are two transactions, committed in a fixed order: the log row first,
+then the status UPDATE on the shard. If the second commit fails, a log row
+is left without its transition. That is harmless, because the sync
+endpoint always serves the article's current state. The opposite failure,
+a status change that sync clients never hear about, cannot happen.
+
+When an ``editor`` is given, the same UPDATE also requires the item to be
+in the editor's scope and not leased to another editor
+(news/review_queue.py). A refused transition raises PermissionDenied or
+LeaseHeld, so the editor is told why.
+
+``update()`` does not send pre_save/post_save, which is why the event has
+its own signal.
+"""
+
+from django.core.exceptions import PermissionDenied
+from django.db import router, transaction
+from django.dispatch import Signal
+from django.utils import timezone
+
+from .changelog import classify_article_change, record_article_change
+from .models import Article, ArticleChange
+from .review_queue import actionable_by, editor_scope
+from .sharding import queryset_for_pk
+
+# Sent once per successful transition with ``instance``, ``old_status``,
+# ``new_status`` and ``using``; the sender is the model class.
+status_changed = Signal()
+
+
+class LeaseHeld(Exception):
+    """The item is leased to another editor."""
+
+
+def transition(model, pk, to_status, from_status=None, editor=None):
+    """
+    Move ``model`` row ``pk`` from ``from_status`` (default PENDING) to
+    ``to_status``, on behalf of ``editor`` if given.
+
+    Returns the updated instance, or None if the row does not exist or was
+    no longer in ``from_status`` (someone else got there first). Raises
+    PermissionDenied if the item is outside ``editor``'s scope and LeaseHeld
+    if another editor holds an unexpired lease on it.
+    """
+    if from_status is None:
+        from_status = model.STATUS_PENDING
+    queryset = queryset_for_pk(model._default_manager.all(), pk)
+    # The item leaves the review queue, so its lease goes too.
+    values = {"status": to_status, "claimed_by": None, "claimed_until": None}
+    # update() skips auto_now, so stamp those fields here.
+    for field in model._meta.concrete_fields:
+        if getattr(field, "auto_now", False):
+            values[field.attname] = timezone.now()
+    if to_status == model.STATUS_APPROVED:
+        values["approved_at"] = timezone.now()
+
+    matches = queryset.filter(pk=pk, status=from_status)
+    if editor is not None:
+        matches = matches.filter(actionable_by(editor))
+
+    alias = queryset.db
+    with transaction.atomic(using=alias):
+        changed = matches.update(**values)
+        if changed != 1:
+            if editor is not None:
+                _refuse(queryset.filter(pk=pk, status=from_status), editor)
+            return None
+        instance = queryset.get(pk=pk)
+        if model is Article:
+            was_approved = (from_status == Article.STATUS_APPROVED)
+            # A savepoint on the same database; on another one it commits
+            # before the outer transaction does (see the module docstring).
+            with transaction.atomic(
+                    using=router.db_for_write(ArticleChange)):
+                record_article_change(
+                    pk, classify_article_change(instance, False,
+                                                was_approved))
+
+    status_changed.send(
+        sender=model, instance=instance, old_status=from_status,
+        new_status=to_status, using=alias,
+    )
+    return instance
+
+
+def _refuse(pending, editor):
+    """Raise why ``editor`` could not move the ``pending`` row, if it is
+    still pending at all."""
+    if not pending.exists():
+        return
+    if not pending.filter(editor_scope(editor)).exists():
+        raise PermissionDenied("Item is outside the editor's publishers.")
+    raise LeaseHeld("Item is leased to another editor.")
+
+
+def approve(model, pk, editor=None):
+    """Approve a pending ``model`` row; see transition()."""
+    return transition(model, pk, model.STATUS_APPROVED, editor=editor)
+
+
+def deny(model, pk, editor=None):
+    """Deny a pending ``model`` row; see transition()."""
+    return transition(model, pk, model.STATUS_DENIED, editor=editor)
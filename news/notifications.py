@@ -0,0 +1,122 @@
+# news/notifications.py
+
+"""
+De-duplication of subscriber notifications through the SentNotification
+ledger.
+
+Before sending, a notification path calls claim_recipients() with everyone
+it intends to reach on one channel. It gets back only the recipients that
+have not been notified about that item and transition yet, and those are
+recorded in the same call, so a second path (or a repeated save) finds them
+already taken. Each call costs one SELECT, one bulk INSERT and one SELECT of
+the rows it won, however many recipients there are.
+
+The unique constraint on the ledger decides who wins when two senders claim
+the same recipient at once: both may see it as fresh, but only one insert
+lands. Every call tags its rows with a random claim token and reads back
+only the rows carrying that token, so the loser gets an empty set instead
+of sending a duplicate.
+"""
+
+import logging
+import uuid
+from datetime import timedelta
+
+import requests
+from django.conf import settings
+from django.utils import timezone
+
+from .models import Article, SentNotification
+
+logger = logging.getLogger(__name__)
+
+TRANSITION_APPROVED = "approved"
+
+CHANNEL_EMAIL = "email"
+CHANNEL_X = "x"
+
+# recipient_id used for channels that broadcast rather than address users.
+BROADCAST = 0
+
+
+def _item_key(item):
+    item_type = SentNotification.ITEM_ARTICLE if isinstance(item, Article) \
+        else SentNotification.ITEM_NEWSLETTER
+    return item_type, item.pk
+
+
+def claim_recipient_ids(item, channel, recipient_ids,
+                        transition=TRANSITION_APPROVED):
+    """
+    Record and return the subset of ``recipient_ids`` not yet notified about
+    ``transition`` of ``item`` on ``channel``.
+    """
+    item_type, item_id = _item_key(item)
+    wanted = set(recipient_ids)
+    if not wanted:
+        return set()
+    ledger = SentNotification.objects.filter(
+        item_type=item_type, item_id=item_id,
+        transition=transition, channel=channel,
+    )
+    fresh = wanted - set(
+        ledger.filter(recipient_id__in=wanted)
+        .values_list("recipient_id", flat=True)
+    )
+    if not fresh:
+        return set()
+    # Conflicting rows are skipped, so only the rows tagged with our token
+    # were inserted by this call.
+    claim = uuid.uuid4().hex
+    SentNotification.objects.bulk_create(
+        [
+            SentNotification(
+                item_type=item_type, item_id=item_id, transition=transition,
+                channel=channel, recipient_id=recipient_id, claim=claim,
+            )
+            for recipient_id in fresh
+        ],
+        ignore_conflicts=True,
+    )
+    return set(
+        ledger.filter(recipient_id__in=fresh, claim=claim)
+        .values_list("recipient_id", flat=True)
+    )
+
+
+def claim_recipients(item, channel, users, transition=TRANSITION_APPROVED):
+    """Like claim_recipient_ids(), but takes and returns user objects."""
+    users = list(users)
+    fresh = claim_recipient_ids(
+        item, channel, [user.pk for user in users], transition)
+    return [user for user in users if user.pk in fresh]
+
+
+def claim_broadcast(item, channel, transition=TRANSITION_APPROVED):
+    """Return True if ``item`` has not been broadcast on ``channel`` yet."""
+    return bool(claim_recipient_ids(item, channel, [BROADCAST], transition))
+
+
+def post_to_x(article):
+    """Post the approval of ``article`` to X, once per article."""
+    if not claim_broadcast(article, CHANNEL_X):
+        return
+    try:
+        requests.post("https://api.x.com/statuses/update",
+                      data={"status": article.title})
+    except requests.RequestException:
+        # The approval has already committed; do not fail it over X
+        logger.exception("Posting article %s to X failed", article.pk)
+
+
+def prune(older_than=None):
+    """
+    Delete ledger rows older than ``older_than`` (default
+    ``settings.NEWS_NOTIFICATION_LEDGER_DAYS`` days) and return how many.
+    """
+    if older_than is None:
+        older_than = timedelta(
+            days=getattr(settings, "NEWS_NOTIFICATION_LEDGER_DAYS", 30))
+    deleted, _ = SentNotification.objects.filter(
+        sent_at__lt=timezone.now() - older_than).delete()
+    return deleted
@@ -0,0 +1,257 @@
+# news/popularity.py
+
+"""
+Buffered read counters and precomputed "most read" rankings.
+
+Page views never write to the database directly. ViewCounter.hit() bumps an
+in-process counter keyed by item and hour; when the buffer is older than
+``NEWS_VIEWCOUNT_FLUSH_SECONDS`` or holds more than
+``NEWS_VIEWCOUNT_MAX_PENDING`` keys, the next finished request flushes it
+with one multi-row upsert into ViewCount that adds to the stored hits. Every
+worker process flushes its own buffer and the upserts are additive, so no
+coordination is needed; a crash loses at most one flush interval of counts.
+
+After a flush, rankings older than ``NEWS_POPULAR_REFRESH_SECONDS`` are
+rebuilt: the top ``NEWS_POPULAR_SIZE`` approved items per window ("today",
+"week"), overall and per publisher, with their titles, stored in the shared
+cache. top() only reads that cache entry, so serving a ranking costs no
+query; ``manage.py flush_view_counts`` does the same work from cron.
+"""
+
+import threading
+import time
+from collections import Counter, defaultdict
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connections, router, transaction
+from django.db.models import Sum
+from django.utils import timezone
+
+from .models import Article, Newsletter, ViewCount
+from .sharding import fetch_by_pks
+
+RANKINGS_KEY = "popular:rankings"
+REBUILD_LOCK_KEY = "popular:rebuild-lock"
+
+WINDOWS = {
+    "today": timedelta(days=1),
+    "week": timedelta(days=7),
+}
+
+KINDS = {
+    "article": (ViewCount.ITEM_ARTICLE, Article),
+    "newsletter": (ViewCount.ITEM_NEWSLETTER, Newsletter),
+}
+
+UPSERT_BATCH_SIZE = 500
+
+
+def _setting(name, default):
+    return getattr(settings, name, default)
+
+
+def bucket_for(when):
+    """Return the start of the hour containing ``when``."""
+    return when.replace(minute=0, second=0, microsecond=0)
+
+
+def _item_type(item):
+    return ViewCount.ITEM_ARTICLE if isinstance(item, Article) \
+        else ViewCount.ITEM_NEWSLETTER
+
+
+# -----------------------------------------------------------------------------
+# Batched upsert
+# -----------------------------------------------------------------------------
+def upsert_counts(counts):
+    """
+    Add ``{(item_type, item_id, publisher_id, bucket): hits}`` to ViewCount
+    with one ``INSERT ... ON CONFLICT/ON DUPLICATE KEY`` per batch.
+    """
+    alias = router.db_for_write(ViewCount)
+    connection = connections[alias]
+    qn = connection.ops.quote_name
+    table = qn(ViewCount._meta.db_table)
+    hits = qn("hits")
+    columns = ", ".join(
+        qn(c) for c in ("item_type", "item_id", "publisher_id", "bucket",
+                        "hits"))
+    if connection.vendor == "mysql":
+        conflict = f"ON DUPLICATE KEY UPDATE {hits} = {hits} + VALUES({hits})"
+    else:
+        keys = ", ".join(qn(c) for c in ("item_type", "item_id", "bucket"))
+        conflict = (f"ON CONFLICT ({keys}) DO UPDATE SET "
+                    f"{hits} = {table}.{hits} + excluded.{hits}")
+
+    rows = [
+        (item_type, item_id, publisher_id,
+         connection.ops.adapt_datetimefield_value(bucket), count)
+        for (item_type, item_id, publisher_id, bucket), count
+        in sorted(counts.items(), key=lambda kv: kv[0][:2] + (kv[0][3],))
+    ]
+    with transaction.atomic(using=alias), connection.cursor() as cursor:
+        for start in range(0, len(rows), UPSERT_BATCH_SIZE):
+            batch = rows[start:start + UPSERT_BATCH_SIZE]
+            values = ", ".join(["(%s, %s, %s, %s, %s)"] * len(batch))
+            cursor.execute(
+                f"INSERT INTO {table} ({columns}) VALUES {values} {conflict}",
+                [value for row in batch for value in row],
+            )
+
+
+# -----------------------------------------------------------------------------
+# In-process buffer
+# -----------------------------------------------------------------------------
+class ViewCounter:
+    """Thread-safe buffer of read counts, flushed in batches."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._pending = Counter()
+        self._last_flush = time.monotonic()
+
+    def hit(self, item):
+        """Count one read of an article or newsletter. Never queries."""
+        key = (_item_type(item), item.pk, item.publisher_id,
+               bucket_for(timezone.now()))
+        with self._lock:
+            self._pending[key] += 1
+
+    def pending(self):
+        """Return the number of buffered reads."""
+        with self._lock:
+            return sum(self._pending.values())
+
+    def is_due(self):
+        with self._lock:
+            if not self._pending:
+                return False
+            return (
+                len(self._pending) >= _setting("NEWS_VIEWCOUNT_MAX_PENDING",
+                                               1000)
+                or time.monotonic() - self._last_flush
+                >= _setting("NEWS_VIEWCOUNT_FLUSH_SECONDS", 30)
+            )
+
+    def flush(self):
+        """Write the buffered reads out and return how many there were."""
+        with self._lock:
+            pending, self._pending = self._pending, Counter()
+            self._last_flush = time.monotonic()
+        if not pending:
+            return 0
+        try:
+            upsert_counts(pending)
+        except Exception:
+            # Keep the counts for the next attempt rather than losing them.
+            with self._lock:
+                self._pending.update(pending)
+            raise
+        return sum(pending.values())
+
+    def flush_if_due(self):
+        """Flush when due, then refresh stale rankings."""
+        if self.is_due():
+            self.flush()
+            if rankings_are_stale():
+                rebuild_rankings()
+
+
+view_counter = ViewCounter()
+
+
+# -----------------------------------------------------------------------------
+# Rankings
+# -----------------------------------------------------------------------------
+def rankings_are_stale():
+    rankings = cache.get(RANKINGS_KEY)
+    if rankings is None:
+        return True
+    age = timezone.now() - rankings["built_at"]
+    return age.total_seconds() >= _setting("NEWS_POPULAR_REFRESH_SECONDS", 300)
+
+
+def _rank(kind, rows, size):
+    """
+    Turn ``(item_id, publisher_id, total)`` rows, busiest first, into
+    ``{None: overall, publisher_id: [...]}`` lists of entries, keeping only
+    approved items.
+    """
+    item_type, model = KINDS[kind]
+    # Take a few spares per list in case some top items are not approved.
+    cut = size * 2
+    overall = rows[:cut]
+    per_publisher = defaultdict(list)
+    for row in rows:
+        bucket = per_publisher[row[1]]
+        if len(bucket) < cut:
+            bucket.append(row)
+
+    wanted = {row[0] for row in overall}
+    for publisher_rows in per_publisher.values():
+        wanted.update(row[0] for row in publisher_rows)
+    approved = fetch_by_pks(
+        model.objects.filter(status=model.STATUS_APPROVED)
+        .only("pk", "title", "publisher_id"),
+        wanted,
+    )
+
+    def entries(candidates):
+        return [
+            {"id": item_id, "title": approved[item_id].title, "hits": total}
+            for item_id, _, total in candidates if item_id in approved
+        ][:size]
+
+    ranking = {None: entries(overall)}
+    for publisher_id, candidates in per_publisher.items():
+        if publisher_id is not None:
+            ranking[publisher_id] = entries(candidates)
+    return ranking
+
+
+def rebuild_rankings(now=None):
+    """
+    Recompute every ranking from ViewCount and store it in the cache.
+
+    Also drops buckets older than the longest window. Concurrent callers
+    skip the work while one rebuild is in progress.
+    """
+    if not cache.add(REBUILD_LOCK_KEY, True, timeout=60):
+        return None
+    try:
+        now = now or timezone.now()
+        size = _setting("NEWS_POPULAR_SIZE", 10)
+        rankings = {"built_at": now}
+        for window, span in WINDOWS.items():
+            since = bucket_for(now - span)
+            for kind, (item_type, _) in KINDS.items():
+                rows = [
+                    (row["item_id"], row["publisher_id"], row["total"])
+                    for row in ViewCount.objects
+                    .filter(item_type=item_type, bucket__gte=since)
+                    .values("item_id", "publisher_id")
+                    .annotate(total=Sum("hits"))
+                    .order_by("-total", "item_id")
+                ]
+                rankings[(kind, window)] = _rank(kind, rows, size)
+        ViewCount.objects.filter(
+            bucket__lt=bucket_for(now - max(WINDOWS.values()))).delete()
+        cache.set(RANKINGS_KEY, rankings, timeout=None)
+        return rankings
+    finally:
+        cache.delete(REBUILD_LOCK_KEY)
+
+
+def top(kind, window="today", publisher_id=None):
+    """
+    Return the precomputed ranking as ``[{"id", "title", "hits"}, ...]``.
+
+    Reads one cache entry and never touches the database; before the first
+    rebuild it returns an empty list.
+    """
+    rankings = cache.get(RANKINGS_KEY)
+    if rankings is None:
+        return []
+    return rankings.get((kind, window), {}).get(publisher_id, [])
@@ -0,0 +1,210 @@
+# news/querycache.py
+
+"""
+Generation-keyed result cache for small, hot, rarely-changing querysets.
+
+Every watched model has a generation counter in the shared cache. Writes to
+the model (post_save, post_delete, m2m_changed) bump its counter, so any
+cached result that depends on it stops matching and is recomputed on the
+next read. Nothing has to know which entries to delete.
+
+Lookups go through two levels:
+
+- L1: a bounded, in-process LRU keyed by entry name.
+- L2: the shared Django cache, keyed by entry name plus generations.
+
+Results are plain lists of model instances shared between requests, so
+callers must treat them as read-only.
+"""
+
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connections, transaction
+from django.db.models.signals import m2m_changed, post_delete, post_save
+
+GENERATION_KEY = "qc:gen:{}"
+VALUE_KEY = "qc:val:{}:{}"
+
+_watched = set()
+_ignored_fields = {}
+
+
+def _label(model):
+    return model._meta.label_lower
+
+
+# -----------------------------------------------------------------------------
+# Generation counters
+# -----------------------------------------------------------------------------
+def _new_generation():
+    # Time-based seeds mean an evicted counter never restarts at a value
+    # that older L2 entries were stored under.
+    return time.time_ns()
+
+
+def get_generations(models):
+    """Return a tuple with the current generation of each model, in order."""
+    keys = [GENERATION_KEY.format(_label(m)) for m in models]
+    found = cache.get_many(keys)
+    generations = []
+    for key in keys:
+        if key not in found:
+            cache.add(key, _new_generation(), timeout=None)
+            found[key] = cache.get(key)
+        generations.append(found[key])
+    return tuple(generations)
+
+
+def bump_generation(model, using="default"):
+    """
+    Invalidate every entry that depends on ``model``.
+
+    Inside a transaction the counter is bumped twice: now, so this
+    connection stops trusting the cache, and again on commit, so a reader
+    that filled the cache from pre-commit data is invalidated too.
+    """
+    key = GENERATION_KEY.format(_label(model))
+
+    def bump():
+        try:
+            cache.incr(key)
+        except ValueError:
+            cache.set(key, _new_generation(), timeout=None)
+
+    bump()
+    connection = connections[using]
+    if connection.in_atomic_block:
+        connection._querycache_dirty_block = connection.atomic_blocks[0]
+        transaction.on_commit(bump, using=using)
+
+
+def _has_uncommitted_writes(using="default"):
+    connection = connections[using]
+    return (
+        connection.in_atomic_block
+        and getattr(connection, "_querycache_dirty_block", None)
+        is connection.atomic_blocks[0]
+    )
+
+
+# -----------------------------------------------------------------------------
+# Signal wiring
+# -----------------------------------------------------------------------------
+def _on_write(sender, using="default", update_fields=None, **kwargs):
+    ignored = _ignored_fields.get(sender)
+    if ignored and update_fields and set(update_fields) <= ignored:
+        return
+    bump_generation(sender, using)
+
+
+def _on_m2m_changed(sender, instance, action, model, using="default", **kwargs):
+    if not action.startswith("post_"):
+        return
+    for related in {type(instance), model}:
+        if related in _watched:
+            bump_generation(related, using)
+
+
+def watch(*models, ignore_fields=()):
+    """
+    Bump the generation of each model on save, delete and m2m change.
+
+    Many-to-many relations declared on either side are covered, so adding a
+    user to a group or a publisher invalidates entries for both models.
+    Saves whose ``update_fields`` fall entirely within ``ignore_fields``
+    (e.g. the ``last_login`` stamp on every login) do not count as writes.
+    """
+    for model in models:
+        if ignore_fields:
+            _ignored_fields[model] = set(ignore_fields)
+        if model in _watched:
+            continue
+        _watched.add(model)
+        uid = f"querycache:{_label(model)}"
+        post_save.connect(_on_write, sender=model, dispatch_uid=uid)
+        post_delete.connect(_on_write, sender=model, dispatch_uid=uid)
+        throughs = [f.remote_field.through for f in model._meta.many_to_many]
+        throughs += [
+            rel.through for rel in model._meta.related_objects
+            if rel.many_to_many
+        ]
+        for through in throughs:
+            m2m_changed.connect(
+                _on_m2m_changed, sender=through,
+                dispatch_uid=f"querycache:{through._meta.label_lower}",
+            )
+
+
+# -----------------------------------------------------------------------------
+# Two-level cache
+# -----------------------------------------------------------------------------
+class QueryCache:
+    """
+    Cache of evaluated querysets, invalidated by model generations.
+
+    ``max_entries`` bounds the in-process L1; the least recently used entry
+    is evicted first. ``timeout`` applies to the shared L2.
+    """
+
+    def __init__(self, max_entries=None, timeout=None):
+        self.max_entries = max_entries or getattr(
+            settings, "QUERY_CACHE_L1_MAX_ENTRIES", 256)
+        self.timeout = timeout or getattr(settings, "QUERY_CACHE_TIMEOUT", 300)
+        self._l1 = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, name, factory, depends_on):
+        """
+        Return the cached result of ``factory()`` for ``name``.
+
+        ``factory`` returns a queryset (or any iterable); it is evaluated
+        into a list only on a miss. ``depends_on`` lists the models whose
+        writes should invalidate the entry.
+        """
+        watch(*depends_on)
+        if _has_uncommitted_writes():
+            return list(factory())
+
+        generations = get_generations(depends_on)
+        with self._lock:
+            entry = self._l1.get(name)
+            if entry is not None and entry[0] == generations:
+                self._l1.move_to_end(name)
+                return entry[1]
+
+        digest = hashlib.md5(repr(generations).encode()).hexdigest()
+        value_key = VALUE_KEY.format(name, digest)
+        result = cache.get(value_key)
+        if result is None:
+            result = list(factory())
+            cache.set(value_key, result, self.timeout)
+        self._remember(name, generations, result)
+        return result
+
+    def _remember(self, name, generations, result):
+        with self._lock:
+            self._l1[name] = (generations, result)
+            self._l1.move_to_end(name)
+            while len(self._l1) > self.max_entries:
+                self._l1.popitem(last=False)
+
+    def clear(self):
+        """Drop every L1 entry; L2 entries expire on their own."""
+        with self._lock:
+            self._l1.clear()
+
+    def __len__(self):
+        return len(self._l1)
+
+
+query_cache = QueryCache()
+
+
+def cached_queryset(name, factory, depends_on):
+    """Shortcut for ``query_cache.get()`` on the process-wide cache."""
+    return query_cache.get(name, factory, depends_on)
@@ -0,0 +1,397 @@
+# news/related.py
+
+"""
+"Related articles" from a NumPy vector index over approved articles.
+
+Every approved article gets a hashed bag-of-words vector. Its title and body
+tokens are hashed into ``NEWS_RELATED_DIMENSIONS`` buckets, with stop words
+dropped and title tokens counted twice. Each bucket is weighted
+``1 + log(tf)`` and the vector is L2-normalised, so cosine similarity is a
+plain dot product. Hashing needs no shared vocabulary or corpus-wide IDF.
+A stored vector therefore never goes stale, and adding one article gives
+exactly what a full rebuild would.
+
+Approving an article, or editing an approved one, only queues it
+(queue_articles(), one INSERT). ``manage.py index_related`` runs
+index_pending() from cron. It takes ``NEWS_RELATED_BATCH_SIZE`` queued
+articles at a time and scores the whole batch against every stored vector,
+one chunk of ``NEWS_RELATED_CHUNK_SIZE`` rows at a time, so a pass over the
+corpus is shared by the batch. Each article keeps its top
+``NEWS_RELATED_SIZE`` neighbours and is spliced into the list of every
+article whose weakest neighbour it now beats.
+rebuild_index() re-encodes all approved articles and recomputes every list
+block by block, holding at most two chunks of dense vectors at once. Run it
+through ``manage.py rebuild_related`` after changing the dimension count.
+
+Readers never compute similarities: related_articles() is one lookup for
+the stored list plus one fetch of the articles in it.
+"""
+
+import re
+import zlib
+from collections import defaultdict
+
+import numpy as np
+from django.conf import settings
+from django.db import router, transaction
+from django.utils import timezone
+
+from .models import Article, ArticleVector, RelatedIndexQueue
+from .sharding import fetch_by_pks, shard_querysets
+
+TOKEN_RE = re.compile(r"[a-z0-9]+")
+
+STOP_WORDS = frozenset("""
+    about after again all also and any are because been before being but can
+    could did does doing down during each few for from further had has have
+    having her here hers him his how into its itself just more most not now
+    off once only other our ours out over own same she should some such than
+    that the their theirs them then there these they this those through too
+    under until very was were what when where which while who whom why will
+    with would you your yours
+""".split())
+
+TITLE_WEIGHT = 2
+
+
+def _setting(name, default):
+    return getattr(settings, name, default)
+
+
+def dimensions():
+    return _setting("NEWS_RELATED_DIMENSIONS", 2048)
+
+
+def related_size():
+    return _setting("NEWS_RELATED_SIZE", 5)
+
+
+# -----------------------------------------------------------------------------
+# Vectors
+# -----------------------------------------------------------------------------
+def tokenize(text):
+    """Return the indexable words of ``text``, lower-cased."""
+    return [
+        token for token in TOKEN_RE.findall(text.lower())
+        if len(token) > 2 and token not in STOP_WORDS
+    ]
+
+
+def encode(title, body, dims=None):
+    """Return the sparse, normalised vector of an article as
+    ``(indices, values)``."""
+    dims = dims or dimensions()
+    tokens = tokenize(title) * TITLE_WEIGHT + tokenize(body)
+    if not tokens:
+        return np.empty(0, dtype="<u4"), np.empty(0, dtype="<f4")
+    hashes = np.fromiter(
+        (zlib.crc32(token.encode()) for token in tokens),
+        dtype=np.uint32, count=len(tokens),
+    ) % dims
+    indices, counts = np.unique(hashes, return_counts=True)
+    values = 1.0 + np.log(counts)
+    values /= np.linalg.norm(values)
+    return indices.astype("<u4"), values.astype("<f4")
+
+
+def pack(indices, values):
+    """Serialise a sparse vector for ArticleVector.vector."""
+    return indices.astype("<u4").tobytes() + values.astype("<f4").tobytes()
+
+
+def unpack(blob):
+    """Inverse of pack()."""
+    blob = bytes(blob)
+    count = len(blob) // 8
+    return (np.frombuffer(blob, dtype="<u4", count=count),
+            np.frombuffer(blob, dtype="<f4", count=count, offset=4 * count))
+
+
+def _densify(blobs, dims):
+    matrix = np.zeros((len(blobs), dims), dtype=np.float32)
+    for row, blob in enumerate(blobs):
+        indices, values = unpack(blob)
+        # Vectors from a different dimension count are ignored past the
+        # edge until rebuild_index() re-encodes them.
+        keep = indices < dims
+        matrix[row, indices[keep]] = values[keep]
+    return matrix
+
+
+def _top(ids, scores, k):
+    """Return the ``k`` best ``[id, score]`` pairs, best first."""
+    if len(scores) > k:
+        best = np.argpartition(-scores, k - 1)[:k]
+    else:
+        best = np.arange(len(scores))
+    best = best[np.argsort(-scores[best], kind="stable")]
+    minimum = _setting("NEWS_RELATED_MIN_SCORE", 0.05)
+    return [[int(ids[i]), round(float(scores[i]), 4)] for i in best
+            if scores[i] >= minimum]
+
+
+def _merge(entries, article_id, score, k):
+    """Put ``article_id`` into a neighbour list at ``score`` (or drop it
+    when ``score`` is None)."""
+    entries = [entry for entry in entries if entry[0] != article_id]
+    if score is not None:
+        entries.append([article_id, score])
+    entries.sort(key=lambda entry: -entry[1])
+    return entries[:k]
+
+
+# -----------------------------------------------------------------------------
+# Stored vectors
+# -----------------------------------------------------------------------------
+def _stored_chunks(size, fields=("article_id", "vector", "related")):
+    """Yield lists of ``fields`` tuples in primary-key order."""
+    after = None
+    while True:
+        qs = ArticleVector.objects.order_by("article_id")
+        if after is not None:
+            qs = qs.filter(article_id__gt=after)
+        rows = list(qs.values_list(*fields)[:size])
+        if not rows:
+            return
+        after = rows[-1][0]
+        yield rows
+
+
+def _store_vectors(vectors):
+    """Write ``{article_id: packed vector}``, keeping existing lists."""
+    now = timezone.now()
+    rows = list(ArticleVector.objects.filter(article_id__in=list(vectors))
+                .only("article_id"))
+    for row in rows:
+        row.vector = vectors[row.article_id]
+        row.indexed_at = now
+    ArticleVector.objects.bulk_update(rows, ["vector", "indexed_at"],
+                                      batch_size=500)
+    stored = {row.article_id for row in rows}
+    ArticleVector.objects.bulk_create(
+        [ArticleVector(article_id=pk, vector=blob)
+         for pk, blob in vectors.items() if pk not in stored],
+        batch_size=500, ignore_conflicts=True,
+    )
+
+
+# -----------------------------------------------------------------------------
+# Incremental updates
+# -----------------------------------------------------------------------------
+def queue_articles(article_ids):
+    """Queue articles for the next index_pending() run."""
+    RelatedIndexQueue.objects.bulk_create(
+        [RelatedIndexQueue(article_id=pk) for pk in article_ids],
+        batch_size=500, ignore_conflicts=True,
+    )
+
+
+def index_pending(batch_size=None):
+    """
+    Index every queued article that is still approved, ``batch_size`` per
+    pass over the stored vectors. Returns the number indexed.
+
+    A batch is taken off the queue before it is scored; if the run fails,
+    those articles stay unlisted until they are edited again or the next
+    rebuild_index(). Run one index_pending() at a time.
+    """
+    batch_size = batch_size or _setting("NEWS_RELATED_BATCH_SIZE", 256)
+    approved = Article.objects.filter(status=Article.STATUS_APPROVED) \
+        .only("pk", "title", "body")
+    indexed = 0
+    while True:
+        ids = list(RelatedIndexQueue.objects.order_by("queued_at")
+                   .values_list("article_id", flat=True)[:batch_size])
+        if not ids:
+            return indexed
+        RelatedIndexQueue.objects.filter(article_id__in=ids).delete()
+        found = fetch_by_pks(approved, ids)
+        articles = [found[pk] for pk in ids if pk in found]
+        if articles:
+            index_articles(articles)
+        indexed += len(articles)
+
+
+def index_articles(articles):
+    """
+    Add or refresh ``articles`` in the index with one pass over the stored
+    vectors.
+
+    Returns ``{article_id: related list}``. Lists of other articles that now
+    rank one of them among their neighbours, or that held one at a score
+    that has since changed, are patched in the same transaction.
+    """
+    dims = dimensions()
+    k = related_size()
+    minimum = _setting("NEWS_RELATED_MIN_SCORE", 0.05)
+    vectors = {article.pk: pack(*encode(article.title, str(article.body),
+                                        dims))
+               for article in articles}
+    batch_ids = np.array(list(vectors), dtype=np.int64)
+    column_of = {pk: column for column, pk in enumerate(vectors)}
+    queries = _densify(list(vectors.values()), dims)
+    # Stored first, so articles of the same batch find each other below.
+    _store_vectors(vectors)
+
+    best_ids = np.empty((len(batch_ids), 0), dtype=np.int64)
+    best_scores = np.empty((len(batch_ids), 0), dtype=np.float32)
+    patches = defaultdict(dict)
+    for rows in _stored_chunks(_setting("NEWS_RELATED_CHUNK_SIZE", 1024)):
+        ids = np.array([row[0] for row in rows], dtype=np.int64)
+        scores = _densify([row[1] for row in rows], dims) @ queries.T
+        scores[ids[:, None] == batch_ids[None, :]] = -1.0  # never itself
+        best_ids, best_scores = _keep_best(best_ids, best_scores,
+                                           ids, scores.T, k)
+
+        # Lists of batch articles are recomputed whole; patch the others.
+        rounded = np.round(scores, 4)
+        floors = np.array([
+            entries[-1][1] if len(entries) >= k else -np.inf
+            for _, _, entries in rows
+        ])
+        qualifies = (rounded >= minimum) & (rounded > floors[:, None])
+        in_batch = np.isin(ids, batch_ids)
+        qualifies[in_batch] = False
+        for row, column in zip(*np.nonzero(qualifies)):
+            patches[int(ids[row])][int(batch_ids[column])] = \
+                round(float(scores[row, column]), 4)
+        for row, (other_id, _, entries) in enumerate(rows):
+            if in_batch[row]:
+                continue
+            for entry in entries:
+                column = column_of.get(entry[0])
+                if column is None or qualifies[row, column]:
+                    continue
+                score = round(float(scores[row, column]), 4)
+                patches[other_id][entry[0]] = \
+                    score if score >= minimum else None
+
+    related = {
+        int(pk): _top(ids, scores, k)
+        for pk, ids, scores in zip(batch_ids, best_ids, best_scores)
+    }
+    with transaction.atomic(using=router.db_for_write(ArticleVector)):
+        # Re-read under lock so concurrent writers do not overwrite each
+        # other's lists.
+        locked = list(
+            ArticleVector.objects.select_for_update()
+            .filter(article_id__in=list(related) + list(patches))
+            .only("article_id", "related")
+        )
+        for row in locked:
+            if row.article_id in related:
+                row.related = related[row.article_id]
+                continue
+            for article_id, score in patches[row.article_id].items():
+                row.related = _merge(row.related, article_id, score, k)
+        ArticleVector.objects.bulk_update(locked, ["related"],
+                                          batch_size=500)
+    return related
+
+
+def _keep_best(best_ids, best_scores, ids, scores, k):
+    """
+    Merge a block of ``scores`` (one row per query, one column per id in
+    ``ids``) into the running best ``k`` ids and scores of every query.
+    """
+    all_ids = np.concatenate(
+        [best_ids, np.broadcast_to(ids, scores.shape)], axis=1)
+    all_scores = np.concatenate([best_scores, scores], axis=1)
+    if all_scores.shape[1] <= k:
+        return all_ids, all_scores
+    keep = np.argpartition(-all_scores, k - 1, axis=1)[:, :k]
+    return (np.take_along_axis(all_ids, keep, axis=1),
+            np.take_along_axis(all_scores, keep, axis=1))
+
+
+def remove_article(article_id):
+    """
+    Drop an article that was deleted or lost its approval.
+
+    Other lists may still name it; related_articles() skips it and the
+    next rebuild removes it.
+    """
+    ArticleVector.objects.filter(article_id=article_id).delete()
+
+
+# -----------------------------------------------------------------------------
+# Batch rebuild
+# -----------------------------------------------------------------------------
+def rebuild_index(chunk_size=None):
+    """
+    Re-encode every approved article and recompute all related lists.
+
+    Vectors are re-encoded and stored in batches first; rows of articles
+    that are no longer approved are deleted. Every block of ``chunk_size``
+    stored vectors is then scored against every other block, so at most two
+    dense ``chunk_size`` x dimensions matrices are held at once. Related
+    lists are replaced block by block and readers never see an empty index.
+    Returns the number of articles indexed.
+    """
+    dims = dimensions()
+    k = related_size()
+    chunk_size = chunk_size or _setting("NEWS_RELATED_CHUNK_SIZE", 1024)
+    started = timezone.now()
+
+    indexed = 0
+    approved = (
+        Article.objects.filter(status=Article.STATUS_APPROVED)
+        .order_by("pk").values_list("pk", "title", "body")
+    )
+    for shard in shard_querysets(approved):
+        vectors = {}
+        for pk, title, body in shard.iterator(chunk_size=2000):
+            vectors[pk] = pack(*encode(title, str(body), dims))
+            if len(vectors) >= 2000:
+                _store_vectors(vectors)
+                indexed += len(vectors)
+                vectors = {}
+        _store_vectors(vectors)
+        indexed += len(vectors)
+    ArticleVector.objects.filter(indexed_at__lt=started).delete()
+
+    vector_fields = ("article_id", "vector")
+    for block in _stored_chunks(chunk_size, vector_fields):
+        block_ids = np.array([row[0] for row in block], dtype=np.int64)
+        matrix = _densify([row[1] for row in block], dims)
+        best_ids = np.empty((len(block), 0), dtype=np.int64)
+        best_scores = np.empty((len(block), 0), dtype=np.float32)
+        for rows in _stored_chunks(chunk_size, vector_fields):
+            ids = np.array([row[0] for row in rows], dtype=np.int64)
+            scores = matrix @ _densify([row[1] for row in rows], dims).T
+            scores[block_ids[:, None] == ids[None, :]] = -1.0
+            best_ids, best_scores = _keep_best(best_ids, best_scores,
+                                               ids, scores, k)
+        updates = [
+            ArticleVector(article_id=int(pk), related=_top(ids, scores, k))
+            for pk, ids, scores in zip(block_ids, best_ids, best_scores)
+        ]
+        ArticleVector.objects.bulk_update(updates, ["related"],
+                                          batch_size=500)
+    return indexed
+
+
+# -----------------------------------------------------------------------------
+# Reading
+# -----------------------------------------------------------------------------
+def related_ids(article_id):
+    """Return the stored neighbour ids of an article, most similar first."""
+    entries = (
+        ArticleVector.objects.filter(article_id=article_id)
+        .values_list("related", flat=True).first()
+    )
+    return [entry[0] for entry in entries or ()]
+
+
+def related_articles(article_id, queryset=None):
+    """
+    Return the related articles of ``article_id`` that are in ``queryset``
+    (approved articles by default), most similar first.
+    """
+    ids = related_ids(article_id)
+    if not ids:
+        return []
+    if queryset is None:
+        queryset = Article.objects.filter(status=Article.STATUS_APPROVED)
+    found = fetch_by_pks(queryset, ids)
+    return [found[pk] for pk in ids if pk in found]
@@ -0,0 +1,167 @@
+# news/review_queue.py
+
+"""
+Leased review queue for editors.
+
+Editors no longer browse one shared list of pending items. Instead each
+editor claims a batch of pending articles or newsletters from the publishers
+they edit (plus items with no publisher), and holds a lease on them for
+``settings.NEWS_REVIEW_LEASE_SECONDS``:
+
+- claim() picks candidates with ``SELECT ... FOR UPDATE SKIP LOCKED``, so
+  editors claiming at the same moment are handed disjoint rows instead of
+  waiting on each other's locks. The following UPDATE re-checks that the
+  lease is free, which keeps claims exclusive on databases without
+  SKIP LOCKED as well.
+- Leases expire on their own; an expired item is simply claimable again.
+- claimed_page() lists an editor's leased items oldest first, paginated by
+  the ``(created_at, pk)`` keyset rather than by OFFSET.
+
+Approving or denying an item (news/moderation.py) clears its lease. The
+moderation views only let an editor act on items in their scope that are
+leased to them or not leased at all (actionable_by()), so a lease is
+binding rather than advisory.
+"""
+
+import base64
+import binascii
+from datetime import datetime, timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from .models import Publisher
+from .sharding import (
+    MergedQuerySet,
+    is_sharded,
+    queryset_for_pk,
+    select_related_across,
+    shard_querysets,
+)
+
+
+def lease_duration():
+    """Return how long a claim lasts."""
+    return timedelta(
+        seconds=getattr(settings, "NEWS_REVIEW_LEASE_SECONDS", 600))
+
+
+def batch_size():
+    """Return how many items one claim() hands out by default."""
+    return getattr(settings, "NEWS_REVIEW_BATCH_SIZE", 10)
+
+
+def editor_scope(editor):
+    """Return a Q matching items ``editor`` may review."""
+    publisher_ids = list(
+        Publisher.objects.filter(editors=editor).values_list("pk", flat=True)
+    )
+    return Q(publisher_id__in=publisher_ids) | Q(publisher__isnull=True)
+
+
+def _lease_free(now):
+    return Q(claimed_until__isnull=True) | Q(claimed_until__lte=now)
+
+
+def actionable_by(editor, now=None):
+    """Return a Q matching items ``editor`` may approve or deny now: in
+    their scope and not leased to another editor."""
+    now = now or timezone.now()
+    return editor_scope(editor) & (
+        Q(claimed_by_id=editor.pk) | _lease_free(now))
+
+
+def _pending(model):
+    return model._default_manager.filter(status=model.STATUS_PENDING)
+
+
+def claim(model, editor, limit=None):
+    """
+    Lease up to ``limit`` more pending ``model`` items to ``editor`` and
+    extend the leases they already hold. Returns the number newly claimed.
+    """
+    limit = limit or batch_size()
+    now = timezone.now()
+    until = now + lease_duration()
+    scope = editor_scope(editor)
+    claimed = 0
+    for qs in shard_querysets(_pending(model)):
+        with transaction.atomic(using=qs.db):
+            qs.filter(claimed_by_id=editor.pk, claimed_until__gt=now) \
+                .update(claimed_until=until)
+            if claimed >= limit:
+                continue
+            pks = list(
+                qs.select_for_update(skip_locked=True)
+                .filter(scope).filter(_lease_free(now))
+                .order_by("created_at", "pk")
+                .values_list("pk", flat=True)[:limit - claimed]
+            )
+            if pks:
+                claimed += qs.filter(pk__in=pks).filter(_lease_free(now)) \
+                    .update(claimed_by_id=editor.pk, claimed_until=until)
+    return claimed
+
+
+def release(model, editor, pk):
+    """Give up ``editor``'s lease on item ``pk``; True if one was held."""
+    qs = queryset_for_pk(model._default_manager.all(), pk)
+    return qs.filter(pk=pk, claimed_by_id=editor.pk).update(
+        claimed_by=None, claimed_until=None) == 1
+
+
+def waiting_count(model, editor):
+    """Return how many pending items in ``editor``'s scope are unclaimed."""
+    now = timezone.now()
+    return sum(
+        qs.filter(editor_scope(editor)).filter(_lease_free(now)).count()
+        for qs in shard_querysets(_pending(model))
+    )
+
+
+def encode_cursor(obj):
+    """Return an opaque keyset cursor pointing just after ``obj``."""
+    raw = f"{obj.created_at.isoformat()}|{obj.pk}".encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(token):
+    """
+    Turn a token from encode_cursor() back into ``(created_at, pk)``.
+
+    Raises ValueError for anything that was not produced by encode_cursor().
+    """
+    padded = token + "=" * (-len(token) % 4)
+    try:
+        created, pk = base64.urlsafe_b64decode(padded.encode()) \
+            .decode().split("|")
+        return datetime.fromisoformat(created), int(pk)
+    except (binascii.Error, UnicodeDecodeError, ValueError) as exc:
+        raise ValueError("Malformed review-queue cursor.") from exc
+
+
+def claimed_page(model, editor, after=None, page_size=20):
+    """
+    Return ``(items, next_cursor)``: up to ``page_size`` of ``editor``'s
+    leased items after the ``(created_at, pk)`` position ``after``.
+    """
+    qs = _pending(model).filter(
+        claimed_by_id=editor.pk, claimed_until__gt=timezone.now()
+    ).order_by("created_at", "pk")
+    if after is not None:
+        created, pk = after
+        qs = qs.filter(
+            Q(created_at__gt=created) | Q(created_at=created, pk__gt=pk))
+    qs = select_related_across(qs, "author", "publisher")
+    if is_sharded():
+        qs = MergedQuerySet(
+            shard_querysets(qs),
+            key=lambda obj: (obj.created_at, obj.pk),
+            reverse=False,
+        )
+    rows = list(qs[:page_size + 1])
+    if len(rows) > page_size:
+        return rows[:page_size], encode_cursor(rows[page_size - 1])
+    return rows, None
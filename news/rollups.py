@@ -0,0 +1,210 @@
+# news/rollups.py
+
+"""
+Month-by-month navigation for approved articles and newsletters.
+
+MonthRollup holds one count per (kind, publisher, month). The counts change
+incrementally whenever an item becomes approved, stops being approved,
+moves to another publisher or is deleted. The save, delete and
+``status_changed`` receivers in news/signals.py and bulk ingest all call in
+here. Month navigation (months()) and page counts (count()) read only this
+small table.
+
+A month page (month_items()) is a range scan on the ``created_at`` indexes
+of the hot and archive tables of each shard, merged newest first. Archived
+items stay in the counts and on the pages.
+
+Changes that bypass signals, such as ``QuerySet.update()`` or raw SQL, are
+not tracked. ``manage.py rebuild_rollups`` recomputes every count.
+"""
+
+from collections import Counter
+from datetime import date, datetime
+
+from django.db import IntegrityError, transaction
+from django.db.models import Count, F, Q, Sum
+from django.db.models.functions import TruncMonth
+from django.utils import timezone
+
+from .archive import ARCHIVES
+from .models import Article, MonthRollup, Newsletter
+from .sharding import (
+    MergedQuerySet,
+    select_related_across,
+    shard_querysets,
+)
+
+KINDS = {
+    Article: MonthRollup.KIND_ARTICLE,
+    Newsletter: MonthRollup.KIND_NEWSLETTER,
+}
+
+
+def month_of(moment):
+    """Return the first day of ``moment``'s month in the site time zone."""
+    if timezone.is_aware(moment):
+        moment = timezone.localtime(moment)
+    return moment.date().replace(day=1)
+
+
+def month_range(year, month):
+    """
+    Return the aware ``[start, end)`` datetimes of a calendar month.
+
+    Raises ValueError for a month that does not exist.
+    """
+    start = datetime(year, month, 1)
+    end = datetime(year + (month == 12), month % 12 + 1, 1)
+    return timezone.make_aware(start), timezone.make_aware(end)
+
+
+# -----------------------------------------------------------------------------
+# Incremental maintenance
+# -----------------------------------------------------------------------------
+def bump(model, publisher_id, created_at, delta=1):
+    """Add ``delta`` to the rollup of ``created_at``'s month."""
+    _add(model, publisher_id, month_of(created_at), delta)
+
+
+def _add(model, publisher_id, month, delta):
+    if not delta:
+        return
+    key = {"kind": KINDS[model], "publisher_id": publisher_id, "month": month}
+    rollup = MonthRollup.objects.filter(**key)
+    if rollup.update(count=F("count") + delta) or delta < 0:
+        return
+    try:
+        with transaction.atomic():
+            MonthRollup.objects.create(count=delta, **key)
+    except IntegrityError:
+        # Created concurrently by another writer
+        rollup.update(count=F("count") + delta)
+
+
+def bump_many(model, items):
+    """Count approved ``items`` (just bulk-inserted) in one update each per
+    (publisher, month)."""
+    counts = Counter(
+        (item.publisher_id, month_of(item.created_at))
+        for item in items if item.status == model.STATUS_APPROVED
+    )
+    for (publisher_id, month), delta in counts.items():
+        _add(model, publisher_id, month, delta)
+
+
+def track_save(instance, created):
+    """
+    post_save: move ``instance`` in or out of the counts. Relies on
+    ``_was_approved`` from the pre_save receivers and on the tracked
+    publisher id.
+    """
+    model = type(instance)
+    is_approved = instance.status == model.STATUS_APPROVED
+    was_approved = not created and instance._was_approved
+    old_publisher = instance.get_loaded_value(
+        "publisher_id", instance.publisher_id)
+    if was_approved and (not is_approved
+                         or old_publisher != instance.publisher_id):
+        bump(model, old_publisher, instance.created_at, -1)
+        was_approved = False
+    if is_approved and not was_approved:
+        bump(model, instance.publisher_id, instance.created_at, 1)
+
+
+def track_transition(instance, old_status, new_status):
+    """status_changed: count moderation approvals and un-approvals."""
+    model = type(instance)
+    approved = model.STATUS_APPROVED
+    if (old_status == approved) != (new_status == approved):
+        bump(model, instance.publisher_id, instance.created_at,
+             1 if new_status == approved else -1)
+
+
+def track_delete(instance):
+    """post_delete: an approved item leaves the counts."""
+    model = type(instance)
+    if instance.get_loaded_value("status", instance.status) \
+            == model.STATUS_APPROVED:
+        bump(model, instance.get_loaded_value(
+            "publisher_id", instance.publisher_id), instance.created_at, -1)
+
+
+def rebuild():
+    """
+    Recompute every rollup from the hot and archive tables. Returns the
+    number of rollup rows written.
+    """
+    counts = Counter()
+    for model, kind in KINDS.items():
+        for source in (model, ARCHIVES[model]):
+            base = source._base_manager.filter(status=model.STATUS_APPROVED) \
+                .annotate(month=TruncMonth("created_at")) \
+                .values("publisher_id", "month") \
+                .annotate(n=Count("pk")).order_by()
+            for queryset in shard_querysets(base):
+                for row in queryset:
+                    month = row["month"]
+                    if isinstance(month, datetime):
+                        month = month_of(month)
+                    counts[kind, row["publisher_id"], month] += row["n"]
+    with transaction.atomic():
+        MonthRollup.objects.all().delete()
+        MonthRollup.objects.bulk_create([
+            MonthRollup(kind=kind, publisher_id=publisher_id, month=month,
+                        count=n)
+            for (kind, publisher_id, month), n in counts.items()
+        ])
+    return len(counts)
+
+
+# -----------------------------------------------------------------------------
+# Reading
+# -----------------------------------------------------------------------------
+def _rollups(model, publisher_id=None):
+    rollups = MonthRollup.objects.filter(kind=KINDS[model])
+    if publisher_id is not None:
+        rollups = rollups.filter(publisher_id=publisher_id)
+    return rollups
+
+
+def months(model, publisher_id=None):
+    """Return ``[(month, count), ...]`` for months with items, newest
+    first."""
+    return [
+        (row["month"], row["total"])
+        for row in _rollups(model, publisher_id)
+        .values("month").annotate(total=Sum("count"))
+        .filter(total__gt=0).order_by("-month")
+    ]
+
+
+def count(model, year, month, publisher_id=None):
+    """Return the number of approved items in one month."""
+    return _rollups(model, publisher_id).filter(
+        month=date(year, month, 1)).aggregate(total=Sum("count"))["total"] \
+        or 0
+
+
+def month_items(model, start, end, publisher_id=None):
+    """
+    Return the approved ``model`` items created in ``[start, end)``, hot
+    and archived, newest first, as one sliceable MergedQuerySet.
+    """
+    querysets = []
+    for source in (model, ARCHIVES[model]):
+        queryset = source._default_manager.filter(
+            status=model.STATUS_APPROVED,
+            created_at__gte=start, created_at__lt=end,
+        )
+        if publisher_id is not None:
+            queryset = queryset.filter(publisher_id=publisher_id)
+        queryset = select_related_across(queryset, "author") \
+            .order_by("-created_at", "-pk")
+        querysets += shard_querysets(queryset)
+    return MergedQuerySet(querysets, key=lambda obj: (obj.created_at, obj.pk))
+
+
+def month_filter(year, month):
+    """Return a Q for items created in the given month."""
+    start, end = month_range(year, month)
+    return Q(created_at__gte=start, created_at__lt=end)
@@ -0,0 +1,296 @@
+# news/sharding.py
+
+"""
+Horizontal sharding of Article and Newsletter rows by publisher.
+
+Sharding is off unless ``settings.NEWS_SHARDS`` lists more than one database
+alias. When it is on:
+
+- A new row is written to ``shards[publisher_id % N]`` (newsletters without
+  a publisher go to the first shard).
+- Its primary key is allocated so that ``pk % N`` is the shard index, which
+  lets ``/article/<pk>/`` style lookups go straight to the right database.
+  The row stays on that shard if its publisher is later changed.
+- Archived copies (news/archive.py) keep their primary key, and with it
+  their shard.
+- Every other model (users, publishers, sessions, tokens, ...) lives on
+  ``default``; the foreign keys from sharded rows carry no database
+  constraint for that reason.
+- Feeds that span publishers are served by MergedQuerySet, a k-way merge of
+  per-shard pages that are already sorted by the database.
+
+Each shard needs the schema: ``manage.py migrate --database=<alias>``.
+"""
+
+import heapq
+import threading
+from itertools import islice
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, models, transaction
+
+SHARDED_MODELS = {
+    "news.article", "news.newsletter",
+    "news.archivedarticle", "news.archivednewsletter",
+}
+
+
+def shard_aliases():
+    """Return the configured shard aliases, or ``["default"]``."""
+    return list(getattr(settings, "NEWS_SHARDS", None) or [DEFAULT_DB_ALIAS])
+
+
+def is_sharded():
+    """Return True when rows are spread over more than one database."""
+    return len(shard_aliases()) > 1
+
+
+def is_sharded_model(model):
+    return model._meta.label_lower in SHARDED_MODELS
+
+
+def shard_for_publisher(publisher_id):
+    """Return the alias that new rows for ``publisher_id`` are written to."""
+    shards = shard_aliases()
+    if publisher_id is None:
+        return shards[0]
+    return shards[int(publisher_id) % len(shards)]
+
+
+def shard_for_pk(pk):
+    """Return the alias holding the sharded row with primary key ``pk``."""
+    shards = shard_aliases()
+    return shards[int(pk) % len(shards)]
+
+
+def shard_for_instance(instance):
+    if instance.pk is not None:
+        return shard_for_pk(instance.pk)
+    return shard_for_publisher(instance.publisher_id)
+
+
+# -----------------------------------------------------------------------------
+# Primary-key allocation
+# -----------------------------------------------------------------------------
+_blocks = {}
+_blocks_lock = threading.Lock()
+
+
+def _reserve_block(model, alias, shard_count):
+    from .models import ShardSequence
+
+    size = getattr(settings, "NEWS_SHARD_ID_BLOCK_SIZE", 100)
+    with transaction.atomic(using=alias):
+        seq, _ = (
+            ShardSequence.objects.using(alias)
+            .select_for_update()
+            .get_or_create(name=model._meta.label_lower)
+        )
+        # Never hand out a block below rows that already exist, even if an
+        # earlier reservation was rolled back.
+        top = model._base_manager.using(alias).aggregate(
+            top=models.Max("pk"))["top"] or 0
+        start = max(seq.next_local, top // shard_count + 1)
+        seq.next_local = start + size
+        seq.save(using=alias)
+    return [start, start + size - 1]
+
+
+def allocate_pk(model, alias):
+    """
+    Return a fresh primary key on ``alias`` with ``pk % N`` equal to the
+    shard's index. Ids are reserved from the shard in blocks, so most calls
+    never touch the database.
+    """
+    shards = shard_aliases()
+    index, count = shards.index(alias), len(shards)
+    key = (model._meta.label_lower, alias, count)
+    with _blocks_lock:
+        block = _blocks.get(key)
+        if block is None or block[0] > block[1]:
+            block = _blocks[key] = _reserve_block(model, alias, count)
+        local = block[0]
+        block[0] += 1
+    return local * count + index
+
+
+def assign_pk(instance, using):
+    """Give an unsaved sharded instance a shard-encoded primary key."""
+    if is_sharded() and instance.pk is None:
+        instance.pk = allocate_pk(type(instance), using)
+
+
+# -----------------------------------------------------------------------------
+# Router
+# -----------------------------------------------------------------------------
+class ShardRouter:
+    """
+    Database router for the sharded models; inactive unless sharding is on.
+
+    Sharded rows are routed by their own instance when Django passes one.
+    Reads without an instance cannot be routed and should use the helpers
+    below (queryset_for_pk, shard_querysets, merge_shards). Everything else
+    is pinned to ``default`` so related lookups from a sharded row (e.g.
+    ``article.author``) leave the shard.
+    """
+
+    def _route(self, model, hints):
+        if not is_sharded():
+            return None
+        if not is_sharded_model(model):
+            return DEFAULT_DB_ALIAS
+        instance = hints.get("instance")
+        if isinstance(instance, model):
+            return shard_for_instance(instance)
+        if instance is not None and instance._meta.label_lower == \
+                "news.publisher":
+            return shard_for_publisher(instance.pk)
+        return None
+
+    def db_for_read(self, model, **hints):
+        return self._route(model, hints)
+
+    def db_for_write(self, model, **hints):
+        return self._route(model, hints)
+
+    def allow_relation(self, obj1, obj2, **hints):
+        if is_sharded() and (
+            is_sharded_model(type(obj1)) or is_sharded_model(type(obj2))
+        ):
+            return True
+        return None
+
+
+class ShardedQuerySet(models.QuerySet):
+    """
+    QuerySet for sharded models. ``create()`` without an explicit
+    ``using()`` saves through the instance, so the router can place it.
+    """
+
+    def create(self, **kwargs):
+        if self._db is not None or not is_sharded():
+            return super().create(**kwargs)
+        obj = self.model(**kwargs)
+        obj.save(force_insert=True)
+        return obj
+
+
+# -----------------------------------------------------------------------------
+# Query helpers
+# -----------------------------------------------------------------------------
+def queryset_for_pk(queryset, pk):
+    """Point ``queryset`` at the shard that holds ``pk``."""
+    if not is_sharded():
+        return queryset
+    return queryset.using(shard_for_pk(pk))
+
+
+def shard_querysets(queryset):
+    """Return one copy of ``queryset`` per shard."""
+    return [queryset.using(alias) for alias in shard_aliases()]
+
+
+def select_related_across(queryset, *fields):
+    """
+    ``select_related()`` when every table is in one database, otherwise
+    ``prefetch_related()``, since a shard cannot join against ``default``.
+    """
+    if is_sharded():
+        return queryset.prefetch_related(*fields)
+    return queryset.select_related(*fields)
+
+
+def evaluate_for_shards(queryset):
+    """
+    Subqueries cannot cross databases, so evaluate ``queryset`` (typically
+    a ``values_list`` of ids from ``default``) before filtering shards.
+    """
+    return list(queryset) if is_sharded() else queryset
+
+
+def fetch_by_pks(queryset, pks):
+    """Return ``{pk: obj}`` for ``pks``, querying each shard at most once."""
+    by_shard = {}
+    for pk in pks:
+        by_shard.setdefault(shard_for_pk(pk) if is_sharded() else None,
+                            []).append(pk)
+    found = {}
+    for alias, shard_pks in by_shard.items():
+        qs = queryset.using(alias) if alias else queryset
+        found.update((obj.pk, obj) for obj in qs.filter(pk__in=shard_pks))
+    return found
+
+
+class MergedQuerySet:
+    """
+    Read-only, sliceable view over several querysets that share one ordering.
+
+    Slicing ``[start:stop]`` fetches the first ``stop`` rows of each shard
+    (already sorted by the database) and k-way merges them with a heap, so
+    it works with Django's Paginator and ListView.
+    """
+
+    def __init__(self, querysets, key, reverse=True):
+        self.querysets = querysets
+        self.key = key
+        self.reverse = reverse
+        self._count = None
+
+    def count(self):
+        if self._count is None:
+            self._count = sum(qs.count() for qs in self.querysets)
+        return self._count
+
+    def __len__(self):
+        return self.count()
+
+    def exists(self):
+        return any(qs.exists() for qs in self.querysets)
+
+    def _merge(self, pages):
+        return heapq.merge(*pages, key=self.key, reverse=self.reverse)
+
+    def __iter__(self):
+        return self._merge(
+            [qs.iterator(chunk_size=2000) for qs in self.querysets]
+        )
+
+    def __getitem__(self, item):
+        if isinstance(item, slice):
+            if item.step is not None:
+                raise ValueError("MergedQuerySet does not support steps.")
+            start = item.start or 0
+            stop = item.stop if item.stop is not None else self.count()
+            pages = [list(qs[:stop]) for qs in self.querysets]
+            return list(islice(self._merge(pages), start, stop))
+        rows = self[item:item + 1]
+        if not rows:
+            raise IndexError("MergedQuerySet index out of range")
+        return rows[0]
+
+
+def merge_shards(queryset):
+    """
+    Return ``queryset`` unchanged when unsharded, otherwise a MergedQuerySet
+    over every shard ordered newest first by ``(created_at, pk)``.
+    """
+    if not is_sharded():
+        return queryset
+    ordered = queryset.order_by("-created_at", "-pk")
+    return MergedQuerySet(
+        shard_querysets(ordered),
+        key=lambda obj: (obj.created_at, obj.pk),
+    )
+
+
+def delete_sharded_dependents(model, **filters):
+    """
+    Delete rows of a sharded model matching ``filters`` on every shard.
+
+    Django's cascade only looks in the database of the deleted parent, so
+    deleting a publisher or user has to clean up the shards explicitly.
+    """
+    if not is_sharded():
+        return
+    for qs in shard_querysets(model._base_manager.filter(**filters)):
+        qs.delete()
@@ -1,28 +1,56 @@
 # news/signals.py
 
+import logging
+
 from django.conf import settings
+from django.contrib.auth.models import Group
+from django.contrib.auth.signals import user_logged_out
+from django.core.signals import request_finished
 from django.core.mail import send_mass_mail
-from django.db.models.signals import pre_save, post_save
+from django.db.models.signals import (
+    m2m_changed, pre_save, post_save, pre_delete, post_delete
+)
 from django.dispatch import receiver
+from django.utils import timezone
 
-from .models import Article, Newsletter
+from . import (
+    duplicates, feeds, notifications, related, rollups, surrogate, usercache,
+)
+from .changelog import classify_article_change, record_article_change
+from .models import (
+    ArchivedArticle,
+    ArchivedNewsletter,
+    Article,
+    ArticleChange,
+    CustomUser,
+    Newsletter,
+    Publisher,
+)
+from .moderation import status_changed
+from .popularity import view_counter
+from .querycache import watch
+from .sharding import assign_pk, delete_sharded_dependents
+
+logger = logging.getLogger(__name__)
+
+# -----------------------------------------------------------------------------
+# Query cache invalidation: writes to these models bump their generation
+# -----------------------------------------------------------------------------
+watch(Publisher, Group)
+watch(CustomUser, ignore_fields={"last_login"})
 
 
 # -----------------------------------------------------------------------------
 # Article approval caching & notifications
 # -----------------------------------------------------------------------------
 @receiver(pre_save, sender=Article)
-def cache_previous_article_approval(sender, instance, **kwargs):
-    if not instance.pk:
-        instance._was_approved = False
-    else:
-        old_status = (
-            Article.objects
-            .filter(pk=instance.pk)
-            .values_list("status", flat=True)
-            .first()
-        )
-        instance._was_approved = (old_status == Article.STATUS_APPROVED)
+def cache_previous_article_approval(sender, instance, using, **kwargs):
+    # The status loaded with the row is tracked, so no SELECT is needed
+    # unless the field was deferred.
+    old_status = instance.get_previous_value("status", using)
+    instance._was_approved = (old_status == Article.STATUS_APPROVED)
+    if instance.status == Article.STATUS_APPROVED and not instance._was_approved:
+        instance.approved_at = timezone.now()
 
 
 @receiver(post_save, sender=Article)
@@ -30,11 +58,19 @@ def send_article_notifications(sender, instance, created, **kwargs):
     # Only fire when an existing article is freshly approved
     if created or instance.status != Article.STATUS_APPROVED or instance._was_approved:
         return
+    notify_article_approved(instance)
+
 
+def notify_article_approved(instance):
     # Gather subscribers
-    pub_subs = instance.publisher.subscribers.all()
-    journ_subs = instance.author.subscriber_set.all()
-    recipients = set(pub_subs) | set(journ_subs)
+    # Digest readers hear about it from send_digests instead
+    immediate = {"notification_frequency": CustomUser.FREQUENCY_IMMEDIATE}
+    pub_subs = instance.publisher.subscribers.filter(**immediate)
+    journ_subs = instance.author.subscriber_set.filter(**immediate)
+    # Skip anyone another notification path has already emailed
+    recipients = notifications.claim_recipients(
+        instance, notifications.CHANNEL_EMAIL, set(pub_subs) | set(journ_subs)
+    )
 
     # Build email messages
     messages = []
@@ -52,6 +88,9 @@ def send_article_notifications(sender, instance, created, **kwargs):
     except Exception as e:
         print(f"[EMAIL ERROR] {e}")
 
+    # Post to X; the ledger keeps news/api/signals.py from posting again
+    notifications.post_to_x(instance)
+
     # Simulate tweet to X
     token = getattr(settings, "X_API_BEARER_TOKEN", None)
     if token:
@@ -60,21 +99,104 @@ def send_article_notifications(sender, instance, created, **kwargs):
         print("[X SIMULATION] No X_API_BEARER_TOKEN; skipping tweet.")
 
 
+# -----------------------------------------------------------------------------
+# Article change log (feeds the incremental sync API)
+# -----------------------------------------------------------------------------
+@receiver(post_save, sender=Article)
+def log_article_change(sender, instance, created, **kwargs):
+    kind = classify_article_change(
+        instance, created, getattr(instance, "_was_approved", False)
+    )
+    record_article_change(instance.pk, kind)
+
+
+@receiver(post_delete, sender=Article)
+def log_article_delete(sender, instance, **kwargs):
+    record_article_change(instance.pk, ArticleChange.KIND_DELETED)
+
+
+# -----------------------------------------------------------------------------
+# Related articles: keep the vector index in step with approvals and edits
+# -----------------------------------------------------------------------------
+@receiver(post_save, sender=Article)
+def update_related_index(sender, instance, created, update_fields=None,
+                         **kwargs):
+    kind = classify_article_change(
+        instance, created, getattr(instance, "_was_approved", False)
+    )
+    if kind == ArticleChange.KIND_UNAPPROVED:
+        related.remove_article(instance.pk)
+    elif instance.status == Article.STATUS_APPROVED and (
+            kind == ArticleChange.KIND_APPROVED or update_fields is None
+            or {"title", "body"} & set(update_fields)):
+        queue_related(instance)
+
+
+@receiver(post_delete, sender=Article)
+def drop_related_index(sender, instance, **kwargs):
+    related.remove_article(instance.pk)
+
+
+def queue_related(instance):
+    # Scoring against the corpus is left to `manage.py index_related`
+    try:
+        related.queue_articles([instance.pk])
+    except Exception:
+        # The article stays unlisted until the next rebuild_related run
+        logger.exception("Queueing related articles for %s failed",
+                         instance.pk)
+
+
+# -----------------------------------------------------------------------------
+# Near-duplicate groups: fingerprint new articles and edited text
+# -----------------------------------------------------------------------------
+@receiver(post_save, sender=Article)
+def update_duplicate_index(sender, instance, created, update_fields=None,
+                           **kwargs):
+    if created or update_fields is None \
+            or {"title", "body"} & set(update_fields):
+        try:
+            duplicates.index_article(instance)
+        except Exception:
+            # Ungrouped until the next rebuild_duplicates run
+            logger.exception("Fingerprinting article %s failed", instance.pk)
+
+
+@receiver(post_delete, sender=Article)
+def drop_duplicate_index(sender, instance, **kwargs):
+    duplicates.remove_article(instance.pk)
+
+
+# -----------------------------------------------------------------------------
+# Syndication feeds: a feed changes only when one of its approved articles does
+# -----------------------------------------------------------------------------
+@receiver(post_save, sender=Article)
+def invalidate_article_feeds(sender, instance, created, using, **kwargs):
+    if instance.status == Article.STATUS_APPROVED or \
+     getattr(instance, "_was_approved", False):
+        feeds.invalidate_article(instance, using)
+        # An article moved to another publisher leaves the old feed too
+        old_publisher = instance.get_loaded_value("publisher_id", None)
+        if old_publisher not in (None, instance.publisher_id):
+            feeds.invalidate(feeds.SOURCE_PUBLISHER, old_publisher, using)
+
+
+@receiver(post_delete, sender=Article)
+def invalidate_deleted_article_feeds(sender, instance, using, **kwargs):
+    if instance.status == Article.STATUS_APPROVED:
+        feeds.invalidate_article(instance, using)
+
+
 # -----------------------------------------------------------------------------
 # Newsletter approval caching & notifications
 # -----------------------------------------------------------------------------
 @receiver(pre_save, sender=Newsletter)
-def cache_previous_newsletter_approval(sender, instance, **kwargs):
-    if not instance.pk:
-        instance._was_approved = False
-    else:
-        old_status = (
-            Newsletter.objects
-                      .filter(pk=instance.pk)
-                      .values_list("status", flat=True)
-                      .first()
-        )
-        instance._was_approved = (old_status == Newsletter.STATUS_APPROVED)
+def cache_previous_newsletter_approval(sender, instance, using, **kwargs):
+    old_status = instance.get_previous_value("status", using)
+    instance._was_approved = (old_status == Newsletter.STATUS_APPROVED)
+    if instance.status == Newsletter.STATUS_APPROVED and \
+            not instance._was_approved:
+        instance.approved_at = timezone.now()
 
 
 @receiver(post_save, sender=Newsletter)
@@ -83,11 +205,18 @@ def send_newsletter_notifications(sender, instance, created, **kwargs):
     if created or instance.status != \
      Newsletter.STATUS_APPROVED or instance._was_approved:
         return
+    notify_newsletter_approved(instance)
 
+
+def notify_newsletter_approved(instance):
     # Gather subscribers
-    pub_subs = instance.publisher.subscribers.all() if instance.publisher else []
-    journ_subs = instance.author.subscriber_set.all()
-    recipients = set(pub_subs) | set(journ_subs)
+    immediate = {"notification_frequency": CustomUser.FREQUENCY_IMMEDIATE}
+    pub_subs = instance.publisher.subscribers.filter(**immediate) \
+        if instance.publisher else []
+    journ_subs = instance.author.subscriber_set.filter(**immediate)
+    recipients = notifications.claim_recipients(
+        instance, notifications.CHANNEL_EMAIL, set(pub_subs) | set(journ_subs)
+    )
 
     # Build email messages
     messages = []
@@ -111,3 +240,156 @@ def send_newsletter_notifications(sender, instance, created, **kwargs):
         print(f"[X SIMULATION] Would post tweet: Newsletter - {instance.title}")
     else:
         print("[X SIMULATION] No X_API_BEARER_TOKEN; skipping tweet.")
+
+
+# -----------------------------------------------------------------------------
+# Moderation transitions (news/moderation.py): conditional UPDATEs that bypass
+# save(), so notifications hang off status_changed instead
+# -----------------------------------------------------------------------------
+@receiver(status_changed, sender=Article)
+def handle_article_transition(sender, instance, old_status, new_status,
+                              **kwargs):
+    if new_status == Article.STATUS_APPROVED and \
+     old_status != Article.STATUS_APPROVED:
+        notify_article_approved(instance)
+        queue_related(instance)
+        feeds.invalidate_article(instance)
+    rollups.track_transition(instance, old_status, new_status)
+
+
+@receiver(status_changed, sender=Newsletter)
+def handle_newsletter_transition(sender, instance, old_status, new_status,
+                                 **kwargs):
+    if new_status == Newsletter.STATUS_APPROVED and \
+     old_status != Newsletter.STATUS_APPROVED:
+        notify_newsletter_approved(instance)
+    rollups.track_transition(instance, old_status, new_status)
+
+
+# -----------------------------------------------------------------------------
+# Month rollups for date navigation (news/rollups.py)
+# -----------------------------------------------------------------------------
+@receiver(post_save, sender=Article)
+@receiver(post_save, sender=Newsletter)
+def update_month_rollups(sender, instance, created, **kwargs):
+    rollups.track_save(instance, created)
+
+
+@receiver(post_delete, sender=Article)
+@receiver(post_delete, sender=Newsletter)
+def drop_from_month_rollups(sender, instance, **kwargs):
+    rollups.track_delete(instance)
+
+
+# -----------------------------------------------------------------------------
+# Sharding: shard-encoded primary keys and cross-database cascades
+# -----------------------------------------------------------------------------
+@receiver(pre_save, sender=Article)
+@receiver(pre_save, sender=Newsletter)
+def assign_sharded_pk(sender, instance, using, **kwargs):
+    assign_pk(instance, using)
+
+
+@receiver(pre_delete, sender=Publisher)
+def delete_publisher_sharded_rows(sender, instance, **kwargs):
+    delete_sharded_dependents(Article, publisher_id=instance.pk)
+    delete_sharded_dependents(Newsletter, publisher_id=instance.pk)
+    delete_sharded_dependents(ArchivedArticle, publisher_id=instance.pk)
+    delete_sharded_dependents(ArchivedNewsletter, publisher_id=instance.pk)
+
+
+@receiver(pre_delete, sender=CustomUser)
+def delete_author_sharded_rows(sender, instance, **kwargs):
+    delete_sharded_dependents(Article, author_id=instance.pk)
+    delete_sharded_dependents(Newsletter, author_id=instance.pk)
+    delete_sharded_dependents(ArchivedArticle, author_id=instance.pk)
+    delete_sharded_dependents(ArchivedNewsletter, author_id=instance.pk)
+
+
+# -----------------------------------------------------------------------------
+# Read counters: buffered hits are written out after the response is sent
+# -----------------------------------------------------------------------------
+@receiver(request_finished)
+def flush_view_counts(sender, **kwargs):
+    try:
+        view_counter.flush_if_due()
+    except Exception:
+        # Counts stay buffered for the next attempt
+        logger.exception("Flushing view counts failed")
+
+
+# -----------------------------------------------------------------------------
+# Caching proxy: purge the surrogate keys of changed content (news/surrogate.py)
+# -----------------------------------------------------------------------------
+@receiver(post_save, sender=Article)
+@receiver(post_save, sender=Newsletter)
+def purge_saved_item(sender, instance, using, **kwargs):
+    surrogate.purge_item(instance, getattr(instance, "_was_approved", False),
+                         using)
+
+
+@receiver(post_delete, sender=Article)
+@receiver(post_delete, sender=Newsletter)
+def purge_deleted_item(sender, instance, using, **kwargs):
+    surrogate.purge_item(instance, False, using)
+
+
+@receiver(status_changed, sender=Article)
+@receiver(status_changed, sender=Newsletter)
+def purge_moderated_item(sender, instance, old_status, using, **kwargs):
+    surrogate.purge_item(instance, old_status == sender.STATUS_APPROVED,
+                         using)
+
+
+@receiver(post_save, sender=Publisher)
+@receiver(post_delete, sender=Publisher)
+def purge_publisher(sender, instance, using, **kwargs):
+    surrogate.purge(surrogate.publisher_key(instance.pk),
+                    surrogate.LIST_PUBLISHERS, using=using)
+
+
+@receiver(post_save, sender=CustomUser)
+def purge_saved_user(sender, instance, created, using, update_fields=None,
+                     **kwargs):
+    if update_fields is not None and set(update_fields) <= {"last_login"}:
+        return
+    keys = [surrogate.author_key(instance.pk)]
+    if created:
+        keys.append(surrogate.LIST_JOURNALISTS)
+    surrogate.purge(*keys, using=using)
+
+
+@receiver(post_delete, sender=CustomUser)
+def purge_deleted_user(sender, instance, using, **kwargs):
+    surrogate.purge(surrogate.author_key(instance.pk),
+                    surrogate.LIST_JOURNALISTS, using=using)
+
+
+@receiver(m2m_changed, sender=CustomUser.groups.through)
+def purge_journalist_list(sender, action, using, **kwargs):
+    # The API's journalist list is the "Journalist" group
+    if action in ("post_add", "post_remove", "post_clear"):
+        surrogate.purge(surrogate.LIST_JOURNALISTS, using=using)
+
+
+@receiver(request_finished)
+def flush_purges(sender, **kwargs):
+    try:
+        surrogate.purge_queue.flush()
+    except Exception:
+        logger.exception("Purging surrogate keys failed")
+
+
+# -----------------------------------------------------------------------------
+# Cached user snapshots (news/usercache.py)
+# -----------------------------------------------------------------------------
+@receiver(post_save, sender=CustomUser)
+@receiver(post_delete, sender=CustomUser)
+def forget_user_snapshot(sender, instance, using, **kwargs):
+    usercache.forget(instance.pk, using)
+
+
+@receiver(user_logged_out)
+def forget_logged_out_user(sender, request, user, **kwargs):
+    if user is not None:
+        usercache.forget(user.pk)
@@ -0,0 +1,222 @@
+# news/surrogate.py
+
+"""
+Surrogate keys and purges for a caching reverse proxy (Varnish with xkey,
+Fastly, ...) in front of the portal.
+
+Views tag what a response shows with tag(). Items are tagged
+``article-<id>``, ``newsletter-<id>``, ``publisher-<id>`` and
+``author-<id>``. Lists of the newest approved items are tagged
+``list-latest``, and the API's publisher and journalist lists have their
+own collection keys. SurrogateKeyMiddleware writes the tags into the
+``NEWS_SURROGATE_HEADER`` header of successful GET/HEAD responses. When
+the view set no ``Cache-Control``, the middleware also lets the proxy keep
+the page for ``NEWS_SURROGATE_MAX_AGE`` seconds. Browsers must revalidate
+(``max-age=0``). A page is only shared when it is the same for everyone:
+a response for a logged-in session or one that sets a cookie is marked
+private instead. API responses carry their token in ``Authorization``, and
+``Vary`` keeps them apart per token. The API's article reads depend on the
+caller's subscriptions and are left untagged.
+
+When content changes, the signal handlers in news/signals.py call purge()
+with the affected keys. Keys are queued once the transaction commits.
+After each request (and from ``ingest_articles``) they are sent to
+``NEWS_PURGE_URL`` as ``NEWS_PURGE_METHOD`` requests, in batches of
+``NEWS_PURGE_BATCH_SIZE``, with the keys in the surrogate header. Nothing
+is queued while ``NEWS_PURGE_URL`` is empty. A failed purge is logged and
+dropped; the proxy's copy then expires within ``NEWS_SURROGATE_MAX_AGE``.
+
+Reads served by the proxy never reach Django, so read counts
+(news/popularity.py) only see cache misses of detail pages.
+"""
+
+import atexit
+import logging
+import threading
+from functools import partial
+
+import requests
+from django.conf import settings
+from django.db import transaction
+from django.utils.cache import patch_cache_control, patch_vary_headers
+
+from .models import ArchivedArticle, ArchivedNewsletter, Article, Newsletter
+
+logger = logging.getLogger(__name__)
+
+LIST_LATEST = "list-latest"
+LIST_PUBLISHERS = "list-publishers"
+LIST_JOURNALISTS = "list-journalists"
+
+PREFIXES = {
+    Article: "article",
+    ArchivedArticle: "article",
+    Newsletter: "newsletter",
+    ArchivedNewsletter: "newsletter",
+}
+
+CACHEABLE_METHODS = ("GET", "HEAD")
+
+
+def _setting(name, default):
+    return getattr(settings, name, default)
+
+
+def header():
+    return _setting("NEWS_SURROGATE_HEADER", "Surrogate-Key")
+
+
+def purge_url():
+    return _setting("NEWS_PURGE_URL", "")
+
+
+# -----------------------------------------------------------------------------
+# Keys
+# -----------------------------------------------------------------------------
+def publisher_key(pk):
+    return f"publisher-{pk}"
+
+
+def author_key(pk):
+    return f"author-{pk}"
+
+
+def keys_for(item):
+    """Keys of an article or newsletter (hot or archived): the item
+    itself, its author and its publisher."""
+    keys = [f"{PREFIXES[type(item)]}-{item.pk}", author_key(item.author_id)]
+    if item.publisher_id is not None:
+        keys.append(publisher_key(item.publisher_id))
+    return keys
+
+
+def list_keys(items):
+    """Keys of a list of the newest items: ``list-latest`` and each item's
+    keys."""
+    keys = {LIST_LATEST}
+    for item in items:
+        keys.update(keys_for(item))
+    return keys
+
+
+def tag(response, *keys):
+    """Add surrogate ``keys`` to ``response`` and return it."""
+    response.surrogate_keys = getattr(response, "surrogate_keys", set()) \
+        | set(keys)
+    return response
+
+
+# -----------------------------------------------------------------------------
+# Response headers
+# -----------------------------------------------------------------------------
+def is_shareable(request, response):
+    """True when the proxy may serve ``response`` to other clients
+    (of the same token, for API calls)."""
+    if response.cookies:
+        return False
+    if "HTTP_AUTHORIZATION" in request.META:
+        return True
+    user = getattr(request, "user", None)
+    return user is None or not user.is_authenticated
+
+
+class SurrogateKeyMiddleware:
+    """Emit the surrogate keys of tagged responses, with cache headers."""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        response = self.get_response(request)
+        keys = getattr(response, "surrogate_keys", None)
+        if not keys or request.method not in CACHEABLE_METHODS \
+                or response.status_code != 200:
+            return response
+        response[header()] = " ".join(sorted(keys))
+        if not response.has_header("Cache-Control"):
+            if is_shareable(request, response):
+                patch_cache_control(
+                    response, public=True, max_age=0,
+                    s_maxage=_setting("NEWS_SURROGATE_MAX_AGE", 300))
+            else:
+                patch_cache_control(response, private=True, max_age=0)
+        patch_vary_headers(response, ("Cookie", "Authorization"))
+        return response
+
+
+# -----------------------------------------------------------------------------
+# Purging
+# -----------------------------------------------------------------------------
+def send(keys):
+    """Purge ``keys`` with one request to the proxy. True on success."""
+    try:
+        response = requests.request(
+            _setting("NEWS_PURGE_METHOD", "PURGE"), purge_url(),
+            headers={header(): " ".join(keys)},
+            timeout=_setting("NEWS_PURGE_TIMEOUT", 2),
+        )
+        response.raise_for_status()
+    except requests.RequestException:
+        logger.exception("Purging %d surrogate keys failed", len(keys))
+        return False
+    return True
+
+
+class PurgeQueue:
+    """Thread-safe set of keys waiting to be purged, sent in batches."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._pending = set()
+
+    def add(self, keys):
+        with self._lock:
+            self._pending.update(keys)
+            full = len(self._pending) >= \
+                _setting("NEWS_PURGE_BATCH_SIZE", 256)
+        if full:
+            self.flush()
+
+    def pending(self):
+        """Return the queued keys."""
+        with self._lock:
+            return set(self._pending)
+
+    def flush(self):
+        """Send every queued key; return how many there were."""
+        with self._lock:
+            keys, self._pending = sorted(self._pending), set()
+        if not keys or not purge_url():
+            return 0
+        size = _setting("NEWS_PURGE_BATCH_SIZE", 256)
+        for start in range(0, len(keys), size):
+            send(keys[start:start + size])
+        return len(keys)
+
+
+purge_queue = PurgeQueue()
+# Management commands have no request_finished to flush on.
+atexit.register(purge_queue.flush)
+
+
+def purge(*keys, using=None):
+    """Queue ``keys`` for purging once the current transaction commits."""
+    if keys and purge_url():
+        transaction.on_commit(partial(purge_queue.add, keys), using=using)
+
+
+def purge_item(item, was_visible, using=None):
+    """
+    Purge an article or newsletter that was saved, deleted or moderated,
+    plus the lists it is (or was) on. Items that were never approved are
+    on no shared page, so nothing is purged for them.
+    """
+    is_visible = item.status == item.STATUS_APPROVED
+    if not (is_visible or was_visible):
+        return
+    keys = [LIST_LATEST, *keys_for(item)]
+    # Moving to another publisher changes the old publisher's pages too
+    old_publisher = item.get_loaded_value("publisher_id", None)
+    if old_publisher not in (None, item.publisher_id):
+        keys.append(publisher_key(old_publisher))
+    purge(*keys, using=using)
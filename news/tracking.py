@@ -0,0 +1,98 @@
+# news/tracking.py
+
+"""
+Dirty-field tracking for models.
+
+TrackedFieldsMixin remembers the database value of each field listed in
+``tracked_fields`` when a row is loaded (``from_db``), refreshed
+(``refresh_from_db``, including deferred-field loads) or saved. Signal
+handlers can then ask what a field used to be without another SELECT.
+"""
+
+UNKNOWN = object()
+
+
+class TrackedFieldsMixin:
+    """
+    Mixin for models that need to know a field's last-known database value.
+
+    Set ``tracked_fields`` to a tuple of attribute names. During a save, the
+    snapshot still describes the row as it was before the save, so pre_save
+    and post_save receivers can compare old and new values; it is updated
+    once ``save()`` returns, only for the fields that were written.
+    """
+
+    tracked_fields = ()
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance._loaded_values = {
+            name: value
+            for name, value in zip(field_names, values)
+            if name in cls.tracked_fields
+        }
+        return instance
+
+    def _snapshot(self, names=None):
+        """
+        Record the current value of the tracked fields among ``names``
+        (field names or attnames, e.g. "publisher" or "publisher_id"), or
+        of all tracked fields when ``names`` is None.
+        """
+        if names is None:
+            attnames = self.tracked_fields
+        else:
+            attnames = [self._meta.get_field(name).attname for name in names]
+        loaded = self.__dict__.setdefault("_loaded_values", {})
+        for name in attnames:
+            if name in self.tracked_fields and name in self.__dict__:
+                loaded[name] = self.__dict__[name]
+
+    def refresh_from_db(self, using=None, fields=None, from_queryset=None):
+        super().refresh_from_db(
+            using=using, fields=fields, from_queryset=from_queryset)
+        self._snapshot(fields)
+
+    def save(self, *args, **kwargs):
+        super().save(*args, **kwargs)
+        self._snapshot(kwargs.get("update_fields"))
+
+    def get_loaded_value(self, name, default=UNKNOWN):
+        """
+        Return the last-known database value of ``name`` without querying,
+        or ``default`` if it was never loaded (new or deferred instance).
+        """
+        return self.__dict__.get("_loaded_values", {}).get(name, default)
+
+    def get_previous_value(self, name, using=None):
+        """
+        Return the stored value of ``name`` before the current save.
+
+        New rows have no previous value (``None``). Only when the field was
+        never loaded, e.g. it was deferred, is the database asked.
+        """
+        value = self.get_loaded_value(name)
+        if value is not UNKNOWN:
+            return value
+        if self.pk is None:
+            return None
+        return (
+            type(self)._base_manager
+            .using(using or self._state.db)
+            .filter(pk=self.pk)
+            .values_list(name, flat=True)
+            .first()
+        )
+
+    def has_changed(self, name):
+        """Return True if ``name`` differs from its last-known DB value."""
+        return self.get_loaded_value(name, None) != getattr(self, name)
+
+    def changed_fields(self):
+        """Return ``{name: (old, new)}`` for tracked fields that changed."""
+        return {
+            name: (self.get_loaded_value(name, None), getattr(self, name))
+            for name in self.tracked_fields
+            if self.has_changed(name)
+        }
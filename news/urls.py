@@ -4,13 +4,15 @@ from django.urls import path
 from .views import (
     ArticleDeleteView,
     ArticleListView,
+    ArticleFragmentView,
     ArticleDetailView,
     ArticleCreateView,
     ArticleUpdateView,
     NewsletterListView,
+    NewsletterFragmentView,
     NewsletterDetailView,
     NewsletterCreateView,
-    SubscriptionUpdateView,
+    SubscriptionManagerView,
     SignupView,
     PendingArticlesListView,
     PendingNewslettersListView,    
@@ -22,13 +24,25 @@ from .views import (
     unsubscribe_journalist,
     subscribe_publisher,
     unsubscribe_publisher,
+    subscription_search,
+    subscription_toggle,
+    update_delivery_preference,
+    source_feed,
+    MonthArchiveView,
+    NewsletterMonthArchiveView,
+    month_archive_index,
 )
+from .models import Newsletter
 
 app_name = 'news'
 
 urlpatterns = [
     # --- Articles -----------------------------------------------------------
     path('', ArticleListView.as_view(), name='article-list'),
+    path('articles/more/', ArticleFragmentView.as_view(), name='article-more'),
+    path('archive/', month_archive_index, name='article-archive'),
+    path('archive/<int:year>/<int:month>/', MonthArchiveView.as_view(),
+         name='article-month'),
     path('article/create/', ArticleCreateView.as_view(), name='article-create'),
     path('article/<int:pk>/', ArticleDetailView.as_view(), name='article-detail'),
     path('article/<int:pk>/approve/', approve_article, name='article-approve'),
@@ -39,7 +53,13 @@ urlpatterns = [
          ArticleDeleteView.as_view(), name='article-delete'),
 
     # --- Reader Subscriptions -----------------------------------------------
-    path('subscriptions/', SubscriptionUpdateView.as_view(), name='subscriptions'),
+    path('subscriptions/', SubscriptionManagerView.as_view(), name='subscriptions'),
+    path('subscriptions/search/<str:kind>/',
+         subscription_search, name='subscription-search'),
+    path('subscriptions/<str:kind>/<int:pk>/',
+         subscription_toggle, name='subscription-toggle'),
+    path('subscriptions/delivery/',
+         update_delivery_preference, name='subscription-delivery'),
 
     # --- Sign Up ------------------------------------------------------------
     path('signup/', SignupView.as_view(), name='signup'),
@@ -62,6 +82,12 @@ urlpatterns = [
 
     # --- Newsletters --------------------------------------------------------
     path('newsletters/', NewsletterListView.as_view(), name='newsletter-list'),
+    path('newsletters/more/', NewsletterFragmentView.as_view(),
+         name='newsletter-more'),
+    path('newsletters/archive/', month_archive_index,
+         {'model': Newsletter}, name='newsletter-archive'),
+    path('newsletters/archive/<int:year>/<int:month>/',
+         NewsletterMonthArchiveView.as_view(), name='newsletter-month'),
     path('newsletters/create/', NewsletterCreateView.as_view(), 
          name='newsletter-create'),
     path('newsletters/<int:pk>/', NewsletterDetailView.as_view(), 
@@ -70,4 +96,10 @@ urlpatterns = [
          name='newsletter-approve'),
     path('newsletters/<int:pk>/deny/', deny_newsletter, name='newsletter-deny'),
 
+    # --- RSS / Atom Feeds ---------------------------------------------------
+    path('feeds/publisher/<int:pk>/<str:fmt>/', source_feed,
+         {'source': 'publisher'}, name='publisher-feed'),
+    path('feeds/journalist/<int:pk>/<str:fmt>/', source_feed,
+         {'source': 'journalist'}, name='journalist-feed'),
+
 ]
@@ -0,0 +1,108 @@
+# news/usercache.py
+
+"""
+Cached loading of the logged-in user for the HTML site.
+
+Django's AuthenticationMiddleware fetches the CustomUser row on every
+request that touches ``request.user``. CachedAuthenticationMiddleware
+replaces it. It keeps a compact snapshot of the user in the shared cache:
+the fields in SNAPSHOT_FIELDS plus the session auth hash. The common
+logged-in page then needs no user query at all. Together with the
+``cached_db`` session engine, the session lookup is served from the cache
+too.
+
+A snapshot is rebuilt into a real CustomUser whose other fields are
+deferred. Reading one of them, or a relation such as
+``subscriptions_publishers``, queries as usual, and ``save()`` only writes
+the loaded fields.
+
+The session auth hash is checked against the snapshot, so a password
+change still logs out other sessions. When the hash does not match, the
+request takes Django's normal path, which also handles
+SECRET_KEY_FALLBACKS and flushing the session. Snapshots are dropped when
+the user is saved or deleted and on logout (news/signals.py).
+``QuerySet.update()`` on users bypasses those signals; the entry then
+expires after ``NEWS_USER_CACHE_SECONDS``.
+"""
+
+from django.conf import settings
+from django.contrib import auth
+from django.contrib.auth.middleware import AuthenticationMiddleware
+from django.core.cache import cache
+from django.db import DEFAULT_DB_ALIAS, transaction
+from django.utils.crypto import constant_time_compare
+from django.utils.functional import SimpleLazyObject
+
+from .models import CustomUser
+
+SNAPSHOT_KEY = "news:user:{}"
+SNAPSHOT_FIELDS = ("id", "username", "role", "is_staff", "is_superuser",
+                   "is_active")
+
+
+def _key(user_id):
+    return SNAPSHOT_KEY.format(user_id)
+
+
+def remember(user):
+    """Store the snapshot of a freshly loaded, authenticated ``user``."""
+    snapshot = {name: getattr(user, name) for name in SNAPSHOT_FIELDS}
+    snapshot["session_hash"] = user.get_session_auth_hash()
+    cache.set(_key(user.pk), snapshot,
+              getattr(settings, "NEWS_USER_CACHE_SECONDS", 3600))
+
+
+def recall(user_id):
+    """Return ``(user, session_hash)`` from the cache, or None."""
+    try:
+        snapshot = cache.get(_key(int(user_id)))
+    except (TypeError, ValueError):
+        return None
+    if snapshot is None:
+        return None
+    # from_db() wants the values in the model's field order.
+    names = [field.attname for field in CustomUser._meta.concrete_fields
+             if field.attname in SNAPSHOT_FIELDS]
+    user = CustomUser.from_db(
+        DEFAULT_DB_ALIAS, names, [snapshot[name] for name in names])
+    return user, snapshot["session_hash"]
+
+
+def forget(user_id, using=DEFAULT_DB_ALIAS):
+    """Drop the snapshot now and again once the transaction commits, so a
+    concurrent request cannot re-cache the old row in between."""
+    key = _key(user_id)
+    cache.delete(key)
+    transaction.on_commit(lambda: cache.delete(key), using=using)
+
+
+def get_user(request):
+    """Like ``django.contrib.auth.get_user()``, served from the snapshot
+    when there is a valid one."""
+    try:
+        user_id = auth._get_user_session_key(request)
+        backend_path = request.session[auth.BACKEND_SESSION_KEY]
+    except KeyError:
+        return auth.get_user(request)
+    cached = recall(user_id) \
+        if backend_path in settings.AUTHENTICATION_BACKENDS else None
+    if cached is not None:
+        user, session_hash = cached
+        if constant_time_compare(
+                request.session.get(auth.HASH_SESSION_KEY) or "",
+                session_hash):
+            return user
+
+    user = auth.get_user(request)
+    if user.is_authenticated:
+        remember(user)
+    return user
+
+
+class CachedAuthenticationMiddleware(AuthenticationMiddleware):
+    """AuthenticationMiddleware whose ``request.user`` comes from
+    get_user() above. ``request.auser()`` is unchanged."""
+
+    def process_request(self, request):
+        super().process_request(request)
+        request.user = SimpleLazyObject(lambda: get_user(request))
@@ -1,16 +1,36 @@
 # news/views.py
 
+from django.conf import settings
+from django.core.cache import cache
+from django.core.paginator import Paginator
+from django.http import Http404, HttpResponse, JsonResponse
 from django.shortcuts import get_object_or_404, redirect
 from django.contrib import messages
 from django.contrib.auth.decorators import login_required, user_passes_test
+from django.template.loader import render_to_string
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.utils.http import http_date
+from django.views.decorators.http import require_GET, require_http_methods
 from django.views.generic import (
-    ListView, DetailView, CreateView, UpdateView, DeleteView
+    ListView, DetailView, CreateView, UpdateView, DeleteView, TemplateView
     )
-from django.urls import reverse_lazy
+from django.urls import reverse, reverse_lazy
+from django.utils import timezone
 from django.contrib.auth.mixins import LoginRequiredMixin, UserPassesTestMixin
 
 from .models import Article, CustomUser, Newsletter, Publisher
-from .forms import SubscriptionForm, CustomUserCreationForm
+from . import (
+    archive, duplicates, feeds, moderation, popularity, related,
+    review_queue, rollups, surrogate,
+)
+from .forms import CustomUserCreationForm, DeliveryPreferenceForm
+from .sharding import (
+    evaluate_for_shards,
+    fetch_by_pks,
+    merge_shards,
+    queryset_for_pk,
+    select_related_across,
+)
 from django.db.models import Q
 
 
@@ -32,12 +52,33 @@ def is_editor(user):
 # -----------------------------------------------------------------------------
 # 2) Approve / Deny only pending articles
 # -----------------------------------------------------------------------------
+def moderate(verb, model, pk, editor):
+    """
+    Run moderation ``verb`` on ``model`` row ``pk`` for ``editor``.
+
+    Returns None on success and a 409 response when another editor holds
+    the item's lease; raises Http404 when nothing is pending and
+    PermissionDenied (403) when the item is outside the editor's scope.
+    """
+    # Single conditional UPDATE: only one of several concurrent editors
+    # gets through, and only that one triggers notifications.
+    try:
+        instance = verb(model, pk, editor=editor)
+    except moderation.LeaseHeld:
+        return HttpResponse(
+            f"Another editor is reviewing this "
+            f"{model._meta.verbose_name}.", status=409)
+    if instance is None:
+        raise Http404(f"No pending {model._meta.verbose_name} with that id.")
+    return None
+
+
 @login_required
 @user_passes_test(is_editor)
 def approve_article(request, pk):
-    article = get_object_or_404(Article, pk=pk, status=Article.STATUS_PENDING)
-    article.status = Article.STATUS_APPROVED
-    article.save()
+    refused = moderate(moderation.approve, Article, pk, request.user)
+    if refused:
+        return refused
     messages.success(request, "Article approved.")
     return redirect("news:article-list")
 
@@ -45,9 +86,9 @@ def approve_article(request, pk):
 @login_required
 @user_passes_test(is_editor)
 def deny_article(request, pk):
-    article = get_object_or_404(Article, pk=pk, status=Article.STATUS_PENDING)
-    article.status = Article.STATUS_DENIED
-    article.save()
+    refused = moderate(moderation.deny, Article, pk, request.user)
+    if refused:
+        return refused
     messages.warning(request, "Article denied.")
     return redirect("news:article-list")
 
@@ -55,30 +96,72 @@ def deny_article(request, pk):
 # -----------------------------------------------------------------------------
 # 3) Public homepage: only approved articles & newsletters
 # -----------------------------------------------------------------------------
-class ArticleListView(ListView):
+class SurrogateKeyMixin:
+    """Tag the page with surrogate_keys() for the caching proxy (see
+    news/surrogate.py)."""
+
+    def surrogate_keys(self, context):
+        return ()
+
+    def render_to_response(self, context, **response_kwargs):
+        response = super().render_to_response(context, **response_kwargs)
+        return surrogate.tag(response, *self.surrogate_keys(context))
+
+
+class PublicListKeysMixin(SurrogateKeyMixin):
+    def surrogate_keys(self, context):
+        if not self.is_public():
+            return ()
+        return surrogate.list_keys(context[self.context_object_name])
+
+
+class ArticleListView(PublicListKeysMixin, ListView):
     model = Article
     template_name = "news/article_list.html"
     context_object_name = "articles"
     paginate_by = 10
 
-    def get_queryset(self):
+    def is_public(self):
+        """True when every visitor sees the same list."""
+        return self.request.GET.get("view") != "subscribed"
+
+    def filtered_queryset(self):
         qs = Article.objects.filter(status=Article.STATUS_APPROVED)
         view = self.request.GET.get("view")
         if view == "subscribed" and is_reader(self.request.user):
             user = self.request.user
-            j_ids = user.subscriptions_journalists.values_list("pk", flat=True)
-            p_ids = user.subscriptions_publishers.values_list("pk", flat=True)
+            j_ids = evaluate_for_shards(
+                user.subscriptions_journalists.values_list("pk", flat=True))
+            p_ids = evaluate_for_shards(
+                user.subscriptions_publishers.values_list("pk", flat=True))
             qs = qs.filter(Q(author_id__in=j_ids) | Q(publisher_id__in=p_ids))
-        return qs.order_by("-created_at")
+        return select_related_across(qs, "author")
 
+    def get_queryset(self):
+        return merge_shards(
+            self.filtered_queryset().order_by("-created_at", "-pk"))
 
-class NewsletterListView(ListView):
+    def get_context_data(self, **kwargs):
+        ctx = super().get_context_data(**kwargs)
+        # Precomputed in the cache by news/popularity.py; no query here
+        ctx["most_read_today"] = popularity.top("article", "today")
+        ctx["most_read_week"] = popularity.top("article", "week")
+        ctx["next_cursor"] = next_page_cursor(ctx)
+        return ctx
+
+
+class NewsletterListView(PublicListKeysMixin, ListView):
     model = Newsletter
     template_name = "news/newsletter_list.html"
     context_object_name = "newsletters"
     paginate_by = 10
 
-    def get_queryset(self):
+    def is_public(self):
+        """True when every visitor sees the same list."""
+        return self.request.GET.get("view") != "subscribed" \
+            and not is_editor(self.request.user)
+
+    def filtered_queryset(self):
         user = self.request.user
         view = self.request.GET.get("view")
         if is_editor(user):
@@ -86,29 +169,157 @@ class NewsletterListView(ListView):
         else:
             qs = Newsletter.objects.filter(status=Newsletter.STATUS_APPROVED)
             if view == "subscribed" and is_reader(user):
-                j_ids = user.subscriptions_journalists.values_list("pk", flat=True)
-                p_ids = user.subscriptions_publishers.values_list("pk", flat=True)
+                j_ids = evaluate_for_shards(
+                    user.subscriptions_journalists.values_list("pk", flat=True))
+                p_ids = evaluate_for_shards(
+                    user.subscriptions_publishers.values_list("pk", flat=True))
                 qs = qs.filter(Q(author_id__in=j_ids) | Q(publisher_id__in=p_ids))
-        return qs.order_by("-created_at")
+        return select_related_across(qs, "author")
+
+    def get_queryset(self):
+        return merge_shards(
+            self.filtered_queryset().order_by("-created_at", "-pk"))
+
+    def get_context_data(self, **kwargs):
+        ctx = super().get_context_data(**kwargs)
+        ctx["most_read_today"] = popularity.top("newsletter", "today")
+        ctx["most_read_week"] = popularity.top("newsletter", "week")
+        ctx["next_cursor"] = next_page_cursor(ctx)
+        return ctx
+
+
+def next_page_cursor(ctx):
+    """Keyset cursor after the last item of a list page, if there is more."""
+    page = ctx.get("page_obj")
+    if page is None or not page.has_next():
+        return None
+    return review_queue.encode_cursor(list(page.object_list)[-1])
+
+
+def newest_page(queryset, after=None, page_size=10):
+    """
+    Return ``(items, next_cursor)``: up to ``page_size`` items of
+    ``queryset``, newest first, after the ``(created_at, pk)`` position
+    ``after``. One indexed range scan per shard.
+    """
+    if after is not None:
+        created, pk = after
+        queryset = queryset.filter(
+            Q(created_at__lt=created) | Q(created_at=created, pk__lt=pk))
+    rows = list(merge_shards(queryset.order_by("-created_at", "-pk"))
+                [:page_size + 1])
+    if len(rows) > page_size:
+        return rows[:page_size], review_queue.encode_cursor(
+            rows[page_size - 1])
+    return rows, None
+
+
+class CardFragmentMixin:
+    """
+    Infinite scroll: only the cards after ``?after=<cursor>``, without the
+    page around them. The next fragment's URL is in the ``X-Next-Url``
+    header, which is missing on the last one.
+
+    Fragments of public lists go in the shared cache, and browsers may keep
+    them for ``NEWS_SCROLL_CACHE_SECONDS``. Items after a cursor are older
+    than it, so new posts never change an existing fragment; edits show up
+    once the entry expires. The proxy's copies are tagged with the keys of
+    the items only (news/surrogate.py).
+    """
+    fragment_template = None
+
+    def get(self, request, *args, **kwargs):
+        try:
+            after = review_queue.decode_cursor(request.GET.get("after", ""))
+        except ValueError:
+            raise Http404("Invalid page cursor.")
+        public = self.is_public()
+        timeout = getattr(settings, "NEWS_SCROLL_CACHE_SECONDS", 60)
+        key = f"news:scroll:{self.context_object_name}:{request.GET['after']}"
+        cached = cache.get(key) if public else None
+        if cached is None:
+            items, next_cursor = newest_page(
+                self.filtered_queryset(), after, self.paginate_by)
+            html = render_to_string(
+                self.fragment_template,
+                {self.context_object_name: items}, request)
+            keys = {key for item in items for key in surrogate.keys_for(item)}
+            cached = (html, next_cursor, keys)
+            if public:
+                cache.set(key, cached, timeout)
+
+        html, next_cursor, keys = cached
+        response = HttpResponse(html)
+        if next_cursor:
+            query = request.GET.copy()
+            query["after"] = next_cursor
+            response["X-Next-Url"] = f"{request.path}?{query.urlencode()}"
+        if public:
+            patch_cache_control(response, public=True, max_age=timeout)
+            surrogate.tag(response, *keys)
+        else:
+            patch_cache_control(response, private=True, max_age=timeout)
+        return response
+
+
+class ArticleFragmentView(CardFragmentMixin, ArticleListView):
+    fragment_template = "partials/article_cards.html"
+
+
+class NewsletterFragmentView(CardFragmentMixin, NewsletterListView):
+    fragment_template = "partials/newsletter_cards.html"
 
 
 # -----------------------------------------------------------------------------
 # 4) Newsletter detail
 # -----------------------------------------------------------------------------
-class NewsletterDetailView(DetailView):
+def get_archived_or_404(model, pk, user):
+    """
+    Return archived item ``pk`` (see news/archive.py); editors also see
+    denied ones.
+    """
+    queryset = archive.ARCHIVES[model]._default_manager.all()
+    if not is_editor(user):
+        queryset = queryset.filter(status=model.STATUS_APPROVED)
+    obj = archive.get_archived(model, pk, queryset)
+    if obj is None:
+        raise Http404(f"No {model._meta.verbose_name} found matching the query")
+    return obj
+
+
+class DetailKeysMixin(SurrogateKeyMixin):
+    def surrogate_keys(self, context):
+        return surrogate.keys_for(self.object)
+
+
+class NewsletterDetailView(DetailKeysMixin, DetailView):
     model = Newsletter
     template_name = "news/newsletter_detail.html"
 
     def get_queryset(self):
+        qs = queryset_for_pk(Newsletter.objects.all(), self.kwargs["pk"])
         if is_editor(self.request.user):
-            return Newsletter.objects.all()
-        return Newsletter.objects.filter(status=Newsletter.STATUS_APPROVED)
+            return qs
+        return qs.filter(status=Newsletter.STATUS_APPROVED)
+
+    def get_object(self, queryset=None):
+        try:
+            return super().get_object(queryset)
+        except Http404:
+            # Old and denied newsletters live in the archive
+            return get_archived_or_404(Newsletter, self.kwargs["pk"],
+                                       self.request.user)
 
     def get_context_data(self, **kwargs):
         ctx = super().get_context_data(**kwargs)
         user = self.request.user
         nl = self.object
 
+        # Buffered in memory; see news/popularity.py
+        if isinstance(nl, Newsletter) and \
+                nl.status == Newsletter.STATUS_APPROVED:
+            popularity.view_counter.hit(nl)
+
         # Editors get review buttons & status
         ctx["can_review"] = is_editor(user)
 
@@ -126,20 +337,36 @@ class NewsletterDetailView(DetailView):
 # -----------------------------------------------------------------------------
 # 5) Article detail
 # -----------------------------------------------------------------------------
-class ArticleDetailView(DetailView):
+class ArticleDetailView(DetailKeysMixin, DetailView):
     model = Article
     template_name = "news/article_detail.html"
 
     def get_queryset(self):
+        qs = queryset_for_pk(Article.objects.all(), self.kwargs["pk"])
         if is_editor(self.request.user):
-            return Article.objects.all()
-        return Article.objects.filter(status=Article.STATUS_APPROVED)
+            return qs
+        return qs.filter(status=Article.STATUS_APPROVED)
+
+    def get_object(self, queryset=None):
+        try:
+            return super().get_object(queryset)
+        except Http404:
+            # Old and denied articles live in the archive
+            return get_archived_or_404(Article, self.kwargs["pk"],
+                                       self.request.user)
 
     def get_context_data(self, **kwargs):
         ctx = super().get_context_data(**kwargs)
         user = self.request.user
         article = self.object
 
+        # Buffered in memory; see news/popularity.py
+        if isinstance(article, Article) and \
+                article.status == Article.STATUS_APPROVED:
+            popularity.view_counter.hit(article)
+            # Precomputed after approval by news/related.py
+            ctx["related_articles"] = related.related_articles(article.pk)
+
         # Editors get review buttons & status
         ctx["can_review"] = is_editor(user)
 
@@ -155,17 +382,59 @@ class ArticleDetailView(DetailView):
 
 
 # -----------------------------------------------------------------------------
-# 6) Editor dashboard: pending newsletters
+# 6) Editor dashboards: leased review queues (see news/review_queue.py)
 # -----------------------------------------------------------------------------
-class PendingNewslettersListView(LoginRequiredMixin, ListView):
+REVIEW_PAGE_SIZE = 20
+
+
+class ReviewQueueView(LoginRequiredMixin, UserPassesTestMixin, TemplateView):
+    """
+    An editor's claimed items, oldest first, paginated by keyset (?after=).
+
+    POST ``action=claim`` leases the next batch; ``action=release`` with
+    ``pk`` hands one item back.
+    """
+    model = None
+    context_object_name = None
+
+    def test_func(self):
+        return is_editor(self.request.user)
+
+    def get_context_data(self, **kwargs):
+        ctx = super().get_context_data(**kwargs)
+        after = self.request.GET.get("after")
+        try:
+            after = review_queue.decode_cursor(after) if after else None
+        except ValueError:
+            raise Http404("Invalid page cursor.")
+        items, next_cursor = review_queue.claimed_page(
+            self.model, self.request.user, after, REVIEW_PAGE_SIZE)
+        ctx[self.context_object_name] = items
+        ctx["next_cursor"] = next_cursor
+        ctx["is_first_page"] = after is None
+        ctx["waiting"] = review_queue.waiting_count(
+            self.model, self.request.user)
+        return ctx
+
+    def post(self, request, *args, **kwargs):
+        action = request.POST.get("action")
+        if action == "claim":
+            claimed = review_queue.claim(self.model, request.user)
+            messages.info(request, f"Claimed {claimed} item(s) for review.")
+        elif action == "release":
+            try:
+                pk = int(request.POST.get("pk", ""))
+            except ValueError:
+                raise Http404("No item given.")
+            review_queue.release(self.model, request.user, pk)
+        return redirect(request.path)
+
+
+class PendingNewslettersListView(ReviewQueueView):
     model = Newsletter
     template_name = "news/pending_newsletters.html"
     context_object_name = "pending_newsletters"
 
-    def get_queryset(self):
-        return Newsletter.objects.filter(
-            status=Newsletter.STATUS_PENDING).order_by("-created_at")
-
 
 # -----------------------------------------------------------------------------
 # 7) Subscribe / Unsubscribe Views
@@ -203,50 +472,129 @@ def unsubscribe_publisher(request, pk):
 
 
 # -----------------------------------------------------------------------------
-# 8) Manage subscriptions via a form
+# 8) Manage subscriptions: search, paginated lists and incremental add/remove
 # -----------------------------------------------------------------------------
-class SubscriptionUpdateView(LoginRequiredMixin, UpdateView):
-    model = CustomUser
-    form_class = SubscriptionForm
-    template_name = "news/subscriptions.html"
-    success_url = reverse_lazy("news:subscriptions")
+SUBSCRIPTION_PAGE_SIZE = 20
+SUBSCRIPTION_SEARCH_LIMIT = 20
+
+
+def _subscription_target(kind):
+    """
+    Return ``(queryset, label_field, relation)`` for a subscription kind,
+    where ``relation`` is the CustomUser m2m that holds the subscriptions.
+    """
+    if kind == "journalist":
+        return (
+            CustomUser.objects.filter(role=CustomUser.ROLE_JOURNALIST),
+            "username",
+            "subscriptions_journalists",
+        )
+    if kind == "publisher":
+        return Publisher.objects.all(), "name", "subscriptions_publishers"
+    raise Http404("Unknown subscription type.")
 
-    def get_object(self):
-        return self.request.user
 
-    def get_form(self, *args, **kwargs):
-        form = super().get_form(*args, **kwargs)
-        user = self.request.user
-        form.fields["subscriptions_journalists"].initial = user. \
-            subscriptions_journalists.all()
-        form.fields["subscriptions_publishers"].initial = user. \
-            subscriptions_publishers.all()
-        return form
-
-    def form_valid(self, form):
-        self.object = form.save(commit=False)
-        self.object.save()
-        self.object.subscriptions_journalists.set(
-            form.cleaned_data["subscriptions_journalists"])
-        self.object.subscriptions_publishers.set(
-            form.cleaned_data["subscriptions_publishers"])
-        return super().form_valid(form)
+class SubscriptionManagerView(LoginRequiredMixin, TemplateView):
+    """
+    Subscription page whose cost depends on what is shown: one page of each
+    subscription list and one page of subscribed articles. Finding new
+    journalists or publishers goes through subscription_search().
+    """
+    template_name = "news/subscriptions.html"
 
     def get_context_data(self, **kwargs):
         ctx = super().get_context_data(**kwargs)
         user = self.request.user
-        j_ids = user.subscriptions_journalists.values_list("pk", flat=True)
-        p_ids = user.subscriptions_publishers.values_list("pk", flat=True)
-        ctx["articles"] = (
+        params = self.request.GET
+
+        ctx["journalists_page"] = Paginator(
+            user.subscriptions_journalists.order_by("username")
+            .only("pk", "username"),
+            SUBSCRIPTION_PAGE_SIZE,
+        ).get_page(params.get("jpage"))
+        ctx["publishers_page"] = Paginator(
+            user.subscriptions_publishers.order_by("name").only("pk", "name"),
+            SUBSCRIPTION_PAGE_SIZE,
+        ).get_page(params.get("ppage"))
+
+        j_ids = evaluate_for_shards(
+            user.subscriptions_journalists.values_list("pk", flat=True))
+        p_ids = evaluate_for_shards(
+            user.subscriptions_publishers.values_list("pk", flat=True))
+        ctx["articles_page"] = Paginator(merge_shards(select_related_across(
             Article.objects
-            .filter(Q(author_id__in=j_ids) | Q(publisher_id__in=p_ids), 
-                    status=Article.STATUS_APPROVED)
-            .select_related("author", "publisher")
-            .order_by("-created_at")
-        )
+            .filter(Q(author_id__in=j_ids) | Q(publisher_id__in=p_ids),
+                    status=Article.STATUS_APPROVED),
+            "author", "publisher",
+        ).order_by("-created_at")), 10).get_page(params.get("page"))
+        ctx["articles"] = ctx["articles_page"].object_list
+        ctx["delivery_form"] = DeliveryPreferenceForm(instance=user)
         return ctx
 
 
+@login_required
+@require_GET
+def subscription_search(request, kind):
+    """
+    Prefix search over journalists or publishers for the autocomplete box:
+    ``GET /subscriptions/search/<kind>/?q=<prefix>``. Returns at most
+    SUBSCRIPTION_SEARCH_LIMIT matches with the caller's subscription flag.
+    """
+    queryset, field, relation = _subscription_target(kind)
+    prefix = request.GET.get("q", "").strip()
+    if not prefix:
+        return JsonResponse({"results": []})
+
+    matches = list(
+        queryset.filter(**{f"{field}__istartswith": prefix})
+        .order_by(field)
+        .values_list("pk", field)[:SUBSCRIPTION_SEARCH_LIMIT]
+    )
+    subscribed = set(
+        getattr(request.user, relation)
+        .filter(pk__in=[pk for pk, _ in matches])
+        .values_list("pk", flat=True)
+    )
+    return JsonResponse({"results": [
+        {"id": pk, "name": name, "subscribed": pk in subscribed}
+        for pk, name in matches
+    ]})
+
+
+@login_required
+@require_http_methods(["POST", "DELETE"])
+def subscription_toggle(request, kind, pk):
+    """
+    Incremental subscription change: ``POST`` subscribes and ``DELETE``
+    unsubscribes, touching one row of the through table.
+    """
+    queryset, field, relation = _subscription_target(kind)
+    target = get_object_or_404(queryset, pk=pk)
+    manager = getattr(request.user, relation)
+    if request.method == "POST":
+        manager.add(target)
+    else:
+        manager.remove(target)
+    return JsonResponse({
+        "id": target.pk,
+        "name": getattr(target, field),
+        "subscribed": request.method == "POST",
+    })
+
+
+@login_required
+@require_http_methods(["POST"])
+def update_delivery_preference(request):
+    """Save how the reader wants to hear about approvals (news/digests.py)."""
+    form = DeliveryPreferenceForm(request.POST, instance=request.user)
+    if form.is_valid():
+        form.save()
+        messages.success(request, "Delivery preference saved.")
+    else:
+        messages.error(request, "Please choose a valid delivery option.")
+    return redirect("news:subscriptions")
+
+
 # -----------------------------------------------------------------------------
 # 9) Sign up
 # -----------------------------------------------------------------------------
@@ -259,14 +607,34 @@ class SignupView(CreateView):
 # -----------------------------------------------------------------------------
 # 10) Editor dashboard: pending articles
 # -----------------------------------------------------------------------------
-class PendingArticlesListView(LoginRequiredMixin, ListView):
+class PendingArticlesListView(ReviewQueueView):
+    """
+    The review queue for articles, with suspected duplicates
+    (news/duplicates.py) grouped: each row lists the other articles of its
+    group, and rows of one group on the page follow each other.
+    """
     model = Article
     template_name = "news/pending_articles.html"
     context_object_name = "pending_articles"
 
-    def get_queryset(self):
-        return Article.objects.filter(
-            status=Article.STATUS_PENDING).order_by("-created_at")
+    def get_context_data(self, **kwargs):
+        ctx = super().get_context_data(**kwargs)
+        items = ctx[self.context_object_name]
+        groups = duplicates.groups([item.pk for item in items])
+        others = fetch_by_pks(
+            select_related_across(Article.objects.all(), "author"),
+            {pk for ids in groups.values() for pk in ids},
+        )
+        order = {}
+        for item in items:
+            ids = groups.get(item.pk, [])
+            item.suspected_duplicates = [others[pk] for pk in ids
+                                         if pk in others]
+            item.duplicate_group = min([item.pk, *ids]) if ids else None
+            order.setdefault(item.duplicate_group or item.pk, len(order))
+        ctx[self.context_object_name] = sorted(
+            items, key=lambda item: order[item.duplicate_group or item.pk])
+        return ctx
 
 
 # -----------------------------------------------------------------------------
@@ -281,7 +649,15 @@ class ArticleCreateView(LoginRequiredMixin, CreateView):
 
     def form_valid(self, form):
         form.instance.author = self.request.user
-        return super().form_valid(form)
+        response = super().form_valid(form)
+        similar = duplicates.duplicates_of(self.object.pk)
+        if similar:
+            messages.warning(
+                self.request,
+                f"This looks like a near-duplicate of {len(similar)} "
+                f"existing article(s), such as “{similar[0].title}”. "
+                f"Editors will review them together.")
+        return response
 
 
 class NewsletterCreateView(LoginRequiredMixin, CreateView):
@@ -306,9 +682,9 @@ class NewsletterCreateView(LoginRequiredMixin, CreateView):
 @login_required
 @user_passes_test(is_editor)
 def approve_newsletter(request, pk):
-    nl = get_object_or_404(Newsletter, pk=pk, status=Newsletter.STATUS_PENDING)
-    nl.status = Newsletter.STATUS_APPROVED
-    nl.save()
+    refused = moderate(moderation.approve, Newsletter, pk, request.user)
+    if refused:
+        return refused
     messages.success(request, "Newsletter approved.")
     return redirect("news:newsletter-list")
 
@@ -316,18 +692,139 @@ def approve_newsletter(request, pk):
 @login_required
 @user_passes_test(is_editor)
 def deny_newsletter(request, pk):
-    nl = get_object_or_404(Newsletter, pk=pk, status=Newsletter.STATUS_PENDING)
-    nl.status = Newsletter.STATUS_DENIED
-    nl.save()
+    refused = moderate(moderation.deny, Newsletter, pk, request.user)
+    if refused:
+        return refused
     messages.warning(request, "Newsletter denied.")
     return redirect("news:newsletter-list")
 
 
+# -----------------------------------------------------------------------------
+# 13) RSS / Atom feeds per publisher and journalist (see news/feeds.py)
+# -----------------------------------------------------------------------------
+@require_GET
+def source_feed(request, source, pk, fmt):
+    """Serve a cached feed, or a 304 when the client's copy is current."""
+    if fmt not in feeds.FORMATS:
+        raise Http404("Unknown feed format.")
+    entry = feeds.get_feed(request, source, pk, fmt)
+    if entry is None:
+        raise Http404("No such feed.")
+    etag = f'"{entry["etag"]}"'
+    last_modified = int(entry["last_modified"])
+    response = get_conditional_response(
+        request, etag=etag, last_modified=last_modified)
+    if response is None:
+        response = HttpResponse(entry["body"],
+                                content_type=entry["content_type"])
+    response["ETag"] = etag
+    response["Last-Modified"] = http_date(last_modified)
+    source_key = surrogate.publisher_key(pk) \
+        if source == feeds.SOURCE_PUBLISHER else surrogate.author_key(pk)
+    return surrogate.tag(response, source_key)
+
+
+# -----------------------------------------------------------------------------
+# 14) Date archive: one calendar month at a time (see news/rollups.py)
+# -----------------------------------------------------------------------------
+class KnownCountPaginator(Paginator):
+    """Paginator told its count up front (here: from the month rollups)."""
+
+    def __init__(self, object_list, per_page, count, **kwargs):
+        super().__init__(object_list, per_page, **kwargs)
+        self._known_count = count
+
+    @property
+    def count(self):
+        return self._known_count
+
+
+def _publisher_param(request):
+    publisher = request.GET.get("publisher")
+    if not publisher:
+        return None
+    try:
+        return int(publisher)
+    except ValueError:
+        raise Http404("Invalid publisher.")
+
+
+class MonthArchiveView(SurrogateKeyMixin, TemplateView):
+    """
+    Approved items created in one month, newest first, hot and archived.
+    Month navigation and page counts come from the rollups; the page itself
+    is a ``created_at`` range scan.
+    """
+    model = Article
+    template_name = "news/month_archive.html"
+    context_object_name = "articles"
+    cards_template = "partials/article_cards.html"
+    url_name = "news:article-month"
+    paginate_by = 10
+
+    def surrogate_keys(self, context):
+        return surrogate.list_keys(context[self.context_object_name])
+
+    def get_context_data(self, **kwargs):
+        ctx = super().get_context_data(**kwargs)
+        year, month = self.kwargs["year"], self.kwargs["month"]
+        try:
+            start, end = rollups.month_range(year, month)
+        except ValueError:
+            raise Http404("No such month.")
+        publisher = _publisher_param(self.request)
+
+        paginator = KnownCountPaginator(
+            rollups.month_items(self.model, start, end, publisher),
+            self.paginate_by,
+            rollups.count(self.model, year, month, publisher),
+        )
+        page = paginator.get_page(self.request.GET.get("page"))
+        months = rollups.months(self.model, publisher)
+        current = start.date()
+        ctx.update({
+            self.context_object_name: page.object_list,
+            "page_obj": page,
+            "is_paginated": page.has_other_pages(),
+            "month": current,
+            "months": months,
+            "newer_month": next(
+                (m for m, _ in reversed(months) if m > current), None),
+            "older_month": next((m for m, _ in months if m < current), None),
+            "publisher": publisher,
+            "cards_template": self.cards_template,
+            "url_name": self.url_name,
+        })
+        return ctx
+
+
+class NewsletterMonthArchiveView(MonthArchiveView):
+    model = Newsletter
+    context_object_name = "newsletters"
+    cards_template = "partials/newsletter_cards.html"
+    url_name = "news:newsletter-month"
+
+
+def month_archive_index(request, model=Article):
+    """Redirect to the newest month that has items (or the current one)."""
+    months = rollups.months(model, _publisher_param(request))
+    month = months[0][0] if months else timezone.localdate()
+    url_name = "news:article-month" if model is Article \
+        else "news:newsletter-month"
+    url = reverse(url_name, args=[month.year, month.month])
+    if request.GET.get("publisher"):
+        url += f"?publisher={request.GET['publisher']}"
+    return redirect(url)
+
+
 class ArticleUpdateView(LoginRequiredMixin, UserPassesTestMixin, UpdateView):
     model = Article
     fields = ['title', 'body', 'publisher']
     template_name = 'news/article_form.html'
 
+    def get_queryset(self):
+        return queryset_for_pk(Article.objects.all(), self.kwargs["pk"])
+
     def test_func(self):
         return self.get_object().author == self.request.user
 
@@ -337,5 +834,8 @@ class ArticleDeleteView(LoginRequiredMixin, UserPassesTestMixin, DeleteView):
     template_name = 'news/article_confirm_delete.html'
     success_url = reverse_lazy('news:article-list')
 
+    def get_queryset(self):
+        return queryset_for_pk(Article.objects.all(), self.kwargs["pk"])
+
     def test_func(self):
         return self.get_object().author == self.request.user
\ No newline at end of file
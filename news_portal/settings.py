@@ -38,11 +38,13 @@ INSTALLED_APPS = [
 
 MIDDLEWARE = [
     'django.middleware.security.SecurityMiddleware',
+    'news.middleware.CompressionMiddleware',
+    'news.surrogate.SurrogateKeyMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'whitenoise.middleware.WhiteNoiseMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
-    'django.contrib.auth.middleware.AuthenticationMiddleware',
+    'news.usercache.CachedAuthenticationMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]
@@ -81,6 +83,167 @@ DATABASES = {
     }
 }
 
+# Incremental sync (news/changelog.py) only hands out change-log rows older
+# than this many seconds, so rows from slow transactions are never skipped.
+# Keep it above the longest write transaction.
+NEWS_SYNC_SETTLE_SECONDS = int(os.getenv('NEWS_SYNC_SETTLE_SECONDS', '5'))
+
+# Article/Newsletter sharding by publisher (news/sharding.py). NEWS_SHARDS is
+# a comma-separated list of database aliases; leave it empty to keep every
+# row on 'default'. Aliases other than 'default' take their connection from
+# DB_<ALIAS>_NAME / _HOST / _PORT / _USER / _PASSWORD, falling back to the
+# default database's values.
+NEWS_SHARDS = [a for a in os.getenv('NEWS_SHARDS', '').split(',') if a]
+for _alias in NEWS_SHARDS:
+    if _alias != 'default':
+        _prefix = f'DB_{_alias.upper()}_'
+        DATABASES[_alias] = {
+            **DATABASES['default'],
+            **{
+                key: os.getenv(_prefix + key)
+                for key in ('NAME', 'HOST', 'PORT', 'USER', 'PASSWORD')
+                if os.getenv(_prefix + key)
+            },
+        }
+NEWS_SHARD_ID_BLOCK_SIZE = int(os.getenv('NEWS_SHARD_ID_BLOCK_SIZE', '100'))
+DATABASE_ROUTERS = ['news.sharding.ShardRouter']
+
+# Shared cache (point CACHE_BACKEND/CACHE_LOCATION at Redis or Memcached
+# in production so every worker sees the same entries)
+CACHES = {
+    'default': {
+        'BACKEND': os.getenv(
+            'CACHE_BACKEND',
+            'django.core.cache.backends.locmem.LocMemCache'
+        ),
+        'LOCATION': os.getenv('CACHE_LOCATION', 'news-portal'),
+    }
+}
+
+# Query result cache (news/querycache.py)
+QUERY_CACHE_L1_MAX_ENTRIES = int(os.getenv('QUERY_CACHE_L1_MAX_ENTRIES', '256'))
+QUERY_CACHE_TIMEOUT = int(os.getenv('QUERY_CACHE_TIMEOUT', '300'))
+
+# Sessions are read through the shared cache and written through to the
+# database; the logged-in user's snapshot (news/usercache.py) is cached for
+# NEWS_USER_CACHE_SECONDS at most and dropped on save, delete and logout.
+SESSION_ENGINE = 'django.contrib.sessions.backends.cached_db'
+NEWS_USER_CACHE_SECONDS = int(os.getenv('NEWS_USER_CACHE_SECONDS', '3600'))
+
+# Article/Newsletter body compression (news/fields.py). Bodies of at least
+# NEWS_COMPRESSION_THRESHOLD bytes are stored compressed; 'zstd' needs the
+# optional zstandard package and falls back to zlib without it.
+NEWS_COMPRESSION_THRESHOLD = int(os.getenv('NEWS_COMPRESSION_THRESHOLD', '1024'))
+NEWS_COMPRESSION_CODEC = os.getenv('NEWS_COMPRESSION_CODEC', 'zlib')
+
+# Editor review queue (news/review_queue.py): how many pending items one
+# claim hands out and how long an editor holds them before they go back.
+NEWS_REVIEW_BATCH_SIZE = int(os.getenv('NEWS_REVIEW_BATCH_SIZE', '10'))
+NEWS_REVIEW_LEASE_SECONDS = int(os.getenv('NEWS_REVIEW_LEASE_SECONDS', '600'))
+
+# Notification de-duplication ledger (news/notifications.py): rows older than
+# this many days are removed by `manage.py prune_notifications`.
+NEWS_NOTIFICATION_LEDGER_DAYS = int(os.getenv('NEWS_NOTIFICATION_LEDGER_DAYS', '30'))
+
+# Absolute base URL for links in emails sent outside a request, such as the
+# digests from `manage.py send_digests`.
+NEWS_SITE_URL = os.getenv('NEWS_SITE_URL', 'http://localhost:8000')
+
+# Read counters and "most read" rankings (news/popularity.py). Each worker
+# buffers hits and flushes them every NEWS_VIEWCOUNT_FLUSH_SECONDS (or once
+# NEWS_VIEWCOUNT_MAX_PENDING items are buffered); rankings of
+# NEWS_POPULAR_SIZE items are rebuilt every NEWS_POPULAR_REFRESH_SECONDS.
+NEWS_VIEWCOUNT_FLUSH_SECONDS = int(os.getenv('NEWS_VIEWCOUNT_FLUSH_SECONDS', '30'))
+NEWS_VIEWCOUNT_MAX_PENDING = int(os.getenv('NEWS_VIEWCOUNT_MAX_PENDING', '1000'))
+NEWS_POPULAR_REFRESH_SECONDS = int(os.getenv('NEWS_POPULAR_REFRESH_SECONDS', '300'))
+NEWS_POPULAR_SIZE = int(os.getenv('NEWS_POPULAR_SIZE', '10'))
+
+# Related articles (news/related.py): hashed feature vectors of
+# NEWS_RELATED_DIMENSIONS buckets, NEWS_RELATED_SIZE neighbours per article
+# scoring at least NEWS_RELATED_MIN_SCORE, compared NEWS_RELATED_CHUNK_SIZE
+# rows at a time. Approvals queue articles; `manage.py index_related` (cron)
+# indexes NEWS_RELATED_BATCH_SIZE of them per pass over the corpus. Run
+# `manage.py rebuild_related` after changing dimensions.
+NEWS_RELATED_DIMENSIONS = int(os.getenv('NEWS_RELATED_DIMENSIONS', '2048'))
+NEWS_RELATED_SIZE = int(os.getenv('NEWS_RELATED_SIZE', '5'))
+NEWS_RELATED_MIN_SCORE = float(os.getenv('NEWS_RELATED_MIN_SCORE', '0.05'))
+NEWS_RELATED_CHUNK_SIZE = int(os.getenv('NEWS_RELATED_CHUNK_SIZE', '1024'))
+NEWS_RELATED_BATCH_SIZE = int(os.getenv('NEWS_RELATED_BATCH_SIZE', '256'))
+
+# Near-duplicate detection (news/duplicates.py): MinHash signatures of
+# NEWS_DUPLICATE_BANDS x NEWS_DUPLICATE_ROWS values over word
+# NEWS_DUPLICATE_SHINGLE-grams; articles estimated at least
+# NEWS_DUPLICATE_THRESHOLD similar (Jaccard) are grouped. Run
+# `manage.py rebuild_duplicates` after changing any of these.
+NEWS_DUPLICATE_BANDS = int(os.getenv('NEWS_DUPLICATE_BANDS', '16'))
+NEWS_DUPLICATE_ROWS = int(os.getenv('NEWS_DUPLICATE_ROWS', '8'))
+NEWS_DUPLICATE_SHINGLE = int(os.getenv('NEWS_DUPLICATE_SHINGLE', '3'))
+NEWS_DUPLICATE_THRESHOLD = float(
+    os.getenv('NEWS_DUPLICATE_THRESHOLD', '0.8'))
+
+# RSS/Atom feeds (news/feeds.py): NEWS_FEED_SIZE newest articles per feed,
+# cached until the next approval or for NEWS_FEED_CACHE_SECONDS at most.
+NEWS_FEED_SIZE = int(os.getenv('NEWS_FEED_SIZE', '20'))
+NEWS_FEED_CACHE_SECONDS = int(os.getenv('NEWS_FEED_CACHE_SECONDS', '3600'))
+
+# Infinite-scroll card fragments (news/views.py) of public lists are cached
+# per cursor, in the shared cache and by browsers, for this long.
+NEWS_SCROLL_CACHE_SECONDS = int(os.getenv('NEWS_SCROLL_CACHE_SECONDS', '60'))
+
+# Hot/cold archive (news/archive.py): approved items move to the archive
+# tables after NEWS_ARCHIVE_AFTER_DAYS, denied ones after
+# NEWS_ARCHIVE_DENIED_AFTER_DAYS, NEWS_ARCHIVE_BATCH_SIZE rows per transaction.
+NEWS_ARCHIVE_AFTER_DAYS = int(os.getenv('NEWS_ARCHIVE_AFTER_DAYS', '365'))
+NEWS_ARCHIVE_DENIED_AFTER_DAYS = int(os.getenv('NEWS_ARCHIVE_DENIED_AFTER_DAYS', '30'))
+NEWS_ARCHIVE_BATCH_SIZE = int(os.getenv('NEWS_ARCHIVE_BATCH_SIZE', '500'))
+
+# Streaming exports (news/exports.py): rows are read NEWS_EXPORT_CHUNK_SIZE
+# at a time and sent in chunks of about NEWS_EXPORT_BUFFER_BYTES.
+NEWS_EXPORT_CHUNK_SIZE = int(os.getenv('NEWS_EXPORT_CHUNK_SIZE', '2000'))
+NEWS_EXPORT_BUFFER_BYTES = int(os.getenv('NEWS_EXPORT_BUFFER_BYTES', '65536'))
+
+# Bulk ingest (news/ingest.py): rows per bulk_create batch and checkpoint.
+NEWS_INGEST_BATCH_SIZE = int(os.getenv('NEWS_INGEST_BATCH_SIZE', '1000'))
+
+# Bulk follower import/export (news/audiences.py): CSV rows resolved and
+# inserted, or exported, this many at a time.
+NEWS_FOLLOWER_BATCH_SIZE = int(os.getenv('NEWS_FOLLOWER_BATCH_SIZE', '5000'))
+
+# Admin changelists for articles/newsletters (news/admin.py) count at most
+# this many matching rows; bigger unfiltered tables use the DB's estimate.
+NEWS_ADMIN_COUNT_LIMIT = int(os.getenv('NEWS_ADMIN_COUNT_LIMIT', '1000'))
+
+# Response compression (news/middleware.py): brotli (with the optional
+# brotli package) or gzip for the listed content types, for buffered bodies
+# of at least NEWS_COMPRESS_MIN_BYTES and for all streamed ones.
+NEWS_COMPRESS_MIN_BYTES = int(os.getenv('NEWS_COMPRESS_MIN_BYTES', '512'))
+NEWS_COMPRESS_TYPES = tuple(os.getenv(
+    'NEWS_COMPRESS_TYPES',
+    'text/html,text/plain,text/csv,application/json,application/x-ndjson,'
+    'application/rss+xml,application/atom+xml',
+).split(','))
+NEWS_COMPRESS_GZIP_LEVEL = int(os.getenv('NEWS_COMPRESS_GZIP_LEVEL', '6'))
+NEWS_COMPRESS_BROTLI_LEVEL = int(os.getenv('NEWS_COMPRESS_BROTLI_LEVEL', '4'))
+
+# Batched API calls (news/api/batch.py): at most NEWS_BATCH_MAX_REQUESTS
+# sub-requests and NEWS_BATCH_MAX_COST cost units per batch; consecutive
+# reads run on a shared pool of NEWS_BATCH_WORKERS threads (1 = in order).
+NEWS_BATCH_MAX_REQUESTS = int(os.getenv('NEWS_BATCH_MAX_REQUESTS', '20'))
+NEWS_BATCH_MAX_COST = int(os.getenv('NEWS_BATCH_MAX_COST', '40'))
+NEWS_BATCH_WORKERS = int(os.getenv('NEWS_BATCH_WORKERS', '4'))
+
+# Caching reverse proxy (news/surrogate.py). Cacheable pages list their
+# surrogate keys in NEWS_SURROGATE_HEADER and may be kept by the proxy for
+# NEWS_SURROGATE_MAX_AGE seconds. Changed content is purged by key with
+# NEWS_PURGE_METHOD requests to NEWS_PURGE_URL, at most NEWS_PURGE_BATCH_SIZE
+# keys per request; an empty NEWS_PURGE_URL disables purging.
+NEWS_SURROGATE_HEADER = os.getenv('NEWS_SURROGATE_HEADER', 'Surrogate-Key')
+NEWS_SURROGATE_MAX_AGE = int(os.getenv('NEWS_SURROGATE_MAX_AGE', '300'))
+NEWS_PURGE_URL = os.getenv('NEWS_PURGE_URL', '')
+NEWS_PURGE_METHOD = os.getenv('NEWS_PURGE_METHOD', 'PURGE')
+NEWS_PURGE_BATCH_SIZE = int(os.getenv('NEWS_PURGE_BATCH_SIZE', '256'))
+NEWS_PURGE_TIMEOUT = float(os.getenv('NEWS_PURGE_TIMEOUT', '2'))
+
 # Password validation
 AUTH_PASSWORD_VALIDATORS = [
     {
@@ -0,0 +1,53 @@
+// static/js/infinite_scroll.js
+//
+// Infinite scroll for the article and newsletter lists. The sentinel
+// rendered by partials/infinite_scroll.html names the next card fragment;
+// each response is inserted before it and its X-Next-Url header says where
+// to continue. The last fragment has no header, so the sentinel goes away.
+(function () {
+  var sentinel = document.querySelector("[data-scroll-next]");
+  if (!sentinel || !("IntersectionObserver" in window)) {
+    return;
+  }
+  var pager = document.querySelector(sentinel.dataset.scrollPager);
+  if (pager) {
+    pager.classList.add("d-none");
+  }
+
+  var loading = false;
+  var observer = new IntersectionObserver(function (entries) {
+    if (!entries[0].isIntersecting || loading) {
+      return;
+    }
+    loading = true;
+    fetch(sentinel.dataset.scrollNext, {
+      headers: { "X-Requested-With": "XMLHttpRequest" },
+      credentials: "same-origin",
+    })
+      .then(function (response) {
+        if (!response.ok) {
+          throw new Error(response.status);
+        }
+        return response.text().then(function (html) {
+          sentinel.insertAdjacentHTML("beforebegin", html);
+          var next = response.headers.get("X-Next-Url");
+          if (next) {
+            sentinel.dataset.scrollNext = next;
+          } else {
+            observer.disconnect();
+            sentinel.remove();
+          }
+          loading = false;
+        });
+      })
+      .catch(function () {
+        // Fall back to the pager rather than retrying in a loop.
+        observer.disconnect();
+        sentinel.remove();
+        if (pager) {
+          pager.classList.remove("d-none");
+        }
+      });
+  }, { rootMargin: "600px" });
+  observer.observe(sentinel);
+})();